@@ -1,5 +1,7 @@
 # Import required python module
 import arcpy
+from common_utils import near_pairs
+from spatial_index import group_pairs
 
 def determine(input_lines, input_polygon, out_table, line_field, poly_field):
     poly_lyr = arcpy.management.MakeFeatureLayer(input_polygon, "poly_lyr")
@@ -32,23 +34,10 @@ def determine(input_lines, input_polygon, out_table, line_field, poly_field):
     # If at least on line touches one polygon loop through all the line features
     count_line_lyr = int(arcpy.management.GetCount(line_lyr)[0])
     if count_line_lyr >= 1:
-        near_tab = arcpy.analysis.GenerateNearTable(line_lyr, poly_lyr, "in_memory\\line_near_poly", "0 Meters", closest="ALL")
-        line_to_poly = {}
-        line_ids = []
-        poly_ids = []
-        with arcpy.da.SearchCursor(near_tab, ['IN_FID', 'NEAR_FID']) as n_cur:
-            for n_row in n_cur:
-                if n_row[0] in line_ids:
-                    cur_ids = line_to_poly[n_row[0]]
-                    cur_ids.append(n_row[1])
-                    line_to_poly[n_row[0]] = cur_ids
-                    poly_ids.append(n_row[1])
-                else:
-                    line_ids.append(n_row[0])
-                    line_to_poly[n_row[0]] = [n_row[1]]
-                    poly_ids.append(n_row[1])
-
-        poly_ids = set(poly_ids)
+        line_fids, poly_fids, _ = near_pairs(line_lyr, poly_lyr, "0 Meters", "in_memory", "line_near_poly")
+        line_to_poly = group_pairs(line_fids, poly_fids)
+        line_ids = line_to_poly
+        poly_ids = set(poly_fids.tolist())
         poly_geos = {}
 
         with arcpy.da.SearchCursor(poly_lyr, ['OID@', 'SHAPE@']) as s_cur:
@@ -67,7 +56,7 @@ def determine(input_lines, input_polygon, out_table, line_field, poly_field):
                     poly_touches = line_to_poly[line_id]
                     start_pt = geo.firstPoint
                     end_pt = geo.lastPoint
-                    for touch_id in poly_touches:
+                    for touch_id in poly_touches.tolist():
                         poly_geo = poly_geos[touch_id]
                         if not poly_geo.disjoint(start_pt):
                             # Add a record to the table
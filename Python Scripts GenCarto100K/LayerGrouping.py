@@ -2,19 +2,22 @@ import arcpy
 import pandas as pd
 import sys
 import traceback
+import config_cache
+from common_utils import get_project, save_project
 
 def layer_grouping(map_name, excel_file, sheet_name, logger):
 
     try:
         aoi = None
+        utilities_a = None
         # Setup
-        aprx = arcpy.mp.ArcGISProject("CURRENT")
+        aprx = get_project()
         map_obj = aprx.listMaps(map_name)[0]
         arcpy.AddMessage(f"Working on map: {map_obj.name}")
 
         # Read Excel
-        df = pd.read_excel(excel_file, sheet_name)
-        df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+        df = config_cache.load_config(excel_file).frame(sheet_name)
+        df = df.apply(lambda column: column.map(lambda x: x.strip() if isinstance(x, str) else x))
 
 
         # Build hierarchies
@@ -176,6 +179,7 @@ def layer_grouping(map_name, excel_file, sheet_name, logger):
         # Move Utilities_A before AOI if both exist
         if aoi and utilities_a:
             map_obj.moveLayer(utilities_a, aoi, "BEFORE")
+        save_project()
 
     except Exception as e:
         exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -195,11 +199,11 @@ def reorder_group_layers(map_name, excel_file, sheet_name, logger):
     """
 
     try:
-        aprx = arcpy.mp.ArcGISProject("CURRENT")
+        aprx = get_project()
         m = aprx.listMaps(map_name)[0]
 
         # Read Excel
-        df = pd.read_excel(excel_file, sheet_name=sheet_name)
+        df = config_cache.load_config(excel_file).frame(sheet_name)
         if "Layer_Orders" not in df.columns:
             return
         desired_order = df["Layer_Orders"].dropna().astype(str).tolist()
@@ -265,7 +269,7 @@ def wipe_map(m):
             arcpy.AddMessage(error_message)
 
 def clear_map_contents(map_name):
-    aprx = arcpy.mp.ArcGISProject("CURRENT")
+    aprx = get_project()
     # Run for a specific map or all maps
     if map_name:
         maps = [aprx.listMaps(map_name)[0]]
@@ -273,3 +277,4 @@ def clear_map_contents(map_name):
         maps = aprx.listMaps()
     for m in maps:
         wipe_map(m)
+    save_project()
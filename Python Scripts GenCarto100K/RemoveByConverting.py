@@ -1,5 +1,6 @@
 # Import required python modules
 import arcpy
+from common_utils import describe, select_by_oids
 
 def ConvertEnclosed(primary_fc_lyr, secondary_fc_lyrs):
     """
@@ -9,22 +10,16 @@ def ConvertEnclosed(primary_fc_lyr, secondary_fc_lyrs):
     # Remove representation
     # common.update_geo_with_override(primary_fc_lyr)
 
-    secondary_fc_names = []
-    for layer in secondary_fc_lyrs:
-        desc = arcpy.da.Describe(layer)
-        secondary_fc_names.append(layer)
-
     delete_ids = []
     for i in range(len(secondary_fc_lyrs)):    # keep all secondary lists indices same
         surrounding_fc_lyr = secondary_fc_lyrs[i]
+        surround_name = describe(surrounding_fc_lyr)['name']
         # Remove representation
         # common.update_geo_with_override(surrounding_fc_lyr)
 
         # Get new selection to refresh selection set
         with arcpy.da.SearchCursor(primary_fc_lyr, ("OID@", "SHAPE@")) as cursor:
             for row in cursor:
-                desc = arcpy.da.Describe(surrounding_fc_lyr)
-                surround_name = desc['name']
                 primary_OID = row[0]
                 primary_geo = row[1]
 
@@ -32,7 +27,7 @@ def ConvertEnclosed(primary_fc_lyr, secondary_fc_lyrs):
                 spatial_selected_feature = arcpy.management.SelectLayerByLocation(surrounding_fc_lyr, "COMPLETELY_CONTAINS", primary_geo)
                 if int(arcpy.management.GetCount(spatial_selected_feature).getOutput(0)) > 0:
                     # Get ID of surrounding feature
-                    surrounding_FID_set = [int(oid) for oid in arcpy.da.Describe(surrounding_fc_lyr)['FIDSet']]
+                    surrounding_FID_set = [int(oid) for oid in describe(surrounding_fc_lyr)['FIDSet']]
 
                     # Create temp fc to store and process geometry
                     temp_contained_fc =  surround_name + "_removed_contained_poly_temp"
@@ -67,9 +62,7 @@ def ConvertEnclosed(primary_fc_lyr, secondary_fc_lyrs):
 
     if len(delete_ids) >= 1:
         # delete the original features
-        where = "OBJECTID = "
-        where += " OR OBJECTID = ".join(delete_ids)
-        arcpy.management.SelectLayerByAttribute(primary_fc_lyr, "NEW_SELECTION", where)
+        select_by_oids(primary_fc_lyr, delete_ids)
         arcpy.management.DeleteFeatures(primary_fc_lyr)
 
 def ConvertOverlapping(primary_fc_lyr, secondary_fc_lyrs, working_gdb):
@@ -95,7 +88,7 @@ def ConvertOverlapping(primary_fc_lyr, secondary_fc_lyrs, working_gdb):
         arcpy.AddMessage("Scratch: " + scratch)
         arcpy.management.FeatureToLine(input_layers, feature_to_line_fc, "", "ATTRIBUTES")
 
-        desc = arcpy.da.Describe(primary_fc_lyr)
+        desc = describe(primary_fc_lyr)
         primary_fc_name = desc['name']
 
         first_query_fields = []
@@ -105,7 +98,7 @@ def ConvertOverlapping(primary_fc_lyr, secondary_fc_lyrs, working_gdb):
             # Remove representation
             # common.update_geo_with_override(layer)
 
-            desc = arcpy.da.Describe(layer)
+            desc = describe(layer)
             fc_name = desc['name']
             secondary_fc_names.append(layer)
             secondary_FID_fields.append("FID_" + str(fc_name))
@@ -117,7 +110,7 @@ def ConvertOverlapping(primary_fc_lyr, secondary_fc_lyrs, working_gdb):
         if primary_FID_field in secondary_FID_fields:
             secondary_FID_fields.remove(primary_FID_field)
         # Create a Describe object from the GDB Feature Class
-        desc = arcpy.da.Describe(feature_to_line_fc)
+        desc = describe(feature_to_line_fc)
         shape_length = desc['lengthFieldName']
 
         # Get all unique primary IDs
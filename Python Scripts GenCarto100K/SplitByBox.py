@@ -1,6 +1,8 @@
 import arcpy
 import math
 import traceback
+from common_utils import near_pairs
+from spatial_index import group_pairs
 
 # def straight_lines(outlines, polygon, spat_ref):
 #     try:
@@ -120,31 +122,13 @@ def straight_line(pnt_data, line_data, OFFSETDIST, working_gdb):
 
 def create_near_polys(polygons, spat_ref, working_gdb):
     try:
-        touching_ids = []
-        near_dict = {}
         arcpy.env.overwriteOutput = True
-        if arcpy.Exists(f"{working_gdb}\\near_grids"):
-            arcpy.management.Delete(f"{working_gdb}\\near_grids")
-
-        near_dangles = arcpy.analysis.GenerateNearTable(polygons, polygons, f"{working_gdb}\\near_grids", "0 Meters", closest="ALL", closest_count="0", method="PLANAR")
-
-        #get a list of the lines close to other lines...
-        with arcpy.da.SearchCursor(near_dangles, ["IN_FID", "NEAR_FID", "NEAR_DIST"], sql_clause=(None, 'ORDER BY IN_FID')) as cursor:
-            for row in cursor:
-                #if this is the first record for that in_fid value
-                if row[0] not in touching_ids:
-                    if row[1] > (row[0] + 1) or row[1] < (row[0] - 1):
-                        #add to the touching_ids list and near dictionary
-                        touching_ids.append(row[0])
-                        near_dict[row[0]] = [row[1]]
-                # if this is not the first record
-                else:
-                    if row[1] > (row[0] + 1) or row[1] < (row[0] - 1):
-                        #updated the dictionary to add the new near id
-                        cur_list = near_dict[row[0]]
-                        cur_list.append(row[1])
-                        near_dict[row[0]] = cur_list
+        in_fids, near_fids, _ = near_pairs(polygons, polygons, "0 Meters", working_gdb, "near_grids")
 
+        #get a list of the polygons touching polygons other than their neighbours in the grid sequence
+        keep = (near_fids > in_fids + 1) | (near_fids < in_fids - 1)
+        near_dict = group_pairs(in_fids[keep], near_fids[keep])
+        touching_ids = near_dict.keys()
 
         poly_geos = []
         with arcpy.da.SearchCursor(polygons, ['OID@', 'SHAPE@']) as cursor:
@@ -153,8 +137,6 @@ def create_near_polys(polygons, spat_ref, working_gdb):
                     poly_geos.append(row[1])
 
         undissolved = arcpy.management.CopyFeatures(poly_geos, f"{working_gdb}\\undissolved_polys")
-        if arcpy.Exists(f"{working_gdb}\\near_grids"):
-            arcpy.management.Delete(f"{working_gdb}\\near_grids")
 
         return undissolved
     
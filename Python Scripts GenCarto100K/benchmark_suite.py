@@ -0,0 +1,460 @@
+# Benchmarks of the generalization functions on synthetic map sheets, compared
+# with a stored baseline so that a slower change fails the run. e.g.
+#   python benchmark_suite.py --scales smoke small
+#   python benchmark_suite.py --scales smoke small --update      (store a new baseline)
+#   python benchmark_suite.py --cases find_dangles --repeat 10
+# import required python modules
+import argparse
+import functools
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+import synthetic_data
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+# Relative slow down that counts as a regression
+DEFAULT_THRESHOLD = 0.25
+# Differences below these are noise
+MIN_WALL_DIFF = 0.005
+MIN_RSS_DIFF = 5.0
+
+# Benchmark cases by function name
+CASES = {}
+
+
+class SkipCase(Exception):
+    """ raised by the setup of a case that cannot run here, e.g. without the
+    Data Reviewer workspace; the case is reported as skipped """
+
+
+class Case:
+    """ a benchmark of one function. setup(sheet, workspace) prepares the data,
+    which is not timed, and returns the callable that is timed """
+
+    def __init__(self, name, setup, needs_arcpy=False):
+        self.name = name
+        self.setup = setup
+        self.needs_arcpy = needs_arcpy
+
+
+def case(name, needs_arcpy=False):
+    """ registers a benchmark case for a function """
+    def register(setup):
+        CASES[name] = Case(name, setup, needs_arcpy)
+        return setup
+    return register
+
+
+def has_arcpy():
+    return importlib.util.find_spec("arcpy") is not None
+
+
+# ----------------------------------------------------------------------
+# Measures
+# ----------------------------------------------------------------------
+def peak_rss():
+    """ peak resident memory of this process in MB """
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 1048576.0
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, KB on Linux
+        return peak / 1048576.0 if sys.platform == "darwin" else peak / 1024.0
+    return float("nan")
+
+
+class CallCounter:
+    """ counts the calls to the functions of the geometry (shapely) and
+    geoprocessing (arcpy) modules while it is active. The counting wrappers
+    slow the calls down, so counts are taken in a separate untimed pass """
+
+    def __init__(self):
+        self.counts = {}
+        self._patched = []
+
+    def _wrap(self, owner, attr, label):
+        func = getattr(owner, attr)
+
+        @functools.wraps(func)
+        def counted(*args, **kwargs):
+            self.counts[label] = self.counts.get(label, 0) + 1
+            return func(*args, **kwargs)
+        setattr(owner, attr, counted)
+        self._patched.append((owner, attr, func))
+
+    def _wrap_module(self, module, prefix):
+        for attr in dir(module):
+            func = getattr(module, attr)
+            if not attr.startswith("_") and callable(func) and not isinstance(func, type):
+                self._wrap(module, attr, f"{prefix}.{attr}")
+
+    def __enter__(self):
+        if synthetic_data.shapely is not None:
+            shapely = synthetic_data.shapely
+            self._wrap_module(shapely, "shapely")
+            for method in ("query", "query_nearest"):
+                self._wrap(shapely.STRtree, method, f"STRtree.{method}")
+        if has_arcpy():
+            import arcpy
+            for toolbox in ("management", "analysis", "cartography", "conversion", "edit"):
+                self._wrap_module(getattr(arcpy, toolbox), f"arcpy.{toolbox}")
+            for cursor in ("SearchCursor", "UpdateCursor", "InsertCursor"):
+                self._wrap(arcpy.da, cursor, f"arcpy.da.{cursor}")
+        return self
+
+    def __exit__(self, *exc):
+        for owner, attr, func in reversed(self._patched):
+            setattr(owner, attr, func)
+        self._patched = []
+        return False
+
+    def total(self):
+        return sum(self.counts.values())
+
+
+# ----------------------------------------------------------------------
+# Cases
+# ----------------------------------------------------------------------
+def _layer(sheet, fc):
+    oids, geometries, attrs = sheet.datasets[fc]
+    return oids, geometries, attrs
+
+
+def _grid_partitions(sheet, count=4):
+    """ count x count partition polygons over the sheet """
+    shapely = synthetic_data.shapely
+    step = sheet.size / count
+    return [shapely.box(sheet.x0 + col * step, sheet.y0 + row * step, sheet.x0 + (col + 1) * step,
+                        sheet.y0 + (row + 1) * step) for row in range(count) for col in range(count)]
+
+
+@case("find_dangles")
+def bench_find_dangles(sheet, workspace):
+    """ dangle detection on the road network (dangle_line_ids) """
+    import dangle_detector
+    from feature_store import FeatureStore
+    oids, geometries, _ = _layer(sheet, synthetic_data.ROAD_FC)
+    store = FeatureStore.from_shapely(synthetic_data.ROAD_FC, oids, geometries)
+    return lambda: dangle_detector.dangles_from_store(store, dangle_detector.DEFAULT_TOLERANCE)
+
+
+@case("merge_parallel_roads")
+def bench_merge_parallel_roads(sheet, workspace):
+    """ in-memory part of merge_parallel_roads: the split highways contained in
+    an unsplit one take its geometry, then the roads and the merged roads are
+    matched by geometry hash """
+    import geometry_hash
+    import spatial_index
+    from feature_store import FeatureStore
+    shapely = synthetic_data.shapely
+    oids, geometries, attrs = _layer(sheet, synthetic_data.ROAD_FC)
+    rows = np.flatnonzero(attrs["RCS"] == 1)
+    road_store = FeatureStore.from_shapely(synthetic_data.ROAD_FC, oids[rows], geometries[rows])
+    unsplit = shapely.get_parts(shapely.line_merge(shapely.union_all(geometries[rows])))
+    unsplit_store = FeatureStore.from_shapely("unsplit", np.arange(1, len(unsplit) + 1), unsplit)
+
+    def run():
+        # The merge output is a fresh copy of the roads every run
+        merge_store = FeatureStore.from_shapely("merge", oids[rows], geometries[rows])
+        spatial_index.replace_with_containers(merge_store, unsplit_store)
+        return geometry_hash.unmatched_oids(road_store, merge_store)
+    return run
+
+
+@case("trim_polygon_within_distance")
+def bench_trim_polygon_within_distance(sheet, workspace):
+    """ erase areas between buildings closer than 5 m, per cartographic partition """
+    import partition_executor
+    import trim_polygons
+    oids, geometries, _ = _layer(sheet, synthetic_data.BUILDING_FC)
+    partitions = _grid_partitions(sheet)
+    return lambda: partition_executor.run_partitioned(trim_polygons.trim_task, oids, geometries, partitions, 5.0,
+                                                      (5.0, True, True), oids, geometries)
+
+
+@case("enlarge_polygon_barrier")
+def bench_enlarge_polygon_barrier(sheet, workspace):
+    """ enlargement of the small scattered polygons up to 5000 m2, clipped at
+    the roads and rivers """
+    import enlarge_polygons
+    polygons = [geo for fc, (_, geometries, _) in sheet.datasets.items()
+                if fc.endswith("_A") and fc != synthetic_data.BUILDING_FC for geo in geometries]
+    polygons = [geo for geo in polygons if geo.area < 5000.0]
+    barrier_geoms, sources, barrier_oids = [], [], []
+    for fc in (synthetic_data.ROAD_FC, synthetic_data.RIVER_FC):
+        oids, geometries, _ = _layer(sheet, fc)
+        barrier_geoms.extend(geometries)
+        sources.extend([fc] * len(oids))
+        barrier_oids.extend(oids.tolist())
+    barriers = enlarge_polygons.BarrierIndex(barrier_geoms, sources, barrier_oids)
+    return lambda: enlarge_polygons.enlarge_all(polygons, 5000.0, 10.0, barriers)
+
+
+@case("remove_close_lines")
+def bench_remove_close_lines(sheet, workspace):
+    """ near pairs of the contours within 30 m (near_pairs), split into connected
+    (< 1 m) and close lines like remove_close_lines """
+    import spatial_index
+    from feature_store import FeatureStore
+    oids, geometries, _ = _layer(sheet, synthetic_data.CONTOUR_FC)
+    store = FeatureStore.from_shapely(synthetic_data.CONTOUR_FC, oids, geometries)
+    return lambda: spatial_index.close_and_connected(*spatial_index.store_near_pairs(store, store, 30.0), 1)
+
+
+@case("gen_shared_features", needs_arcpy=True)
+def bench_gen_shared_features(sheet, workspace):
+    """ simplify and smooth of the roads with the shared rivers """
+    import arcpy
+    import common_utils
+    topo = os.path.join(workspace, synthetic_data.DATASET_NAME)
+    roads = os.path.join(topo, synthetic_data.ROAD_FC)
+    rivers = os.path.join(topo, synthetic_data.RIVER_FC)
+    working_gdb = arcpy.env.scratchGDB
+
+    def run():
+        main_fc = arcpy.management.MakeFeatureLayer(roads, "main_fc")
+        common_utils.gen_shared_features(main_fc, ["SIMPLIFY", "SMOOTH"], 50, 5, working_gdb, [main_fc, rivers])
+        arcpy.management.Delete(main_fc)
+    return run
+
+
+def _contour_copy(workspace):
+    """ the contours of the sheet and a copy of them in the scratch gdb """
+    import arcpy
+    contours = os.path.join(workspace, synthetic_data.DATASET_NAME, synthetic_data.CONTOUR_FC)
+    copy = os.path.join(arcpy.env.scratchGDB, "bench_contour_copy")
+    arcpy.management.CopyFeatures(contours, copy)
+    return contours, copy
+
+
+@case("replace_features", needs_arcpy=True)
+def bench_replace_features(sheet, workspace):
+    """ replacing the contours with a copy of themselves in one edit session """
+    import common_utils
+    contours, copy = _contour_copy(workspace)
+    return lambda: common_utils.replace_features(contours, copy)
+
+
+@case("delete_append", needs_arcpy=True)
+def bench_delete_append(sheet, workspace):
+    """ the same replace with DeleteFeatures and Append, to compare with replace_features """
+    import arcpy
+    contours, copy = _contour_copy(workspace)
+
+    def run():
+        arcpy.management.DeleteFeatures(contours)
+        arcpy.management.Append(copy, contours, "NO_TEST")
+    return run
+
+
+@case("populate_hierarchy", needs_arcpy=True)
+def bench_populate_hierarchy(sheet, workspace):
+    """ HIERARCHY of every feature from HierarchyAll_100K.csv """
+    import arcpy
+    import common_utils
+    return lambda: common_utils.populate_hierarchy(HIERARCHY_FILE, workspace, "HIERARCHY", arcpy.env.scratchGDB)
+
+
+@case("hierarchy_rules")
+def bench_hierarchy_rules(sheet, workspace):
+    """ evaluation of the HierarchyAll_100K.csv rules on the attributes of every
+    feature class (the in-memory part of populate_hierarchy) """
+    import hierarchy_rules
+    rules = hierarchy_rules.rules_by_fc(hierarchy_rules.read_rules(HIERARCHY_FILE))
+    tables = [(rules[fc.upper()], attrs, len(oids)) for fc, (oids, _, attrs) in sheet.datasets.items()
+              if fc.upper() in rules]
+    return lambda: [hierarchy_rules.evaluate(fc_rules, attrs, count) for fc_rules, attrs, count in tables]
+
+
+@case("detect_write_conflicts", needs_arcpy=True)
+def bench_detect_write_conflicts(sheet, workspace):
+    """ graphic conflicts of buildings against roads; needs Data Reviewer, the
+    reviewer workspace in GENCARTO_BENCH_REV_WORKSPACE and the layer files in
+    GENCARTO_BENCH_SYMBOLOGY """
+    import logging
+    import theme_10_detect_conflict
+    rev_workspace = os.environ.get("GENCARTO_BENCH_REV_WORKSPACE")
+    symbology = os.environ.get("GENCARTO_BENCH_SYMBOLOGY")
+    if not rev_workspace or not symbology:
+        raise SkipCase("set GENCARTO_BENCH_REV_WORKSPACE and GENCARTO_BENCH_SYMBOLOGY")
+    logger = logging.getLogger("benchmark")
+    return lambda: theme_10_detect_conflict.detect_write_conflicts(
+        workspace, [synthetic_data.BUILDING_FC], "", [synthetic_data.ROAD_FC], "0 Meters", rev_workspace,
+        "Session 1 : Session 1", 1, 100000, "", "Map", symbology, logger)
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+HIERARCHY_FILE = synthetic_data.HIERARCHY_FILE
+
+
+@functools.lru_cache(maxsize=None)
+def _sheet(scale, seed):
+    """ synthetic sheet with the schema of the hierarchy table and the rules workbook """
+    return synthetic_data.generate(scale, seed=seed)
+
+
+def _workspace(sheet, scale, seed, out_folder):
+    """ file gdb of the sheet for the arcpy cases, written once per scale and seed """
+    out_gdb = os.path.join(out_folder, f"bench_{scale}_{seed}.gdb")
+    if not os.path.exists(out_gdb):
+        sheet.write_gdb(out_gdb)
+    return out_gdb
+
+
+def run_case(name, scale, repeat=3, seed=0, out_folder=None):
+    """ runs one case on one scale and returns its measures. Wall time is the
+    median of repeat timed runs, calls are counted in one more run """
+    bench = CASES[name]
+    if bench.needs_arcpy and not has_arcpy():
+        return {"skipped": "needs arcpy"}
+    sheet = _sheet(scale, seed)
+    workspace = _workspace(sheet, scale, seed, out_folder) if bench.needs_arcpy else None
+    try:
+        func = bench.setup(sheet, workspace)
+    except SkipCase as e:
+        return {"skipped": str(e)}
+    rss_before = peak_rss()
+    times = []
+    for _ in range(max(int(repeat), 1)):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    rss_after = peak_rss()
+    with CallCounter() as counter:
+        func()
+    return {
+        "features": sheet.feature_count(),
+        "wall": statistics.median(times),
+        "wall_min": min(times),
+        "rss_mb": rss_after,
+        "rss_delta_mb": max(rss_after - rss_before, 0.0),
+        "calls": dict(sorted(counter.counts.items())),
+        "total_calls": counter.total(),
+    }
+
+
+def _run_case_child(args):
+    return run_case(*args)
+
+
+def run_suite(cases=None, scales=("smoke",), repeat=3, seed=0, out_folder=None, isolate=True):
+    """ runs the cases on every scale, each in its own process when isolate is
+    set so that the peak memory belongs to the case. Returns {scale/case: measures} """
+    cases = list(cases or CASES)
+    out_folder = out_folder or os.path.join(os.path.dirname(BASELINE_FILE), "benchmark_data")
+    jobs = [(name, scale, repeat, seed, out_folder) for scale in scales for name in cases]
+    results = {}
+    if isolate:
+        context = multiprocessing.get_context("spawn")
+        for job in jobs:
+            with context.Pool(1) as pool:
+                results[f"{job[1]}/{job[0]}"] = pool.apply(_run_case_child, (job,))
+    else:
+        for job in jobs:
+            results[f"{job[1]}/{job[0]}"] = run_case(*job)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """ regressions of the results against the baseline, as messages. A case
+    that ran without a baseline to compare with is a failure too """
+    regressions = []
+    for key, result in results.items():
+        if "skipped" in result:
+            continue
+        base = baseline.get(key)
+        if not base or "skipped" in base:
+            regressions.append(f"{key}: no baseline, store one with --update")
+            continue
+        if result["wall"] > base["wall"] * (1 + threshold) and result["wall"] - base["wall"] > MIN_WALL_DIFF:
+            regressions.append(f"{key}: wall time {base['wall']:.3f}s -> {result['wall']:.3f}s")
+        if (result["rss_delta_mb"] > base["rss_delta_mb"] * (1 + threshold)
+                and result["rss_delta_mb"] - base["rss_delta_mb"] > MIN_RSS_DIFF):
+            regressions.append(f"{key}: memory {base['rss_delta_mb']:.1f}MB -> {result['rss_delta_mb']:.1f}MB")
+        if result["total_calls"] > base["total_calls"] * (1 + threshold):
+            regressions.append(f"{key}: calls {base['total_calls']} -> {result['total_calls']}")
+    return regressions
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as baseline:
+        return json.load(baseline).get("results", {})
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    data = {"machine": platform.node(), "platform": platform.platform(), "python": platform.python_version(),
+            "created": time.strftime('%Y-%m-%d %H:%M:%S'), "results": load_baseline(path)}
+    data["results"].update(results)
+    with open(path, "w", encoding="utf-8") as baseline:
+        json.dump(data, baseline, indent=1, sort_keys=True)
+
+
+def report(results, baseline):
+    lines = [f"{'case':<45}{'features':>10}{'wall s':>10}{'base s':>10}{'rss MB':>9}{'calls':>9}"]
+    for key, result in results.items():
+        if "skipped" in result:
+            lines.append(f"{key:<45}  skipped: {result['skipped']}")
+            continue
+        base = baseline.get(key, {}).get("wall")
+        lines.append(f"{key:<45}{result['features']:>10}{result['wall']:>10.3f}"
+                     f"{base if base is not None else float('nan'):>10.3f}{result['rss_delta_mb']:>9.1f}"
+                     f"{result['total_calls']:>9}")
+    skipped = sum("skipped" in result for result in results.values())
+    if skipped:
+        lines.append(f"{skipped} of {len(results)} cases skipped")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the GenCarto 100K functions on synthetic sheets")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=None)
+    parser.add_argument("--scales", nargs="+", choices=sorted(synthetic_data.SCALES), default=["smoke"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="relative slow down that fails")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--in-process", action="store_true", help="run every case in this process")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    results = run_suite(args.cases, args.scales, args.repeat, args.seed, isolate=not args.in_process)
+    baseline = load_baseline(args.baseline)
+    print(report(results, baseline))
+    if args.update:
+        save_baseline(results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -1,6 +1,7 @@
 # import required python modules
 import arcpy
 import traceback
+import contextlib
 import math
 import os
 import shutil
@@ -10,6 +11,22 @@ import logging
 import arcpy.reviewer
 from datetime import datetime
 import glob
+import numpy as np
+import spatial_index
+import dangle_detector
+import geometry_backend
+import trim_polygons
+import geometry_hash
+import enlarge_polygons
+import merge_components
+import point_thinning
+import partition_executor
+import snapshot_store
+import hierarchy_rules
+import where_clause
+import feature_catalog
+from feature_store import FeatureStore, arcpy_to_parts, parts_to_arcpy, editable_fields
+from feature_catalog import describe
 
 
 def error_msgs(log_dir):
@@ -39,11 +56,35 @@ def error_msgs(log_dir):
             arcpy.AddMessage(error_message)
 
 def has_features(fc):
+    count = feature_catalog.cached_count(fc)
+    if count is not None:
+        return count > 0
     with arcpy.da.SearchCursor(fc, ['OID@']) as cursor:
         return next(cursor, None) is not None  #True is there is at least one feature
     
 def count_features(fc):
-    return len([row for row in arcpy.da.SearchCursor(fc, ["OID@"])])
+    return feature_catalog.count(fc)
+
+# Headless projects by .aprx path. A project is opened once per process, so every
+# map step changes the same copy and save_project() writes all of them
+_projects = {}
+
+def get_project():
+    ''' The open ArcGIS Pro project, or the .aprx named by the GENCARTO_PROJECT
+    environment variable when running headless '''
+    path = os.environ.get("GENCARTO_PROJECT")
+    if not path:
+        return arcpy.mp.ArcGISProject('CURRENT')
+    key = os.path.normcase(os.path.abspath(path))
+    if key not in _projects:
+        _projects[key] = arcpy.mp.ArcGISProject(path)
+    return _projects[key]
+
+def save_project():
+    ''' Saves the map changes of a step to the .aprx when running headless,
+    ArcGIS Pro shows them in the open project already '''
+    if os.environ.get("GENCARTO_PROJECT"):
+        get_project().save()
 
 def simplified_msgs(error_method, custom_message):
     try:
@@ -115,11 +156,57 @@ def backup_data(src, dest, logger, ignore=None):
         logger.error(error_message)
         simplified_msgs('Backup data', f'{exc_value}\n')
 
+def snapshot_data(src, backup_root, checkpoint, logger, background=False):
+    '''
+    Incremental backup of src as the checkpoint snapshot (e.g. 02_AFTTrans).
+    Only the files changed since the last snapshot are stored. With background
+    the changed files are staged and stored while the next theme runs; call
+    wait_for_snapshots before the snapshot is needed.
+    '''
+    try:
+        store = snapshot_store.SnapshotStore(backup_root)
+        name = snapshot_store.checkpoint_name(checkpoint, src)
+        if background:
+            snapshot_store.background.start(store, src, name)
+            logger.info(f"Snapshot {name} staged, storing in the background")
+            return None
+        manifest = store.snapshot(src, name)
+        logger.info(f"Snapshot {name}: {len(manifest['files'])} files, {manifest['stored']} new bytes stored")
+        return manifest
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        tb = traceback.format_exc()
+        error_message = f'Snapshot data error: {e}\nTraceback details:\n{tb}'
+        logger.error(error_message)
+        simplified_msgs('Snapshot data', f'{exc_value}\n')
+
+def wait_for_snapshots(logger):
+    '''
+    Barrier for the background snapshots: waits until they are stored and
+    have passed the integrity check.
+    '''
+    try:
+        for manifest in snapshot_store.background.wait():
+            logger.info(f"Snapshot {manifest['name']}: {len(manifest['files'])} files, {manifest['stored']} new bytes stored")
+    except Exception as e:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        tb = traceback.format_exc()
+        error_message = f'Snapshot data error: {e}\nTraceback details:\n{tb}'
+        logger.error(error_message)
+        simplified_msgs('Snapshot data', f'{exc_value}\n')
+        raise
+
+def restore_snapshot(backup_root, checkpoint, src, dest):
+    '''
+    Restores the geodatabase src as it was at a checkpoint into dest.
+    '''
+    return snapshot_store.SnapshotStore(backup_root).restore(snapshot_store.checkpoint_name(checkpoint, src), dest)
+
 def get_fields(featureclass, not_include_fields, logger):
     # Set environment variables
     arcpy.env.overwriteOutput = True
     try:
-        desc = arcpy.da.Describe(featureclass)
+        desc = describe(featureclass)
         length_field = desc['lengthFieldName']
 
         field_names = []
@@ -140,6 +227,137 @@ def get_fields(featureclass, not_include_fields, logger):
         logger.error(error_message)
         simplified_msgs('Get fields', f'{exc_value}\n')
 
+def oid_where(features, oids, field=None):
+    """ where clause selecting the oids of features (or the ids in field), with
+    BETWEEN ranges and IN lists instead of one 'OBJECTID = n' term per feature.
+    No oids gives a clause that selects nothing """
+    return where_clause.oid_clause(field or describe(features)['OIDFieldName'], oids)
+
+def select_by_oids(layer, oids, selection_type="NEW_SELECTION"):
+    """ selects the features of a layer by oid. Large oid sets are selected in
+    chunks, the first with selection_type and the others added to the selection,
+    so that no clause gets too long for the database. Returns the layer """
+    field = describe(layer)['OIDFieldName']
+    if selection_type == "SUBSET_SELECTION":
+        arcpy.management.SelectLayerByAttribute(layer, selection_type, where_clause.oid_clause(field, oids))
+        return layer
+    for cnt, clause in enumerate(where_clause.oid_clauses(field, oids)):
+        chunk_type = selection_type if cnt == 0 or selection_type == "REMOVE_FROM_SELECTION" else "ADD_TO_SELECTION"
+        arcpy.management.SelectLayerByAttribute(layer, chunk_type, clause)
+    return layer
+
+def feature_workspace(dataset):
+    """ geodatabase (or memory workspace) of a feature class or layer """
+    path = describe(dataset)['catalogPath']
+    workspace = os.path.dirname(path)
+    if workspace and describe(workspace)['dataType'] == 'FeatureDataset':
+        workspace = os.path.dirname(workspace)
+    return workspace
+
+def replace_features(target, sources):
+    """ replaces the features of target (the selected ones when it is a layer
+    with a selection) with the features of sources, in place of DeleteFeatures
+    followed by Append with NO_TEST. The old features are deleted and the new
+    ones inserted with cursors in one edit session, so target keeps its old
+    features when anything fails or the run is interrupted. Fields are matched
+    by name like Append. Geometries are copied as WKB unless the source has
+    true curves, which WKB would densify. Returns the number of features written """
+    sources = list(sources) if isinstance(sources, (list, tuple)) else [sources]
+    target_desc = describe(target)
+    for source in sources:
+        if describe(source)['catalogPath'].lower() == target_desc['catalogPath'].lower():
+            raise ValueError(f"Cannot replace the features of {target_desc['name']} with its own features")
+    target_fields = {name.upper(): name for name in editable_fields(target_desc)}
+    workspace = feature_workspace(target)
+    # Memory workspaces do not support edit sessions
+    if workspace.lower() in ("memory", "in_memory"):
+        session = contextlib.nullcontext()
+    else:
+        session = arcpy.da.Editor(workspace)
+    written = 0
+    with session:
+        with arcpy.da.UpdateCursor(target, ['OID@']) as cursor:
+            for row in cursor:
+                cursor.deleteRow()
+        for source in sources:
+            source_desc = describe(source)
+            fields = [target_fields[field.name.upper()] for field in source_desc['fields']
+                      if field.name.upper() in target_fields]
+            shape = 'SHAPE@' if source_desc.get('hasCurves', True) else 'SHAPE@WKB'
+            with arcpy.da.SearchCursor(source, [shape] + fields) as search, \
+                    arcpy.da.InsertCursor(target, [shape] + fields) as insert:
+                for row in search:
+                    insert.insertRow(row)
+                    written += 1
+    return written
+
+def near_pairs(in_features, near_features, search_radius, working_gdb=None, out_name="near_pairs"):
+    ''' Returns the IN_FID, NEAR_FID and NEAR_DIST columns of an "ALL" near table
+    as NumPy arrays. The pairs come from the in memory spatial index when shapely
+    is available, otherwise GenerateNearTable is run and read in one pass.
+    Layer selections are honoured and a feature is never near itself. '''
+    if spatial_index.has_spatial_index():
+        return spatial_index.store_near_pairs(FeatureStore.from_arcpy(in_features, []),
+                                              FeatureStore.from_arcpy(near_features, []), search_radius)
+
+    out_table = f"{working_gdb}\\{out_name}" if working_gdb else out_name
+    near_tab = arcpy.analysis.GenerateNearTable(in_features, near_features, out_table, search_radius,
+                                                "NO_LOCATION", "NO_ANGLE", "ALL").getOutput(0)
+    near_arr = arcpy.da.TableToNumPyArray(near_tab, ['IN_FID', 'NEAR_FID', 'NEAR_DIST'])
+    arcpy.management.Delete(near_tab)
+    return near_arr['IN_FID'], near_arr['NEAR_FID'], near_arr['NEAR_DIST']
+
+def xy_tolerance(features):
+    ''' XY tolerance of the spatial reference of the features '''
+    tolerance = describe(features)['spatialReference'].XYTolerance
+    if not tolerance or math.isnan(tolerance):
+        return dangle_detector.DEFAULT_TOLERANCE
+    return tolerance
+
+def partition_polygons():
+    ''' The polygons of arcpy.env.cartographicPartitions as shapely geometries,
+    or None when no partitions are set or shapely is not installed. The Python
+    steps that support partitions run per partition when it is set, the same
+    as the cartography tools '''
+    carto_partition = arcpy.env.cartographicPartitions
+    if not carto_partition or not spatial_index.has_spatial_index() or not arcpy.Exists(carto_partition):
+        return None
+    partitions = [geo for geo in FeatureStore.from_arcpy(carto_partition, []).geometries() if geo is not None]
+    return partitions or None
+
+def dangle_line_ids(line_features):
+    ''' Returns the OIDs of the lines with a free end, the same lines that
+    FeatureVerticesToPoints with the DANGLE option puts a point on '''
+    store = FeatureStore.from_arcpy(line_features, [])
+    dangle_ids, _, _ = dangle_detector.dangles_from_store(store, xy_tolerance(line_features))
+    return dangle_ids
+
+def thin_point_layer(point_fc, spacing_mm, ref_scale, priority_field, order, query, vis_field):
+    ''' Hides points closer together than the minimum symbol spacing at the
+    reference scale. The points with the best priority value are kept and the
+    others get vis_field = 1; nothing is deleted '''
+    oids, xy, values = [], [], []
+    fields = ['OID@', 'SHAPE@XY'] + ([priority_field] if priority_field else [])
+    with arcpy.da.SearchCursor(point_fc, fields, query or None) as cursor:
+        for row in cursor:
+            if row[1] is None or row[1][0] is None:
+                continue
+            oids.append(row[0])
+            xy.append(row[1])
+            if priority_field:
+                values.append(np.nan if row[2] is None else float(row[2]))
+    spacing = point_thinning.ground_spacing(spacing_mm, ref_scale)
+    hide_ids = point_thinning.hidden_oids(oids, xy, values if priority_field else None, spacing, order)
+    if len(hide_ids):
+        hide_ids = set(hide_ids.tolist())
+        with arcpy.da.UpdateCursor(point_fc, ['OID@', vis_field], query or None) as cursor:
+            for row in cursor:
+                if row[0] in hide_ids:
+                    row[1] = 1
+                    cursor.updateRow(row)
+    arcpy.AddMessage(f"{os.path.basename(point_fc)}: {len(hide_ids)} of {len(oids)} points hidden at {spacing} spacing")
+    return len(hide_ids)
+
 def find_dangles(split_layer, update_field, working_gdb, logger):
     ''' for some reason, feature vertices to points with the dangles option
     returns 0 for dangles with the line layer.  This function mimics what the
@@ -155,26 +373,14 @@ def find_dangles(split_layer, update_field, working_gdb, logger):
             arcpy.management.FeatureVerticesToPoints(split_layer, "DangleVertex", "BOTH_ENDS")
             point_lyr = arcpy.management.MakeFeatureLayer("DangleVertex", f"{working_gdb}\\Dangle_lyr")
 
-            dangle_ids = []
-
-            with arcpy.da.SearchCursor(point_lyr, ['OID@', 'SHAPE@']) as cursor:
-                for row in cursor:
-                    match = False
-                    oid_val = row[0]
-                    if oid_val not in dangle_ids:
-                        with arcpy.da.SearchCursor(point_lyr, ['OID@', 'SHAPE@']) as s_cursor:
-                            for s_row in s_cursor:
-                                if match == False:
-                                    if s_row[0] != oid_val:
-                                        if not row[1].disjoint(s_row[1]):
-                                            match = True
-                        if match == False:
-                            dangle_ids.append(str(oid_val))
+            # An end point is a dangle if no other end point falls on the same node
+            pnt_arr = arcpy.da.FeatureClassToNumPyArray(point_lyr, ['OID@', 'SHAPE@X', 'SHAPE@Y'])
+            node_ids, degree = dangle_detector.point_degrees(np.column_stack([pnt_arr['SHAPE@X'], pnt_arr['SHAPE@Y']]),
+                                                             xy_tolerance(point_lyr))
+            dangle_ids = pnt_arr['OID@'][degree[node_ids] == 1]
 
             if len(dangle_ids) >= 1:
-                where_clause = "OBJECTID = "
-                where_clause += " OR OBJECTID = ".join(dangle_ids)
-                arcpy.management.SelectLayerByAttribute(point_lyr, "NEW_SELECTION", where_clause)
+                select_by_oids(point_lyr, dangle_ids)
         else:
             point_lyr = arcpy.management.MakeFeatureLayer("DangleVertex", f"{working_gdb}\\Dangle_lyr")
 
@@ -318,11 +524,11 @@ def rebuild_features(line_lyr, output_lyr, shape_type, unique_ids, left_field, w
         dup_lyr = arcpy.management.MakeFeatureLayer(line_lyr, "dup_lyr")
 
         # Get information about geometry of output (spatial ref and if has Z)
-        spatial_ref = arcpy.da.Describe(output_lyr)['spatialReference']
-        has_z = arcpy.da.Describe(output_lyr)['hasZ']
+        spatial_ref = describe(output_lyr)['spatialReference']
+        has_z = describe(output_lyr)['hasZ']
 
-        oid_field = arcpy.da.Describe(output_lyr)['OIDFieldName']
-        name = arcpy.da.Describe(output_lyr)['name']
+        oid_field = describe(output_lyr)['OIDFieldName']
+        name = describe(output_lyr)['name']
 
         # Select the generalized lines relating to an input feature
         if len(unique_ids) > 1:
@@ -353,7 +559,7 @@ def rebuild_features(line_lyr, output_lyr, shape_type, unique_ids, left_field, w
         # Dissolve the line features to create one or more closed lines
         fields_not_required_for_dislve = ["OBJECTID", "Shape", "created_user", "created_date", "last_edited_user", "last_edited_date", "InLine_FID", "MaxSimpTol", "MinSimpTol",
                                      "Shape_Length", "Shape_Area"]
-        fields_list_selected_fcs = [field.name for field in (arcpy.da.Describe(line_lyr))['fields'] if field.name not in fields_not_required_for_dislve
+        fields_list_selected_fcs = [field.name for field in (describe(line_lyr))['fields'] if field.name not in fields_not_required_for_dislve
                                and ("FID_" not in field.name and "LEFT_FID" not in field.name and "RIGHT_FID" not in field.name)]
         temp_fc = arcpy.management.Dissolve(line_lyr, f"{scratch}\\Temp_FC", fields_list_selected_fcs, "", "SINGLE_PART", "DISSOLVE_LINES")
 
@@ -375,10 +581,8 @@ def rebuild_features(line_lyr, output_lyr, shape_type, unique_ids, left_field, w
         arcpy.management.MakeFeatureLayer(output_lyr, "output_lyr")
         # Select the features to be updated
         arcpy.management.SelectLayerByAttribute("output_lyr", "NEW_SELECTION", query)
-        # Delete the selected features
-        arcpy.management.DeleteFeatures("output_lyr")
-        # Append the new geometry with attributes to the selected features
-        arcpy.management.Append("final_new_geo", "output_lyr", "NO_TEST")
+        # Replace the selected features with the new geometry and attributes
+        replace_features("output_lyr", "final_new_geo")
 
     except Exception as e:
         tb = traceback.format_exc()
@@ -435,36 +639,56 @@ def parse_file(file_path, params):
         arcpy.AddMessage(error_message)
 
 def populate_hierarchy(hierarchy_file, workspace, field_name, working_gdb):
-    """ Build a query to find all features with the same name as this record"""
+    """ Populates the hierarchy field from the rules of the hierarchy file. The rules
+    of a feature class are evaluated together on one read of its attributes and the
+    changed values are written in one update pass """
     arcpy.AddMessage("Start Populate Hierarchy")
     try:
         # Set environment
         arcpy.env.overwriteOutput = True
         arcpy.env.workspace = working_gdb
 
-        # Set local variables
-        fcs = []
-        queries = []
-        values = []
-        params = [fcs, queries, values]
-
-        fcs, queries, values = parse_file(hierarchy_file, params)
+        rules = hierarchy_rules.rules_by_fc(hierarchy_rules.read_rules(hierarchy_file))
         fc_dict = get_fcs_as_dict(workspace, dataset="Topo")
 
-        cnt = 0
-        for fc in fcs:
-            fc = fc.upper()
-            if fc in fc_dict:
-                fc_path = fc_dict[fc]
-                sql = queries[cnt]
-                val = int(values[cnt])
-                selected_fcs = arcpy.management.SelectLayerByAttribute(fc_path, "NEW_SELECTION", sql)
-                count = int(arcpy.management.GetCount(selected_fcs).getOutput(0))
-                if count >= 1:
-                    arcpy.SetProgressorLabel(f'Populating Hierarchy: Updating {str(count)} features with value {str(val)}')
-                    # arcpy.AddMessage("Updating " + str(count) + " features with value " + str(val))
-                    arcpy.management.CalculateField(fc_path, field_name, val, "PYTHON3")
-                cnt += 1
+        for fc, fc_rules in rules.items():
+            if fc not in fc_dict:
+                continue
+            fc_path = fc_dict[fc]
+            fields = {field.name.upper(): field.name for field in arcpy.ListFields(fc_path)}
+            # Rules on fields the feature class does not have cannot select anything
+            usable = [rule for rule in fc_rules if all(name.upper() in fields for name in rule.where.fields)]
+            for rule in fc_rules:
+                if rule not in usable:
+                    arcpy.AddWarning(f"Populating Hierarchy: {os.path.basename(fc_path)} has no field for rule '{rule.query}'")
+            if not usable:
+                continue
+            if field_name.upper() not in fields:
+                arcpy.management.AddField(fc_path, field_name, "SHORT")
+                fields[field_name.upper()] = field_name
+            read_fields = [fields[name.upper()] for name in hierarchy_rules.rule_fields(usable)]
+
+            with arcpy.da.SearchCursor(fc_path, ['OID@', fields[field_name.upper()]] + read_fields) as cursor:
+                rows = list(cursor)
+            count = len(rows)
+            if count == 0:
+                continue
+            columns = {}
+            for cnt, name in enumerate(read_fields):
+                column = np.empty(count, dtype=object)
+                column[:] = [row[cnt + 2] for row in rows]
+                columns[name] = column
+            current = [row[1] for row in rows]
+            values, selected = hierarchy_rules.evaluate(usable, columns, count, current)
+
+            updates = {rows[cnt][0]: values[cnt] for cnt in np.flatnonzero(selected) if values[cnt] != current[cnt]}
+            if updates:
+                arcpy.SetProgressorLabel(f'Populating Hierarchy: Updating {len(updates)} features of {os.path.basename(fc_path)}')
+                with arcpy.da.UpdateCursor(fc_path, ['OID@', fields[field_name.upper()]]) as cursor:
+                    for row in cursor:
+                        if row[0] in updates:
+                            row[1] = updates[row[0]]
+                            cursor.updateRow(row)
         arcpy.AddMessage("Ended Populating Hierarchy")
 
     except Exception as e:
@@ -531,36 +755,21 @@ def flag_loops(input_line, working_gdb, hier_field):
 
 
 def delete_dangles(hydro_lyr, dangles, seg_length, compare_fcs, working_gdb):
+    ''' dangles is the list of OIDs of the lines with a free end (see dangle_line_ids) '''
     # Set environment variable
     arcpy.env.workspace = working_gdb
     try:
-        # Use a spatial join to join the dangle points to the
-        # hydro feature layer where the Boundary Touches
-        # The purpose of this is to denote which lines are dangles
-        # so that only dangles get deleted, and not small segments
+        # Only dangles get deleted, and not small segments
         # that make up part of a bigger segment that aren't dangles
-        arcpy.AddMessage("Creating spatial join between hydro lines and dangle points...")
-        hydro_sj = arcpy.analysis.SpatialJoin(hydro_lyr, dangles, "hydro_sj", match_option="BOUNDARY_TOUCHES").getOutput(0)
-
-        # Get TARGET_FID value only where Join_Count > 0
-        # (where there is a spatial join, meaning that line
-        # is a dangle)
         arcpy.AddMessage("Retrieving dangles shorter than " + str(seg_length) + " Meters...")
-        targ_fids = []
         count = 0
-        with arcpy.da.SearchCursor(hydro_sj, ["TARGET_FID"], "Join_Count > 0") as cur:
-            for row in cur:
-                # Store each Target FID value in a list
-                targ_fids.append(str(row[0]))
+        dangles = set(int(oid) for oid in dangles)
+        targ_fids = [row[0] for row in arcpy.da.SearchCursor(hydro_lyr, ['OID@']) if row[0] in dangles]
         arcpy.AddMessage(str(len(targ_fids)) + " features found...")
         if len(targ_fids) >= 1:
-            # Convert list of Target FID values to a SQL statement
-            value_str = ", ".join(str(v) for v in targ_fids)
-            where = f"OBJECTID IN ({value_str})"
-
-            # Select hydro layer using where clause of Target FID values
+            # Select hydro layer by the Target FID values
             arcpy.AddMessage("Selecting hydro features to delete...")
-            arcpy.management.SelectLayerByAttribute(hydro_lyr, "NEW_SELECTION", where)
+            select_by_oids(hydro_lyr, targ_fids)
             if compare_fcs:
                 for fc in compare_fcs:
                     arcpy.management.SelectLayerByLocation(hydro_lyr, "INTERSECT", fc, "", "REMOVE_FROM_SELECTION")
@@ -581,7 +790,7 @@ def delete_dangles(hydro_lyr, dangles, seg_length, compare_fcs, working_gdb):
 def process_fc(in_fc, fcs, fc_paths):
     """prep features classes and convert to line if necessary"""
     try:
-        desc = arcpy.da.Describe(str(in_fc))
+        desc = describe(str(in_fc))
         arcpy.AddMessage(" ... Prepping " + desc['name'])
         arcpy.env.workspace = arcpy.env.scratchGDB
         if int(arcpy.management.GetCount(in_fc)[0]) >= 1:
@@ -832,58 +1041,49 @@ def merge_parallel_roads(line_fc, Where_clause, Merge_Field, Merge_Distance, upd
 
                 # Unsplit drops all the attributes, so replace the geometry of the
                 # features in the split layer with the merged geometry.
-                with arcpy.da.SearchCursor(unsplit, ['OID@', 'SHAPE@']) as cursor:
-                    for row in cursor:
-                        geo = row[1]
-                        arcpy.management.SelectLayerByLocation(mergelyr, "WITHIN", geo, "", "NEW_SELECTION")
-                        cnt = 0
-                        with arcpy.da.UpdateCursor(mergelyr, ['OID@', 'SHAPE@']) as up_cursor:
-                            for up_row in up_cursor:
-                                if cnt == 0:
-                                    # Replace the geometry for the first record
-                                    up_row[1] = geo
-                                    up_cursor.updateRow(up_row)
-                                    cnt += 1
-                                else:
-                                    # Delete the other rows
-                                    up_cursor.deleteRow()
+                if spatial_index.has_spatial_index():
+                    arcpy.management.SelectLayerByAttribute(mergelyr, "CLEAR_SELECTION")
+                    merge_store = FeatureStore.from_arcpy(mergelyr, [])
+                    unsplit_store = FeatureStore.from_arcpy(unsplit, [])
+                    # Replace the geometry for the first record and delete the other rows
+                    spatial_index.replace_with_containers(merge_store, unsplit_store)
+                    merge_store.flush(mergeOut, geometry_backend.get_backend("arcpy"))
+                else:
+                    with arcpy.da.SearchCursor(unsplit, ['OID@', 'SHAPE@']) as cursor:
+                        for row in cursor:
+                            geo = row[1]
+                            arcpy.management.SelectLayerByLocation(mergelyr, "WITHIN", geo, "", "NEW_SELECTION")
+                            cnt = 0
+                            with arcpy.da.UpdateCursor(mergelyr, ['OID@', 'SHAPE@']) as up_cursor:
+                                for up_row in up_cursor:
+                                    if cnt == 0:
+                                        # Replace the geometry for the first record
+                                        up_row[1] = geo
+                                        up_cursor.updateRow(up_row)
+                                        cnt += 1
+                                    else:
+                                        # Delete the other rows
+                                        up_cursor.deleteRow()
 
                 # Compare the results of the unsplit to the original feature class
+                # using canonical geometry hashes
                 arcpy.AddMessage("Finding features in input that will be replaced")
-                updategeo = [row[0] for row in arcpy.da.SearchCursor(mergeOut, 'SHAPE@')]
-                orig_geos = [row[0] for row in arcpy.da.SearchCursor(road_lyr, 'SHAPE@')]
-                ids = []
-                with arcpy.da.UpdateCursor(road_lyr, ['OID@', 'SHAPE@']) as cursor:
-                    for row in cursor:
-                        geo = row[1]
-                        match = False
-                        for geom in updategeo:
-                            if geom and geo:
-                                if geo.equals(geom):
-                                    match = True
-
-                        if not match:
-                            cursor.deleteRow()
+                resolution = describe(line_fc)['spatialReference'].XYResolution or geometry_hash.DEFAULT_RESOLUTION
+                road_store = FeatureStore.from_arcpy(road_lyr, [])
+                merge_store = FeatureStore.from_arcpy(mergeOut, [])
+                delete_ids, ids = geometry_hash.unmatched_oids(road_store, merge_store, resolution)
+
+                delete_ids = set(delete_ids.tolist())
+                if delete_ids:
+                    with arcpy.da.UpdateCursor(road_lyr, ['OID@']) as cursor:
+                        for row in cursor:
+                            if row[0] in delete_ids:
+                                cursor.deleteRow()
 
                 arcpy.AddMessage("Finding merged features to add to input feature class")
 
-                with arcpy.da.SearchCursor(mergeOut, ['OID@', 'SHAPE@']) as cursor:
-                    for row in cursor:
-                        geo = row[1]
-                        match = False
-                        for geom in orig_geos:
-                            if geom and geo:
-                                if geo.equals(geom):
-                                    match = True
-
-                        if not match:
-                            ids.append(str(row[0]))
-
                 if len(ids) >= 1:
-                    where = "OBJECTID = "
-                    where += " OR OBJECTID = ".join(ids)
-
-                    arcpy.management.SelectLayerByAttribute(mergelyr, "NEW_SELECTION", where)
+                    select_by_oids(mergelyr, ids)
                     #count = int(arcpy.management.GetCount(mergelyr).getOutput(0))
                     if has_features(mergelyr):
                         arcpy.AddMessage("Adding  merged features to input.")
@@ -918,7 +1118,7 @@ def get_fcs_load_data(in_workspace, wksp_type):
         # Get feature classes name
         fc_classes = arcpy.ListFeatureClasses("", "", dataset_name)
         for fc in fc_classes:
-            desc = arcpy.da.Describe(fc)
+            desc = describe(fc)
             if wksp_type == "RemoteDatabase":
                 fullname = arcpy.ParseTableName(fc, in_workspace)
                 database, owner, featureclass = fullname.split(",")
@@ -962,7 +1162,7 @@ def prepFcs(detec_conflict_fc_list, database_path, map_name, symbology_file_path
         # Filter out any "CartoPartition" feature classes at the start
         detec_conflict_fc_list = [fc for fc in detec_conflict_fc_list if "CartoPartition" not in str(fc)]
         # Get current map
-        aprx = arcpy.mp.ArcGISProject('CURRENT')
+        aprx = get_project()
         maps = aprx.listMaps(map_name)[0]
 
         # Preload symbology path (no map usage)
@@ -976,7 +1176,7 @@ def prepFcs(detec_conflict_fc_list, database_path, map_name, symbology_file_path
                 arcpy.AddMessage(f"Symbology layer file not found at: {candidate}")
 
         for fc in detec_conflict_fc_list:
-            desc = arcpy.da.Describe(fc)
+            desc = describe(fc)
             fcName = desc['name']
             geo_type = desc['shapeType']
             
@@ -1010,6 +1210,7 @@ def prepFcs(detec_conflict_fc_list, database_path, map_name, symbology_file_path
 
         # Keep original call pattern
         layer_list = make_unique_layers(layer_list, map_name)
+        save_project()
         return layer_list
 
     except Exception as e:
@@ -1053,14 +1254,14 @@ def hide_blgs_under_built_up_area(fc_list, build_up_area_fcs, express_val_mx, ex
         # Get feature classes
         build_up_area_fcs = list(filter(str.strip, build_up_area_fcs))
         build_up_area_fcs = [fc for built in build_up_area_fcs for fc in fc_list if str(built) in fc and (str(built) != 'B_Town_Built_Up_A' or str(built) != 'B_Generalised_Buildings_A')]
-        b_town_built_up_A = [fc for fc in fc_list if 'BJ0073_Town_Built_up_A' in fc][0]
+        b_town_built_up_A = fc_list.find('BJ0073_Town_Built_up_A')
         # Get feature class and make feature layer
         b_town_built_up_A = arcpy.management.MakeFeatureLayer(b_town_built_up_A, "b_town_built_up_A")
-        b_generalised_buildings_A = [fc for fc in fc_list if 'BJ0500_Generalised_Buildings_A' in fc][0]
+        b_generalised_buildings_A = fc_list.find('BJ0500_Generalised_Buildings_A')
         b_generalised_buildings_A = arcpy.management.MakeFeatureLayer(b_generalised_buildings_A, "b_generalised_buildings_A")
         b_Buildings_P = [fc for fc in fc_list for key in ['BA0010_Residential_Building_P','BC0010_Industrial_Building_P','BE0010_Educational_Building_P','BF0010_Building_Of_Worship_P'] if key in fc]
         for b_Building_fc in b_Buildings_P:
-            layer_name = arcpy.da.Describe(b_Building_fc)['name']
+            layer_name = describe(b_Building_fc)['name']
             b_Buildings_P_lyr = arcpy.management.MakeFeatureLayer(b_Building_fc, layer_name)
             # Get all field names from the current feature class
             all_fields = [f.name for f in arcpy.ListFields(b_Building_fc)]
@@ -1077,7 +1278,7 @@ def hide_blgs_under_built_up_area(fc_list, build_up_area_fcs, express_val_mx, ex
             arcpy.management.CalculateField(in_table=selected_fcs_gen, field=field_name, expression=express_val_mn, expression_type='PYTHON3')
 
         for fc in build_up_area_fcs:
-            fc_name = arcpy.da.Describe(fc)["name"]
+            fc_name = describe(fc)["name"]
             fc_lyr = arcpy.management.MakeFeatureLayer(fc, f"{fc_name}_layer")
             # Feature selection for B_Town_Built_Up_A
             selected_fcs_town = arcpy.management.SelectLayerByLocation(fc_lyr, 'INTERSECT', b_town_built_up_A, search_distance, 'NEW_SELECTION')
@@ -1096,7 +1297,7 @@ def hide_blgs_under_built_up_area(fc_list, build_up_area_fcs, express_val_mx, ex
 
 def apply_symbology(feature_layer, symbology_field_in, symbology_file_path, map_name, fc_name):
     try:
-        aprx = arcpy.mp.ArcGISProject('CURRENT')
+        aprx = get_project()
         maps = aprx.listMaps(map_name)[0]
         # Add layers into map
         lyr = maps.addDataFromPath(feature_layer)
@@ -1125,9 +1326,9 @@ def resolve_conflicts_points_polygon(fc_list, input_building_layers, input_barri
         arcpy.env.workspace = working_gdb
         # Get feature classes
         input_building_layers = list(filter(str.strip, input_building_layers))
-        input_building_layers = [fc for bld_lyr in input_building_layers for fc in fc_list if str(bld_lyr) in fc]
+        input_building_layers = fc_list.find_all(input_building_layers)
         input_barrier_layers = list(filter(str.strip, input_barrier_layers))
-        input_barrier_layers = [fc for bar_lyr in input_barrier_layers for fc in fc_list if str(bar_lyr) in fc]
+        input_barrier_layers = fc_list.find_all(input_barrier_layers)
         # Set bolean
         bolean = False
         building_list = []
@@ -1135,20 +1336,20 @@ def resolve_conflicts_points_polygon(fc_list, input_building_layers, input_barri
 
         # Make barrier feature layers
         for br_lyr in input_barrier_layers:
-            fc_name = arcpy.da.Describe(br_lyr)['aliasName']
+            fc_name = describe(br_lyr)['aliasName']
             basename = os.path.basename(br_lyr)
             barrier_list.append(fc_name)
             apply_symbology(br_lyr, hierarchy_field, symbology_file_path, map_name, basename)
        
         # Make building feature layers
         for b_lyr in input_building_layers:
-            fc_name = arcpy.da.Describe(b_lyr)['aliasName']
+            fc_name = describe(b_lyr)['aliasName']
             basename = os.path.basename(b_lyr)
             building_list.append(fc_name)
             apply_symbology(b_lyr, hierarchy_field, symbology_file_path, map_name, basename)
 
         # Get the map layers
-        aprx = arcpy.mp.ArcGISProject('CURRENT')
+        aprx = get_project()
         maps = aprx.listMaps(map_name)[0]
         # Get the feature layer
         fc_layers = maps.listLayers()
@@ -1174,7 +1375,7 @@ def align_points(point_fcs, align_fcs, distance, orient, ref_scale, hierarchy_fi
         # Set the reference scale to 1:50,000
         arcpy.env.referenceScale = ref_scale
         # Set spatial reference
-        sr = arcpy.da.Describe(point_fcs[0])['spatialReference']
+        sr = describe(point_fcs[0])['spatialReference']
         arcpy.env.cartographicCoordinateSystem = sr
 
         points_fc_list = []
@@ -1183,7 +1384,7 @@ def align_points(point_fcs, align_fcs, distance, orient, ref_scale, hierarchy_fi
         # Create layers for all input feature classes
         arcpy.AddMessage("Creating layers for points")
         for Point_fc in point_fcs:
-            fc_name = arcpy.da.Describe(Point_fc)['aliasName']
+            fc_name = describe(Point_fc)['aliasName']
             basename = os.path.basename(Point_fc)
             points_fc_list.append(fc_name)
             feature_count = count_features(Point_fc)
@@ -1194,7 +1395,7 @@ def align_points(point_fcs, align_fcs, distance, orient, ref_scale, hierarchy_fi
         # Create layers for all input feature classes
         arcpy.AddMessage("Creating layers for lines and polys")
         for align_fc in align_fcs:
-            fc_name = arcpy.da.Describe(align_fc)['aliasName']
+            fc_name = describe(align_fc)['aliasName']
             basename = os.path.basename(align_fc)
             align_fcs_list.append(fc_name)
             feature_count = count_features(align_fc)
@@ -1204,7 +1405,7 @@ def align_points(point_fcs, align_fcs, distance, orient, ref_scale, hierarchy_fi
                 arcpy.AddMessage("No features in " + str(align_fc))
         
         # Get the map layers
-        aprx = arcpy.mp.ArcGISProject('CURRENT')
+        aprx = get_project()
         maps = aprx.listMaps(map_name)[0]
 
         # Get the feature layer
@@ -1235,7 +1436,7 @@ def convert_polygon(in_p, secondary_list, minimum_area, in_prim_sql, working_gdb
     arcpy.env.workspace = working_gdb
     try:
         input_layer = 0
-        desc = arcpy.da.Describe(in_p)
+        desc = describe(in_p)
         fc_name = desc['name']
         secondary_layers = []
         input_primary_lyr = arcpy.management.MakeFeatureLayer(in_p, f"{working_gdb}\\{fc_name}_primary_lyr", in_prim_sql)
@@ -1243,7 +1444,7 @@ def convert_polygon(in_p, secondary_list, minimum_area, in_prim_sql, working_gdb
         secondary_names = []
         for value in secondary_list:
             value = value.strip("'")
-            desc = arcpy.da.Describe(value)
+            desc = describe(value)
             name = desc['name']
             secondary_names.append(name)
             value = arcpy.management.MakeFeatureLayer(value, f"{name}_secondary_lyr")
@@ -1259,7 +1460,7 @@ def convert_polygon(in_p, secondary_list, minimum_area, in_prim_sql, working_gdb
             arcpy.AddError("Minimum area must be above 0.")
             return
         # Use Describe object and get Shape Area field
-        area_field = arcpy.da.Describe(in_p)['areaFieldName']
+        area_field = describe(in_p)['areaFieldName']
         query = f"{area_field} >= {minimum_area}"
         arcpy.AddMessage(f"Applying minimum area filter with query: {query}")
 
@@ -1325,10 +1526,8 @@ def erase_features(input_primary, input_secondary, working_gdb, max_gap_area, fi
                     arcpy.management.RepairGeometry(in_sec, "DELETE_NULL", "ESRI")
                     # Erase Features
                     veg_erase = arcpy.analysis.Erase(in_sec, in_pri, "veg_erase")
-                    # Delete features
-                    arcpy.management.DeleteFeatures(in_sec)
-                    # Append erased feature with empty feature
-                    arcpy.management.Append(veg_erase, in_sec, "NO_TEST")
+                    # Replace the selected features with the erased features
+                    replace_features(in_sec, veg_erase)
                     if "HH0020_Lake_A" in in_pri:
                         fill_gaps_lake.append(in_pri)
                         fill_gaps_lake.append(in_sec)
@@ -1360,10 +1559,10 @@ def fix_veg_after_resolve_conflict(fc_list, input_primary, input_secondary, in_p
     try:
         # Get feature classes
         input_primary = list(filter(str.strip, input_primary))
-        input_primary = [fc for in_prim in input_primary for fc in fc_list if str(in_prim) in fc]
+        input_primary = fc_list.find_all(input_primary)
         input_secondary = list(filter(str.strip, input_secondary))
-        input_secondary = [fc for in_second in input_secondary for fc in fc_list if str(in_second) in fc]
-        river_coverage_A = [fc for fc in fc_list if 'HH0042_River_Coverage_A' in fc][0]
+        input_secondary = fc_list.find_all(input_secondary)
+        river_coverage_A = fc_list.find('HH0042_River_Coverage_A')
 
         # Convert polygons
         for in_p in input_primary:
@@ -1410,23 +1609,10 @@ def determine(input_lines, input_polygon, out_table, line_field, poly_field, wor
         # if at least on line touches one polygon
         # loop through all the line features
         if int(arcpy.management.GetCount(line_lyr)[0]) >= 1:
-            near_tab = arcpy.analysis.GenerateNearTable(line_lyr, poly_lyr, f"{working_gdb}\\line_near_poly", "0 Meters", closest="ALL")
-            line_to_poly = {}
-            line_ids = []
-            poly_ids = []
-            with arcpy.da.SearchCursor(near_tab, ['IN_FID', 'NEAR_FID']) as n_cur:
-                for n_row in n_cur:
-                    if n_row[0] in line_ids:
-                        cur_ids = line_to_poly[n_row[0]]
-                        cur_ids.append(n_row[1])
-                        line_to_poly[n_row[0]] = cur_ids
-                        poly_ids.append(n_row[1])
-                    else:
-                        line_ids.append(n_row[0])
-                        line_to_poly[n_row[0]] = [n_row[1]]
-                        poly_ids.append(n_row[1])
-
-            poly_ids = set(poly_ids)
+            line_fids, poly_fids, _ = near_pairs(line_lyr, poly_lyr, "0 Meters", working_gdb, "line_near_poly")
+            line_to_poly = spatial_index.group_pairs(line_fids, poly_fids)
+            line_ids = line_to_poly
+            poly_ids = set(poly_fids.tolist())
             poly_geos = {}
 
             with arcpy.da.SearchCursor(poly_lyr, ['oid@', 'SHAPE@']) as s_cur:
@@ -1444,7 +1630,7 @@ def determine(input_lines, input_polygon, out_table, line_field, poly_field, wor
                         poly_touches = line_to_poly[line_id]
                         start_pt = geo.firstPoint
                         end_pt = geo.lastPoint
-                        for touch_id in poly_touches:
+                        for touch_id in poly_touches.tolist():
                             poly_geo = poly_geos[touch_id]
                             if not poly_geo.disjoint(start_pt):
                                 #... add a record to the table
@@ -1457,9 +1643,6 @@ def determine(input_lines, input_polygon, out_table, line_field, poly_field, wor
                                 new_row = (row[0], touch_id, "end")
                                 i_cursor.insertRow(new_row)
             del i_cursor
-            
-            # Delete temp file
-            arcpy.management.Delete([near_tab])
 
     except Exception as e:
         tb = traceback.format_exc()
@@ -1470,10 +1653,10 @@ def reconnect_touching(input_polygon, input_lines, out_table, delete):
     # Set environment
     arcpy.env.overwriteOutput = True
     try:
-        desc = arcpy.da.Describe(input_polygon)
+        desc = describe(input_polygon)
         poly_name = desc['name']
         arcpy.AddMessage(poly_name)
-        line_name = arcpy.da.Describe(input_lines)['name']
+        line_name = describe(input_lines)['name']
         # Check the fields in output table to make sure they match the inputs
         l_match = ""
         p_match = ""
@@ -1508,8 +1691,7 @@ def reconnect_touching(input_polygon, input_lines, out_table, delete):
             arcpy.AddMessage(str(len(unique_values)) + " lines to test")
             # Loop through the lines
             if len(unique_values) >= 1:
-                where = "OBJECTID = "
-                where += " OR OBJECTID = ".join(unique_values)
+                where = oid_where(input_lines, unique_values)
                 line_lyr = arcpy.management.MakeFeatureLayer(input_lines, "in_line_lyr", where)
                 arcpy.management.SelectLayerByLocation(line_lyr, "INTERSECT", input_polygon, invert_spatial_relationship="INVERT")
 
@@ -1582,7 +1764,7 @@ def recreate_boundary_lines(boundary_line, polygon, topology_fcs=[]):
     try:
         # Determine info for main_fc
         if int(arcpy.management.GetCount(polygon)[0]) >= 1:
-            main_name = arcpy.da.Describe(polygon)['name']
+            main_name = describe(polygon)['name']
             main_field = "FID_" + main_name
             query = main_field + " <> -1"
 
@@ -1591,7 +1773,7 @@ def recreate_boundary_lines(boundary_line, polygon, topology_fcs=[]):
                 topo_fc = str(feat_class)
                 if topo_fc != polygon:
                     if int(arcpy.management.GetCount(topo_fc)[0]) >= 1:
-                        name = arcpy.da.Describe(topo_fc)['name']
+                        name = describe(topo_fc)['name']
                         topo_names.append(name)
                         if name != main_name:
                             query += (" AND FID_" + name + " = -1")
@@ -1625,11 +1807,8 @@ def recreate_boundary_lines(boundary_line, polygon, topology_fcs=[]):
             else:
                 arcpy.management.SelectLayerByAttribute(temp_layer, "CLEAR_SELECTION")
                 with_atts = temp_layer
-            arcpy.AddMessage(" ... Deleting lines from boundary" )
-            arcpy.management.DeleteFeatures(boundary_line)
-
-            arcpy.AddMessage(" ... Appending new lines to boundary")
-            arcpy.management.Append(with_atts, boundary_line, "NO_TEST")
+            arcpy.AddMessage(" ... Replacing lines of boundary" )
+            replace_features(boundary_line, with_atts)
         else:
             arcpy.AddMessage(" ... Deleting lines from boundary" )
             arcpy.management.DeleteFeatures(boundary_line)
@@ -1642,7 +1821,7 @@ def recreate_boundary_lines(boundary_line, polygon, topology_fcs=[]):
 def getAttributeValue(dataset, objectid, field):
     try:
         # Get OBJECTID field
-        oid_fld = arcpy.da.Describe(dataset)['OIDFieldName']
+        oid_fld = describe(dataset)['OIDFieldName']
         # Create where clause to only get feature with OBJECTID passed to function
         where = f"{oid_fld} = {objectid}"
         # Create a feature layer of a single feature for the OBJECTID
@@ -1670,7 +1849,7 @@ def trim_polygon_within_distance(input_poly, name_fld, compare_feature, distance
     
         # Only include polys that have a name or have an area greater than 2,500 meters
         # Create where clause
-        area_fld_d = arcpy.da.Describe(input_poly)['areaFieldName']
+        area_fld_d = describe(input_poly)['areaFieldName']
         where = ("(" + name_fld + " <> '' AND " + name_fld + " IS NOT NULL) OR (" +
                  area_fld_d + " > " + str(min_area) + ")")
         arcpy.AddMessage(where)
@@ -1679,161 +1858,60 @@ def trim_polygon_within_distance(input_poly, name_fld, compare_feature, distance
 
         comp_lyr = arcpy.management.MakeFeatureLayer(compare_feature, "comp_lyr")
         clean_list.append("comp_lyr")
-        comp_type = arcpy.da.Describe(compare_feature)['shapeType']
-        comp_name = arcpy.da.Describe(compare_feature)['name']
-        input_name = arcpy.da.Describe(input_poly)['name']
-
-        arcpy.AddMessage("Querying features within " + str(distance) + " of each other...")
-        # Generate near table to find all polygons within 12.5 meters of each other
-        near_tbl = arcpy.analysis.GenerateNearTable("poly_lyr", comp_lyr, "near_tbl", distance, closest="ALL").getOutput(0)
-        clean_list.append(near_tbl)
-
-        arcpy.AddMessage("Processing features...")
-        # Loop through table and store all IN_FID values in a dictionary as the key
-        #    with the NEAR_FID in a list as a value
-        fids_dict = {}
-        with arcpy.da.SearchCursor(near_tbl, ["IN_FID", "NEAR_FID"]) as cur:
-            for row in cur:
-                if str(row[0]) not in fids_dict.keys():
-                    # If IN_FID is not already a key in the dictionary,
-                    #    add the key and value to the dictionary
-                    fids_dict[str(row[0])] = [str(row[1])]
-                else:
-                    # Else, if IN_FID is already a key in the dictionary,
-                    #    append the value to the list of values for that key
-                    fids_dict[str(row[0])].append(str(row[1]))
-
-        # Initialize geometry look-up table in dictionary. This dictionary will
-        #     be used as a look-up table within the update cursor when the
-        #     geometry of each feature in the poly layer is updated to meet the
-        #     distance requirement.
-        geom_dict = {}
-
-        # Initialize list of OBJECTIDs for features that need their geom updated
-        oid_list = []
-
-        # # Create empty geometry to store intermediate data in memory
-        # g = arcpy.Geometry()
-
-        # Key/value pairs are duplicated in dictionary. For example:
-        #     {'1': ['2'], '2': [1]}
-        #     Need to maintain list to save time so not checking same pair
-        #     of geometries more than once
-        kv_list = []
-        # Loop through key/value pairs in dictionary
-        #     Find intersection of buffers, and erase intersection from larger poly
-        for key, val in fids_dict.items():
-            # Initialize updated key flag to False
-            #     It's possible that there could be two or more NEAR_FID features
-            #     for a given IN_FID (if len(val) > 1).  In that case, if the geom
-            #     of the key is updated, need to use the updated geom when creating
-            #     buffers and erasing intersection
-            updated_key = False
-            # Get geometry of IN_FID
-            infid_shp = getAttributeValue("poly_lyr", key, "SHAPE@")
-
-            # Create buffer around IN_FID
-            g = f"{working_gdb}\\infid_buff"
-            infid_buff = arcpy.analysis.Buffer(infid_shp, g, distance)
-            infid_buff = [row[0] for row in arcpy.da.SearchCursor(infid_buff, ['SHAPE@'])][0]
-
-            # Value in dictionary is a list of NEAR_FID records
-            #    Loop through each NEAR_FID in list
-            for v in val:
-                # Check if key/value pair has already been tested
-                if (key, v) not in kv_list:
-                    # Append key/value tuple to list as (value, key)
-                    kv_list.append((v, key))
-
-                    nearfid_shp = getAttributeValue(comp_lyr, v, "SHAPE@")
-
-                    # Check if updated key flag is true. If it is, then use updated
-                    #     key geom to create buffer instead of original key geom
-                    if updated_key:
-                        # Create buffer around IN_FID
-                        g = f"{working_gdb}\\infid_buff"
-                        infid_buff = arcpy.analysis.Buffer(new_key, g, distance)
-                        infid_buff = [row[0] for row in arcpy.da.SearchCursor(infid_buff, ['SHAPE@'])][0]
-
-                    # Create buffer around NEAR_FID
-                    g = f"{working_gdb}\\nearfid_buff"
-                    nearfid_buff = arcpy.analysis.Buffer(nearfid_shp, g, distance)
-                    nearfid_buff = [row[0] for row in arcpy.da.SearchCursor(nearfid_buff, ['SHAPE@'])][0]
-
-                    # Get intersection between IN_FID buffer and NEAR_FID buffer
-                    g = f"{working_gdb}\\intrsct"
-                    intrsct = arcpy.analysis.Intersect([infid_buff, nearfid_buff], g)
-                    intrsct = [row[0] for row in arcpy.da.SearchCursor(intrsct, ['SHAPE@'])][0]
-
-                    # Get geometry of both IN_FID and NEAR_FID to determine larger feature
-                    #     Intersection will be erased from larger feature - from Amber:
-                    #     "The reason why I vote to remove the geometry from the larger of
-                    #     the two polygons is there are other requirements that each of the
-                    #     polygons be at least 2500 meters square so we make some of the
-                    #     polygons bigger.  Most of the time, the reason my the lakes are so
-                    #     close together is because one of them was made larger and if we
-                    #     remove the geometry from that feature, it now becomes less than
-                    #     the minimum size."
-                    infid_area = infid_shp.area
-                    if comp_type == "Polygon":
-                        nearfid_area = nearfid_shp.area
-                    else:
-                        nearfid_area = 0
-
-                    # Erase intersection from larger geometry
-                    # Erasing intersection of buffers will ensure that no other feature
-                    #     is within 12.5 meters of the polygon
-                    if infid_area > nearfid_area:
-                        update_feat = key # This is the OID of the geom that needs to be updated
-                        # Set update key flag to True
-                        updated_key = True
-                        new_key = infid_shp
-                        # Append IN_FID value (key) to OBJECTID list
-                        oid_list.append(key)
-                    else:
-                        update_feat = v # This is the OID of the geom that needs to be updated
-                        # Append NEAR_FID value (v in val) to OBJECTID list
-                        oid_list.append(v)
-
-                    # Store result from erase in the geometry look-up dictionary as the
-                    #     value where the key is the ObjectID of the feature that needs
-                    #     to be updated.
-                    if update_feat in geom_dict:
-                        geom_shp = geom_dict[update_feat]
-                        union_shp = geom_shp.union(intrsct)
-                        geom_dict[update_feat] = union_shp
-
-                    else:
-                        geom_dict[update_feat] = intrsct
-
-        # Remove duplicates from the OBJECTID list and create where clause
-        #     for use in Update Cursor
-        oid_list = list(set(oid_list))
-        # Sort list numerically. When list of OBJECTIDs is printed to GP Window,
-        #     it will be easier to follow if OBJECTIDs are printed numerically.
-        oid_list.sort()
+        comp_type = describe(compare_feature)['shapeType']
+        comp_name = describe(compare_feature)['name']
+        input_name = describe(input_poly)['name']
+
+        backend = geometry_backend.get_backend("arcpy")
+        same_dataset = describe(input_poly)['catalogPath'] == describe(compare_feature)['catalogPath']
+        partitions = partition_polygons()
+        if partitions:
+            arcpy.AddMessage(f"Processing features in {len(partitions)} cartographic partitions...")
+            in_store = FeatureStore.from_arcpy("poly_lyr", [])
+            comp_store = FeatureStore.from_arcpy(comp_lyr, [])
+            in_rows = [row for row, geo in zip(in_store.active_rows(), in_store.geometries()) if geo is not None]
+            comp_rows = [row for row, geo in zip(comp_store.active_rows(), comp_store.geometries()) if geo is not None]
+            # Erase areas of every partition, the features on the seams are done last
+            erase_wkb = partition_executor.run_partitioned(
+                trim_polygons.trim_task, in_store.oids[in_rows], in_store.geometries(in_rows), partitions,
+                spatial_index.linear_distance(distance), (distance, comp_type == "Polygon", same_dataset),
+                comp_store.oids[comp_rows], comp_store.geometries(comp_rows),
+                partition_executor.parse_workers(arcpy.env.parallelProcessingFactor))
+            spat_ref = describe(input_poly)['spatialReference']
+            geom_dict = {oid: backend.from_wkb(wkb, spat_ref) for oid, wkb in erase_wkb.items()}
+        else:
+            arcpy.AddMessage("Querying features within " + str(distance) + " of each other...")
+            # Generate near table to find all polygons within 12.5 meters of each other
+            in_fids, near_fids, _ = near_pairs("poly_lyr", comp_lyr, distance, working_gdb, "near_tbl")
+
+            arcpy.AddMessage("Processing features...")
+            # Load the candidate geometries once and buffer them in memory
+            in_set = set(in_fids.tolist())
+            near_set = set(near_fids.tolist())
+            in_geoms = {oid: geo for oid, geo in zip(*backend.read_features("poly_lyr")[:2]) if oid in in_set or oid in near_set}
+            near_geoms = {oid: geo for oid, geo in zip(*backend.read_features(comp_lyr)[:2]) if oid in near_set}
+
+            # Find intersection of buffers, to be erased from larger poly
+            geom_dict = trim_polygons.trim_erase_areas(in_geoms, near_geoms, in_fids, near_fids, distance,
+                                                       comp_type == "Polygon", same_dataset, backend)
         erase_geos = []
 
-        if len(oid_list) >= 1:
+        if len(geom_dict) >= 1:
             arcpy.AddMessage("Updating feature geometry...")
 
             # Where clause to create subset of only features with geom updates
-            oid_fld = arcpy.da.Describe(input_poly)['OIDFieldName']
-            where_updates = oid_fld + " = " + (" OR " + oid_fld + " = ").join(oid_list)
+            where_updates = oid_where(input_poly, geom_dict)
 
             # Create update cursor to update poly geometries
             with arcpy.da.UpdateCursor("poly_lyr", ["OID@", "SHAPE@", "INVISIBILITY"], where_updates) as cur:
                 for row in cur:
                     # Use geometry look-up dictionary to get poly geometry
                     #     associated with OBJECTID
-                    shp = geom_dict[str(row[0])]
-                    g = f"{working_gdb}\\erase"
-                    erase = arcpy.analysis.Erase(row[1], shp, g)
-                    erase = [row[0] for row in arcpy.da.SearchCursor(erase, ['SHAPE@'])]
-                    if erase:
-                        new_shp = erase[0]
+                    shp = geom_dict[row[0]]
+                    new_shp, large_enough = trim_polygons.apply_trim(row[1], shp, min_area, backend)
+                    if new_shp:
                         erase_geos.append(shp)
-                        if new_shp.area >= min_area:
+                        if large_enough:
                             arcpy.AddMessage("Updating geometry of feature " + str(row[0]))
                             # Update geometry with poly geometry
                             row[1] = new_shp
@@ -1882,7 +1960,7 @@ def trim_polygon_within_distance(input_poly, name_fld, compare_feature, distance
         arcpy.AddMessage(error_message)
 
 def make_unique_layers(layer_list, map_name):
-    aprx = arcpy.mp.ArcGISProject('CURRENT')
+    aprx = get_project()
     maps = aprx.listMaps(map_name)[0]
 
     unique = {}
@@ -1951,21 +2029,14 @@ def ConvertEnclosed(primaryFCLyr, secondaryFCLyrs, working_gdb):
     arcpy.env.overwriteOutput = 1
     arcpy.env.workspace = working_gdb
     try:
-        secondaryFCNames = []
-        for layer in secondaryFCLyrs:
-            desc = arcpy.da.Describe(layer)
-            FCName = desc['name']
-            secondaryFCNames.append(layer)
-
         delete_ids = []
         for i in range(len(secondaryFCLyrs)):    # keep all secondary lists indices same
             surroundingFCLyr = secondaryFCLyrs[i]
+            surroundName = describe(surroundingFCLyr)['name']
 
             # Get new selection to refresh selection set
             with arcpy.da.SearchCursor(primaryFCLyr, ("OID@", "SHAPE@")) as cursor:
                 for row in cursor:
-                    desc = arcpy.da.Describe(surroundingFCLyr)
-                    surroundName = desc['name']
                     primaryOID = row[0]
                     primary_geo = row[1]
 
@@ -1973,7 +2044,7 @@ def ConvertEnclosed(primaryFCLyr, secondaryFCLyrs, working_gdb):
                     spatialSelectedFeatures = arcpy.management.SelectLayerByLocation(surroundingFCLyr, "COMPLETELY_CONTAINS", primary_geo)
                     if int(arcpy.management.GetCount(spatialSelectedFeatures).getOutput(0)) > 0:
                         # Get ID of ssurrounding feature
-                        surroundingFIDSet = [int(oid) for oid in arcpy.da.Describe(surroundingFCLyr)['FIDSet']]
+                        surroundingFIDSet = [int(oid) for oid in describe(surroundingFCLyr)['FIDSet']]
                         # Create temp fc to store and process geometry
                         tempContainedFC =  surroundName + "_removeContainedPolygonsTmp"
                         # Copy surrounding feature to temp FC
@@ -2008,9 +2079,7 @@ def ConvertEnclosed(primaryFCLyr, secondaryFCLyrs, working_gdb):
 
         if len(delete_ids) >= 1:
             # delete the original features
-            where = "OBJECTID = "
-            where += " OR OBJECTID = ".join(delete_ids)
-            arcpy.management.SelectLayerByAttribute(primaryFCLyr, "NEW_SELECTION", where)
+            select_by_oids(primaryFCLyr, delete_ids)
             arcpy.management.DeleteFeatures(primaryFCLyr)
 
     except Exception as e:
@@ -2038,15 +2107,15 @@ def ConvertOverlapping(primaryFCLyr, secondaryFCLyrs, working_gdb):
             scratch = arcpy.env.scratchGDB
             arcpy.management.FeatureToLine(inputLayers, featureToLineFC, "", "ATTRIBUTES")
 
-            desc = arcpy.da.Describe(primaryFCLyr)['catalogPath']
-            primaryFCName = arcpy.da.Describe(desc)['name']
+            desc = describe(primaryFCLyr)['catalogPath']
+            primaryFCName = describe(desc)['name']
 
             lstQueryFields = []
             secondaryFIDFields = []
             secondaryFCNames = []
             for layer in secondaryFCLyrs:
-                desc = arcpy.da.Describe(layer)['catalogPath']
-                FCName = arcpy.da.Describe(desc)['name']
+                desc = describe(layer)['catalogPath']
+                FCName = describe(desc)['name']
                 secondaryFCNames.append(layer)
                 secondaryFIDFields.append("FID_" + str(FCName))
                 lstQueryFields.append("FID_" + str(FCName))
@@ -2057,7 +2126,7 @@ def ConvertOverlapping(primaryFCLyr, secondaryFCLyrs, working_gdb):
             if primaryFIDField in secondaryFIDFields:
                 secondaryFIDFields.remove(primaryFIDField)
             # Create a Describe object from the GDB Feature Class
-            desc = arcpy.da.Describe(featureToLineFC)
+            desc = describe(featureToLineFC)
             shapeLength = desc['lengthFieldName']
 
             # Get all unique primary IDs
@@ -2158,7 +2227,7 @@ def feature2point(working_gdb, inFc, point_fc, min_size, delete_input, one_point
     try:
         clean_list = []
         # Use Describe object and get Shape Area field
-        desc = arcpy.da.Describe(inFc)
+        desc = describe(inFc)
         if desc['shapeType'] == 'Polygon':
             size_field  = desc['areaFieldName']
             oid_field = desc['OIDFieldName']
@@ -2262,7 +2331,7 @@ def feature2point_bldg(inFc, point_fc, min_size, delete_input, one_point, unique
 
     try:
         # Use Describe object and get Shape Area field
-        desc = arcpy.da.Describe(inFc)
+        desc = describe(inFc)
         if desc['shapeType'] == 'Polygon':
             size_field  = desc['areaFieldName']
             unique_delimit = arcpy.AddFieldDelimiters(inFc, unique_field)
@@ -2323,7 +2392,7 @@ def gen_shared_features(main_fc, generalize_operations, simple_tolerance, smooth
         if has_features(main_fc):
             arcpy.AddMessage("Determining shared edges...")
             # Determine info for main_fc
-            main_name = arcpy.da.Describe(main_fc)['name']
+            main_name = describe(main_fc)['name']
             # Split topology fcs
             for topo_fc in topology_fcs:
                 fcs, fc_paths = process_fc(topo_fc, fcs, fc_paths) 
@@ -2385,11 +2454,11 @@ def gen_shared_features(main_fc, generalize_operations, simple_tolerance, smooth
                 # Based on the temp feature classes determine the matching original feature class
                 feat_class = str(feat_class)
                 if arcpy.Exists(feat_class):
-                    name = arcpy.da.Describe(feat_class)['name']
+                    name = describe(feat_class)['name']
                     topo_feat_class = fc_paths[name]
-                    arcpy.AddMessage("Rebuilding " + arcpy.da.Describe(topo_feat_class)['catalogPath'] + "...")
+                    arcpy.AddMessage("Rebuilding " + describe(topo_feat_class)['catalogPath'] + "...")
                     # If the geometry type of the feature class is a polygon
-                    shape_type = arcpy.da.Describe(topo_feat_class)['shapeType']
+                    shape_type = describe(topo_feat_class)['shapeType']
                     if shape_type == "Polygon":
                         id_cnt = find_id_fields(name, fields)
                         left_field = fields[id_cnt+1].name
@@ -2420,7 +2489,27 @@ def gen_shared_features(main_fc, generalize_operations, simple_tolerance, smooth
         error_message = f"Generalised shared features error: {e}\nTraceback details:\n{tb}"
         arcpy.AddMessage(error_message) 
 
-def enlarge_polygon_barrier(polygon_fc, sql, intersect_fc, minimum_size, enlarge, barrier_fcs, working_gdb):
+def enlarge_features_batch(small_features, polygon_path, minimum_size, enlarge, barrier_fcs, workers=1):
+    ''' Enlarges all the small features at once. The barrier features are read
+    into one spatial index, the buffer distance of each feature is found by
+    bisection and the enlarged geometries are written back in one pass '''
+    store = FeatureStore.from_arcpy(small_features, [])
+    barriers = None
+    if len(barrier_fcs) >= 1:
+        arcpy.AddMessage("Indexing barrier features")
+        barriers = enlarge_polygons.BarrierIndex.from_stores([FeatureStore.from_arcpy(str(barrier), []) for barrier in barrier_fcs])
+
+    oids = store.active_oids().tolist()
+    results = enlarge_polygons.enlarge_all(store.geometries(), minimum_size, enlarge, barriers, polygon_path, oids, workers)
+    for oid, new_geo in zip(oids, results):
+        if new_geo is None:
+            arcpy.AddWarning(f"Cannot enlarge feature {oid} without crossing barriers.")
+        else:
+            arcpy.AddMessage(str(oid) + " enlarged to " + str(new_geo.area))
+            store.set_geometry(oid, new_geo)
+    store.flush(polygon_path, geometry_backend.get_backend("arcpy"))
+
+def enlarge_polygon_barrier(polygon_fc, sql, intersect_fc, minimum_size, enlarge, barrier_fcs, working_gdb, workers=1):
     # Set the workspace
     arcpy.env.overwriteOutput = True
     arcpy.env.workspace = working_gdb
@@ -2431,7 +2520,7 @@ def enlarge_polygon_barrier(polygon_fc, sql, intersect_fc, minimum_size, enlarge
 
         #--- determine query for selecting features ---#
         # Find area field
-        desc = arcpy.da.Describe(polygon_fc)
+        desc = describe(polygon_fc)
         fc_name = desc['name']
         area_delimited = desc['areaFieldName']
         oid_delimited = desc['OIDFieldName']
@@ -2458,89 +2547,92 @@ def enlarge_polygon_barrier(polygon_fc, sql, intersect_fc, minimum_size, enlarge
 
         if has_features(small_features):
             arcpy.AddMessage(str(count) + " features are smaller than the minimum size and need to be enlarged.")
-            # Open update cursor
-            with arcpy.da.UpdateCursor(small_features, ['OID@', 'SHAPE@']) as cursor:
-                for row in cursor:
-                    geo = row[1]
-                    newgeo = geo
-                    arcpy.AddMessage("Processing " + str(row[0]))
-                    # Get centerpoint of geometry
-                    pt = geo.centroid
-                    new_area = geo.area - 1
-                    # Determine if starting geometry crosses any features
-                    if len(barrier_fcs) >= 1:
-                        arcpy.AddMessage("Determining if expanded geometry is crossed")
-                    while new_area < float(minimum_size):
-                        # Buffer the feature until it is bigger that the minimum size
-                        newgeo = newgeo.buffer(enlarge)
-                        prev_area = new_area
-                        if newgeo.area >= float(minimum_size):
-                            arcpy.AddMessage(str(row[0]) + " enlarged to " + str(newgeo.area))
-
-                            # If barrier feature classes are specified
-                            if len(barrier_fcs) >= 1:
-                                intersect_layers = []
-                                cnt = 0
-                                # find any features from the barrier feature classes that cross the new geometry.
-                                for barrier in barrier_fcs:
-                                    barrier = str(barrier)
-                                    cnt += 1
-                                    desc = arcpy.da.Describe(barrier)
-                                    fcName = desc['name']
-
-                                    layerName = "layer_" + str(cnt)
-                                    barrier_lyr = arcpy.management.MakeFeatureLayer(barrier, layerName)
-                                    clean_list.append(barrier_lyr)
-
-                                    # Select the features from the barrier FC that intersect the buffered geometry
-                                    arcpy.management.SelectLayerByLocation(barrier_lyr, "INTERSECT", newgeo)
-                                    # Ignore the features that were already within the original geometry of the feature
-                                    arcpy.management.SelectLayerByLocation(barrier_lyr, "WITHIN", geo, "", "REMOVE_FROM_SELECTION")
-                                    # If the barrier feature class is the polygon fC
-                                    if fcName == fc_name:
-                                        # Remove the feature we are processing from the selection
-                                        searchIDQuery = oid_delimited + " = " + str(row[0])
-                                        arcpy.management.SelectLayerByAttribute(barrier_lyr, "REMOVE_FROM_SELECTION", searchIDQuery)
-
-                                    # count = int(arcpy.management.GetCount(barrier_lyr).getOutput(0))
-                                    if has_features(barrier_lyr):   #Joy added has_features check instead of count check
-                                        intersect_layers.append(barrier_lyr)
-
-                                # If any features from the barrier cross the geometry
-                                if len(intersect_layers) >= 1:
-                                    arcpy.AddMessage("Enlarged feature touches a barrier feature")
-                                    # Create new geometries that are split by the crossing feature
-                                    if arcpy.Exists(f"{working_gdb}\\TempGeo"):
-                                        arcpy.management.Delete(f"{working_gdb}\\TempGeo")
-                                    geofeat = arcpy.management.CopyFeatures(newgeo, f"{working_gdb}\\TempGeo")
-                                    intersect_layers.append(geofeat)
-
-                                    out_poly = f"{working_gdb}\\outpoly"
-                                    if arcpy.Exists(f"{working_gdb}\\outpoly"):
-                                        arcpy.management.Delete(out_poly)
-                                    arcpy.management.FeatureToPolygon(intersect_layers, out_poly)
-                                    with arcpy.da.SearchCursor(out_poly, ["SHAPE@"]) as mem_cur:
-                                        for mem_row in mem_cur:
-                                            # Find the part of the geometry that contains the center of the original geometry.
-                                            if pt.within(mem_row[0]):
-                                                # Keep that geometry
-                                                arcpy.AddMessage("Enlarged feature will be split at barrier.")
-                                                newgeo = mem_row[0]
-
-                                                arcpy.AddMessage(str(row[0]) + " split to " + str(newgeo.area))
-
-                            new_area = newgeo.area
-                            if new_area >= float(minimum_size):
-                                arcpy.AddMessage("Update Record")
-                                row[1] = newgeo
-                                cursor.updateRow(row)
-
-                            arcpy.AddMessage("Assign new area")
-                            arcpy.AddMessage(str(round(prev_area, 12)))
-                            arcpy.AddMessage(str(round(new_area, 12)))
-                            if prev_area == new_area:
-                                arcpy.AddWarning("Cannot enlarge feature without crossing barriers.")
-                                new_area = float(minimum_size) + 1.0
+            if spatial_index.has_spatial_index():
+                enlarge_features_batch(small_features, desc['catalogPath'], float(minimum_size), enlarge, barrier_fcs, workers)
+            else:
+                # Open update cursor
+                barrier_names = {str(barrier): describe(str(barrier))['name'] for barrier in barrier_fcs}
+                with arcpy.da.UpdateCursor(small_features, ['OID@', 'SHAPE@']) as cursor:
+                    for row in cursor:
+                        geo = row[1]
+                        newgeo = geo
+                        arcpy.AddMessage("Processing " + str(row[0]))
+                        # Get centerpoint of geometry
+                        pt = geo.centroid
+                        new_area = geo.area - 1
+                        # Determine if starting geometry crosses any features
+                        if len(barrier_fcs) >= 1:
+                            arcpy.AddMessage("Determining if expanded geometry is crossed")
+                        while new_area < float(minimum_size):
+                            # Buffer the feature until it is bigger that the minimum size
+                            newgeo = newgeo.buffer(enlarge)
+                            prev_area = new_area
+                            if newgeo.area >= float(minimum_size):
+                                arcpy.AddMessage(str(row[0]) + " enlarged to " + str(newgeo.area))
+
+                                # If barrier feature classes are specified
+                                if len(barrier_fcs) >= 1:
+                                    intersect_layers = []
+                                    cnt = 0
+                                    # find any features from the barrier feature classes that cross the new geometry.
+                                    for barrier in barrier_fcs:
+                                        barrier = str(barrier)
+                                        cnt += 1
+                                        fcName = barrier_names[barrier]
+
+                                        layerName = "layer_" + str(cnt)
+                                        barrier_lyr = arcpy.management.MakeFeatureLayer(barrier, layerName)
+                                        clean_list.append(barrier_lyr)
+
+                                        # Select the features from the barrier FC that intersect the buffered geometry
+                                        arcpy.management.SelectLayerByLocation(barrier_lyr, "INTERSECT", newgeo)
+                                        # Ignore the features that were already within the original geometry of the feature
+                                        arcpy.management.SelectLayerByLocation(barrier_lyr, "WITHIN", geo, "", "REMOVE_FROM_SELECTION")
+                                        # If the barrier feature class is the polygon fC
+                                        if fcName == fc_name:
+                                            # Remove the feature we are processing from the selection
+                                            searchIDQuery = oid_delimited + " = " + str(row[0])
+                                            arcpy.management.SelectLayerByAttribute(barrier_lyr, "REMOVE_FROM_SELECTION", searchIDQuery)
+
+                                        # count = int(arcpy.management.GetCount(barrier_lyr).getOutput(0))
+                                        if has_features(barrier_lyr):   #Joy added has_features check instead of count check
+                                            intersect_layers.append(barrier_lyr)
+
+                                    # If any features from the barrier cross the geometry
+                                    if len(intersect_layers) >= 1:
+                                        arcpy.AddMessage("Enlarged feature touches a barrier feature")
+                                        # Create new geometries that are split by the crossing feature
+                                        if arcpy.Exists(f"{working_gdb}\\TempGeo"):
+                                            arcpy.management.Delete(f"{working_gdb}\\TempGeo")
+                                        geofeat = arcpy.management.CopyFeatures(newgeo, f"{working_gdb}\\TempGeo")
+                                        intersect_layers.append(geofeat)
+
+                                        out_poly = f"{working_gdb}\\outpoly"
+                                        if arcpy.Exists(f"{working_gdb}\\outpoly"):
+                                            arcpy.management.Delete(out_poly)
+                                        arcpy.management.FeatureToPolygon(intersect_layers, out_poly)
+                                        with arcpy.da.SearchCursor(out_poly, ["SHAPE@"]) as mem_cur:
+                                            for mem_row in mem_cur:
+                                                # Find the part of the geometry that contains the center of the original geometry.
+                                                if pt.within(mem_row[0]):
+                                                    # Keep that geometry
+                                                    arcpy.AddMessage("Enlarged feature will be split at barrier.")
+                                                    newgeo = mem_row[0]
+
+                                                    arcpy.AddMessage(str(row[0]) + " split to " + str(newgeo.area))
+
+                                new_area = newgeo.area
+                                if new_area >= float(minimum_size):
+                                    arcpy.AddMessage("Update Record")
+                                    row[1] = newgeo
+                                    cursor.updateRow(row)
+
+                                arcpy.AddMessage("Assign new area")
+                                arcpy.AddMessage(str(round(prev_area, 12)))
+                                arcpy.AddMessage(str(round(new_area, 12)))
+                                if prev_area == new_area:
+                                    arcpy.AddWarning("Cannot enlarge feature without crossing barriers.")
+                                    new_area = float(minimum_size) + 1.0
         else:
             arcpy.AddMessage("No features smaller than minimum size.")
         # Delete temp files
@@ -2564,7 +2656,7 @@ def erase_polygons_by_replace(enlargeFC, eraseList, sql, working_gdb):
             if arcpy.Exists(erase):
                 # count = int(arcpy.management.GetCount(erase)[0])
                 if has_features(erase):   #Joy added has_features check instead of count check
-                    desc = arcpy.da.Describe(erase)
+                    desc = describe(erase)
                     fcName = desc['name']
                     arcpy.AddMessage("comparing " + fcName + " to " + enlargeFC)
                     if sql:
@@ -2581,11 +2673,8 @@ def erase_polygons_by_replace(enlargeFC, eraseList, sql, working_gdb):
                         arcpy.AddMessage("output: " + erase_out)
                         arcpy.analysis.Erase(erase_features, enlarge_features, erase_out)
 
-                        arcpy.AddMessage("Deleting features in " + fcName)
-                        arcpy.management.DeleteFeatures(erase_features)
-
-                        arcpy.AddMessage("Adding erased features to " + fcName)
-                        arcpy.management.Append(erase_out, erase, "NO_TEST")
+                        arcpy.AddMessage("Replacing features in " + fcName + " with erased features")
+                        replace_features(erase_features, erase_out)
 
                         if arcpy.Exists(erase_out):
                             arcpy.management.Delete(erase_out)
@@ -2607,93 +2696,38 @@ def merge_touching_features_new(polygon_fc, sql, name_field, working_gdb):
             poly_layer = arcpy.management.MakeFeatureLayer(polygon_fc, "poly_layer")
 
         arcpy.AddMessage("Dissolving Touching Features")
-        near = arcpy.analysis.GenerateNearTable(poly_layer, poly_layer, f"{working_gdb}\\near_tab", "0 Meters", "NO_LOCATION", "NO_ANGLE", "ALL")
-        touching_ids = []
-        near_dict = {}
-        with arcpy.da.SearchCursor(near, ["IN_FID", "NEAR_FID"]) as cursor:
-            for row in cursor:
-                # If this is the first record for that in_fid value
-                if row[0] not in touching_ids:
-                    # Add to the touching_ids list and near dictionary
-                    touching_ids.append(row[0])
-                    near_dict[row[0]] = [row[1]]
-                # If this is not the first record
-                else:
-                    # Updated the dictionary to add the new near id
-                    cur_list = near_dict[row[0]]
-                    cur_list.append(row[1])
-                    near_dict[row[0]] = cur_list
+        in_fids, near_fids, _ = near_pairs(poly_layer, poly_layer, "0 Meters", working_gdb, "near_tab")
+        touching_ids = np.unique(in_fids)
 
         arcpy.AddMessage(str(len(touching_ids)) + " features touch other features.")
         if len(touching_ids) >= 1:
-            geo_dict = {}
-            with arcpy.da.SearchCursor(poly_layer, ['oid@', 'shape@', name_field]) as cursor:
-                for row in cursor:
-                    if row[0] in touching_ids:
-                        if row[2]:
-                            name_val = row[2]
-                        else:
-                            name_val = "None"
-                        geo_dict[row[0]] = [row[1], name_val]
-
-            keep_ids = []
-            delete_ids = []
-            with arcpy.da.UpdateCursor(poly_layer, ['oid@', 'shape@', name_field], sql_clause=(None, "ORDER BY " + name_field + " DESC")) as cursor:
-                for row in cursor:
-                    obj_id = row[0]
-                    merged_ids = []
-                    # If close to another feature but hasn't already been merged
-                    if obj_id in touching_ids and obj_id not in merged_ids:
-                        arcpy.AddMessage(str(obj_id))
-                        # Get a list of the ids that touch
-                        keep_ids.append(obj_id)
-                        id_list = near_dict[obj_id]
-                        new_geo = row[1]
-                        name_list = [row[2]]
-
-                        while len(id_list) >= 1:
-                            arcpy.AddMessage(str(len(id_list)) + " possible features to merge")
-                            value = id_list.pop()
-                            arcpy.AddMessage(value)
-                            near_vals = geo_dict[value]
-                            near_name = near_vals[1]
-                            name_list.append(near_name)
-
-                            # Get geometry
-                            merged_ids.append(value)
-                            merged_id_set = set(merged_ids)
-                            near_geo = near_vals[0]
-                            new_geo = new_geo.union(near_geo)
-
-                            # Determine if this feature touches any other features
-                            if value in near_dict:
-                                new_ids = set(near_dict[value])
-                                new_ids = new_ids - merged_id_set
-                                if obj_id in new_ids:
-                                    new_ids.remove(obj_id)
-                                if len(new_ids) >= 1:
-                                    (str(len(new_ids)) + " added features to merge")
-                                    id_list.extend(new_ids)
-                            if value in id_list:
-                                id_list.remove(value)
-
-                        # Update row with new geometry get a list of unique names - if null and one other then OK to dissolve
-                        name_list = set(name_list)
-                        if "None" in name_list:
-                            name_list.remove("None")
-
-                        if not new_geo.isMultipart and len(name_list) <= 1:
-                            arcpy.AddMessage("Enlarging feature " + str(row[0]))
-                            delete_ids.extend(merged_ids)
-                            row[1] = new_geo
-                            cursor.updateRow(row)
-                    if obj_id in delete_ids:
-                        arcpy.AddMessage("Removing feature " + str(row[0]))
-                        cursor.deleteRow()
+            # Group the touching features with union find, one name per group
+            store = FeatureStore.from_arcpy(poly_layer, [name_field])
+            rows = np.fromiter((store.row(oid) for oid in in_fids), dtype=np.int64, count=len(in_fids))
+            near_rows = np.fromiter((store.row(oid) for oid in near_fids), dtype=np.int64, count=len(near_fids))
+            plan = merge_components.merge_plan(store.oids, store.columns[name_field], rows, near_rows)
+
+            backend = geometry_backend.get_backend("shapely" if spatial_index.has_spatial_index() else "arcpy")
+            for keep_id, merged_ids in plan:
+                # Union each group once
+                if backend.name == "shapely":
+                    new_geo = backend.union_all([store.geometry(oid) for oid in merged_ids])
+                else:
+                    new_geo = backend.union_all([parts_to_arcpy(store.parts(oid), store.shape_type, store.spatial_reference, store.has_z)
+                                                 for oid in merged_ids])
+                if not backend.is_multipart(new_geo):
+                    arcpy.AddMessage("Enlarging feature " + str(keep_id))
+                    if backend.name == "arcpy":
+                        new_geo = arcpy_to_parts(new_geo, store.shape_type, store.has_z)
+                    store.set_geometry(keep_id, new_geo)
+                    delete_ids = [oid for oid in merged_ids if oid != keep_id]
+                    arcpy.AddMessage("Removing features " + ", ".join(str(oid) for oid in delete_ids))
+                    store.delete(delete_ids)
+            store.flush(None, geometry_backend.get_backend("arcpy"))
         else:
             arcpy.AddMessage("No geometries to dissolve.")
         # Delete temp files
-        arcpy.management.Delete([f"{working_gdb}\\near_tab", "poly_layer"])
+        arcpy.management.Delete(["poly_layer"])
 
     except Exception as e:
         tb = traceback.format_exc()
@@ -2708,7 +2742,7 @@ def remove_by_converting(primaryFC, secondaryFCs, minimumArea, additionalCriteri
         arcpy.AddMessage("Scratch : " + str(arcpy.env.scratchGDB))
 
         # Use Describe object and get Shape Area field
-        desc = arcpy.da.Describe(primaryFC)
+        desc = describe(primaryFC)
         area_field = desc['areaFieldName']
 
         selectionCriteria = area_field + " < " + str(minimumArea)
@@ -2804,7 +2838,7 @@ def extend_polygon_sides(feature_list, working_gdb, minimumLength, minimumWidth,
             # Delete list
             delete_list = []
 
-            desc = arcpy.da.Describe(building_fc)
+            desc = describe(building_fc)
             oidField = desc['OIDFieldName']
             FCName = desc['name']
             # Make a layer from the feature class
@@ -2825,7 +2859,7 @@ def extend_polygon_sides(feature_list, working_gdb, minimumLength, minimumWidth,
                 delete_list.append(mbgFC)
                 delete_list.append(mbgFCLyr)
                 # Create a Describe object from the GDB Feature Class
-                desc = arcpy.da.Describe(mbgFC)
+                desc = describe(mbgFC)
                 mbg_Width = "MBG_Width"
                 mbg_Length = "MBG_Length"
                 mbg_Orientation = "MBG_Orientation"
@@ -2987,10 +3021,6 @@ def extend_polygon_sides(feature_list, working_gdb, minimumLength, minimumWidth,
         arcpy.AddMessage(error_message)
 
 
-def has_features(fc):
-    with arcpy.da.SearchCursor(fc, ["OID@"]) as cursor:
-        return next(cursor, None) is not None  # True if at least one feature #shovon added
-    
 def has_features_fields_where(fc, fields, where_clause : str) -> bool:
     with arcpy.da.SearchCursor(fc, fields, where_clause) as cursor:
         return next(cursor, None) is not None   #shounok added
@@ -3069,6 +3099,6 @@ def is_repair_needed(fc, method="Esri"):
     return cnt > 0, issues
 
 def create_map_add_layers(map_name):
-    aprx = arcpy.mp.ArcGISProject("CURRENT")
+    aprx = get_project()
     maps = aprx.listMaps(map_name)[0]
     return maps.name
\ No newline at end of file
@@ -0,0 +1,181 @@
+# import required python modules
+import hashlib
+import os
+import pickle
+import tempfile
+from datetime import datetime
+
+# Bump when the layout of the cached data changes
+CACHE_VERSION = 1
+# Environment variable for the cache folder, the temp folder is used otherwise
+CACHE_DIR_ENV_VAR = "GENCARTO_CONFIG_CACHE"
+
+# Sheets read by ParamValues and their rule columns
+RULE_SHEETS = ("1_DataPreparation", "2_Transportation", "3_Hydrography", "4_Built Environment", "5_Utility",
+               "6_Hypsography", "7_Vegetation", "8_ApplyCartoSymbology", "9a_ResolveConflictsLines",
+               "9b_ResolveConflictsBuildings", "10_DetectConflicts", "11_LoadDataFinal100K")
+RULE_COLUMNS = ("FeatureClass", "Expression", "Query", "Field", "Value", "Function Name", "Feature Usage Notes")
+
+# Compiled workbooks of this process, by path
+_loaded = {}
+
+
+def file_hash(path):
+    """ sha256 of the workbook file """
+    digest = hashlib.sha256()
+    with open(path, "rb") as workbook:
+        for block in iter(lambda: workbook.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _convert_cell(value):
+    """ cell value as read_excel sees it """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class Cell:
+    """ read-only stand-in for an openpyxl cell """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class CompiledSheet:
+    """ the values of one worksheet, addressed like openpyxl (1-based row and column) """
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def cell(self, row, column):
+        if row <= len(self.rows) and column <= len(self.rows[row - 1]):
+            return Cell(self.rows[row - 1][column - 1])
+        return Cell(None)
+
+    @property
+    def header(self):
+        return [value for value in self.rows[0] if value is not None] if self.rows else []
+
+    def frame(self, keep_default_na=True):
+        """ the sheet as pd.read_excel(excel_file, sheet_name) would return it """
+        from pandas.io.parsers import TextParser
+        data = []
+        for row in self.rows:
+            row = [_convert_cell(value) for value in row]
+            while row and row[-1] == "":
+                row.pop()
+            data.append(row)
+        while data and not data[-1]:
+            data.pop()
+        if not data:
+            import pandas as pd
+            return pd.DataFrame()
+        width = max(len(row) for row in data)
+        data = [row + [""] * (width - len(row)) for row in data]
+        return TextParser(data, header=0, keep_default_na=keep_default_na, skip_blank_lines=False).read()
+
+
+class CompiledConfig:
+    """ every sheet of the generalization rules workbook, read once with
+    openpyxl and kept in a pickle keyed by the hash of the workbook """
+
+    def __init__(self, excel_file, digest, sheets):
+        self.excel_file = excel_file
+        self.digest = digest
+        self.sheets = sheets
+        self.compiled = datetime.now()
+        self.version = CACHE_VERSION
+
+    def __getitem__(self, sheet_name):
+        return self.sheets[sheet_name]
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self.sheets
+
+    @property
+    def sheetnames(self):
+        return list(self.sheets)
+
+    def frame(self, sheet_name, keep_default_na=True):
+        return self.sheets[sheet_name].frame(keep_default_na)
+
+    def frames(self, keep_default_na=True):
+        """ all the sheets, as pd.read_excel(excel_file, sheet_name=None) """
+        return {name: sheet.frame(keep_default_na) for name, sheet in self.sheets.items()}
+
+    def validate(self):
+        """ raises ValueError listing the rule sheets or columns that are missing """
+        problems = []
+        for sheet_name in RULE_SHEETS:
+            if sheet_name not in self.sheets:
+                problems.append(f"sheet '{sheet_name}' is missing")
+                continue
+            header = self.sheets[sheet_name].header
+            missing = [column for column in RULE_COLUMNS if column not in header]
+            if missing:
+                problems.append(f"sheet '{sheet_name}' has no {', '.join(missing)} column")
+        if problems:
+            raise ValueError(f"Invalid configuration file {self.excel_file}: " + "; ".join(problems))
+        return self
+
+
+def compile_workbook(excel_file, digest=None):
+    """ reads the workbook once and validates it """
+    import openpyxl
+    digest = digest or file_hash(excel_file)
+    rule_book = openpyxl.load_workbook(excel_file)
+    sheets = {}
+    for worksheet in rule_book.worksheets:
+        rows = [tuple(row) for row in worksheet.iter_rows(values_only=True)]
+        sheets[worksheet.title] = CompiledSheet(worksheet.title, rows)
+    rule_book.close()
+    return CompiledConfig(excel_file, digest, sheets).validate()
+
+
+def cache_path(excel_file, digest, cache_dir=None):
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV_VAR) or os.path.join(tempfile.gettempdir(), "GenCarto100K")
+    name = os.path.splitext(os.path.basename(excel_file))[0]
+    return os.path.join(cache_dir, f"{name}.{digest[:16]}.v{CACHE_VERSION}.pkl")
+
+
+def load_config(excel_file, cache_dir=None):
+    """ compiled configuration of the workbook. It is compiled on the first run
+    after the workbook changes and loaded from the cache afterwards; within a
+    process the workbook is only hashed again when its size or time stamp change """
+    stat = os.stat(excel_file)
+    key = os.path.abspath(excel_file)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == (stat.st_size, stat.st_mtime_ns):
+        return loaded[1]
+
+    digest = file_hash(excel_file)
+    path = cache_path(excel_file, digest, cache_dir)
+    config = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as cache:
+                config = pickle.load(cache)
+            if getattr(config, "version", None) != CACHE_VERSION or config.digest != digest:
+                config = None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            config = None
+    if config is None:
+        config = compile_workbook(excel_file, digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so that parallel runs never read half a cache
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as cache:
+                pickle.dump(config, cache, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+    config.excel_file = excel_file
+    _loaded[key] = ((stat.st_size, stat.st_mtime_ns), config)
+    return config
@@ -0,0 +1,68 @@
+# import required python modules
+import numpy as np
+
+import spatial_index
+
+DEFAULT_TOLERANCE = 0.001
+
+
+def snap_points(points, tolerance=DEFAULT_TOLERANCE):
+    """ snaps (n, 2) coordinates to a grid of the given tolerance and returns
+    the integer cell of every point """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if not tolerance or tolerance <= 0:
+        tolerance = DEFAULT_TOLERANCE
+    return np.round(points / tolerance).astype(np.int64)
+
+
+def point_degrees(points, tolerance=DEFAULT_TOLERANCE):
+    """ hashes the points on the tolerance grid in one pass. Returns the node id
+    of every point and the number of points at each node """
+    if not len(points):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    _, node_ids, degree = np.unique(snap_points(points, tolerance), axis=0, return_inverse=True,
+                                    return_counts=True)
+    return node_ids.reshape(-1), degree
+
+
+def node_degrees(start_points, end_points, tolerance=DEFAULT_TOLERANCE):
+    """ node ids of the line start and end points, and the degree of each node """
+    count = len(start_points)
+    node_ids, degree = point_degrees(np.vstack([np.asarray(start_points).reshape(-1, 2),
+                                                np.asarray(end_points).reshape(-1, 2)]), tolerance)
+    return node_ids[:count], node_ids[count:], degree
+
+
+def find_dangles(oids, start_points, end_points, tolerance=DEFAULT_TOLERANCE, geometries=None):
+    """ finds the lines that have at least one free end.
+
+    Returns the dangle oids and the degree of the start and end node of every line.
+    When the line geometries are given (Shapely), a free end that touches the
+    interior of another line is not a dangle, as with FeatureVerticesToPoints DANGLE """
+    oids = np.asarray(oids)
+    start_nodes, end_nodes, degree = node_degrees(start_points, end_points, tolerance)
+    start_degree = degree[start_nodes]
+    end_degree = degree[end_nodes]
+
+    if geometries is not None and spatial_index.has_spatial_index() and len(oids):
+        index = spatial_index.SpatialIndex(geometries)
+        for ends, ends_degree in ((start_points, start_degree), (end_points, end_degree)):
+            rows = np.flatnonzero(ends_degree == 1)
+            if not len(rows):
+                continue
+            pts = spatial_index.shapely.points(np.asarray(ends).reshape(-1, 2)[rows])
+            query_idx, tree_idx, _ = index.within_distance(pts, tolerance)
+            # Another line passes through the free end
+            ends_degree[rows[query_idx[tree_idx != rows[query_idx]]]] = 2
+
+    dangle = (start_degree == 1) | (end_degree == 1)
+    return oids[dangle], start_degree, end_degree
+
+
+def dangles_from_store(store, tolerance=DEFAULT_TOLERANCE, check_interior=True):
+    """ find_dangles over the active lines of a FeatureStore """
+    rows = store.active_rows()
+    rows = rows[store.part_counts()[rows] > 0]
+    start_points, end_points = store.end_points()
+    geometries = store.geometries(rows) if check_interior and spatial_index.has_spatial_index() else None
+    return find_dangles(store.oids[rows], start_points[rows], end_points[rows], tolerance, geometries)
@@ -0,0 +1,111 @@
+# import required python modules
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import spatial_index
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+# Bisection stops when the buffer distance is known to within this share of the enlarge step
+DISTANCE_PRECISION = 0.01
+# Safety limit on the number of times the bracketing distance is doubled
+MAX_STEPS = 32
+
+
+class BarrierIndex:
+    """ spatial index over the features of all the barrier feature classes,
+    built once and shared by every polygon that is enlarged """
+
+    def __init__(self, geometries, sources, oids):
+        self.sources = np.asarray(sources, dtype=object)
+        self.oids = np.asarray(oids, dtype=np.int64)
+        self.index = spatial_index.SpatialIndex(geometries) if len(geometries) else None
+
+    @classmethod
+    def from_stores(cls, stores):
+        geometries, sources, oids = [], [], []
+        for store in stores:
+            rows = store.active_rows()
+            geometries.extend(store.geometries(rows))
+            sources.extend([store.name] * len(rows))
+            oids.extend(store.oids[rows].tolist())
+        keep = [cnt for cnt, geo in enumerate(geometries) if geo is not None]
+        return cls([geometries[cnt] for cnt in keep], [sources[cnt] for cnt in keep], [oids[cnt] for cnt in keep])
+
+    def crossing(self, geo, original, source=None, oid=None):
+        """ barrier geometries that intersect geo, leaving out the ones already within
+        the original geometry and the feature itself """
+        if self.index is None:
+            return []
+        _, tree_idx = self.index.intersects([geo])
+        tree_idx = tree_idx[~((self.sources[tree_idx] == source) & (self.oids[tree_idx] == oid))]
+        barriers = self.index.geometries[tree_idx]
+        if len(barriers):
+            barriers = barriers[~shapely.within(barriers, original)]
+        return list(barriers)
+
+
+def clip_at_barriers(geo, barriers, center):
+    """ splits geo along the barriers and keeps the piece that contains the center
+    of the original geometry (FeatureToPolygon of the barriers and geo) """
+    if not barriers:
+        return geo
+    edges = [geo.boundary] + [barrier.boundary if barrier.geom_type in ("Polygon", "MultiPolygon") else barrier
+                              for barrier in barriers]
+    for face in shapely.get_parts(shapely.polygonize(shapely.get_parts(shapely.union_all(edges)))):
+        if face.contains(center):
+            return face
+    return geo
+
+
+def enlarged_geometry(geo, minimum_size, enlarge, barriers=None, source=None, oid=None):
+    """ smallest buffer of geo, clipped at the barriers, that reaches the minimum size.
+
+    The buffer distance is bracketed by doubling from the enlarge step and then
+    narrowed by bisection on the clipped area. Returns the new geometry,
+    or None when the feature cannot reach the minimum size without crossing barriers """
+    center = geo.centroid
+
+    def grow(distance):
+        new_geo = geo.buffer(distance)
+        if barriers is not None:
+            new_geo = clip_at_barriers(new_geo, barriers.crossing(new_geo, geo, source, oid), center)
+        return new_geo
+
+    low, high = 0.0, enlarge
+    prev_area = geo.area
+    new_geo = grow(high)
+    steps = 1
+    while new_geo.area < minimum_size:
+        if np.isclose(new_geo.area, prev_area) or steps >= MAX_STEPS:
+            # Cannot enlarge feature without crossing barriers
+            return None
+        prev_area = new_geo.area
+        low, high = high, high * 2
+        new_geo = grow(high)
+        steps += 1
+
+    # Bisection on the buffer distance
+    while high - low > enlarge * DISTANCE_PRECISION:
+        middle = (low + high) / 2
+        middle_geo = grow(middle)
+        if middle_geo.area >= minimum_size:
+            high, new_geo = middle, middle_geo
+        else:
+            low = middle
+    return new_geo
+
+
+def enlarge_all(geometries, minimum_size, enlarge, barriers=None, source=None, oids=None, workers=1):
+    """ enlarges every geometry, in parallel threads when workers > 1 (GEOS
+    releases the GIL). Returns one result per geometry, None where it failed """
+    oids = list(oids) if oids is not None else [None] * len(geometries)
+    work = lambda item: enlarged_geometry(item[0], minimum_size, enlarge, barriers, source, item[1])
+    if workers and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(work, zip(geometries, oids)))
+    return [work(item) for item in zip(geometries, oids)]
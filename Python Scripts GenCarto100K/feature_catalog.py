@@ -0,0 +1,190 @@
+# import required python modules
+import os
+import re
+
+import arcpy
+
+import gp_tracer
+
+# Geoprocessing calls that leave the data and the schema of every feature class as they are
+READ_CALLS = {"Exists", "Describe", "ListFields", "ListFeatureClasses", "ListDatasets", "ListTables",
+              "CheckOutExtension", "CheckInExtension", "da.Describe", "da.SearchCursor", "da.Walk",
+              "da.FeatureClassToNumPyArray", "da.TableToNumPyArray", "da.ListSubtypes", "management.GetCount",
+              "management.MakeFeatureLayer", "management.MakeTableView", "management.SelectLayerByAttribute",
+              "management.SelectLayerByLocation"}
+# Tools that add, change or remove fields, possibly through a layer
+FIELD_TOOLS = {"AddField", "AddFields", "DeleteField", "AlterField", "JoinField", "CalculateField", "CalculateFields",
+               "CalculateGeometryAttributes", "AddGeometryAttributes", "AddXY", "AddJoin", "RemoveJoin",
+               "TransferAttributes"}
+# Feature class code, e.g. HH0020 of HH0020_Lake_A
+CODE_PATTERN = re.compile(r"^([A-Z]{2}\d{4})_", re.IGNORECASE)
+
+# Describe properties and counts of feature classes by catalog path key
+_describes = {}
+_counts = {}
+_watching = False
+
+
+def dataset_key(dataset):
+    """ cache key of a feature class path, None for layers, results and bare
+    names, whose data can change through other names """
+    if not isinstance(dataset, str):
+        return None
+    path = dataset.replace("/", "\\").rstrip("\\")
+    if "\\" not in path:
+        return None
+    return path.lower()
+
+
+def _named(values):
+    """ base names (lower case) of the datasets named by the arguments of a call """
+    names = set()
+    for value in values:
+        if isinstance(value, str):
+            names.update(os.path.basename(name.replace("\\", "/")).lower() for name in value.split(";") if name)
+        elif isinstance(value, (list, tuple)):
+            names |= _named(value)
+        elif isinstance(value, dict):
+            names |= _named(value.values())
+    return names
+
+
+def on_call(label, args, kwargs):
+    """ shim watcher: any call that can write drops the counts and the field
+    lists, which can change through layers; the other describe properties only
+    change when a feature class named by the call is replaced or deleted """
+    if label in READ_CALLS:
+        return
+    _counts.clear()
+    if label.rpartition(".")[2] in FIELD_TOOLS:
+        _describes.clear()
+        return
+    names = _named(args) | _named(kwargs.values())
+    for key in [key for key in _describes if key.rpartition("\\")[2] in names]:
+        _describes.pop(key, None)
+
+
+def start():
+    """ caches describes and counts until stop(), the geoprocessing calls made
+    meanwhile drop what they can change. Theme.run watches while a theme runs """
+    global _watching
+    if not _watching:
+        gp_tracer.shim.add_watcher(on_call)
+        _watching = True
+
+
+def stop():
+    """ stops watching the geoprocessing calls and forgets the cache """
+    global _watching
+    if _watching:
+        gp_tracer.shim.remove_watcher(on_call)
+        _watching = False
+    invalidate()
+
+
+def invalidate(dataset=None):
+    """ forgets the cached properties of one feature class, or of all of them
+    (e.g. after a workspace was restored from a backup) """
+    key = dataset_key(dataset) if dataset is not None else None
+    if key is None:
+        _describes.clear()
+        _counts.clear()
+    else:
+        _describes.pop(key, None)
+        _counts.pop(key, None)
+
+
+def describe(dataset):
+    """ arcpy.da.Describe of a feature class, described once until it is
+    replaced while the catalog watches. Layers are described every time, their
+    selection changes """
+    key = dataset_key(dataset) if _watching else None
+    if key is None:
+        return arcpy.da.Describe(dataset)
+    desc = _describes.get(key)
+    if desc is None:
+        desc = _describes[key] = arcpy.da.Describe(dataset)
+    return desc
+
+
+def field_names(dataset):
+    """ names of the fields of a feature class or layer """
+    return [field.name for field in describe(dataset)['fields']]
+
+
+def count(dataset):
+    """ number of features of a feature class (counted once until the next
+    write while the catalog watches) or of the selection of a layer """
+    key = dataset_key(dataset) if _watching else None
+    if key is None:
+        return int(arcpy.management.GetCount(dataset)[0])
+    value = _counts.get(key)
+    if value is None:
+        value = _counts[key] = int(arcpy.management.GetCount(dataset)[0])
+    return value
+
+
+def cached_count(dataset):
+    """ count of a feature class if it is known, else None """
+    key = dataset_key(dataset)
+    return None if key is None else _counts.get(key)
+
+
+def fc_code(fc):
+    """ feature class code of a path or name, e.g. HH0020, None if it has none """
+    match = CODE_PATTERN.match(os.path.basename(str(fc).replace("\\", "/")))
+    return match.group(1).upper() if match else None
+
+
+class FeatureCatalog(list):
+    """ feature classes of the input workspace, indexed by name and code.
+
+    It is the fc_list of the themes, so plain list use keeps working, and
+    lookups that scanned the list for a name, e.g.
+    [fc for fc in fc_list if 'HH0020_Lake_A' in fc][0], become fc_list.find().
+    A name is matched against the whole path like before; the matches of every
+    name are found once """
+
+    def __init__(self, fcs=()):
+        super().__init__(fcs)
+        self.by_name = {}
+        self.by_code = {}
+        for fc in self:
+            self.by_name.setdefault(os.path.basename(fc.replace("\\", "/")).upper(), fc)
+            code = fc_code(fc)
+            if code:
+                self.by_code.setdefault(code, []).append(fc)
+        self._matches = {}
+
+    def matches(self, name):
+        """ feature classes whose path contains name, in list order """
+        name = str(name)
+        found = self._matches.get(name)
+        if found is None:
+            found = self._matches[name] = tuple(fc for fc in self if name in fc)
+        return list(found)
+
+    def find(self, name):
+        """ first feature class whose path contains name """
+        found = self.matches(name)
+        if not found:
+            raise KeyError(f"No feature class matches {name}")
+        return found[0]
+
+    def find_all(self, names):
+        """ feature classes matching each of the names, in the order of the names """
+        return [fc for name in names for fc in self.matches(name)]
+
+    def named(self, name):
+        """ feature class with this exact (case insensitive) name, None if there is none """
+        return self.by_name.get(str(name).upper())
+
+    def code(self, code):
+        """ feature classes with a feature class code, e.g. HH0040 """
+        return list(self.by_code.get(str(code).upper(), ()))
+
+    def describe(self, name):
+        return describe(self.find(name))
+
+    def count(self, name):
+        return count(self.find(name))
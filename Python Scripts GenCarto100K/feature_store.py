@@ -0,0 +1,425 @@
+# import required python modules
+import numpy as np
+
+import geometry_backend
+import where_clause
+
+# Field types that are never copied into the store
+SKIP_FIELD_TYPES = ("OID", "Geometry", "GlobalID", "Blob", "Raster")
+
+
+class FeatureStore:
+    """ columnar in-memory copy of a feature class.
+
+    Coordinates are held in a single (n, 2) or (n, 3) buffer and geometries are
+    described by three offset arrays, the same layout Shapely uses for ragged arrays:
+        geom_offsets[i]:geom_offsets[i+1]  -> parts of feature i
+        part_offsets[p]:part_offsets[p+1]  -> rings (or paths) of part p
+        ring_offsets[r]:ring_offsets[r+1]  -> coordinates of ring r
+    Points and lines have one ring per part. Attributes are typed NumPy columns
+    keyed by field name, rows are keyed by OID. Edits are kept aside and written
+    back to the feature class by flush() in a single pass """
+
+    def __init__(self, name, shape_type, oids, coords, geom_offsets, part_offsets, ring_offsets, columns=None,
+                 spatial_reference=None, has_z=False):
+        self.name = name
+        self.shape_type = shape_type
+        self.spatial_reference = spatial_reference
+        self.has_z = has_z
+        self.oids = np.asarray(oids, dtype=np.int64)
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3 if has_z else 2)
+        self.geom_offsets = np.asarray(geom_offsets, dtype=np.int64)
+        self.part_offsets = np.asarray(part_offsets, dtype=np.int64)
+        self.ring_offsets = np.asarray(ring_offsets, dtype=np.int64)
+        self.columns = dict(columns or {})
+        self._row_index = {int(oid): row for row, oid in enumerate(self.oids)}
+        # Pending edits, applied by flush()
+        self._edited_geoms = {}
+        self._edited_values = {}
+        self._deleted = set()
+        self._inserted = []
+        # Incremented on every edit so that indexes built on the store can be invalidated
+        self.version = 0
+
+    def __len__(self):
+        return len(self.oids) - len(self._deleted)
+
+    # ------------------------------------------------------------------
+    # Builders
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_features(cls, name, shape_type, oids, features, columns=None, spatial_reference=None, has_z=False):
+        """ builds a store from nested coordinates: feature -> parts -> rings -> (x, y[, z]) """
+        dims = 3 if has_z else 2
+        coords = []
+        geom_offsets = [0]
+        part_offsets = [0]
+        ring_offsets = [0]
+        for parts in features:
+            for rings in parts:
+                for ring in rings:
+                    coords.extend(tuple(pnt[:dims]) for pnt in ring)
+                    ring_offsets.append(len(coords))
+                part_offsets.append(len(ring_offsets) - 1)
+            geom_offsets.append(len(part_offsets) - 1)
+        columns = {field: _to_column(values) for field, values in (columns or {}).items()}
+        return cls(name, shape_type, oids, np.asarray(coords, dtype=np.float64).reshape(-1, dims), geom_offsets,
+                   part_offsets, ring_offsets, columns, spatial_reference, has_z)
+
+    @classmethod
+    def from_arcpy(cls, fc, fields=None, where=None):
+        """ reads a feature class into a store with one search cursor """
+        import arcpy
+        desc = arcpy.da.Describe(fc)
+        shape_type = desc['shapeType']
+        has_z = bool(desc['hasZ'])
+        if fields is None:
+            fields = editable_fields(desc)
+        fields = list(fields)
+        oids = []
+        features = []
+        values = {field: [] for field in fields}
+        with arcpy.da.SearchCursor(fc, ['OID@', 'SHAPE@'] + fields, where) as cursor:
+            for row in cursor:
+                oids.append(row[0])
+                features.append(arcpy_to_parts(row[1], shape_type, has_z))
+                for cnt, field in enumerate(fields):
+                    values[field].append(row[cnt + 2])
+        return cls.from_features(desc['catalogPath'], shape_type, oids, features, values, desc['spatialReference'], has_z)
+
+    @classmethod
+    def from_shapely(cls, name, oids, geometries, columns=None, spatial_reference=None):
+        """ builds a store from a list of Shapely geometries """
+        features = [shapely_to_parts(geo) for geo in geometries]
+        has_z = any(geo is not None and geo.has_z for geo in geometries)
+        shape_type = _shapely_shape_type(geometries)
+        return cls.from_features(name, shape_type, oids, features, columns, spatial_reference, has_z)
+
+    @classmethod
+    def from_backend(cls, fc, fields=None, where=None, backend=None):
+        """ reads a feature class through the active geometry backend """
+        backend = backend or geometry_backend.get_backend()
+        if backend.name == "arcpy":
+            return cls.from_arcpy(fc, fields, where)
+        oids, geometries, attributes = backend.read_features(fc, fields, where)
+        return cls.from_shapely(fc, oids, geometries, attributes)
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+    def row(self, oid):
+        return self._row_index[int(oid)]
+
+    def active_rows(self):
+        """ row numbers of the features that have not been deleted """
+        if not self._deleted:
+            return np.arange(len(self.oids))
+        deleted = np.fromiter((self._row_index[oid] for oid in self._deleted), dtype=np.int64)
+        return np.setdiff1d(np.arange(len(self.oids)), deleted)
+
+    def active_oids(self):
+        return self.oids[self.active_rows()]
+
+    def parts(self, oid):
+        """ nested coordinate arrays of a feature, honouring pending edits """
+        oid = int(oid)
+        if oid in self._edited_geoms:
+            return self._edited_geoms[oid]
+        row = self._row_index[oid]
+        parts = []
+        for part in range(self.geom_offsets[row], self.geom_offsets[row + 1]):
+            rings = []
+            for ring in range(self.part_offsets[part], self.part_offsets[part + 1]):
+                rings.append(self.coords[self.ring_offsets[ring]:self.ring_offsets[ring + 1]])
+            parts.append(rings)
+        return parts
+
+    def part_counts(self):
+        """ number of parts for every row """
+        return np.diff(self.geom_offsets)
+
+    def end_points(self):
+        """ first and last vertex of every row as two (n, 2) arrays (lines only).
+        Reads the column buffers, call compact() first if there are pending edits """
+        first_part = self.geom_offsets[:-1]
+        last_part = self.geom_offsets[1:] - 1
+        first_ring = self.part_offsets[first_part]
+        last_ring = self.part_offsets[last_part + 1] - 1
+        start = self.coords[self.ring_offsets[first_ring], :2]
+        end = self.coords[self.ring_offsets[last_ring + 1] - 1, :2]
+        return start, end
+
+    def bounds(self):
+        """ (minx, miny, maxx, maxy) for every row as an (n, 4) array """
+        starts = self.ring_offsets[self.part_offsets[self.geom_offsets[:-1]]]
+        ends = self.ring_offsets[self.part_offsets[self.geom_offsets[1:]]]
+        out = np.full((len(self.oids), 4), np.nan)
+        non_empty = ends > starts
+        if non_empty.any():
+            xy = self.coords[:, :2]
+            out[non_empty, 0] = np.minimum.reduceat(xy[:, 0], starts[non_empty])
+            out[non_empty, 1] = np.minimum.reduceat(xy[:, 1], starts[non_empty])
+            out[non_empty, 2] = np.maximum.reduceat(xy[:, 0], starts[non_empty])
+            out[non_empty, 3] = np.maximum.reduceat(xy[:, 1], starts[non_empty])
+        return out
+
+    def values(self, field, oids=None):
+        column = self.columns[field]
+        if oids is None:
+            return column
+        return column[[self._row_index[int(oid)] for oid in oids]]
+
+    def value(self, field, oid):
+        oid = int(oid)
+        if oid in self._edited_values.get(field, {}):
+            return self._edited_values[field][oid]
+        value = self.columns[field][self._row_index[oid]]
+        # Cursors expect plain python values, not NumPy scalars
+        return value.item() if isinstance(value, np.generic) else value
+
+    def select(self, where):
+        """ oids of the features selected by a where clause, evaluated on the columns
+        with the pending value edits. Deleted and pending inserted features are
+        never selected """
+        clause = where_clause.compile_where(where)
+        rows = self.active_rows()
+        oids = self.oids[rows]
+        names = {field.upper() for field in clause.fields}
+        attributes = {}
+        for field in self.columns:
+            if field.upper() not in names:
+                continue
+            column = self.columns[field][rows]
+            edits = self._edited_values.get(field)
+            if edits:
+                column = column.astype(object)
+                positions = {int(oid): cnt for cnt, oid in enumerate(oids)}
+                for oid, value in edits.items():
+                    if oid in positions:
+                        column[positions[oid]] = value
+            attributes[field] = column
+        geometries = self.geometries(rows) if where_clause.needs_geometry(clause) else None
+        return oids[where_clause.select(clause, oids, attributes, geometries)]
+
+    def geometry(self, oid):
+        """ returns the feature as a Shapely geometry """
+        return parts_to_shapely(self.parts(oid), self.shape_type)
+
+    def geometries(self, rows=None):
+        rows = self.active_rows() if rows is None else rows
+        return [self.geometry(self.oids[row]) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Edits
+    # ------------------------------------------------------------------
+    def set_geometry(self, oid, geometry):
+        """ replaces the geometry of a feature; accepts nested parts or a Shapely geometry """
+        parts = geometry if isinstance(geometry, list) else shapely_to_parts(geometry)
+        self._edited_geoms[int(oid)] = [[np.asarray(ring, dtype=np.float64) for ring in rings] for rings in parts]
+        self.version += 1
+
+    def set_values(self, field, oids, values):
+        """ sets field for the given oids; values may be a scalar or one value per oid """
+        edits = self._edited_values.setdefault(field, {})
+        if np.isscalar(values) or values is None:
+            values = [values] * len(oids)
+        for oid, value in zip(oids, values):
+            edits[int(oid)] = value
+        self.version += 1
+
+    def delete(self, oids):
+        self._deleted.update(int(oid) for oid in oids)
+        for oid in self._deleted:
+            self._edited_geoms.pop(oid, None)
+        self.version += 1
+
+    def insert(self, geometry, values=None):
+        """ queues a new feature; values is a dict of field -> value """
+        parts = geometry if isinstance(geometry, list) else shapely_to_parts(geometry)
+        self._inserted.append((parts, dict(values or {})))
+        self.version += 1
+
+    def explode(self, oids=None):
+        """ splits multipart features into one feature per part, the first part
+        stays on the original feature and the others are inserted with its
+        attributes. Returns the number of features that were exploded """
+        rows = self.active_rows() if oids is None else [self._row_index[int(oid)] for oid in oids]
+        counts = self.part_counts()
+        exploded = 0
+        for row in rows:
+            oid = int(self.oids[row])
+            parts = self.parts(oid)
+            if oid not in self._edited_geoms and counts[row] < 2:
+                continue
+            if len(parts) < 2:
+                continue
+            values = {field: self.value(field, oid) for field in self.columns}
+            self.set_geometry(oid, [parts[0]])
+            for part in parts[1:]:
+                self.insert([part], values)
+            exploded += 1
+        return exploded
+
+    def has_edits(self):
+        return bool(self._edited_geoms or self._edited_values or self._deleted or self._inserted)
+
+    def flush(self, fc=None, backend=None):
+        """ writes every pending edit back to the feature class in one pass """
+        if not self.has_edits():
+            return 0
+        fc = fc or self.name
+        backend = backend or geometry_backend.get_backend()
+        if backend.name == "arcpy":
+            to_geometry = lambda parts: parts_to_arcpy(parts, self.shape_type, self.spatial_reference, self.has_z)
+        else:
+            to_geometry = lambda parts: parts_to_shapely(parts, self.shape_type)
+        geometries = {oid: to_geometry(parts) for oid, parts in self._edited_geoms.items()}
+        inserts = [(to_geometry(parts), values) for parts, values in self._inserted]
+        edits = len(self._deleted) + len(geometries) + len(inserts)
+        new_oids = backend.apply_edits(fc, geometries, self._edited_values, self._deleted, inserts)
+        self.compact(new_oids)
+        return edits
+
+    def compact(self, new_oids=None):
+        """ folds the pending edits into the column buffers. Inserted features get
+        new_oids when given (after a flush), otherwise provisional oids """
+        features = []
+        oids = []
+        values = {field: [] for field in self.columns}
+        for field in self._edited_values:
+            values.setdefault(field, [])
+        for row in self.active_rows():
+            oid = int(self.oids[row])
+            oids.append(oid)
+            features.append(self.parts(oid))
+            for field in values:
+                values[field].append(self.value(field, oid) if field in self.columns
+                                     else self._edited_values[field].get(oid))
+        next_oid = max(self.oids.tolist() + oids, default=0)
+        for cnt, (parts, new_values) in enumerate(self._inserted):
+            if new_oids:
+                oids.append(int(new_oids[cnt]))
+            else:
+                next_oid += 1
+                oids.append(next_oid)
+            features.append(parts)
+            for field in values:
+                values[field].append(new_values.get(field))
+        rebuilt = FeatureStore.from_features(self.name, self.shape_type, oids, features, values,
+                                             self.spatial_reference, self.has_z)
+        version = self.version
+        self.__dict__.update(rebuilt.__dict__)
+        self.version = version + 1
+
+
+# ----------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------
+def editable_fields(desc):
+    """ names of the attribute fields that can be read and written through a cursor """
+    skip = {desc.get('lengthFieldName'), desc.get('areaFieldName')}
+    return [field.name for field in desc['fields'] if field.type not in SKIP_FIELD_TYPES
+            and field.editable and field.name not in skip]
+
+
+def _to_column(values):
+    """ typed NumPy column; numbers keep a numeric dtype, everything else is object """
+    values = list(values)
+    if values and all(isinstance(val, (bool, np.bool_)) for val in values):
+        return np.asarray(values, dtype=bool)
+    if values and all(isinstance(val, (int, np.integer)) and not isinstance(val, bool) for val in values):
+        return np.asarray(values, dtype=np.int64)
+    if values and all(isinstance(val, (int, float, np.number)) and not isinstance(val, bool) for val in values):
+        return np.asarray(values, dtype=np.float64)
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def arcpy_to_parts(geo, shape_type, has_z=False):
+    """ nested coordinates from an arcpy geometry """
+    if geo is None:
+        return []
+    if shape_type == "Point":
+        pnt = geo.firstPoint
+        return [[[(pnt.X, pnt.Y, pnt.Z) if has_z else (pnt.X, pnt.Y)]]]
+    parts = []
+    for part in geo:
+        if shape_type == "Multipoint":
+            parts.append([[(part.X, part.Y, part.Z) if has_z else (part.X, part.Y)]])
+            continue
+        rings = [[]]
+        for pnt in part:
+            # A null point separates the interior rings of a polygon part
+            if pnt is None:
+                rings.append([])
+            else:
+                rings[-1].append((pnt.X, pnt.Y, pnt.Z) if has_z else (pnt.X, pnt.Y))
+        parts.append([ring for ring in rings if ring])
+    return parts
+
+
+def parts_to_arcpy(parts, shape_type, spatial_reference=None, has_z=False):
+    """ arcpy geometry from nested coordinates """
+    import arcpy
+    make_point = (lambda xy: arcpy.Point(*xy[:3])) if has_z else (lambda xy: arcpy.Point(xy[0], xy[1]))
+    if shape_type == "Point":
+        return arcpy.PointGeometry(make_point(parts[0][0][0]), spatial_reference, has_z)
+    if shape_type == "Multipoint":
+        return arcpy.Multipoint(arcpy.Array([make_point(rings[0][0]) for rings in parts]), spatial_reference, has_z)
+    # Rings are passed as separate arrays, arcpy resolves holes from ring orientation
+    arrays = arcpy.Array([arcpy.Array([make_point(xy) for xy in ring]) for rings in parts for ring in rings])
+    if shape_type == "Polygon":
+        return arcpy.Polygon(arrays, spatial_reference, has_z)
+    return arcpy.Polyline(arrays, spatial_reference, has_z)
+
+
+def shapely_to_parts(geo):
+    """ nested coordinates from a Shapely geometry """
+    if geo is None or geo.is_empty:
+        return []
+    geom_type = geo.geom_type
+    if geom_type == "Point":
+        return [[[tuple(geo.coords[0])]]]
+    if geom_type == "LineString":
+        return [[list(geo.coords)]]
+    if geom_type == "Polygon":
+        # Esri ring order: exterior clockwise, holes counter clockwise
+        import shapely
+        geo = shapely.geometry.polygon.orient(geo, sign=-1.0)
+        return [[list(geo.exterior.coords)] + [list(ring.coords) for ring in geo.interiors]]
+    parts = []
+    for sub_geo in geo.geoms:
+        parts.extend(shapely_to_parts(sub_geo))
+    return parts
+
+
+def parts_to_shapely(parts, shape_type):
+    """ Shapely geometry from nested coordinates """
+    import shapely
+    if not parts:
+        return None
+    if shape_type == "Point":
+        return shapely.Point(parts[0][0][0])
+    if shape_type == "Multipoint":
+        return shapely.MultiPoint([rings[0][0] for rings in parts])
+    if shape_type == "Polygon":
+        polygons = [shapely.Polygon(rings[0], rings[1:]) for rings in parts]
+        return polygons[0] if len(polygons) == 1 else shapely.MultiPolygon(polygons)
+    lines = [shapely.LineString(ring) for rings in parts for ring in rings]
+    return lines[0] if len(lines) == 1 else shapely.MultiLineString(lines)
+
+
+def _shapely_shape_type(geometries):
+    for geo in geometries:
+        if geo is None:
+            continue
+        geom_type = geo.geom_type
+        if geom_type in ("Polygon", "MultiPolygon"):
+            return "Polygon"
+        if geom_type in ("LineString", "MultiLineString"):
+            return "Polyline"
+        if geom_type == "MultiPoint":
+            return "Multipoint"
+        return "Point"
+    return "Polyline"
@@ -0,0 +1,494 @@
+# import required python modules
+import os
+from functools import reduce
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+try:
+    import pyogrio
+except ImportError:
+    pyogrio = None
+
+import where_clause
+
+# Environment variable used to select the backend for a run
+BACKEND_ENV_VAR = "GENCARTO_BACKEND"
+DEFAULT_BACKEND = "arcpy"
+
+# Dimension argument of arcpy Geometry.intersect by geometry type
+GEOMETRY_DIMENSIONS = {"point": 1, "multipoint": 1, "polyline": 2, "polygon": 4}
+# Predicates understood by every backend
+PREDICATES = ("intersects", "disjoint", "within", "contains", "touches", "crosses", "overlaps", "equals")
+
+
+class GeometryBackend:
+    """ common interface for reading features, testing spatial predicates,
+    running overlay operations and writing geometries back """
+    name = None
+
+    # Reading and writing
+    def read_features(self, fc, fields=None, where=None):
+        """ returns (oids, geometries, attributes) where attributes is a dict
+        of field name -> list of values in the same order as oids """
+        raise NotImplementedError
+
+    def update_geometries(self, fc, geometries):
+        """ replaces the geometry of each oid in the {oid: geometry} dict """
+        raise NotImplementedError
+
+    def update_attributes(self, fc, field, values):
+        """ writes the {oid: value} dict into field """
+        raise NotImplementedError
+
+    def delete_features(self, fc, oids):
+        raise NotImplementedError
+
+    def insert_features(self, fc, geometries, attributes=None):
+        """ appends new features and returns the list of new oids """
+        raise NotImplementedError
+
+    def apply_edits(self, fc, geometries, values, deletes, inserts):
+        """ applies a batch of edits: {oid: geometry}, {field: {oid: value}}, oids
+        to delete and a list of (geometry, {field: value}) to insert. Returns the
+        oids of the inserted features """
+        self.delete_features(fc, deletes)
+        self.update_geometries(fc, geometries)
+        for field, field_values in values.items():
+            self.update_attributes(fc, field, field_values)
+        new_oids = []
+        for geo, attrs in inserts:
+            new_oids.extend(self.insert_features(fc, [geo], {field: [val] for field, val in attrs.items()}))
+        return new_oids
+
+    # Spatial predicates
+    def predicate(self, name, geo_a, geo_b):
+        if name not in PREDICATES:
+            raise ValueError(f"Unknown spatial predicate {name}")
+        return getattr(self, name)(geo_a, geo_b)
+
+    def intersects(self, geo_a, geo_b):
+        return not self.disjoint(geo_a, geo_b)
+
+    def disjoint(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    def within(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    def contains(self, geo_a, geo_b):
+        return self.within(geo_b, geo_a)
+
+    def touches(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    def crosses(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    def overlaps(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    def equals(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    # Overlay and construction
+    def buffer(self, geo, distance):
+        raise NotImplementedError
+
+    def union(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    def union_all(self, geometries):
+        geometries = [geo for geo in geometries if geo is not None]
+        if not geometries:
+            return None
+        return reduce(self.union, geometries)
+
+    def difference(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    def intersection(self, geo_a, geo_b):
+        raise NotImplementedError
+
+    # Measures and accessors
+    def area(self, geo):
+        raise NotImplementedError
+
+    def length(self, geo):
+        raise NotImplementedError
+
+    def centroid(self, geo):
+        """ returns the (x, y) of the centroid """
+        raise NotImplementedError
+
+    def end_points(self, geo):
+        """ returns ((x, y), (x, y)) for the first and last vertex of a line """
+        raise NotImplementedError
+
+    def is_multipart(self, geo):
+        raise NotImplementedError
+
+    # Conversion
+    def to_wkb(self, geo):
+        raise NotImplementedError
+
+    def from_wkb(self, wkb, spatial_reference=None):
+        raise NotImplementedError
+
+
+class ArcpyBackend(GeometryBackend):
+    """ geometry backend on top of arcpy.da cursors and arcpy geometry objects """
+    name = "arcpy"
+
+    def __init__(self):
+        # Import here so that the module can be loaded on machines without ArcGIS Pro
+        import arcpy
+        self.arcpy = arcpy
+
+    def _oid_where(self, fc, oids):
+        return where_clause.oid_clause(self.arcpy.da.Describe(fc)['OIDFieldName'], oids)
+
+    def read_features(self, fc, fields=None, where=None):
+        fields = list(fields or [])
+        oids = []
+        geometries = []
+        attributes = {field: [] for field in fields}
+        with self.arcpy.da.SearchCursor(fc, ['OID@', 'SHAPE@'] + fields, where) as cursor:
+            for row in cursor:
+                oids.append(row[0])
+                geometries.append(row[1])
+                for cnt, field in enumerate(fields):
+                    attributes[field].append(row[cnt + 2])
+        return oids, geometries, attributes
+
+    def update_geometries(self, fc, geometries):
+        if not geometries:
+            return 0
+        count = 0
+        with self.arcpy.da.UpdateCursor(fc, ['OID@', 'SHAPE@'], self._oid_where(fc, geometries.keys())) as cursor:
+            for row in cursor:
+                row[1] = geometries[row[0]]
+                cursor.updateRow(row)
+                count += 1
+        return count
+
+    def update_attributes(self, fc, field, values):
+        if not values:
+            return 0
+        count = 0
+        with self.arcpy.da.UpdateCursor(fc, ['OID@', field], self._oid_where(fc, values.keys())) as cursor:
+            for row in cursor:
+                row[1] = values[row[0]]
+                cursor.updateRow(row)
+                count += 1
+        return count
+
+    def delete_features(self, fc, oids):
+        if not len(oids):
+            return 0
+        count = 0
+        with self.arcpy.da.UpdateCursor(fc, ['OID@'], self._oid_where(fc, oids)) as cursor:
+            for row in cursor:
+                cursor.deleteRow()
+                count += 1
+        return count
+
+    def insert_features(self, fc, geometries, attributes=None):
+        attributes = attributes or {}
+        fields = list(attributes.keys())
+        new_oids = []
+        with self.arcpy.da.InsertCursor(fc, ['SHAPE@'] + fields) as cursor:
+            for cnt, geo in enumerate(geometries):
+                new_oids.append(cursor.insertRow([geo] + [attributes[field][cnt] for field in fields]))
+        return new_oids
+
+    def apply_edits(self, fc, geometries, values, deletes, inserts):
+        # One update cursor for deletes, geometry and attribute edits, one insert cursor for new rows
+        fields = list(values.keys())
+        touched = set(deletes) | set(geometries) | {oid for field_values in values.values() for oid in field_values}
+        if touched:
+            with self.arcpy.da.UpdateCursor(fc, ['OID@', 'SHAPE@'] + fields, self._oid_where(fc, touched)) as cursor:
+                for row in cursor:
+                    oid = row[0]
+                    if oid in deletes:
+                        cursor.deleteRow()
+                        continue
+                    if oid in geometries:
+                        row[1] = geometries[oid]
+                    for cnt, field in enumerate(fields):
+                        if oid in values[field]:
+                            row[cnt + 2] = values[field][oid]
+                    cursor.updateRow(row)
+        new_oids = []
+        if inserts:
+            insert_fields = sorted({field for geo, attrs in inserts for field in attrs})
+            with self.arcpy.da.InsertCursor(fc, ['SHAPE@'] + insert_fields) as cursor:
+                for geo, attrs in inserts:
+                    new_oids.append(cursor.insertRow([geo] + [attrs.get(field) for field in insert_fields]))
+        return new_oids
+
+    def disjoint(self, geo_a, geo_b):
+        return geo_a.disjoint(geo_b)
+
+    def within(self, geo_a, geo_b):
+        return geo_a.within(geo_b)
+
+    def touches(self, geo_a, geo_b):
+        return geo_a.touches(geo_b)
+
+    def crosses(self, geo_a, geo_b):
+        return geo_a.crosses(geo_b)
+
+    def overlaps(self, geo_a, geo_b):
+        return geo_a.overlaps(geo_b)
+
+    def equals(self, geo_a, geo_b):
+        return geo_a.equals(geo_b)
+
+    def buffer(self, geo, distance):
+        return geo.buffer(distance)
+
+    def union(self, geo_a, geo_b):
+        return geo_a.union(geo_b)
+
+    def difference(self, geo_a, geo_b):
+        return geo_a.difference(geo_b)
+
+    def intersection(self, geo_a, geo_b):
+        # Intersection dimension follows the lower dimension of the inputs (1 point, 2 line, 4 polygon)
+        return geo_a.intersect(geo_b, min(GEOMETRY_DIMENSIONS[geo_a.type], GEOMETRY_DIMENSIONS[geo_b.type]))
+
+    def area(self, geo):
+        return geo.area
+
+    def length(self, geo):
+        return geo.length
+
+    def centroid(self, geo):
+        pnt = geo.centroid
+        return pnt.X, pnt.Y
+
+    def end_points(self, geo):
+        return (geo.firstPoint.X, geo.firstPoint.Y), (geo.lastPoint.X, geo.lastPoint.Y)
+
+    def is_multipart(self, geo):
+        return geo.isMultipart
+
+    def to_wkb(self, geo):
+        return bytes(geo.WKB)
+
+    def from_wkb(self, wkb, spatial_reference=None):
+        return self.arcpy.FromWKB(bytearray(wkb), spatial_reference)
+
+
+class ShapelyBackend(GeometryBackend):
+    """ geometry backend on top of Shapely 2.x (GEOS). Feature classes are held
+    in memory as datasets keyed by name; they can be registered directly or
+    loaded from any OGR readable source (including file geodatabases) with pyogrio """
+    name = "shapely"
+
+    def __init__(self):
+        if shapely is None:
+            raise ImportError("The shapely backend requires shapely 2.x to be installed")
+        self.datasets = {}
+
+    # Dataset management
+    def register(self, fc, oids, geometries, attributes=None):
+        """ adds or replaces an in-memory dataset """
+        attributes = attributes or {}
+        self.datasets[fc] = {
+            'oids': [int(oid) for oid in oids],
+            'geoms': list(geometries),
+            'attrs': {field: list(values) for field, values in attributes.items()},
+        }
+        return fc
+
+    def load(self, fc, path, layer=None, where=None):
+        """ reads a layer from disk into an in-memory dataset """
+        if pyogrio is None:
+            raise ImportError("Loading datasets from disk requires pyogrio to be installed")
+        meta, fids, wkb_geoms, field_data = pyogrio.raw.read(path, layer=layer, where=where, return_fids=True)
+        geometries = list(shapely.from_wkb(wkb_geoms))
+        attributes = {field: list(values) for field, values in zip(meta['fields'], field_data)}
+        return self.register(fc, fids, geometries, attributes)
+
+    def save(self, fc, path, layer=None, driver=None):
+        """ writes an in-memory dataset back to disk """
+        if pyogrio is None:
+            raise ImportError("Saving datasets to disk requires pyogrio to be installed")
+        import numpy as np
+        data = self._dataset(fc)
+        fields = list(data['attrs'].keys())
+        field_data = [np.asarray(data['attrs'][field]) for field in fields]
+        geom_types = {geo.geom_type for geo in data['geoms'] if geo is not None}
+        geometry_type = geom_types.pop() if len(geom_types) == 1 else "Unknown"
+        pyogrio.raw.write(path, np.asarray(shapely.to_wkb(data['geoms']), dtype=object), field_data, fields,
+                          layer=layer or os.path.basename(str(fc)), driver=driver, geometry_type=geometry_type)
+
+    def _dataset(self, fc):
+        if fc not in self.datasets:
+            raise KeyError(f"Dataset {fc} has not been registered with the shapely backend")
+        return self.datasets[fc]
+
+    def read_features(self, fc, fields=None, where=None):
+        data = self._dataset(fc)
+        fields = list(fields or [])
+        if not where:
+            attributes = {field: list(data['attrs'][field]) for field in fields}
+            return list(data['oids']), list(data['geoms']), attributes
+        # Where clauses are compiled to masks over the attribute columns
+        clause = where_clause.compile_where(where)
+        columns = {field: data['attrs'][field] for field in data['attrs']
+                   if field.upper() in {name.upper() for name in clause.fields}}
+        rows = where_clause.select(clause, data['oids'], columns, data['geoms']).nonzero()[0].tolist()
+        attributes = {field: [data['attrs'][field][cnt] for cnt in rows] for field in fields}
+        return [data['oids'][cnt] for cnt in rows], [data['geoms'][cnt] for cnt in rows], attributes
+
+    def update_geometries(self, fc, geometries):
+        data = self._dataset(fc)
+        count = 0
+        for cnt, oid in enumerate(data['oids']):
+            if oid in geometries:
+                data['geoms'][cnt] = geometries[oid]
+                count += 1
+        return count
+
+    def update_attributes(self, fc, field, values):
+        data = self._dataset(fc)
+        column = data['attrs'].setdefault(field, [None] * len(data['oids']))
+        count = 0
+        for cnt, oid in enumerate(data['oids']):
+            if oid in values:
+                column[cnt] = values[oid]
+                count += 1
+        return count
+
+    def delete_features(self, fc, oids):
+        data = self._dataset(fc)
+        oids = set(int(oid) for oid in oids)
+        keep = [cnt for cnt, oid in enumerate(data['oids']) if oid not in oids]
+        count = len(data['oids']) - len(keep)
+        data['oids'] = [data['oids'][cnt] for cnt in keep]
+        data['geoms'] = [data['geoms'][cnt] for cnt in keep]
+        data['attrs'] = {field: [values[cnt] for cnt in keep] for field, values in data['attrs'].items()}
+        return count
+
+    def insert_features(self, fc, geometries, attributes=None):
+        data = self.datasets.setdefault(fc, {'oids': [], 'geoms': [], 'attrs': {}})
+        attributes = attributes or {}
+        next_oid = max(data['oids'], default=0) + 1
+        new_oids = list(range(next_oid, next_oid + len(geometries)))
+        data['oids'].extend(new_oids)
+        data['geoms'].extend(geometries)
+        for field in set(data['attrs']) | set(attributes):
+            column = data['attrs'].setdefault(field, [None] * (len(data['oids']) - len(new_oids)))
+            column.extend(attributes.get(field, [None] * len(new_oids)))
+        return new_oids
+
+    def disjoint(self, geo_a, geo_b):
+        return bool(shapely.disjoint(geo_a, geo_b))
+
+    def intersects(self, geo_a, geo_b):
+        return bool(shapely.intersects(geo_a, geo_b))
+
+    def within(self, geo_a, geo_b):
+        return bool(shapely.within(geo_a, geo_b))
+
+    def contains(self, geo_a, geo_b):
+        return bool(shapely.contains(geo_a, geo_b))
+
+    def touches(self, geo_a, geo_b):
+        return bool(shapely.touches(geo_a, geo_b))
+
+    def crosses(self, geo_a, geo_b):
+        return bool(shapely.crosses(geo_a, geo_b))
+
+    def overlaps(self, geo_a, geo_b):
+        return bool(shapely.overlaps(geo_a, geo_b))
+
+    def equals(self, geo_a, geo_b):
+        return bool(shapely.equals(geo_a, geo_b))
+
+    def buffer(self, geo, distance):
+        return shapely.buffer(geo, distance)
+
+    def union(self, geo_a, geo_b):
+        return shapely.union(geo_a, geo_b)
+
+    def union_all(self, geometries):
+        geometries = [geo for geo in geometries if geo is not None]
+        if not geometries:
+            return None
+        return shapely.union_all(geometries)
+
+    def difference(self, geo_a, geo_b):
+        return shapely.difference(geo_a, geo_b)
+
+    def intersection(self, geo_a, geo_b):
+        return shapely.intersection(geo_a, geo_b)
+
+    def area(self, geo):
+        return float(shapely.area(geo))
+
+    def length(self, geo):
+        return float(shapely.length(geo))
+
+    def centroid(self, geo):
+        pnt = shapely.centroid(geo)
+        return pnt.x, pnt.y
+
+    def end_points(self, geo):
+        if geo.geom_type == "MultiLineString":
+            first = geo.geoms[0].coords[0]
+            last = geo.geoms[-1].coords[-1]
+        else:
+            first = geo.coords[0]
+            last = geo.coords[-1]
+        return (first[0], first[1]), (last[0], last[1])
+
+    def is_multipart(self, geo):
+        return geo.geom_type.startswith("Multi") and len(geo.geoms) > 1
+
+    def to_wkb(self, geo):
+        return shapely.to_wkb(geo)
+
+    def from_wkb(self, wkb, spatial_reference=None):
+        return shapely.from_wkb(wkb)
+
+
+# Registered backends and the instance used for the current run
+BACKENDS = {
+    ArcpyBackend.name: ArcpyBackend,
+    ShapelyBackend.name: ShapelyBackend,
+}
+_active_backend = None
+_instances = {}
+
+
+def _instance(name):
+    name = str(name).strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown geometry backend {name}. Expected one of {', '.join(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+
+def set_backend(name):
+    """ selects the backend for the current run """
+    global _active_backend
+    _active_backend = _instance(name)
+    return _active_backend
+
+
+def get_backend(name=None):
+    """ returns the backend for the current run, or the named backend without
+    changing the active one. When no backend has been selected the
+    GENCARTO_BACKEND environment variable is used and defaults to arcpy """
+    if name:
+        return _instance(name)
+    if _active_backend is None:
+        return set_backend(os.environ.get(BACKEND_ENV_VAR, DEFAULT_BACKEND))
+    return _active_backend
@@ -0,0 +1,65 @@
+# import required python modules
+import hashlib
+
+import numpy as np
+
+DEFAULT_RESOLUTION = 0.0001
+
+
+def _canonical_ring(ring, closed):
+    """ orders the vertices of a ring so that the same shape digitized in
+    either direction, or from another start vertex, gives the same array """
+    if closed and len(ring) > 1 and (ring[0] == ring[-1]).all():
+        ring = ring[:-1]
+        # Rotate to start at the lowest vertex, then pick the direction with the lower second vertex
+        start = np.lexsort((ring[:, 1], ring[:, 0]))[0]
+        ring = np.roll(ring, -start, axis=0)
+        reverse = np.roll(ring[::-1], 1, axis=0)
+        if len(ring) > 2 and tuple(reverse[1]) < tuple(ring[1]):
+            ring = reverse
+    elif len(ring) > 1 and tuple(ring[-1]) < tuple(ring[0]):
+        ring = ring[::-1]
+    return np.ascontiguousarray(ring)
+
+
+def canonical_key(parts, resolution=DEFAULT_RESOLUTION, closed=False):
+    """ hash of a geometry given as nested coordinate arrays (parts -> rings -> (n, 2+)).
+    Coordinates are rounded to the resolution and vertex order and part order
+    are normalized, so equal geometries get equal keys. Empty geometries give None """
+    if not parts:
+        return None
+    rings = []
+    for part in parts:
+        for ring in part:
+            ring = np.round(np.asarray(ring, dtype=np.float64)[:, :2] / resolution).astype(np.int64)
+            if len(ring):
+                rings.append(_canonical_ring(ring, closed).tobytes())
+    if not rings:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    for ring in sorted(rings):
+        digest.update(len(ring).to_bytes(8, "little"))
+        digest.update(ring)
+    return digest.digest()
+
+
+def store_keys(store, resolution=DEFAULT_RESOLUTION, rows=None):
+    """ canonical keys of the rows of a FeatureStore (active rows by default) """
+    rows = store.active_rows() if rows is None else rows
+    closed = store.shape_type == "Polygon"
+    return [canonical_key(store.parts(store.oids[row]), resolution, closed) for row in rows]
+
+
+def match_keys(keys, other_keys):
+    """ True for every key that also appears in other_keys. None never matches """
+    other = set(key for key in other_keys if key is not None)
+    return np.fromiter((key is not None and key in other for key in keys), dtype=bool, count=len(keys))
+
+
+def unmatched_oids(store, other_store, resolution=DEFAULT_RESOLUTION):
+    """ OIDs of the features of store with no equal geometry in other_store, and
+    of the features of other_store with none in store """
+    keys = store_keys(store, resolution)
+    other_keys = store_keys(other_store, resolution)
+    return (store.active_oids()[~match_keys(keys, other_keys)],
+            other_store.active_oids()[~match_keys(other_keys, keys)])
@@ -1,15 +1,33 @@
 # import required python modules
-import pandas as pd
-import openpyxl
+import config_cache
 
 class ParamValues:
     def __init__(self, excel_file):
         self.excel_file = excel_file
+        # Workbook compiled once and cached by file hash
+        self.config = config_cache.load_config(excel_file)
+        self.vals = None
+        self.lists = None
+
+    def resolve(self, keys):
+        """ values of the given configuration keys. The feature class lists, which
+        need the sheets as data frames, are only read when a key is not a single value """
+        if self.vals is None:
+            self.vals = self.get_param_vals()
+        values = {key: self.vals[key] for key in keys if key in self.vals}
+        if len(values) < len(keys):
+            if self.lists is None:
+                self.lists = self.get_param_list()
+            values.update((key, self.lists[key]) for key in keys if key not in values and key in self.lists)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            raise KeyError(f"Configuration file {self.excel_file} has no value for {', '.join(missing)}")
+        return values
 
     def get_param_list(self):
         fc_dict = {}
         # Read Excel Data
-        excel_data = pd.read_excel(self.excel_file, sheet_name=None, keep_default_na=False)
+        excel_data = self.config.frames(keep_default_na=False)
         
         # Data Prep Clean
         fc_to_create_buffer_zone = list(excel_data["1_DataPreparation"].loc[excel_data["1_DataPreparation"]["Function Name"] == "FC to create buffer zone", "FeatureClass"])
@@ -170,12 +188,18 @@ class ParamValues:
         fc_dict['prep_line_resolve_fcs_list'] = prep_line_resolve_fcs_list
         apply_symbology_layers_list = list(excel_data["8_ApplyCartoSymbology"].loc[excel_data["8_ApplyCartoSymbology"]["Function Name"] == "Calculate VST on Workspace", "FeatureClass"])
         fc_dict['apply_symbology_layers_list'] = apply_symbology_layers_list
+        thin_points = excel_data["8_ApplyCartoSymbology"].loc[excel_data["8_ApplyCartoSymbology"]["Function Name"] == "Thin Points"]
+        fc_dict['thin_point_fcs'] = list(thin_points["FeatureClass"])
+        fc_dict['thin_point_queries'] = list(thin_points["Query"])
+        fc_dict['thin_point_fields'] = list(thin_points["Field"])
+        fc_dict['thin_point_orders'] = list(thin_points["Value"])
+        fc_dict['thin_point_spacings'] = list(thin_points["Value.1"])
         return fc_dict
     
     def get_param_vals(self):
         val_dict = {}
         # Read Excel Data
-        rule_book = openpyxl.load_workbook(self.excel_file)
+        rule_book = self.config
         # Data Prep Clean
         wb = rule_book['1_DataPreparation']
         dataset_name = wb.cell(row=8, column=10).value
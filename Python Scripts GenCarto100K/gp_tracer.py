@@ -0,0 +1,612 @@
+# Counts and times every arcpy call by call site and theme, and flags the call
+# sites that sit inside loops over features. With a real arcpy set
+# GENCARTO_GP_TRACE (1 or an output folder) before the tool runs. On machines
+# without ArcGIS Pro the calls of a theme can be counted against a stub arcpy
+# for a dataset shape, e.g.
+#   python gp_tracer.py --scale sheet --themes 2-3 --excel ..\GeneralizationRules100K.xlsx
+# import required python modules
+import argparse
+import ast
+import functools
+import inspect
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import types
+
+# Set to 1 (report in the log folder) or to a folder to record the arcpy calls of a run
+TRACE_ENV_VAR = "GENCARTO_GP_TRACE"
+# arcpy modules whose functions are geoprocessing calls
+GP_TOOLBOXES = ("management", "analysis", "cartography", "conversion", "edit", "topographic", "reviewer")
+GP_FUNCTIONS = ("Exists", "Describe", "ListFields", "ListFeatureClasses", "ListDatasets", "ListTables",
+                "CheckOutExtension", "CheckInExtension")
+GP_DA_FUNCTIONS = ("Describe", "SearchCursor", "UpdateCursor", "InsertCursor", "Walk", "FeatureClassToNumPyArray",
+                   "TableToNumPyArray", "ListSubtypes")
+# Modules never reported as the call site
+SHIM_MODULES = ("gp_tracer", "instrumentation", "functools", "contextlib")
+SHIM_FILE = os.path.abspath(__file__)
+# A call site in a loop called at least this often in one theme is a hot loop
+HOT_LOOP_CALLS = 50
+REPORT_ROWS = 40
+
+
+# ----------------------------------------------------------------------
+# Call sites
+# ----------------------------------------------------------------------
+def call_site(depth=2):
+    """ (file, line, function) of the first caller outside arcpy and the shims """
+    frame = sys._getframe(depth)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if (module not in SHIM_MODULES and not module.startswith("arcpy")
+                and os.path.abspath(frame.f_code.co_filename) != SHIM_FILE):
+            return os.path.basename(frame.f_code.co_filename), frame.f_lineno, frame.f_code.co_name
+        frame = frame.f_back
+    return "?", 0, "?"
+
+
+@functools.lru_cache(maxsize=None)
+def _loops(path):
+    """ (first line, last line, per feature) of every loop of a source file. A loop
+    is per feature when it iterates over a cursor or the rows of one """
+    try:
+        with open(path, "r", encoding="utf-8") as source:
+            tree = ast.parse(source.read())
+    except (OSError, SyntaxError, ValueError):
+        return ()
+    loops = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.For, ast.AsyncFor)):
+            target = ast.unparse(node.iter).lower()
+            per_feature = "cursor" in target or re.search(r"\brows?\b", target) is not None
+            loops.append((node.body[0].lineno, node.end_lineno, per_feature))
+        elif isinstance(node, ast.While):
+            loops.append((node.body[0].lineno, node.end_lineno, False))
+        elif isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            per_feature = any("cursor" in ast.unparse(gen.iter).lower() for gen in node.generators)
+            loops.append((node.lineno, node.end_lineno, per_feature))
+    return tuple(loops)
+
+
+def loop_kind(path, line):
+    """ 'per-feature' when the line is inside a loop over features, 'loop' when it
+    is inside any other loop, '' otherwise """
+    kind = ""
+    for first, last, per_feature in _loops(path):
+        if first <= line <= last:
+            if per_feature:
+                return "per-feature"
+            kind = "loop"
+    return kind
+
+
+# ----------------------------------------------------------------------
+# Shim
+# ----------------------------------------------------------------------
+class GPShim:
+    """ wraps the geoprocessing functions of arcpy while anyone listens. Each
+    call is passed to the listeners as (label, call site, seconds) and to the
+    watchers, which do not need the call site, as (label, args, kwargs) """
+
+    def __init__(self):
+        self.listeners = []
+        self.watchers = []
+        self.patched = []
+        self.lock = threading.Lock()
+
+    def add_listener(self, listener):
+        with self.lock:
+            if not self.listeners and not self.watchers:
+                self._install()
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+            if not self.listeners and not self.watchers:
+                self._uninstall()
+
+    def add_watcher(self, watcher):
+        with self.lock:
+            if not self.listeners and not self.watchers:
+                self._install()
+            self.watchers.append(watcher)
+
+    def remove_watcher(self, watcher):
+        with self.lock:
+            if watcher in self.watchers:
+                self.watchers.remove(watcher)
+            if not self.listeners and not self.watchers:
+                self._uninstall()
+
+    def call(self, label, func, args, kwargs):
+        listeners = self.listeners
+        watchers = self.watchers
+        if not listeners and not watchers:
+            return func(*args, **kwargs)
+        site = call_site(3) if listeners else None
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            for listener in listeners:
+                listener(label, site, elapsed)
+            for watcher in watchers:
+                watcher(label, args, kwargs)
+
+    def _wrap(self, owner, attr, label):
+        func = getattr(owner, attr, None)
+        if func is None or not callable(func):
+            return
+
+        @functools.wraps(func)
+        def recorded(*args, **kwargs):
+            return self.call(label, func, args, kwargs)
+        setattr(owner, attr, recorded)
+        self.patched.append((owner, attr, func))
+
+    def _install(self):
+        try:
+            import arcpy
+        except ImportError:
+            return
+        if getattr(arcpy, "__gp_stub__", False):
+            # The stub reports its calls itself
+            return
+        for toolbox in GP_TOOLBOXES:
+            owner = getattr(arcpy, toolbox, None)
+            if owner is None:
+                continue
+            for attr in dir(owner):
+                if not attr.startswith("_") and inspect.isfunction(getattr(owner, attr)):
+                    self._wrap(owner, attr, f"{toolbox}.{attr}")
+                    # Legacy name of the same tool, e.g. arcpy.AddField_management
+                    self._wrap(arcpy, f"{attr}_{toolbox}", f"{toolbox}.{attr}")
+        for attr in GP_FUNCTIONS:
+            self._wrap(arcpy, attr, attr)
+        for attr in GP_DA_FUNCTIONS:
+            self._wrap(arcpy.da, attr, f"da.{attr}")
+
+    def _uninstall(self):
+        for owner, attr, func in reversed(self.patched):
+            setattr(owner, attr, func)
+        self.patched = []
+
+
+shim = GPShim()
+
+
+# ----------------------------------------------------------------------
+# Recorder
+# ----------------------------------------------------------------------
+class GPRecorder:
+    """ calls and seconds of every (tool, call site) per theme """
+
+    def __init__(self):
+        self.theme = "run"
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, label, site, elapsed):
+        key = (label,) + tuple(site)
+        with self.lock:
+            stats = self.calls.setdefault(self.theme, {}).setdefault(key, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def sites(self, theme):
+        """ call sites of a theme with their counts, time and loop kind, most called first """
+        rows = []
+        for (label, path, line, function), (count, seconds) in self.calls.get(theme, {}).items():
+            kind = loop_kind(_source_path(path), line)
+            if kind and count >= HOT_LOOP_CALLS and kind == "loop":
+                kind = "hot loop"
+            rows.append({"tool": label, "file": path, "line": line, "function": function, "calls": count,
+                         "seconds": seconds, "loop": kind})
+        return sorted(rows, key=lambda row: (row["calls"], row["seconds"]), reverse=True)
+
+    def tools(self, theme):
+        totals = {}
+        for (label, *_), (count, seconds) in self.calls.get(theme, {}).items():
+            total = totals.setdefault(label, [0, 0.0])
+            total[0] += count
+            total[1] += seconds
+        return sorted(totals.items(), key=lambda item: item[1][0], reverse=True)
+
+    def report(self, theme, rows=REPORT_ROWS):
+        sites = self.sites(theme)
+        calls = sum(row["calls"] for row in sites)
+        seconds = sum(row["seconds"] for row in sites)
+        lines = [f"arcpy calls of {theme}: {calls} calls, {seconds:.1f} s in {len(sites)} call sites", "",
+                 f"{'tool':<40}{'calls':>9}{'seconds':>10}"]
+        for label, (count, total) in self.tools(theme)[:rows]:
+            lines.append(f"{label:<40}{count:>9}{total:>10.2f}")
+        looped = [row for row in sites if row["loop"] in ("per-feature", "hot loop")]
+        if looped:
+            lines += ["", "Call sites inside loops over features (candidates for batching):"]
+            lines += [_site_line(row) for row in looped[:rows]]
+        lines += ["", "Busiest call sites:"]
+        lines += [_site_line(row) for row in sites[:rows]]
+        return "\n".join(lines)
+
+    def write(self, theme, path, failed=False):
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump({"theme": theme, "failed": failed, "sites": self.sites(theme),
+                       "tools": {label: {"calls": count, "seconds": seconds}
+                                 for label, (count, seconds) in self.tools(theme)}}, out, indent=1)
+        return path
+
+
+def _site_line(row):
+    flag = f" [{row['loop']}]" if row["loop"] else ""
+    site = f"{row['file']}:{row['line']} {row['function']}"
+    return f"{row['calls']:>9}{row['seconds']:>10.2f}  {row['tool']:<36}{site}{flag}"
+
+
+def _source_path(file_name):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), file_name)
+    return path if os.path.exists(path) else file_name
+
+
+# The recorder of this process, None when not recording
+recorder = None
+
+
+def recording():
+    return recorder is not None
+
+
+def start(theme):
+    """ starts recording the arcpy calls of a theme """
+    global recorder
+    if recorder is None:
+        recorder = GPRecorder()
+        shim.add_listener(recorder)
+    recorder.theme = str(theme)
+    return recorder
+
+
+def start_from_env(theme):
+    if os.environ.get(TRACE_ENV_VAR):
+        start(theme)
+        return True
+    return False
+
+
+def stop():
+    global recorder
+    stopped, recorder = recorder, None
+    if stopped is not None:
+        shim.remove_listener(stopped)
+    return stopped
+
+
+def finish(log_dir, logger):
+    """ stops recording, writes the call sites as JSON and logs the report.
+    Returns the path of the JSON file """
+    stopped = stop()
+    if stopped is None:
+        return None
+    folder = os.environ.get(TRACE_ENV_VAR, "")
+    folder = folder if os.path.isdir(folder) else log_dir
+    safe_name = re.sub(r"[^0-9A-Za-z_-]+", "_", stopped.theme).strip("_") or "run"
+    path = stopped.write(stopped.theme, os.path.join(folder, f"gpcalls_{safe_name}_{time.strftime('%Y%m%dT%H%M%S')}.json"))
+    logger.info(f"{stopped.report(stopped.theme)}\nCall sites written to {path}")
+    return path
+
+
+# ----------------------------------------------------------------------
+# Stub arcpy
+# ----------------------------------------------------------------------
+class StubObject:
+    """ stands in for any arcpy object: every attribute, item and call gives another stub """
+
+    def __init__(self, name="stub"):
+        self._name = name
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return StubObject(f"{self._name}.{attr}")
+
+    def __call__(self, *args, **kwargs):
+        return StubObject(self._name)
+
+    def __getitem__(self, key):
+        return StubObject(f"{self._name}[{key}]")
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return False
+
+    def __str__(self):
+        return self._name
+
+    def __fspath__(self):
+        return self._name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __int__(self):
+        return 0
+
+    def __float__(self):
+        return 0.0
+
+    def __eq__(self, other):
+        return isinstance(other, StubObject) and other._name == self._name
+
+    def __hash__(self):
+        return hash(self._name)
+
+    __repr__ = __str__
+
+
+class StubResult(StubObject):
+    """ result of a stub tool, its first output is a dataset name """
+
+    def __init__(self, output, count=None):
+        super().__init__(str(output))
+        self.output = str(output)
+        self.count = count
+
+    def __getitem__(self, key):
+        if key == 0:
+            return str(self.count) if self.count is not None else self.output
+        return StubObject(f"{self.output}[{key}]")
+
+    def getOutput(self, index=0):
+        return self.output
+
+    def __bool__(self):
+        return True
+
+
+class StubDescribe(dict):
+    """ Describe of a stub dataset, unknown keys give a stub """
+
+    def __missing__(self, key):
+        return StubObject(f"Describe.{key}")
+
+    def __getattr__(self, attr):
+        return self[attr]
+
+
+class StubCursor:
+    """ cursor over count rows; OID@ gives 1..count, other fields None """
+
+    def __init__(self, count, fields):
+        fields = [fields] if isinstance(fields, str) else list(fields or [])
+        self.rows = [[cnt + 1 if field in ("OID@", "OBJECTID") else None for field in fields] for cnt in range(count)]
+        self.position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.position >= len(self.rows):
+            raise StopIteration
+        self.position += 1
+        return list(self.rows[self.position - 1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def next(self):
+        return next(self, None)
+
+    def updateRow(self, row):
+        pass
+
+    def deleteRow(self):
+        pass
+
+    def insertRow(self, row):
+        return 0
+
+    def reset(self):
+        self.position = 0
+
+
+class StubArcpy(types.ModuleType):
+    """ arcpy without ArcGIS Pro: tools do nothing and return results, cursors
+    and GetCount follow the dataset shape {feature class: number of features}.
+    Layers and outputs inherit the count of the first input of the tool. Every
+    call is reported to the shim like a real one """
+
+    __gp_stub__ = True
+
+    def __init__(self, shape, workspace):
+        super().__init__("arcpy")
+        self.shape = {os.path.basename(name): int(count) for name, count in shape.items()}
+        self.workspace = workspace
+        self.counts = dict(self.shape)
+        self.ExecuteError = type("ExecuteError", (Exception,), {})
+        self.env = types.SimpleNamespace(overwriteOutput=True, workspace=workspace, scratchWorkspace=workspace,
+                                         scratchGDB=os.path.join(os.path.dirname(workspace), "scratch.gdb"),
+                                         referenceScale=None, cartographicPartitions=None,
+                                         cartographicCoordinateSystem=None, parallelProcessingFactor=None,
+                                         addOutputsToMap=False, outputCoordinateSystem=None, extent=None)
+        self.da = _StubNamespace(self, "da", {
+            "Describe": self._describe, "SearchCursor": self._cursor, "UpdateCursor": self._cursor,
+            "InsertCursor": self._cursor, "Walk": self._walk, "ListSubtypes": lambda *a, **k: {},
+            "FeatureClassToNumPyArray": self._to_array, "TableToNumPyArray": self._to_array})
+        for toolbox in GP_TOOLBOXES:
+            setattr(self, toolbox, _StubNamespace(self, toolbox, {"GetCount": self._get_count}))
+        self.mp = StubObject("mp")
+        for attr in ("AddMessage", "AddWarning", "AddError", "AddIDMessage", "SetProgressor", "SetProgressorLabel",
+                     "SetProgressorPosition", "ResetProgressor"):
+            setattr(self, attr, lambda *args, **kwargs: None)
+        self.GetMessages = lambda *args: ""
+        self.GetParameter = lambda index: None
+        self.GetParameterAsText = lambda index: ""
+        self.AddFieldDelimiters = lambda workspace, field: field
+        self.ValidateTableName = lambda name, workspace=None: name
+        self.ParseTableName = lambda name, workspace=None: name
+        self.Exists = self._recorded("Exists", lambda dataset: self.count_of(dataset) is not None)
+        self.Describe = self._recorded("Describe", self._describe)
+        self.ListFeatureClasses = self._recorded("ListFeatureClasses", lambda *args, **kwargs: [])
+        self.ListTables = self._recorded("ListTables", lambda *args, **kwargs: [])
+        self.ListFields = self._recorded("ListFields", lambda *args, **kwargs: [])
+        self.ListDatasets = self._recorded("ListDatasets", lambda *args, **kwargs: ["Topo"])
+        self.CheckOutExtension = self._recorded("CheckOutExtension", lambda *args: "CheckedOut")
+        self.CheckInExtension = self._recorded("CheckInExtension", lambda *args: "CheckedIn")
+
+    def __getattr__(self, attr):
+        # Geometry and other classes (Point, Array, Polyline, SpatialReference...)
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        return StubObject(attr)
+
+    def _recorded(self, label, func):
+        return lambda *args, **kwargs: shim.call(label, func, args, kwargs)
+
+    def count_of(self, dataset):
+        name = os.path.basename(str(dataset).replace("\\", "/"))
+        return self.counts.get(name)
+
+    def tool(self, label, args, kwargs):
+        """ a geoprocessing tool: the output named by the second argument gets
+        the count of the first """
+        inputs = [value for value in list(args) + list(kwargs.values())[:1] if isinstance(value, (str, StubResult))]
+        count = self.count_of(inputs[0]) if inputs else None
+        output = inputs[1] if len(inputs) > 1 else (inputs[0] if inputs else label)
+        if count is not None and isinstance(output, str):
+            self.counts[os.path.basename(output.replace("\\", "/"))] = count
+        return StubResult(output)
+
+    def _get_count(self, dataset, *args, **kwargs):
+        return StubResult(str(dataset), self.count_of(dataset) or 0)
+
+    def _cursor(self, dataset, fields=None, *args, **kwargs):
+        return StubCursor(self.count_of(dataset) or 0, fields)
+
+    def _to_array(self, dataset, fields=None, *args, **kwargs):
+        """ structured array of the fields, OID@ gives 1..count like the cursors """
+        import numpy as np
+        fields = [fields] if isinstance(fields, str) else list(fields or ["OID@"])
+        array = np.zeros(self.count_of(dataset) or 0, dtype=[(field, "<i4" if field in ("OID@", "OBJECTID") else "<f8")
+                                                              for field in fields])
+        for field in fields:
+            if field in ("OID@", "OBJECTID"):
+                array[field] = np.arange(1, len(array) + 1)
+        return array
+
+    def _describe(self, dataset, *args):
+        name = os.path.basename(str(dataset).replace("\\", "/"))
+        shape_type = {"L": "Polyline", "A": "Polygon", "P": "Point"}.get(name[-1:], "Polygon")
+        return StubDescribe(name=name, baseName=name, catalogPath=str(dataset), shapeType=shape_type,
+                            OIDFieldName="OBJECTID", fields=[], hasZ=False, dataType="FeatureClass",
+                            lengthFieldName="Shape_Length", areaFieldName="Shape_Area",
+                            spatialReference=StubObject("SpatialReference"))
+
+    def _walk(self, workspace, *args, **kwargs):
+        names = sorted(self.shape)
+        yield str(workspace), ["Topo"], [name for name in names if name == "AOI"]
+        yield os.path.join(str(workspace), "Topo"), [], [name for name in names if name != "AOI"]
+
+
+class _StubNamespace:
+    """ a toolbox (or arcpy.da) of the stub; tools not listed are generic tools """
+
+    def __init__(self, stub, toolbox, functions):
+        self._stub = stub
+        self._toolbox = toolbox
+        for attr, func in functions.items():
+            setattr(self, attr, stub._recorded(f"{toolbox}.{attr}", func))
+
+    def __getattr__(self, attr):
+        if attr.startswith("__"):
+            raise AttributeError(attr)
+        label = f"{self._toolbox}.{attr}"
+        tool = lambda *args, **kwargs: shim.call(label, self._stub.tool, (label, args, kwargs), {})
+        setattr(self, attr, tool)
+        return tool
+
+
+def install_stub(shape, workspace):
+    """ makes 'import arcpy' give a stub for the dataset shape. Returns the stub """
+    stub = StubArcpy(shape, workspace)
+    stub.__path__ = []
+    sys.modules["arcpy"] = stub
+    for name in GP_TOOLBOXES + ("da", "mp"):
+        sys.modules[f"arcpy.{name}"] = getattr(stub, name)
+    return stub
+
+
+def shape_from_sheet(sheet):
+    """ dataset shape {feature class: number of features} of a synthetic sheet """
+    return {fc: len(oids) for fc, (oids, _, _) in sheet.datasets.items()}
+
+
+# ----------------------------------------------------------------------
+# Command line, stub mode
+# ----------------------------------------------------------------------
+def parse_args(argv=None):
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Count the arcpy calls of GenCarto 100K themes with a stub arcpy")
+    parser.add_argument("--themes", default="1-11", help="range or list of themes, e.g. 1-11 or 3,5,9a")
+    parser.add_argument("--scale", default="smoke", help="synthetic sheet that gives the dataset shape")
+    parser.add_argument("--shape", default="", help="JSON file {feature class: count}, instead of --scale")
+    parser.add_argument("--excel", default=os.path.join(here, "GeneralizationRules100K.xlsx"))
+    parser.add_argument("--hierarchy", default=os.path.join(here, "HierarchyAll_100K.csv"))
+    parser.add_argument("--out", default="", help="folder for the reports, a temp folder by default")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    if args.shape:
+        with open(args.shape, "r", encoding="utf-8") as shape_file:
+            shape = json.load(shape_file)
+    else:
+        import synthetic_data
+        shape = shape_from_sheet(synthetic_data.generate(args.scale, hierarchy_file=args.hierarchy,
+                                                         excel_file=args.excel))
+    out = args.out or tempfile.mkdtemp(prefix="gpcalls_")
+    in_feature_loc = os.path.join(out, "stub.gdb")
+    stub = install_stub(shape, in_feature_loc)
+    os.makedirs(stub.env.scratchGDB, exist_ok=True)
+
+    import pipeline
+    import main as gencarto
+    failed = []
+    for theme in pipeline.parse_themes(args.themes):
+        start(theme)
+        try:
+            succeeded = gencarto.main(theme, in_feature_loc, args.hierarchy, out, out, args.excel, out, out)
+        except SystemExit:
+            succeeded = False
+        stopped = stop()
+        safe_name = re.sub(r"[^0-9A-Za-z_-]+", "_", theme).strip("_")
+        stopped.write(theme, os.path.join(out, f"gpcalls_{safe_name}.json"), failed=not succeeded)
+        if not succeeded:
+            failed.append(theme)
+            print(f"FAILED: {theme} stopped with an error, the calls below end at the failure (see the log in {out})")
+        print(stopped.report(theme), end="\n\n")
+    print(f"Call sites written to {out}")
+    for theme in failed:
+        print(f"Failed: {theme}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
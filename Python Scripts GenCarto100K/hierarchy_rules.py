@@ -0,0 +1,68 @@
+# import required python modules
+import csv
+
+import numpy as np
+
+from where_clause import compile_where
+
+
+class HierarchyRule:
+    """ one row of the hierarchy file: features of fc selected by query get value """
+
+    def __init__(self, fc, query, value, line):
+        self.fc = fc
+        self.query = query
+        self.value = value
+        self.line = line
+        self.where = compile_where(query)
+
+    def __repr__(self):
+        return f"HierarchyRule({self.fc!r}, {self.query!r}, {self.value}, line={self.line})"
+
+
+def read_rules(hierarchy_file):
+    """ rules of a hierarchy file (feature class, where clause, value; no header)
+    in file order. Quoted queries may contain commas """
+    rules = []
+    with open(hierarchy_file, "r", newline="", encoding="utf-8-sig") as rule_file:
+        for line, record in enumerate(csv.reader(rule_file), start=1):
+            if not record or not record[0].strip():
+                continue
+            if len(record) < 3:
+                raise ValueError(f"{hierarchy_file} line {line}: expected feature class, query and value")
+            # An unquoted query with commas is split over several columns
+            fc, query, value = record[0].strip(), ",".join(record[1:-1]).strip(), record[-1].strip()
+            try:
+                rules.append(HierarchyRule(fc, query, int(value), line))
+            except ValueError as e:
+                raise ValueError(f"{hierarchy_file} line {line}: {e}") from e
+    return rules
+
+
+def rules_by_fc(rules):
+    """ rules grouped by upper case feature class name, in file order """
+    grouped = {}
+    for rule in rules:
+        grouped.setdefault(rule.fc.upper(), []).append(rule)
+    return grouped
+
+
+def rule_fields(rules):
+    """ attribute fields the where clauses of the rules read """
+    return sorted({field for rule in rules for field in rule.where.fields}, key=str.upper)
+
+
+def evaluate(rules, columns, count, current=None):
+    """ hierarchy value of every row for the rules of one feature class. Every
+    where clause is evaluated as a mask over the columns; when several rules select
+    a row the last one in the file wins, as when the rules were applied one after
+    the other. Rows no rule selects keep their current value. Returns the values
+    (object array, None for no value) and the mask of the rows a rule selected """
+    values = np.empty(count, dtype=object)
+    values[:] = [None] * count if current is None else list(current)
+    selected = np.zeros(count, dtype=bool)
+    for rule in rules:
+        mask = rule.where.mask(columns, count)
+        values[mask] = rule.value
+        selected |= mask
+    return values, selected
@@ -0,0 +1,259 @@
+# import required python modules
+import contextlib
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+
+import gp_tracer
+
+# Set to 1 (trace files in the log folder) or to a folder to trace a run
+TRACE_ENV_VAR = "GENCARTO_TRACE"
+# Set to 1 to also count the features of the first argument of every step
+COUNT_ENV_VAR = "GENCARTO_TRACE_COUNTS"
+# Helpers that are too small to trace, or are used by the tracer itself
+SKIP_FUNCTIONS = {"has_features", "count_features", "simplified_msgs", "error_msgs", "get_project"}
+# Rows of the summary table
+SUMMARY_ROWS = 40
+
+# Active tracer, None when tracing is off
+_tracer = None
+_null_step = contextlib.nullcontext()
+
+
+class Span:
+    """ one timed call of a step """
+    __slots__ = ("name", "start", "cpu", "children", "gp_calls", "features_in", "features_out", "depth")
+
+    def __init__(self, name, start, cpu, depth):
+        self.name = name
+        self.start = start
+        self.cpu = cpu
+        self.depth = depth
+        self.children = 0.0
+        self.gp_calls = 0
+        self.features_in = None
+        self.features_out = None
+
+
+class Tracer:
+    """ records the steps of a run as complete events of a Chrome trace
+    (chrome://tracing or ui.perfetto.dev) with the wall and CPU time, the
+    geoprocessing calls and optionally the features in and out of every step """
+
+    def __init__(self, count_features=False):
+        self.count_features = count_features
+        self.origin = time.perf_counter()
+        self.events = []
+        self.gp_totals = {}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # Set while the tracer counts features so that GetCount is not counted as a step call
+        self.counting = False
+
+    def stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def begin(self, name, dataset=None):
+        stack = self.stack()
+        span = Span(name, time.perf_counter(), time.thread_time(), len(stack))
+        if self.count_features and dataset is not None:
+            span.features_in = self.feature_count(dataset)
+        stack.append(span)
+        return span
+
+    def end(self, span, dataset=None):
+        end = time.perf_counter()
+        cpu = time.thread_time() - span.cpu
+        stack = self.stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        duration = end - span.start
+        if stack:
+            stack[-1].children += duration
+        if self.count_features and dataset is not None:
+            span.features_out = self.feature_count(dataset)
+        args = {"cpu_s": round(cpu, 6), "self_s": round(duration - span.children, 6), "gp_calls": span.gp_calls}
+        if span.features_in is not None or span.features_out is not None:
+            args["features_in"] = span.features_in
+            args["features_out"] = span.features_out
+        event = {"name": span.name, "ph": "X", "ts": round((span.start - self.origin) * 1e6, 1),
+                 "dur": round(duration * 1e6, 1), "pid": os.getpid(), "tid": threading.get_ident(), "args": args}
+        with self.lock:
+            self.events.append(event)
+
+    def gp_call(self, label, site=None, elapsed=0.0):
+        if self.counting:
+            return
+        for span in self.stack():
+            span.gp_calls += 1
+        with self.lock:
+            self.gp_totals[label] = self.gp_totals.get(label, 0) + 1
+
+    def feature_count(self, dataset):
+        """ number of features of a feature class or layer, None for anything else """
+        if not isinstance(dataset, str) and type(dataset).__name__ not in ("Layer", "Result"):
+            return None
+        try:
+            import arcpy
+            self.counting = True
+            return int(arcpy.management.GetCount(dataset)[0])
+        except Exception:
+            return None
+        finally:
+            self.counting = False
+
+    # ------------------------------------------------------------------
+    # Geoprocessing calls
+    # ------------------------------------------------------------------
+    def patch_gp(self):
+        """ counts the arcpy calls, through the gp_tracer shim, while the tracer is active """
+        gp_tracer.shim.add_listener(self.gp_call)
+
+    def unpatch_gp(self):
+        gp_tracer.shim.remove_listener(self.gp_call)
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def write(self, path, metadata=None):
+        trace = {"traceEvents": sorted(self.events, key=lambda event: event["ts"]), "displayTimeUnit": "ms",
+                 "otherData": dict(metadata or {}, gp_calls=self.gp_totals)}
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump(trace, out)
+        return path
+
+    def summary(self):
+        """ totals per step name, slowest (own time) first """
+        steps = {}
+        for event in self.events:
+            step = steps.setdefault(event["name"], {"calls": 0, "wall_s": 0.0, "self_s": 0.0, "cpu_s": 0.0,
+                                                    "gp_calls": 0, "features_in": None, "features_out": None})
+            args = event["args"]
+            step["calls"] += 1
+            step["wall_s"] += event["dur"] / 1e6
+            step["self_s"] += args["self_s"]
+            step["cpu_s"] += args["cpu_s"]
+            step["gp_calls"] += args["gp_calls"]
+            if args.get("features_in") is not None:
+                step["features_in"] = args["features_in"]
+                step["features_out"] = args["features_out"]
+        return sorted(steps.items(), key=lambda item: item[1]["self_s"], reverse=True)
+
+    def summary_table(self, rows=SUMMARY_ROWS):
+        lines = [f"{'step':<45}{'calls':>7}{'wall s':>11}{'self s':>11}{'cpu s':>11}{'gp calls':>10}{'features':>17}"]
+        for name, step in self.summary()[:rows]:
+            features = "" if step["features_in"] is None else f"{step['features_in']}->{step['features_out']}"
+            lines.append(f"{name[:44]:<45}{step['calls']:>7}{step['wall_s']:>11.2f}{step['self_s']:>11.2f}"
+                         f"{step['cpu_s']:>11.2f}{step['gp_calls']:>10}{features:>17}")
+        return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# Public interface
+# ----------------------------------------------------------------------
+def active():
+    return _tracer is not None
+
+
+def enable(count_features=False):
+    """ starts tracing; steps that run before this are not recorded """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(count_features)
+        _tracer.patch_gp()
+    return _tracer
+
+
+def disable():
+    """ stops tracing and returns the tracer with what it recorded """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is not None:
+        tracer.unpatch_gp()
+    return tracer
+
+
+def traced(func=None, name=None):
+    """ decorator that records every call of func as a step. When tracing is
+    off the only cost is one check of the active tracer """
+    if func is None:
+        return lambda inner: traced(inner, name)
+    step_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tracer = _tracer
+        if tracer is None:
+            return func(*args, **kwargs)
+        dataset = args[0] if args and tracer.count_features else None
+        span = tracer.begin(step_name, dataset)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            tracer.end(span, dataset)
+    wrapper.__traced__ = True
+    return wrapper
+
+
+@contextlib.contextmanager
+def _step(tracer, name, dataset):
+    span = tracer.begin(name, dataset)
+    try:
+        yield span
+    finally:
+        tracer.end(span, dataset)
+
+
+def step(name, dataset=None):
+    """ context manager that records a block as a step; dataset is the feature
+    class whose features are counted before and after """
+    tracer = _tracer
+    if tracer is None:
+        return _null_step
+    return _step(tracer, name, dataset if tracer.count_features else None)
+
+
+def instrument_modules(modules):
+    """ wraps the functions defined in the modules with traced, in the namespace
+    of every module so that calls through 'from common_utils import *' are
+    recorded too """
+    names = {module.__name__ for module in modules}
+    wrapped = 0
+    for module in modules:
+        for attr, obj in list(vars(module).items()):
+            if (inspect.isfunction(obj) and obj.__module__ in names and attr not in SKIP_FUNCTIONS
+                    and not getattr(obj, "__traced__", False)):
+                setattr(module, attr, traced(obj, f"{obj.__module__}.{attr}"))
+                wrapped += 1
+    return wrapped
+
+
+def start_from_env(modules):
+    """ starts tracing when GENCARTO_TRACE is set. Returns whether it is on """
+    if not os.environ.get(TRACE_ENV_VAR):
+        return False
+    instrument_modules(modules)
+    enable(os.environ.get(COUNT_ENV_VAR, "") not in ("", "0"))
+    return True
+
+
+def finish(run_name, log_dir, logger):
+    """ stops tracing, writes the trace file and logs the summary table.
+    Returns the path of the trace, None when tracing was off """
+    tracer = disable()
+    if tracer is None:
+        return None
+    folder = os.environ.get(TRACE_ENV_VAR, "")
+    folder = folder if os.path.isdir(folder) else log_dir
+    safe_name = re.sub(r"[^0-9A-Za-z_-]+", "_", str(run_name)).strip("_") or "run"
+    path = os.path.join(folder, f"trace_{safe_name}_{time.strftime('%Y%m%dT%H%M%S')}.json")
+    tracer.write(path, {"run": str(run_name)})
+    logger.info(f"Step timings of {run_name}, trace written to {path}\n{tracer.summary_table()}")
+    return path
@@ -0,0 +1,72 @@
+# import required python modules
+import numpy as np
+
+
+class UnionFind:
+    """ disjoint sets over the integers 0..count-1 with path halving and union by size """
+
+    def __init__(self, count):
+        self.parent = np.arange(count)
+        self.size = np.ones(count, dtype=np.int64)
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, item_a, item_b):
+        root_a, root_b = self.find(item_a), self.find(item_b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+    def labels(self):
+        """ root of every item """
+        return np.fromiter((self.find(item) for item in range(len(self.parent))), dtype=np.int64,
+                           count=len(self.parent))
+
+
+def connected_components(count, left, right):
+    """ component label of each of count items, given the edges (left[i], right[i]) """
+    sets = UnionFind(count)
+    for item_a, item_b in zip(np.asarray(left).tolist(), np.asarray(right).tolist()):
+        sets.union(item_a, item_b)
+    return sets.labels()
+
+
+def _blank(name):
+    return name is None or (isinstance(name, str) and not name.strip())
+
+
+def merge_plan(oids, names, left, right):
+    """ groups touching features into components. Returns (keep_oid, member_oids)
+    for every component of two or more features that has at most one distinct name.
+    left and right are row numbers into oids; the feature kept is the named one
+    when there is one, then the lowest oid """
+    oids = np.asarray(oids)
+    labels = connected_components(len(oids), left, right)
+    touching = np.zeros(len(oids), dtype=bool)
+    touching[np.asarray(left, dtype=np.int64)] = True
+    touching[np.asarray(right, dtype=np.int64)] = True
+
+    plan = []
+    rows = np.flatnonzero(touching)
+    order = np.argsort(labels[rows], kind="stable")
+    rows = rows[order]
+    splits = np.flatnonzero(np.diff(labels[rows])) + 1
+    for component in np.split(rows, splits):
+        if len(component) < 2:
+            continue
+        component_names = set(names[row] for row in component if not _blank(names[row]))
+        if len(component_names) > 1:
+            continue
+        # Named feature first, then by OBJECTID
+        keep = min(component, key=lambda row: (_blank(names[row]), int(oids[row])))
+        plan.append((int(oids[keep]), [int(oid) for oid in oids[component]]))
+    return plan
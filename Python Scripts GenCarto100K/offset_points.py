@@ -0,0 +1,70 @@
+# import required python modules
+import numpy as np
+
+import spatial_index
+
+# Offset distance constant
+RIGHTANGLE = 90.0
+
+
+def _ranges(starts, ends):
+    """ concatenation of arange(start, end) for every pair """
+    counts = np.maximum(ends - starts, 0)
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+
+def line_segments(store, rows=None):
+    """ splits the lines of a FeatureStore at their vertices in one pass.
+    Returns the (m, 2) start and end points of every segment and the store row it belongs to """
+    rows = store.active_rows() if rows is None else np.asarray(rows, dtype=np.int64)
+    # Lines have one ring per part
+    parts = _ranges(store.geom_offsets[rows], store.geom_offsets[rows + 1])
+    part_rows = np.repeat(rows, store.geom_offsets[rows + 1] - store.geom_offsets[rows])
+    rings = _ranges(store.part_offsets[parts], store.part_offsets[parts + 1])
+    ring_rows = np.repeat(part_rows, store.part_offsets[parts + 1] - store.part_offsets[parts])
+    # A segment starts at every vertex except the last one of a ring
+    seg_counts = np.maximum(store.ring_offsets[rings + 1] - store.ring_offsets[rings] - 1, 0)
+    start_idx = _ranges(store.ring_offsets[rings], store.ring_offsets[rings] + seg_counts)
+    xy = store.coords[:, :2]
+    return xy[start_idx], xy[start_idx + 1], np.repeat(ring_rows, seg_counts)
+
+
+def offset_angles(delta_x, delta_y, offset_dist, perpendicular=False):
+    """ orientation angle of the segments (degrees, 0-360) and the x and y offset
+    of a point on the segment, on the left side of the segment direction """
+    angle = np.degrees(np.arctan2(delta_y, delta_x))
+    angle = np.where(angle < 0, angle + 360, angle)
+    # Calculate angle of offset
+    offset_angle = np.radians(np.abs(RIGHTANGLE - angle))
+    x_offset = np.abs(np.cos(offset_angle) * offset_dist)
+    y_offset = np.abs(np.sin(offset_angle) * offset_dist)
+    # Sign of the offset based on quadrant angle falls in
+    quadrant = np.minimum((angle // RIGHTANGLE).astype(np.int64), 3)
+    new_x = np.choose(quadrant, [-x_offset, -x_offset, x_offset, x_offset])
+    new_y = np.choose(quadrant, [y_offset, -y_offset, -y_offset, y_offset])
+    if perpendicular:
+        return -new_x, -new_y, angle - RIGHTANGLE
+    return new_x, new_y, angle
+
+
+def point_offsets(points, seg_start, seg_end, offset_dist, perpendicular=False, tolerance=0.001, seg_index=None):
+    """ finds the segment under every point through the spatial index and
+    returns (segment of every point or -1, x offset, y offset, angle).
+    offset_dist is a scalar or one distance per segment """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    nearest = np.full(len(points), -1, dtype=np.int64)
+    if seg_index is None:
+        seg_index = spatial_index.SpatialIndex(
+            spatial_index.shapely.linestrings(np.stack([seg_start, seg_end], axis=1)))
+    if len(points) and len(seg_index):
+        pnt_idx, seg_idx, _ = seg_index.nearest(spatial_index.shapely.points(points), max_distance=tolerance)
+        nearest[pnt_idx] = seg_idx
+    found = nearest >= 0
+    seg = nearest[found]
+    delta = seg_end[seg] - seg_start[seg]
+    dist = np.broadcast_to(np.asarray(offset_dist, dtype=np.float64), (len(seg_start),))[seg] if len(seg_start) else seg
+    x_offset = np.full(len(points), np.nan)
+    y_offset = np.full(len(points), np.nan)
+    angle = np.full(len(points), np.nan)
+    x_offset[found], y_offset[found], angle[found] = offset_angles(delta[:, 0], delta[:, 1], dist, perpendicular)
+    return nearest, x_offset, y_offset, angle
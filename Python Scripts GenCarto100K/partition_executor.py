@@ -0,0 +1,142 @@
+# Runs an in-memory task per cartographic partition in a process pool. Only
+# trim_polygon_within_distance (trim_polygons.trim_task) runs through it so far.
+# Enlarge, merge_components and the hydrography steps still run over the whole
+# sheet: merged components can span any number of partitions, and the
+# hydrography steps are geoprocessing tools, not in-memory tasks.
+# import required python modules
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import spatial_index
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+
+def _worker_executable():
+    """ inside ArcGIS Pro sys.executable is ArcGISPro.exe, the workers
+    have to be started with the python of the Pro environment instead """
+    if os.path.basename(sys.executable).lower() == "arcgispro.exe":
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, "pythonw.exe"))
+
+
+def default_workers():
+    """ one worker per core, leaving one for ArcGIS Pro """
+    return max((os.cpu_count() or 1) - 1, 1)
+
+
+def parse_workers(factor):
+    """ number of workers for a parallelProcessingFactor value ('8' or '50%'),
+    one per core less one when it is not set """
+    if factor in (None, ""):
+        return default_workers()
+    factor = str(factor).strip()
+    if factor.endswith("%"):
+        return max(int(round((os.cpu_count() or 1) * float(factor[:-1]) / 100.0)), 1)
+    return max(int(float(factor)), 1)
+
+
+class PartitionPlan:
+    """ splits the features of a dataset between the partition polygons.
+
+    Every partition gets the features that intersect its polygon buffered by
+    the halo. A feature is interior to the partition whose polygon contains it,
+    so all its neighbours within the halo are in that partition too and its
+    result can be taken from there. Features that straddle a seam are interior
+    to no partition and are resolved by a last pass over the seam features and
+    their neighbours """
+
+    def __init__(self, partitions, geometries, halo, context=None):
+        self.partitions = np.asarray(partitions, dtype=object)
+        self.halo = float(halo)
+        index = spatial_index.SpatialIndex(geometries)
+        windows = shapely.buffer(self.partitions, self.halo) if self.halo > 0 else self.partitions
+        self.members = group_by_query(index.intersects(windows), len(self.partitions))
+        self.interior = group_by_query(index.query(self.partitions, "contains"), len(self.partitions))
+
+        # Features contained by no partition
+        owned = np.zeros(len(index), dtype=bool)
+        for rows in self.interior:
+            owned[rows] = True
+        self.seams = np.flatnonzero(~owned)
+        _, seam_right, _ = index.within_distance(index.geometries[self.seams], self.halo)
+        self.seam_members = np.unique(np.concatenate([self.seams, seam_right]))
+
+        # Context features (compare features of another dataset) seen by every window
+        self.context_members = None
+        self.seam_context = None
+        if context is not None:
+            context_index = spatial_index.SpatialIndex(context)
+            self.context_members = group_by_query(context_index.intersects(windows), len(self.partitions))
+            _, context_right, _ = context_index.within_distance(index.geometries[self.seams], self.halo)
+            self.seam_context = np.unique(context_right)
+
+    def jobs(self):
+        """ (member rows, context rows, rows whose results are kept) of every
+        partition with work to do, then of the seam pass """
+        for part in range(len(self.partitions)):
+            if len(self.interior[part]):
+                context = self.context_members[part] if self.context_members is not None else None
+                yield self.members[part], context, self.interior[part]
+        if len(self.seams):
+            yield self.seam_members, self.seam_context, self.seams
+
+
+def group_by_query(pairs, count):
+    """ tree indexes of every query geometry from (query_idx, tree_idx) pairs """
+    left, right = pairs
+    order = np.argsort(left, kind="stable")
+    left, right = left[order], right[order]
+    bounds = np.searchsorted(left, np.arange(count + 1))
+    return [np.sort(right[bounds[cnt]:bounds[cnt + 1]]) for cnt in range(count)]
+
+
+def _run_job(task, ids, wkb, context_ids, context_wkb, keep_ids, args):
+    """ runs a task on one partition in a worker process and keeps the
+    results of the features it owns """
+    geometries = shapely.from_wkb(wkb)
+    context = shapely.from_wkb(context_wkb) if context_wkb is not None else None
+    results = task(ids, geometries, context_ids, context, *args)
+    keep_ids = set(keep_ids.tolist())
+    return {oid: result for oid, result in results.items() if oid in keep_ids}
+
+
+def run_partitioned(task, ids, geometries, partitions, halo, args=(), context_ids=None, context=None, workers=1):
+    """ runs task(ids, geometries, context_ids, context, *args) -> {id: result}
+    on every partition of the features and stitches the results together.
+
+    The task must only depend on the features (and context features) within
+    halo of each feature it returns a result for, and must be a module level
+    function so it can be sent to the worker processes. Geometries travel as
+    WKB. With workers > 1 the partitions run in a process pool """
+    ids = np.asarray(ids)
+    geometries = np.asarray(geometries, dtype=object)
+    plan = PartitionPlan(partitions, geometries, halo, context)
+    wkb = shapely.to_wkb(geometries)
+    if context is not None:
+        context_ids = np.asarray(context_ids)
+        context_wkb = shapely.to_wkb(np.asarray(context, dtype=object))
+
+    def job_args(job):
+        members, context_rows, keep = job
+        if context is None:
+            return task, ids[members], wkb[members], None, None, ids[keep], args
+        return task, ids[members], wkb[members], context_ids[context_rows], context_wkb[context_rows], ids[keep], args
+
+    results = {}
+    if workers and workers > 1:
+        _worker_executable()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_run_job, *job_args(job)) for job in plan.jobs()]
+            for future in futures:
+                results.update(future.result())
+    else:
+        for job in plan.jobs():
+            results.update(_run_job(*job_args(job)))
+    return results
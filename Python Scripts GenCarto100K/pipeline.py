@@ -0,0 +1,153 @@
+# Runs several themes in one process, records each finished theme and resumes
+# a failed run from the last checkpoint. Usable headless, e.g.
+#   propy pipeline.py --in-gdb D:\Sheets\3957.gdb --excel GeneralizationRules100K.xlsx
+#       --hierarchy HierarchyAll_100K.csv --symbology D:\Style --project D:\GenCarto.aprx --themes 1-9b
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import traceback
+
+import arcpy
+
+import main as gencarto
+import snapshot_store
+import theme_registry
+
+# Themes in run order with the key used on the command line and their snapshot
+THEMES = [(theme.key, theme.name, theme.checkpoint) for theme in theme_registry.THEMES]
+THEME_KEYS = [key for key, _, _ in THEMES]
+THEME_NAMES = {key: name for key, name, _ in THEMES}
+CHECKPOINTS = {name: checkpoint for _, name, checkpoint in THEMES}
+
+
+def parse_themes(text):
+    """ theme names for '1-11', '3,5,9a' or '2-6,9a' """
+    themes = []
+    for item in str(text).split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        if "-" in item:
+            first, last = [part.strip() for part in item.split("-", 1)]
+            keys = THEME_KEYS[THEME_KEYS.index(first):THEME_KEYS.index(last) + 1]
+        else:
+            keys = [item]
+        for key in keys:
+            if key not in THEME_NAMES:
+                raise ValueError(f"Unknown theme {key}, expected one of {', '.join(THEME_KEYS)}")
+            if THEME_NAMES[key] not in themes:
+                themes.append(THEME_NAMES[key])
+    return sorted(themes, key=lambda name: list(CHECKPOINTS).index(name))
+
+
+class PipelineState:
+    """ status of every theme run on one sheet, kept as JSON next to the backups """
+
+    def __init__(self, backup_root, in_feature_loc):
+        name = os.path.splitext(os.path.basename(os.path.normpath(in_feature_loc)))[0]
+        self.path = os.path.join(backup_root, f"pipeline_{name}.json")
+        self.themes = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as state:
+                self.themes = json.load(state).get("themes", {})
+
+    def mark(self, theme, status, **info):
+        self.themes[theme] = dict(info, status=status, time=time.strftime('%Y-%m-%d %H:%M:%S'))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as state:
+            json.dump({"themes": self.themes}, state, indent=1)
+        os.replace(temp_path, self.path)
+
+    def status(self, theme):
+        return self.themes.get(theme, {}).get("status")
+
+
+def restore_checkpoint(store, checkpoint, in_feature_loc):
+    """ puts the gdb of a checkpoint back in place of in_feature_loc; the
+    gdb left by the failed theme is kept next to it """
+    restored = f"{in_feature_loc}.restore"
+    shutil.rmtree(restored, ignore_errors=True)
+    store.restore(snapshot_store.checkpoint_name(checkpoint, in_feature_loc), restored)
+    arcpy.management.ClearWorkspaceCache()
+    os.rename(in_feature_loc, f"{in_feature_loc}.failed_{time.strftime('%Y%m%dT%H%M%S')}")
+    os.rename(restored, in_feature_loc)
+
+
+def run_pipeline(themes, in_feature_loc, resume=False, restore=True, **params):
+    """ runs the themes in order on one sheet and stops at the first failure.
+    With resume the themes that finished in an earlier run are skipped and,
+    if the run before failed, the gdb is first restored from the snapshot of the
+    last finished theme. Returns True when every theme finished """
+    log_dir = os.path.dirname(arcpy.env.scratchGDB)
+    backup_root = os.path.join(log_dir, "Backup")
+    state = PipelineState(backup_root, in_feature_loc)
+
+    todo = list(themes)
+    if resume:
+        failed = [theme for theme in todo if state.status(theme) in ("failed", "running")]
+        todo = [theme for theme in todo if state.status(theme) != "completed"]
+        if failed and restore:
+            done = [theme for theme in CHECKPOINTS if state.status(theme) == "completed"
+                    and list(CHECKPOINTS).index(theme) < list(CHECKPOINTS).index(failed[0])]
+            store = snapshot_store.SnapshotStore(backup_root)
+            if done and snapshot_store.checkpoint_name(CHECKPOINTS[done[-1]], in_feature_loc) in store.snapshots():
+                arcpy.AddMessage(f"Restoring {in_feature_loc} from checkpoint {CHECKPOINTS[done[-1]]}.....")
+                restore_checkpoint(store, CHECKPOINTS[done[-1]], in_feature_loc)
+
+    for theme in todo:
+        arcpy.AddMessage(f"Pipeline: starting {theme} on {in_feature_loc}.....")
+        state.mark(theme, "running")
+        try:
+            succeeded = gencarto.main(theme, in_feature_loc, **params)
+            # The snapshot of the theme is part of its checkpoint
+            snapshot_store.background.wait()
+        except (Exception, SystemExit):
+            arcpy.AddError(traceback.format_exc())
+            succeeded = False
+        if not succeeded:
+            state.mark(theme, "failed")
+            arcpy.AddError(f"Pipeline stopped, {theme} failed on {in_feature_loc}")
+            return False
+        state.mark(theme, "completed", checkpoint=CHECKPOINTS[theme])
+    return True
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run GenCarto 100K themes in one process")
+    parser.add_argument("--in-gdb", nargs="+", required=True, help="input workspace(s), one per map sheet")
+    parser.add_argument("--excel", required=True, help="GeneralizationRules100K.xlsx")
+    parser.add_argument("--hierarchy", default="", help="HierarchyAll_100K.csv")
+    parser.add_argument("--out-workspace", default="")
+    parser.add_argument("--rev-workspace", default="")
+    parser.add_argument("--symbology", default="", help="folder of the symbology layer files")
+    parser.add_argument("--vst-workspace", default="")
+    parser.add_argument("--project", default="", help=".aprx for the map based themes when run headless")
+    parser.add_argument("--themes", default="1-11", help="range or list of themes, e.g. 1-11, 2-6 or 3,5,9a")
+    parser.add_argument("--resume", action="store_true", help="skip finished themes and restart from the last checkpoint")
+    parser.add_argument("--no-restore", action="store_true", help="with --resume, keep the gdb left by the failed theme")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    if args.project:
+        os.environ["GENCARTO_PROJECT"] = args.project
+    themes = parse_themes(args.themes)
+    failed = []
+    for in_feature_loc in args.in_gdb:
+        if not run_pipeline(themes, in_feature_loc, args.resume, not args.no_restore,
+                            hierarchy_file=args.hierarchy, out_workspace=args.out_workspace,
+                            rev_workspace=args.rev_workspace, excel_file=args.excel,
+                            symbology_file_path=args.symbology, vst_workspace=args.vst_workspace):
+            failed.append(in_feature_loc)
+    for in_feature_loc in failed:
+        print(f"Failed: {in_feature_loc}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
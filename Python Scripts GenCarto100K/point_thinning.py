@@ -0,0 +1,76 @@
+# import required python modules
+import numpy as np
+
+# Priority orders accepted in the workbook
+ORDERS = ("ASC", "DESC", "EXTREME")
+
+
+def ground_spacing(spacing_mm, ref_scale):
+    """ minimum symbol spacing in map millimetres to ground units at the reference scale """
+    return float(spacing_mm) * float(ref_scale) / 1000.0
+
+
+def priority_order(values, order="ASC"):
+    """ row order in which the points are considered, most important first.
+
+    ASC keeps low values first (HIERARCHY 1 before 2), DESC high values first and
+    EXTREME the values furthest from the median first (peaks and pits of the height
+    points). Points without a value come last; ties keep the input order """
+    values = np.asarray(values, dtype=np.float64)
+    order = (order or "ASC").strip().upper()
+    if order not in ORDERS:
+        raise ValueError(f"Unknown priority order {order}, expected one of {', '.join(ORDERS)}")
+    missing = np.isnan(values)
+    if order == "ASC":
+        key = values
+    elif order == "DESC":
+        key = -values
+    else:
+        center = np.median(values[~missing]) if (~missing).any() else 0.0
+        key = -np.abs(values - center)
+    key = np.where(missing, np.inf, key)
+    return np.argsort(key, kind="stable")
+
+
+def thin_points(xy, spacing, order=None):
+    """ greedy thinning on a spatial hash grid. Points are visited in priority order
+    and a point is kept when no kept point lies closer than spacing; only the kept
+    points of the 3 x 3 grid cells around it are compared. Returns a keep mask """
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    keep = np.zeros(len(xy), dtype=bool)
+    if not len(xy):
+        return keep
+    if spacing <= 0:
+        keep[:] = True
+        return keep
+    order = np.arange(len(xy)) if order is None else np.asarray(order, dtype=np.int64)
+    cells = np.floor((xy - xy.min(axis=0)) / spacing).astype(np.int64)
+    spacing_sq = spacing * spacing
+
+    grid = {}
+    xs, ys = xy[:, 0].tolist(), xy[:, 1].tolist()
+    cxs, cys = cells[:, 0].tolist(), cells[:, 1].tolist()
+    for row in order.tolist():
+        x, y, cx, cy = xs[row], ys[row], cxs[row], cys[row]
+        clear = True
+        for nx in (cx - 1, cx, cx + 1):
+            for ny in (cy - 1, cy, cy + 1):
+                for other in grid.get((nx, ny), ()):
+                    if (xs[other] - x) ** 2 + (ys[other] - y) ** 2 < spacing_sq:
+                        clear = False
+                        break
+                if not clear:
+                    break
+            if not clear:
+                break
+        if clear:
+            keep[row] = True
+            grid.setdefault((cx, cy), []).append(row)
+    return keep
+
+
+def hidden_oids(oids, xy, values, spacing, order="ASC"):
+    """ OIDs of the points to hide so that the rest are at least spacing apart """
+    oids = np.asarray(oids, dtype=np.int64)
+    keep = thin_points(xy, spacing, priority_order(values, order) if values is not None else None)
+    return oids[~keep]
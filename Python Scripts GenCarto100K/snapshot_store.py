@@ -0,0 +1,328 @@
+# Incremental snapshots of the input geodatabase, taken after every theme under
+# <log folder>\Backup\Snapshots. A checkpoint can be restored to a new .gdb
+# without running Python code, e.g.
+#   propy snapshot_store.py list D:\Logs\Backup
+#   propy snapshot_store.py restore D:\Logs\Backup 03_AFTHydro_3957 D:\Restore\3957.gdb
+# import required python modules
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Folder of the store under the backup folder
+STORE_DIR = "Snapshots"
+# Files that are never backed up
+SKIP_SUFFIXES = (".lock",)
+# Snapshot manifest format
+MANIFEST_VERSION = 1
+ZSTD_LEVEL = 3
+
+
+def file_digest(path):
+    """ sha256 of a file """
+    digest = hashlib.sha256()
+    with open(path, "rb") as data:
+        for block in iter(lambda: data.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def checkpoint_name(checkpoint, src):
+    """ snapshot name of a theme checkpoint of one sheet, e.g. 02_AFTTrans_3957 """
+    return f"{checkpoint}_{os.path.splitext(os.path.basename(os.path.normpath(src)))[0]}"
+
+
+class SnapshotStore:
+    """ content-addressed store of geodatabase snapshots.
+
+    Every file of a snapshot is kept once under objects/ by the sha256 of its
+    content, zstd compressed when zstandard is installed, and a snapshot is a
+    JSON manifest of relative path -> digest. A new snapshot only copies the
+    files that changed since the snapshot before it; files whose size and time
+    stamp did not change are not even hashed again """
+
+    def __init__(self, backup_root, compress=True):
+        self.root = os.path.join(backup_root, STORE_DIR)
+        self.objects = os.path.join(self.root, "objects")
+        self.manifests = os.path.join(self.root, "manifests")
+        self.compress = compress and zstandard is not None
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.manifests, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Objects
+    # ------------------------------------------------------------------
+    def object_path(self, digest, compressed):
+        return os.path.join(self.objects, digest[:2], digest + (".zst" if compressed else ""))
+
+    def has_object(self, digest):
+        return os.path.exists(self.object_path(digest, True)) or os.path.exists(self.object_path(digest, False))
+
+    def _put(self, path, digest):
+        """ adds a file to the objects unless its content is already there """
+        if self.has_object(digest):
+            return 0
+        target = self.object_path(digest, self.compress)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        if self.compress:
+            with open(path, "rb") as src, open(temp_path, "wb") as dst:
+                zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(src, dst)
+        else:
+            shutil.copyfile(path, temp_path)
+        os.replace(temp_path, target)
+        return os.path.getsize(target)
+
+    def _get(self, digest, dest):
+        """ writes the content of an object to dest """
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if os.path.exists(self.object_path(digest, False)):
+            shutil.copyfile(self.object_path(digest, False), dest)
+            return
+        if zstandard is None:
+            raise ImportError("zstandard is required to restore compressed snapshots")
+        with open(self.object_path(digest, True), "rb") as src, open(dest, "wb") as dst:
+            zstandard.ZstdDecompressor().copy_stream(src, dst)
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+    def manifest_path(self, name):
+        return os.path.join(self.manifests, f"{name}.json")
+
+    def snapshots(self):
+        """ names of the snapshots, oldest first """
+        manifests = [os.path.join(self.manifests, item) for item in os.listdir(self.manifests) if item.endswith(".json")]
+        return [os.path.splitext(os.path.basename(item))[0] for item in sorted(manifests, key=os.path.getmtime)]
+
+    def manifest(self, name):
+        with open(self.manifest_path(name), "r", encoding="utf-8") as manifest:
+            return json.load(manifest)
+
+    def _latest_for(self, source):
+        """ file entries of the newest snapshot of the same source, used to skip hashing """
+        for name in reversed(self.snapshots()):
+            manifest = self.manifest(name)
+            if manifest.get("source") == source:
+                return manifest["files"]
+        return {}
+
+    def freeze(self, src, name, stage=True):
+        """ point-in-time file list of src. Files unchanged since the last snapshot
+        keep their digest; with stage=True the changed files are copied to a
+        staging folder so that src can be edited again while they are stored """
+        src = os.path.abspath(src)
+        previous = self._latest_for(src)
+        staging = os.path.join(self.root, "staging", f"{name}.{os.getpid()}.{time.time_ns()}")
+        files = {}
+        for folder, _, names in os.walk(src):
+            for file_name in names:
+                if file_name.endswith(SKIP_SUFFIXES):
+                    continue
+                path = os.path.join(folder, file_name)
+                rel_path = os.path.relpath(path, src).replace(os.sep, "/")
+                try:
+                    stat = os.stat(path)
+                    entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+                    known = previous.get(rel_path)
+                    if (known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns
+                            and self.has_object(known["digest"])):
+                        entry["digest"] = known["digest"]
+                    elif stage:
+                        entry["path"] = os.path.join(staging, *rel_path.split("/"))
+                        os.makedirs(os.path.dirname(entry["path"]), exist_ok=True)
+                        shutil.copyfile(path, entry["path"])
+                    else:
+                        entry["path"] = path
+                except OSError:
+                    # File removed or locked while the snapshot was taken
+                    continue
+                files[rel_path] = entry
+        return {"name": name, "source": src, "created": time.time(), "files": files,
+                "staging": staging if stage else None}
+
+    def commit(self, frozen):
+        """ hashes and stores the changed files of a frozen file list and writes
+        the manifest. Returns the manifest, with the new bytes written in 'stored' """
+        files = {}
+        stored = 0
+        for rel_path, entry in frozen["files"].items():
+            digest = entry.get("digest")
+            if digest is None:
+                digest = file_digest(entry["path"])
+                stored += self._put(entry["path"], digest)
+            files[rel_path] = {"digest": digest, "size": entry["size"], "mtime": entry["mtime"]}
+
+        manifest = {"version": MANIFEST_VERSION, "name": frozen["name"], "source": frozen["source"],
+                    "created": frozen["created"], "files": files, "stored": stored}
+        temp_path = f"{self.manifest_path(frozen['name'])}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as out:
+            json.dump(manifest, out, indent=1)
+        os.replace(temp_path, self.manifest_path(frozen["name"]))
+        if frozen.get("staging"):
+            shutil.rmtree(frozen["staging"], ignore_errors=True)
+        return manifest
+
+    def snapshot(self, src, name):
+        """ stores a snapshot of the folder src (a file geodatabase) under name """
+        return self.commit(self.freeze(src, name, stage=False))
+
+    def verify(self, name, deep=True):
+        """ checks that every file of a snapshot is in the store and, with deep=True,
+        that its content still has its digest. Returns the paths that failed """
+        failed = []
+        for rel_path, entry in self.manifest(name)["files"].items():
+            digest = entry["digest"]
+            if not self.has_object(digest):
+                failed.append(rel_path)
+            elif deep and self._digest_of_object(digest) != digest:
+                failed.append(rel_path)
+        return failed
+
+    def _digest_of_object(self, digest):
+        if os.path.exists(self.object_path(digest, False)):
+            return file_digest(self.object_path(digest, False))
+        if zstandard is None:
+            raise ImportError("zstandard is required to verify compressed snapshots")
+        content = hashlib.sha256()
+        with open(self.object_path(digest, True), "rb") as src:
+            reader = zstandard.ZstdDecompressor().stream_reader(src)
+            for block in iter(lambda: reader.read(1 << 20), b""):
+                content.update(block)
+        return content.hexdigest()
+
+    def resolve(self, name):
+        """ snapshot of a full name (03_AFTHydro_3957) or of a checkpoint
+        (03_AFTHydro), the newest one when several sheets match """
+        snapshots = self.snapshots()
+        if name in snapshots:
+            return name
+        matches = [snapshot for snapshot in snapshots if snapshot.startswith(f"{name}_")]
+        if not matches:
+            raise KeyError(f"No snapshot {name} in {self.root}")
+        return matches[-1]
+
+    def restore(self, name, dest):
+        """ rebuilds the geodatabase of a snapshot in dest, which must not exist yet """
+        if os.path.exists(dest) and os.listdir(dest):
+            raise FileExistsError(f"Cannot restore snapshot {name}, {dest} is not empty")
+        for rel_path, entry in self.manifest(name)["files"].items():
+            self._get(entry["digest"], os.path.join(dest, *rel_path.split("/")))
+        return dest
+
+    def prune(self):
+        """ deletes the objects that no snapshot refers to. Returns the bytes freed """
+        used = set()
+        for name in self.snapshots():
+            used.update(entry["digest"] for entry in self.manifest(name)["files"].values())
+        freed = 0
+        for folder, _, names in os.walk(self.objects):
+            for file_name in names:
+                if file_name.split(".")[0] not in used:
+                    path = os.path.join(folder, file_name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+        return freed
+
+
+class BackgroundSnapshots:
+    """ stores snapshots on a background thread. start() freezes the file list
+    and copies the changed files before it returns, so the next theme can edit
+    the geodatabase straight away; wait() is the barrier to call before the
+    snapshot is needed or the store is used again """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+        self.pending = []
+
+    def start(self, store, src, name):
+        # The file list of a snapshot is compared with the one before it
+        self.wait()
+        frozen = store.freeze(src, name, stage=True)
+        self.pending.append((store, name, self.executor.submit(self._store, store, frozen)))
+
+    @staticmethod
+    def _store(store, frozen):
+        manifest = store.commit(frozen)
+        failed = store.verify(frozen["name"])
+        if failed:
+            raise IOError(f"Snapshot {frozen['name']} failed the integrity check: {', '.join(failed[:10])}")
+        return manifest
+
+    def wait(self):
+        """ waits for every pending snapshot. Returns their manifests and raises
+        the first error after all of them finished """
+        manifests, error = [], None
+        pending, self.pending = self.pending, []
+        for _, _, future in pending:
+            try:
+                manifests.append(future.result())
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return manifests
+
+
+# Snapshots still being stored in this process
+background = BackgroundSnapshots()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="List, verify and restore the theme snapshots of a run")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_cmd = commands.add_parser("list", help="snapshots of a backup folder, oldest first")
+    list_cmd.add_argument("backup", help="Backup folder of the run (the one holding Snapshots)")
+    verify_cmd = commands.add_parser("verify", help="check that the files of a snapshot are intact")
+    verify_cmd.add_argument("backup")
+    verify_cmd.add_argument("name", help="snapshot (03_AFTHydro_3957) or checkpoint (03_AFTHydro)")
+    restore_cmd = commands.add_parser("restore", help="rebuild the geodatabase of a snapshot")
+    restore_cmd.add_argument("backup")
+    restore_cmd.add_argument("name", help="snapshot (03_AFTHydro_3957) or checkpoint (03_AFTHydro)")
+    restore_cmd.add_argument("dest", help="new .gdb folder, must not exist or be empty")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(os.path.join(args.backup, STORE_DIR)):
+        print(f"No snapshots in {args.backup}")
+        return 1
+    store = SnapshotStore(args.backup)
+    if args.command == "list":
+        for name in store.snapshots():
+            manifest = store.manifest(name)
+            print(f"{name:<40}{len(manifest['files']):>7} files  {manifest.get('source', '')}")
+        return 0
+    try:
+        name = store.resolve(args.name)
+    except KeyError as e:
+        print(e.args[0])
+        return 1
+    failed = store.verify(name)
+    if failed:
+        print(f"Snapshot {name} is damaged: {', '.join(failed[:10])}")
+        return 1
+    if args.command == "verify":
+        print(f"Snapshot {name} is intact")
+        return 0
+    try:
+        store.restore(name, args.dest)
+    except FileExistsError as e:
+        print(e.args[0])
+        return 1
+    print(f"Snapshot {name} restored to {args.dest}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
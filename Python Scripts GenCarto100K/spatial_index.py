@@ -0,0 +1,185 @@
+# import required python modules
+import numpy as np
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+
+def has_spatial_index():
+    """ True when the STRtree index can be used (Shapely 2.x is installed) """
+    return shapely is not None and hasattr(shapely, "STRtree")
+
+
+def linear_distance(distance):
+    """ converts a GP linear unit such as '12.5 Meters' (or a number) to a float """
+    if distance is None or distance == "":
+        return 0.0
+    if isinstance(distance, (int, float, np.number)):
+        return float(distance)
+    return float(str(distance).strip().split()[0])
+
+
+class SpatialIndex:
+    """ STRtree over a list of geometries. Queries take a list (or array) of
+    query geometries and return NumPy index pairs (query_idx, tree_idx);
+    ids maps tree indexes back to OIDs """
+
+    def __init__(self, geometries, ids=None):
+        if not has_spatial_index():
+            raise ImportError("The spatial index requires shapely 2.x to be installed")
+        self.geometries = np.asarray(geometries, dtype=object)
+        self.ids = np.arange(len(self.geometries)) if ids is None else np.asarray(ids)
+        self.tree = shapely.STRtree(self.geometries)
+        self.version = None
+
+    def __len__(self):
+        return len(self.geometries)
+
+    @classmethod
+    def from_store(cls, store):
+        """ builds the index over the active features of a FeatureStore """
+        rows = store.active_rows()
+        index = cls(store.geometries(rows), store.oids[rows])
+        index.version = store.version
+        return index
+
+    def _as_array(self, geometries):
+        if isinstance(geometries, SpatialIndex):
+            return geometries.geometries
+        return np.asarray(geometries, dtype=object)
+
+    def query(self, geometries, predicate="intersects"):
+        """ index pairs for any STRtree predicate (intersects, within, contains, touches, ...) """
+        pairs = self.tree.query(self._as_array(geometries), predicate=predicate)
+        return pairs[0], pairs[1]
+
+    def intersects(self, geometries):
+        return self.query(geometries, "intersects")
+
+    def within_distance(self, geometries, distance):
+        """ index pairs of features within distance of each query geometry, with the distances """
+        geometries = self._as_array(geometries)
+        distance = linear_distance(distance)
+        if distance <= 0:
+            left, right = self.query(geometries, "intersects")
+            return left, right, np.zeros(len(left))
+        try:
+            left, right = self.tree.query(geometries, predicate="dwithin", distance=distance)
+        except (TypeError, ValueError):
+            # dwithin needs shapely 2.1 / GEOS 3.10, otherwise query the expanded
+            # envelopes and do the exact test on the distances
+            left, right = self.tree.query(shapely.buffer(shapely.envelope(geometries), distance, join_style="mitre"))
+        dist = shapely.distance(geometries[left], self.geometries[right])
+        keep = dist <= distance
+        return left[keep], right[keep], dist[keep]
+
+    def nearest(self, geometries, k=1, max_distance=None):
+        """ the k nearest features of every query geometry as (query_idx, tree_idx, distance),
+        ordered by query then distance """
+        geometries = self._as_array(geometries)
+        if k == 1:
+            (left, right), dist = self.tree.query_nearest(geometries, max_distance=max_distance,
+                                                          return_distance=True, all_matches=False)
+            return left, right, dist
+        if max_distance is None:
+            # Grow the search radius from the nearest distance until every query has k candidates
+            (left, right), dist = self.tree.query_nearest(geometries, return_distance=True, all_matches=False)
+            radius = max(float(dist.max()) if len(dist) else 0.0, 1e-6)
+            while True:
+                left, right, dist = self.within_distance(geometries, radius)
+                counts = np.bincount(left, minlength=len(geometries))
+                if np.all(np.minimum(counts, len(self)) >= min(k, len(self))) or not len(self):
+                    break
+                radius *= 2
+        else:
+            left, right, dist = self.within_distance(geometries, max_distance)
+        return _top_k(left, right, dist, k)
+
+    def self_pairs(self, distance=0, unique=False):
+        """ pairs of different features of this index within distance of each other.
+        With unique=True each pair is returned once (left < right) """
+        left, right, dist = self.within_distance(self.geometries, distance)
+        keep = left < right if unique else left != right
+        return left[keep], right[keep], dist[keep]
+
+    def to_ids(self, tree_idx):
+        return self.ids[tree_idx]
+
+
+def group_pairs(left, right):
+    """ turns two aligned id arrays into {left_id: array of right ids} """
+    left = np.asarray(left)
+    right = np.asarray(right)
+    if not len(left):
+        return {}
+    order = np.argsort(left, kind="stable")
+    left = left[order]
+    right = right[order]
+    keys, starts = np.unique(left, return_index=True)
+    return {key.item(): values for key, values in zip(keys, np.split(right, starts[1:]))}
+
+
+def store_near_pairs(in_store, near_store, search_radius):
+    """ IN_FID, NEAR_FID and NEAR_DIST of the features of in_store within
+    search_radius of the features of near_store, in the row order of an "ALL"
+    near table (by IN_FID, then distance). A feature is never near itself """
+    index = SpatialIndex.from_store(near_store)
+    in_idx, near_idx, near_dist = index.within_distance(in_store.geometries(), search_radius)
+    in_fids = in_store.active_oids()[in_idx]
+    near_fids = index.to_ids(near_idx)
+    if in_store.name == near_store.name:
+        keep = in_fids != near_fids
+        in_fids, near_fids, near_dist = in_fids[keep], near_fids[keep], near_dist[keep]
+    order = np.lexsort((near_dist, in_fids))
+    return in_fids[order], near_fids[order], near_dist[order]
+
+
+def close_and_connected(in_fids, near_fids, near_dist, connect_distance=1.0):
+    """ {IN_FID: [NEAR_FIDs]} of the near pairs farther apart than connect_distance
+    (close lines) and of the others (connected lines) """
+    close = np.asarray(near_dist) > connect_distance
+    in_fids = np.asarray(in_fids)
+    near_fids = np.asarray(near_fids)
+    return ({key: val.tolist() for key, val in group_pairs(in_fids[close], near_fids[close]).items()},
+            {key: val.tolist() for key, val in group_pairs(in_fids[~close], near_fids[~close]).items()})
+
+
+def replace_with_containers(store, container_store):
+    """ gives every group of features of store that one feature of container_store
+    contains the containing geometry: the first feature of the group (by OID)
+    takes it and the others are deleted. A feature is only used by one group.
+    Returns the number of features replaced """
+    index = SpatialIndex.from_store(store)
+    container_idx, store_idx = index.query(container_store.geometries(), "contains")
+    container_oids = container_store.active_oids()
+    handled = set()
+    replaced = 0
+    for key, val in group_pairs(container_idx, index.to_ids(store_idx)).items():
+        oids = sorted(set(val.tolist()) - handled)
+        if oids:
+            store.set_geometry(oids[0], container_store.parts(container_oids[key]))
+            store.delete(oids[1:])
+            handled.update(oids)
+            replaced += 1
+    return replaced
+
+
+def pair_counts(left):
+    """ {left_id: number of pairs} """
+    keys, counts = np.unique(np.asarray(left), return_counts=True)
+    return dict(zip(keys.tolist(), counts.tolist()))
+
+
+def _top_k(left, right, dist, k):
+    """ keeps the k closest pairs of every query """
+    if not len(left):
+        return left, right, dist
+    order = np.lexsort((dist, left))
+    left, right, dist = left[order], right[order], dist[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(left)) + 1]
+    sizes = np.diff(np.r_[starts, len(left)])
+    rank = np.arange(len(left)) - np.repeat(starts, sizes)
+    keep = rank < k
+    return left[keep], right[keep], dist[keep]
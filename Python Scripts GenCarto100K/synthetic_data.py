@@ -0,0 +1,416 @@
+# Builds a synthetic topographic map sheet with the schema of the 100K data, for
+# benchmarking the themes without production data. e.g.
+#   propy synthetic_data.py D:\Bench\smoke.gdb --scale smoke
+#   python synthetic_data.py D:\Bench\stress.gpkg --scale stress --density 2 --seed 7
+# import required python modules
+import argparse
+import csv
+import os
+import sys
+
+import numpy as np
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+# Feature dataset holding the topographic feature classes, AOI stays at the root
+DATASET_NAME = "Topo"
+# GDM2000 / Peninsular RSO
+SPATIAL_REFERENCE = 3375
+ORIGIN = (400000.0, 300000.0)
+
+# Schema files shipped next to the scripts folder
+HIERARCHY_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "HierarchyAll_100K.csv")
+EXCEL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "GeneralizationRules100K.xlsx")
+
+# Presets: (side of the square sheet in km, density). With the schema of the files
+# above smoke is about 1k features, sheet about a 100K map sheet and stress a few
+# million features
+SCALES = {
+    "smoke": (6.5, 0.8),
+    "small": (10.0, 1.0),
+    "sheet": (55.0, 1.0),
+    "stress": (150.0, 4.0),
+}
+
+# Attribute fields of every feature class
+COMMON_FIELDS = {"NAM": "TEXT", "INVISIBILITY": "SHORT", "HIERARCHY": "SHORT"}
+# Coded fields used by the rules, with the codes drawn for them
+CODED_FIELDS = {
+    "BRU": (1, 2, 3), "HPT": (1, 2), "HSC": (1, 2, 3), "MKT": (1, 2), "RBU": (1, 2, 3, 4),
+    "RST": (1, 2), "RTR": (1, 2, 3), "TCC": (1, 2), "VPT": (1, 2), "WFT": (1, 2), "WRU": (1, 2),
+}
+FIELDS_BY_FC = {
+    "TA0060_Road_L": {"RCS": (1, 2, 3, 4, 5, 6)},
+    "TA0240_Bridge_L": {"RCS": (1, 2, 3, 4), "BRU": CODED_FIELDS["BRU"]},
+    "TA0240_Bridge_P": {"RCS": (1, 2, 3, 4), "BRU": CODED_FIELDS["BRU"]},
+    "TA0010_Rail_Line_L": {"RTR": CODED_FIELDS["RTR"]},
+    "TA0110_Track_L": {"TCC": CODED_FIELDS["TCC"]},
+    "TB0010_Water_Route_L": {"WRU": CODED_FIELDS["WRU"]},
+    "RA0010_Contour_Line_L": {"CLT": (1, 2), "ZV2": None},
+    "ZA0050_Height_Point_P": {"HPT": CODED_FIELDS["HPT"]},
+    "ZA0080_International_Boundary_Marker_P": {"MKT": CODED_FIELDS["MKT"]},
+    "BJ0380_Historical_Site_A": {"HSC": CODED_FIELDS["HSC"]},
+    "BJ0380_Historical_Site_P": {"HSC": CODED_FIELDS["HSC"]},
+    "BA0010_Residential_Building_P": {"RBU": CODED_FIELDS["RBU"]},
+    "BF0010_Building_Of_Worship_A": {"RBU": CODED_FIELDS["RBU"]},
+    "BJ0030_Rail_Terminal_Railway_Station_A": {"RST": CODED_FIELDS["RST"]},
+    "VA2060_Paddy_A": {"VPT": CODED_FIELDS["VPT"]},
+    "HM0030_Water_Flow_P": {"WFT": CODED_FIELDS["WFT"]},
+}
+
+# Feature classes built with their own topology, the others are scattered
+ROAD_FC = "TA0060_Road_L"
+RIVER_FC = "HH0040_River_L"
+LAKE_FC = "HH0020_Lake_A"
+BUILDING_FC = "BA0010_Residential_Building_A"
+CONTOUR_FC = "RA0010_Contour_Line_L"
+HEIGHT_FC = "ZA0050_Height_Point_P"
+AOI_FC = "AOI"
+
+# Features per km2 at density 1 of the scattered feature classes, by shape
+SCATTER_DENSITY = {"P": 0.06, "L": 0.02, "A": 0.02}
+
+
+def feature_class_names(hierarchy_file=None, excel_file=None):
+    """ feature class names of the schema, from the hierarchy table and the
+    FeatureClass column of the rule sheets """
+    names = set()
+    if hierarchy_file:
+        with open(hierarchy_file, "r", encoding="utf-8-sig") as table:
+            names.update(row[0].strip() for row in csv.reader(table) if row)
+    if excel_file:
+        import config_cache
+        config = config_cache.load_config(excel_file)
+        for sheet_name in config_cache.RULE_SHEETS:
+            frame = config.frame(sheet_name)
+            names.update(str(name).strip() for name in frame["FeatureClass"].dropna())
+    names.update((ROAD_FC, RIVER_FC, LAKE_FC, BUILDING_FC, CONTOUR_FC, HEIGHT_FC))
+    return sorted(name for name in names if name[-2:] in ("_P", "_L", "_A") and " " not in name)
+
+
+def shape_type(fc):
+    return {"P": "POINT", "L": "POLYLINE", "A": "POLYGON"}[fc[-1]]
+
+
+class SyntheticSheet:
+    """ generator of one synthetic map sheet.
+
+    size_km is the side of the square sheet and density scales the number of
+    features per km2. The topology follows the real data: a road grid with dual
+    carriageways on the highways, a dendritic river network whose rivers run
+    into and out of lakes, buildings clustered along the roads around
+    settlements, nested contours around hills with a height point on each top.
+    The same seed always gives the same sheet """
+
+    def __init__(self, size_km=4.0, density=1.0, seed=0, names=None):
+        if shapely is None:
+            raise ImportError("The synthetic data generator requires shapely 2.x to be installed")
+        self.size = float(size_km) * 1000.0
+        self.density = float(density)
+        self.rng = np.random.default_rng(seed)
+        self.names = list(names) if names else feature_class_names()
+        self.datasets = {}
+        self.x0, self.y0 = ORIGIN
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def count(self, per_km2):
+        """ number of features for a density per km2, at least one """
+        return max(int(round(per_km2 * self.density * (self.size / 1000.0) ** 2)), 1)
+
+    def random_xy(self, count, margin=0.0):
+        return self.rng.uniform(margin, self.size - margin, (count, 2)) + (self.x0, self.y0)
+
+    def add(self, fc, geometries, **values):
+        """ adds features to a dataset with the common fields and codes for the coded fields """
+        geometries = np.asarray(geometries, dtype=object)
+        count = len(geometries)
+        attrs = {
+            "NAM": np.where(self.rng.random(count) < 0.4, [f"{fc[:6]} {cnt}" for cnt in range(count)], None),
+            "INVISIBILITY": np.zeros(count, dtype=np.int16),
+            "HIERARCHY": np.full(count, None, dtype=object),
+        }
+        for field, codes in FIELDS_BY_FC.get(fc, {}).items():
+            if codes is not None:
+                attrs[field] = self.rng.choice(codes, count).astype(np.int16)
+        for field, field_values in values.items():
+            attrs[field] = np.asarray(field_values)
+        if fc in self.datasets:
+            oids, old_geometries, old_attrs = self.datasets[fc]
+            geometries = np.concatenate([old_geometries, geometries])
+            attrs = {field: np.concatenate([old_attrs[field], attrs[field]]) for field in old_attrs}
+        self.datasets[fc] = (np.arange(1, len(geometries) + 1), geometries, attrs)
+
+    def noisy_rings(self, centers, radii, vertices=24, roughness=0.15):
+        """ closed wobbly rings around centers, one row of coordinates per ring """
+        angles = np.linspace(0.0, 2.0 * np.pi, vertices, endpoint=False)
+        phase = self.rng.uniform(0.0, 2.0 * np.pi, (len(centers), 1))
+        wobble = 1.0 + roughness * np.sin(3.0 * angles + phase) + 0.5 * roughness * np.sin(5.0 * angles - phase)
+        radius = np.asarray(radii, dtype=float).reshape(-1, 1) * wobble
+        ring = np.stack([centers[:, :1] + radius * np.cos(angles), centers[:, 1:] + radius * np.sin(angles)], axis=2)
+        return np.concatenate([ring, ring[:, :1]], axis=1)
+
+    # ------------------------------------------------------------------
+    # Themes
+    # ------------------------------------------------------------------
+    def aoi(self):
+        self.add(AOI_FC, [shapely.box(self.x0, self.y0, self.x0 + self.size, self.y0 + self.size)])
+
+    def roads(self, spacing=1500.0, vertices=12):
+        """ jittered road grid; every fourth line is a highway (RCS 1) drawn as a
+        dual carriageway, the others get a random class """
+        spacing = spacing / np.sqrt(self.density)
+        positions = np.arange(spacing / 2.0, self.size, spacing)
+        along = np.linspace(0.0, self.size, vertices)
+        lines, classes = [], []
+        for axis in (0, 1):
+            for cnt, pos in enumerate(positions):
+                across = pos + np.cumsum(self.rng.normal(0.0, spacing * 0.04, vertices))
+                xy = np.column_stack([along, across] if axis == 0 else [across, along]) + (self.x0, self.y0)
+                line = shapely.linestrings(xy)
+                if cnt % 4 == 0:
+                    lines.extend([shapely.offset_curve(line, 15.0), shapely.offset_curve(line, -15.0)])
+                    classes.extend([1, 1])
+                else:
+                    lines.append(line)
+                    classes.append(int(self.rng.choice((2, 3, 4, 5, 6))))
+        # The grid is split at the crossings, as roads are stored
+        network = shapely.union_all(lines)
+        segments = shapely.get_parts(shapely.line_merge(network) if network.geom_type != "LineString" else network)
+        tree = shapely.STRtree(lines)
+        source = tree.query(shapely.line_interpolate_point(segments, 0.5, normalized=True), "dwithin", 0.01)
+        road_class = np.full(len(segments), 4, dtype=np.int16)
+        road_class[source[0]] = np.asarray(classes, dtype=np.int16)[source[1]]
+        self.add(ROAD_FC, segments, RCS=road_class)
+        return segments
+
+    def hydrography(self, lakes_per_km2=0.04, rivers_per_km2=0.05, step=120.0):
+        """ lakes, rivers running into each lake and one outflow, and tributaries
+        that end on a vertex of the river they join """
+        lake_centers = self.random_xy(self.count(lakes_per_km2), margin=self.size * 0.1)
+        lake_radii = self.rng.uniform(150.0, 600.0, len(lake_centers))
+        lakes = shapely.polygons(self.noisy_rings(lake_centers, lake_radii, vertices=32))
+        self.add(LAKE_FC, lakes)
+
+        rivers = []
+        lake_rings = shapely.get_exterior_ring(lakes)
+        for ring, radius in zip(lake_rings, lake_radii):
+            for direction in range(int(self.rng.integers(1, 4))):
+                start = np.asarray(shapely.line_interpolate_point(ring, self.rng.random(), normalized=True).coords[0])
+                centroid = np.asarray(shapely.centroid(ring).coords[0])
+                heading = np.arctan2(*(start - centroid)[::-1])
+                path = self.meander(start, heading, int(self.rng.integers(8, 40)), step)
+                # Inflows run towards the lake, the first river is the outflow
+                rivers.append(path if direction == 0 else path[::-1])
+
+        for cnt in range(self.count(rivers_per_km2)):
+            start = self.random_xy(1)[0]
+            rivers.append(self.meander(start, self.rng.uniform(0.0, 2.0 * np.pi), int(self.rng.integers(10, 60)), step))
+
+        # Tributaries flow into a vertex of an existing river
+        tributaries = []
+        for path in rivers[:len(rivers) // 2]:
+            vertex = path[int(self.rng.integers(1, len(path) - 1))] if len(path) > 2 else path[-1]
+            heading = self.rng.uniform(0.0, 2.0 * np.pi)
+            tributaries.append(self.meander(vertex, heading, int(self.rng.integers(4, 20)), step)[::-1])
+        box = shapely.box(self.x0, self.y0, self.x0 + self.size, self.y0 + self.size)
+        lines = shapely.intersection(np.asarray([shapely.linestrings(path) for path in rivers + tributaries]), box)
+        lines = shapely.get_parts(lines[~shapely.is_empty(lines)])
+        self.add(RIVER_FC, lines[shapely.get_type_id(lines) == 1])
+
+    def meander(self, start, heading, vertices, step):
+        """ random walk path with a slowly turning heading """
+        headings = heading + np.cumsum(self.rng.normal(0.0, 0.25, vertices))
+        steps = np.column_stack([np.cos(headings), np.sin(headings)]) * step
+        return np.vstack([start, start + np.cumsum(steps, axis=0)])
+
+    def buildings(self, roads, settlements_per_km2=0.15, per_settlement=80):
+        """ rectangular buildings on a local grid around settlements, which are
+        placed on the roads and aligned with them """
+        count = self.count(settlements_per_km2)
+        road_rows = self.rng.integers(0, len(roads), count)
+        centers = shapely.line_interpolate_point(roads[road_rows], self.rng.random(count), normalized=True)
+        centers = shapely.get_coordinates(centers)
+        sizes = self.rng.poisson(per_settlement, count) + 1
+        total = int(sizes.sum())
+        settlement = np.repeat(np.arange(count), sizes)
+        angle = np.repeat(self.rng.uniform(0.0, np.pi, count), sizes)
+        # Buildings fill the 25 m cells of a settlement from the centre outwards
+        rank = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        ring_no = np.floor((np.sqrt(rank) + 1.0) / 2.0)
+        cell = self.spiral(rank, ring_no) * 25.0
+        cell += self.rng.normal(0.0, 2.0, (total, 2))
+        rotation = np.stack([np.cos(angle), np.sin(angle)], axis=1)
+        offset = np.column_stack([cell[:, 0] * rotation[:, 0] - cell[:, 1] * rotation[:, 1],
+                                  cell[:, 0] * rotation[:, 1] + cell[:, 1] * rotation[:, 0]])
+        xy = centers[settlement] + offset
+
+        half = np.column_stack([self.rng.uniform(4.0, 10.0, total), self.rng.uniform(3.0, 7.0, total)])
+        corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1], [-1, -1]], dtype=float)
+        local = corners[None, :, :] * half[:, None, :]
+        ring = np.stack([local[..., 0] * rotation[:, :1] - local[..., 1] * rotation[:, 1:],
+                         local[..., 0] * rotation[:, 1:] + local[..., 1] * rotation[:, :1]], axis=2)
+        ring += xy[:, None, :]
+        inside = np.all((ring[..., 0] > self.x0) & (ring[..., 0] < self.x0 + self.size)
+                        & (ring[..., 1] > self.y0) & (ring[..., 1] < self.y0 + self.size), axis=1)
+        self.add(BUILDING_FC, shapely.polygons(ring[inside]))
+
+    @staticmethod
+    def spiral(rank, ring_no):
+        """ (column, row) of the rank-th cell of a square spiral """
+        side = 2.0 * ring_no
+        pos = rank - (2.0 * ring_no - 1.0) ** 2
+        pos = np.where(ring_no == 0, 0.0, pos)
+        edge = np.where(side > 0, np.floor(pos / np.maximum(side, 1.0)), 0.0)
+        along = pos - edge * side
+        col = np.select([edge == 0, edge == 1, edge == 2], [ring_no, ring_no - 1 - along, -ring_no], -ring_no + 1 + along)
+        row = np.select([edge == 0, edge == 1, edge == 2], [-ring_no + 1 + along, ring_no, ring_no - 1 - along], -ring_no)
+        return np.column_stack([np.where(ring_no == 0, 0.0, col), np.where(ring_no == 0, 0.0, row)])
+
+    def hypsography(self, hills_per_km2=0.05, interval=20.0):
+        """ nested contour rings around every hill, every fifth one an index
+        contour (CLT 1), and a height point on the top """
+        count = self.count(hills_per_km2)
+        centers = self.random_xy(count, margin=self.size * 0.05)
+        heights = self.rng.uniform(60.0, 600.0, count)
+        slope = self.rng.uniform(0.08, 0.25, count)
+        levels = [np.arange(interval, height, interval) for height in heights]
+        hill = np.repeat(np.arange(count), [len(level) for level in levels])
+        elevation = np.concatenate(levels) if levels else np.zeros(0)
+        radii = (heights[hill] - elevation) / slope[hill]
+        rings = shapely.linestrings(self.noisy_rings(centers[hill], radii, vertices=36, roughness=0.1))
+        box = shapely.box(self.x0, self.y0, self.x0 + self.size, self.y0 + self.size)
+        rings = shapely.intersection(rings, box)
+        keep = ~shapely.is_empty(rings)
+        clt = np.where(np.isclose(np.mod(elevation, interval * 5), 0.0), 1, 2).astype(np.int16)
+        self.add(CONTOUR_FC, rings[keep], CLT=clt[keep], ZV2=elevation[keep])
+        self.add(HEIGHT_FC, shapely.points(centers), ZV2=np.round(heights, 1))
+
+    def scatter(self):
+        """ features of the other feature classes, scattered over the sheet """
+        built = set(self.datasets)
+        for fc in self.names:
+            if fc in built:
+                continue
+            count = self.count(SCATTER_DENSITY[fc[-1]])
+            xy = self.random_xy(count)
+            if fc.endswith("_P"):
+                geometries = shapely.points(xy)
+            elif fc.endswith("_L"):
+                paths = [self.meander(start, self.rng.uniform(0.0, 2.0 * np.pi), 6, 60.0) for start in xy]
+                geometries = np.asarray([shapely.linestrings(path) for path in paths])
+            else:
+                radii = self.rng.lognormal(3.5, 0.8, count)
+                geometries = shapely.polygons(self.noisy_rings(xy, radii, vertices=16))
+            self.add(fc, geometries)
+
+    def build(self):
+        """ generates every dataset. Returns {fc: (oids, geometries, attributes)} """
+        self.aoi()
+        roads = self.roads()
+        self.hydrography()
+        self.buildings(roads)
+        self.hypsography()
+        self.scatter()
+        return self.datasets
+
+    def feature_count(self):
+        return sum(len(oids) for oids, _, _ in self.datasets.values())
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    def register(self, backend):
+        """ loads the datasets into a shapely backend """
+        for fc, (oids, geometries, attrs) in self.datasets.items():
+            backend.register(fc, oids, geometries, {field: list(values) for field, values in attrs.items()})
+        return backend
+
+    def write_gdb(self, out_gdb):
+        """ writes the datasets to a file geodatabase with the layout of a map
+        sheet: AOI at the root, the rest in the Topo feature dataset """
+        import arcpy
+        spatial_reference = arcpy.SpatialReference(SPATIAL_REFERENCE)
+        folder, name = os.path.split(os.path.abspath(out_gdb))
+        if arcpy.Exists(out_gdb):
+            arcpy.management.Delete(out_gdb)
+        arcpy.management.CreateFileGDB(folder, name)
+        arcpy.management.CreateFeatureDataset(out_gdb, DATASET_NAME, spatial_reference)
+        for fc, (oids, geometries, attrs) in self.datasets.items():
+            workspace = out_gdb if fc == AOI_FC else os.path.join(out_gdb, DATASET_NAME)
+            geometry_type = "POLYGON" if fc == AOI_FC else shape_type(fc)
+            out_fc = arcpy.management.CreateFeatureclass(workspace, fc, geometry_type,
+                                                         spatial_reference=spatial_reference)[0]
+            fields = list(attrs)
+            arcpy.management.AddFields(out_fc, [[field, field_type(field, attrs[field])] for field in fields])
+            with arcpy.da.InsertCursor(out_fc, ["SHAPE@WKB"] + fields) as cursor:
+                for cnt, wkb in enumerate(shapely.to_wkb(geometries)):
+                    cursor.insertRow([bytearray(wkb)] + [python_value(attrs[field][cnt]) for field in fields])
+        return out_gdb
+
+    def write(self, path, driver="GPKG"):
+        """ writes the datasets as layers of an OGR data source (GeoPackage by default) """
+        import pyogrio
+        for fc, (oids, geometries, attrs) in self.datasets.items():
+            fields = list(attrs)
+            pyogrio.raw.write(path, np.asarray(shapely.to_wkb(geometries), dtype=object),
+                              [np.asarray(attrs[field]) for field in fields], fields, layer=fc, driver=driver,
+                              geometry_type={"P": "Point", "L": "LineString", "A": "Polygon", "I": "Polygon"}[fc[-1]],
+                              crs=f"EPSG:{SPATIAL_REFERENCE}", append=os.path.exists(path))
+        return path
+
+
+def field_type(field, values):
+    if field in COMMON_FIELDS:
+        return COMMON_FIELDS[field]
+    return "SHORT" if np.asarray(values).dtype == np.int16 else "DOUBLE"
+
+
+def python_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def generate(scale="smoke", size_km=None, density=None, seed=0, hierarchy_file=None, excel_file=None):
+    """ builds a synthetic sheet for a preset scale, size_km and density override the preset.
+    The schema comes from the hierarchy table and the rules workbook, the shipped ones
+    when they are not given """
+    preset_size, preset_density = SCALES[scale]
+    if hierarchy_file is None and os.path.exists(HIERARCHY_FILE):
+        hierarchy_file = HIERARCHY_FILE
+    if excel_file is None and os.path.exists(EXCEL_FILE):
+        excel_file = EXCEL_FILE
+    names = feature_class_names(hierarchy_file, excel_file)
+    sheet = SyntheticSheet(size_km or preset_size, density or preset_density, seed, names)
+    sheet.build()
+    return sheet
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic GenCarto 100K map sheet")
+    parser.add_argument("out", help="output .gdb (needs arcpy) or .gpkg (needs pyogrio)")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="smoke")
+    parser.add_argument("--size-km", type=float, default=None, help="side of the sheet, overrides the preset")
+    parser.add_argument("--density", type=float, default=None, help="feature density factor, overrides the preset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hierarchy", default=HIERARCHY_FILE, help="HierarchyAll_100K.csv")
+    parser.add_argument("--excel", default=EXCEL_FILE, help="rules workbook whose rule sheets name the feature classes")
+    return parser.parse_args(argv)
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    sheet = generate(args.scale, args.size_km, args.density, args.seed, args.hierarchy, args.excel)
+    if args.out.lower().endswith(".gdb"):
+        sheet.write_gdb(args.out)
+    else:
+        sheet.write(args.out)
+    print(f"{sheet.feature_count()} features in {len(sheet.datasets)} feature classes written to {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(run())
@@ -10,7 +10,7 @@ def contour_clean_up(aoi, feature_list, working_gdb, buffer_distance, vertex_lim
     try:
         # Get contour feature
         contour_fcs = [contour for contour in feature_list if 'RA0010_Contour_Line_L' in contour][0]
-        base_name = arcpy.da.Describe(contour_fcs)['name']
+        base_name = describe(contour_fcs)['name']
         # Creating buffer fc
         buffer_fc = f'{working_gdb}\\aoi_buffer'
         arcpy.analysis.Buffer(aoi, buffer_fc, f"{buffer_distance} Meters")
@@ -20,10 +20,8 @@ def contour_clean_up(aoi, feature_list, working_gdb, buffer_distance, vertex_lim
         # Dicing features using dice gp tool
         dice_fc = f'{working_gdb}\\{base_name}_dice'
         arcpy.management.Dice(clip_fc, dice_fc, vertex_limit)
-        # Delete features before append
-        arcpy.management.DeleteFeatures(contour_fcs)
-        # Append clipped features with input features
-        arcpy.management.Append(dice_fc, contour_fcs, 'NO_TEST')
+        # Replace input features with the clipped features
+        replace_features(contour_fcs, dice_fc)
         # Delete temporary files
         arcpy.management.Delete([buffer_fc, clip_fc, dice_fc])
 
@@ -60,10 +58,8 @@ def split_fcs(aoi, fc_list, buffer_distance, working_gdb, feature_to_split, logg
             # Clip features
             arcpy.AddMessage('  ...Clipping feature class to buffer')
             arcpy.analysis.Clip(fc_path, buffer_fc, clip_fc)
-            # Delete features before append
-            arcpy.management.DeleteFeatures(fc_path)
-            # Append clipped features with input features
-            arcpy.management.Append(clip_fc, fc_path, 'NO_TEST')
+            # Replace input features with the clipped features
+            replace_features(fc_path, clip_fc)
             # Delete temporary files
             arcpy.management.Delete([clip_fc])
 
@@ -143,10 +139,8 @@ def clean_data(aoi_fc, fcs, working_gdb, not_include_fields, clean_fc_name, exte
                         arcpy.analysis.Identity('fc_layer', 'aoi_layer', out_fc, 'ONLY_FID')
                         # Data append for next deleting
                         clean_list.append(out_fc)
-                        # Delete existing features
-                        arcpy.management.DeleteFeatures('fc_layer')
-                        # Append features with base fc
-                        arcpy.management.Append(out_fc, proc_fc, 'NO_TEST')
+                        # Replace the selected features with the split features
+                        replace_features('fc_layer', out_fc)
                         # Reparing geometry
                         arcpy.management.RepairGeometry(proc_fc)
 
@@ -158,9 +152,8 @@ def clean_data(aoi_fc, fcs, working_gdb, not_include_fields, clean_fc_name, exte
                     clean_list.append(out_fc)
 
                 if proc_fc != fc_path:
-                    # Delete features and append features
-                    arcpy.management.DeleteFeatures(fc_path)
-                    arcpy.management.Append(proc_fc, fc_path, 'NO_TEST')
+                    # Replace features with the cleaned features
+                    replace_features(fc_path, proc_fc)
                 has_fcpth_issues, fcpathissues = is_repair_needed(fc_path)
                 if has_fcpth_issues:
                     arcpy.AddMessage(f"{fc_path} has {len(fcpathissues)} geometry problems:")
@@ -219,7 +212,7 @@ def create_buffer_25k(working_gdb, buffer_distance_point, fc_list, buffer_points
     try:
         # Remove empty string
         buffer_points_25k = list(filter(str.strip, buffer_points_25k))
-        new_point_fc_list = [fc for item in buffer_points_25k for fc in fc_list if str(item) in fc]
+        new_point_fc_list = fc_list.find_all(buffer_points_25k)
         # Buffer // Create buffer for each point feature class // modified by Perver.N
         for buffer_fc in new_point_fc_list:
             fc_name = os.path.basename(buffer_fc)
@@ -242,7 +235,7 @@ def add_identifier_BUA(fc_list, bau_field_fc, logger):
     try:
         # Get feature class list for BAU field creation
         bau_field_fc_list = list(filter(str.strip, bau_field_fc))
-        bau_field_fc_list = [fc for a_lyr in bau_field_fc_list for fc in fc_list if str(a_lyr) in fc]
+        bau_field_fc_list = fc_list.find_all(bau_field_fc_list)
 
         for fc_item in bau_field_fc_list:
             # Add Identifier BUA Field
@@ -22,11 +22,9 @@ def collapse_replace(input_line_list, collapse_sql, collapse_size, carto_partiti
             arcpy.cartography.CollapseRoadDetail(in_lyr, f'{collapse_size} Meters', collapse_out)
             # Select features and delete features
             arcpy.management.SelectLayerByLocation(input_line, "WITHIN", in_lyr, None, "NEW_SELECTION", "NOT_INVERT")
-            # Delete all features in original feature class
+            # Replace the selected features with the collapsed features
             arcpy.AddMessage("Replacing geometry on original features")
-            arcpy.management.DeleteFeatures(input_line)
-            # Append collups out features with input features
-            arcpy.management.Append(collapse_out, input_line, "NO_TEST")
+            replace_features(input_line, collapse_out)
             # Delete temp files
             arcpy.management.Delete([fc_singlepart, "Collapse", "in_lyr"])
 
@@ -41,12 +39,11 @@ def trans_delete_dangles(trans_lines, sql, compare_fcs, seg_length, working_gdb,
     arcpy.env.workspace = working_gdb
 
     try:
-        # Denote dangles using points using the
-        # Feature Vertices to Points GP tool at dangles
-        arcpy.AddMessage("Creating points at dangles...")
-        dangles = arcpy.management.FeatureVerticesToPoints(trans_lines, "dangles", "DANGLE").getOutput(0)
+        # Find the lines with a free end
+        arcpy.AddMessage("Finding dangles...")
+        dangles = dangle_line_ids(trans_lines)
         # Use Describe function to get SHAPE Length field
-        shp_len_fld = arcpy.da.Describe(trans_lines)['lengthFieldName']
+        shp_len_fld = describe(trans_lines)['lengthFieldName']
         # Create feature layer of hydro lines where
         # length of segment < seg_length and Name field
         # is an empty string or NULL
@@ -62,12 +59,14 @@ def trans_delete_dangles(trans_lines, sql, compare_fcs, seg_length, working_gdb,
                 while feature_count >= 1:
                     feature_count = delete_dangles("transport", dangles, seg_length, compare_fcs, working_gdb)
                     arcpy.management.SelectLayerByAttribute("transport", "NEW_SELECTION", where)
+                    # Deleting dangles can leave new ones
+                    dangles = dangle_line_ids(trans_lines)
                     count += 1
         else:
             delete_dangles("transport", dangles, seg_length, compare_fcs, working_gdb)
 
         # Delete temp files
-        arcpy.management.Delete([dangles, "transport"])
+        arcpy.management.Delete(["transport"])
 
     except Exception as e:
             tb = traceback.format_exc()
@@ -124,10 +123,8 @@ def thin_road_network(in_features, minimum_length_min, minimum_length_max, invis
             arcpy.management.SelectLayerByAttribute("fc_singlepart_lyr", "CLEAR_SELECTION")
             arcpy.SetProgressorLabel(f"Repairing Geometry")
             arcpy.management.RepairGeometry("fc_singlepart_lyr")
-            arcpy.SetProgressorLabel(f"Deleting Features in {in_feature}")
-            arcpy.management.DeleteFeatures(in_feature)
-            arcpy.SetProgressorLabel(f"Adding Generated Features in {in_feature}")
-            arcpy.management.Append("fc_singlepart_lyr", in_feature, "NO_TEST")
+            arcpy.SetProgressorLabel(f"Replacing Features in {in_feature}")
+            replace_features(in_feature, "fc_singlepart_lyr")
             # Delete temp files
             arcpy.management.Delete([f'{working_gdb}\\road_carto_rank_high_fc', f'{working_gdb}\\road_carto_rank_low_fc', f"{working_gdb}\\fc_singlepart"])
   
@@ -195,9 +192,9 @@ def gen_transportation(feature_list, working_gdb, hierarchy_file, in_feature_loc
         delete_dngl_sql = "NAM IS NOT NULL AND NAM <> ''"
         recursive = "true"
         for trans_lines in input_line_list:
-            if arcpy.da.Describe(trans_lines)['baseName'] == 'TA0060_Road_L':
+            if describe(trans_lines)['baseName'] == 'TA0060_Road_L':
                 compare_fcs_list.insert(0, input_line_list[1])
-            elif arcpy.da.Describe(trans_lines)['baseName'] == 'TA0110_Track_L':
+            elif describe(trans_lines)['baseName'] == 'TA0110_Track_L':
                 compare_fcs_list.insert(0, input_line_list[0])
             trans_delete_dangles(trans_lines, delete_dngl_sql, compare_fcs_list, seg_length, working_gdb, recursive)
         # Thin road network reducing
@@ -209,8 +206,8 @@ def gen_transportation(feature_list, working_gdb, hierarchy_file, in_feature_loc
         topology_fcs = [fc for topo in topology_fcs for fc in feature_list if str(topo) in fc]
         for input_fc in input_line_list:
             if has_features(input_fc):
-                arcpy.SetProgressorLabel(f"Generalizing Shared Feature: {arcpy.da.Describe(input_fc)['baseName']}")
-                if arcpy.da.Describe(input_fc)['name'] == 'TA0060_Road_L':
+                arcpy.SetProgressorLabel(f"Generalizing Shared Feature: {describe(input_fc)['baseName']}")
+                if describe(input_fc)['name'] == 'TA0060_Road_L':
                     main_fc = arcpy.management.MakeFeatureLayer(input_fc, "main_fc", trans_common_express)
                     topology_fcs.insert(0, main_fc)
                     selected_fc = arcpy.management.SelectLayerByAttribute(main_fc, "NEW_SELECTION", "RCS <> 5")
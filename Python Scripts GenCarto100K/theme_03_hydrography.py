@@ -41,27 +41,21 @@ def check_middle(poly_layer, delete_poly_for_wide, delete_poly_ids, dangle_polys
     arcpy.env.overwriteOutput = True
     try:
         arcpy.AddMessage("Checking for middle features")
-        desc = arcpy.da.Describe(poly_layer)
-        delimit_oid = desc['OIDFieldName']
-        delete_query = ""
-        for oid in delete_poly_ids:
-            delete_query = delete_query + delimit_oid + " = " + str(oid) + " OR "
-        delete_query = delete_query[:-4]
+        delete_query = oid_where(poly_layer, delete_poly_ids)
 
         delete_test = arcpy.management.MakeFeatureLayer(poly_layer, "delete_test", delete_query)
 
-        near_delete = arcpy.analysis.GenerateNearTable(delete_test, poly_layer, "del_near", "0 Meters", closest="ALL")
-        near_del_ids = [arow[0] for arow in arcpy.da.SearchCursor(near_delete, "IN_FID")]
-        delete_unique_ids = list(set(near_del_ids))
+        in_fids, near_fids, _ = near_pairs(delete_test, poly_layer, "0 Meters", out_name="del_near")
+        near_delete = spatial_index.group_pairs(in_fids, near_fids)
+        delete_unique_ids = set(near_delete)
 
-        for del_id in delete_unique_ids:
+        for del_id in near_delete:
             arcpy.AddMessage(f"checking feature {del_id}")
-            query_u = f"IN_FID = {del_id}"
             cnt = 0
 
-            for brow in arcpy.da.SearchCursor(near_delete, ["IN_FID", "NEAR_FID"], query_u):
+            for near_id in near_delete[del_id].tolist():
 
-                if brow[1] not in delete_unique_ids:
+                if near_id not in delete_unique_ids:
                     arcpy.AddMessage("touches feature not being deleted")
                     cnt += 1
                 else:
@@ -74,10 +68,7 @@ def check_middle(poly_layer, delete_poly_for_wide, delete_poly_ids, dangle_polys
             else:
                 arcpy.AddMessage("... Feature is dangle and will be deleted.")
 
-        delete_query = ""
-        for oid in delete_poly_ids:
-            delete_query = delete_query + delimit_oid + " = " + str(oid) + " OR "
-        delete_query = delete_query[:-4]
+        delete_query = oid_where(poly_layer, delete_poly_ids)
 
         return delete_query, delete_poly_ids
     
@@ -104,8 +95,7 @@ def connect_centerlines(out_table, input_lines, line_fc, l_match, p_match, delet
                 arcpy.AddMessage(f"Touches {len(unique_polys)} features")
 
                 if len(unique_polys) >= 1:
-                    where_clause = "ORIG_FID = "
-                    where_clause += " OR ORIG_FID = ".join(unique_polys)
+                    where_clause = oid_where(line_fc, unique_polys, "ORIG_FID")
 
                     centerline_geos = [row[0] for row in arcpy.da.SearchCursor(line_fc, ["SHAPE@", "OID@", "ORIG_FID"], where_clause)]
 
@@ -200,7 +190,7 @@ def rebuild_centerline(split_layer, center_layer, update_field, polygons, width_
     try:
         arcpy.AddMessage("Updating casing values for centerlines")
         arcpy.management.SelectLayerByAttribute(split_layer, "CLEAR_SELECTION")
-        orig_oid_field = f'FID_{(arcpy.da.Describe(split_layer))["name"]}'
+        orig_oid_field = f'FID_{(describe(split_layer))["name"]}'
         center_features = f"{orig_oid_field} <> -1"
         final_center_split = arcpy.management.FeatureToLine([split_layer, polygons], "temp_final_split", "#", 'ATTRIBUTES')
         final_center_lyr = arcpy.management.MakeFeatureLayer(final_center_split, "temp_final_lyr", center_features)
@@ -219,7 +209,7 @@ def rebuild_centerline(split_layer, center_layer, update_field, polygons, width_
 
         # Unsplit polygons based on casing value - keep the orig OID
         arcpy.management.SelectLayerByAttribute(final_center_lyr, "CLEAR_SELECTION")
-        center_oid_field = f'FID_{(arcpy.da.Describe(split_layer))["name"]}'
+        center_oid_field = f'FID_{(describe(split_layer))["name"]}'
         un_layer = arcpy.management.Dissolve(final_center_lyr, "unsplit_center_layer", [update_field, center_oid_field])
 
 
@@ -232,8 +222,7 @@ def rebuild_centerline(split_layer, center_layer, update_field, polygons, width_
             arcpy.management.CalculateField(center_layer, "ORIG_OID", '!OBJECTID!',"PYTHON3")
             dup_oids = set(dup_oids)
             arcpy.AddMessage("Some original lines split into multiple")
-            where_clause = "OBJECTID = "
-            where_clause += "OR OBJECTID =".join(dup_oids)
+            where_clause = oid_where(center_layer, dup_oids)
             arcpy.management.MakeFeatureLayer(center_layer, "dup_layer", where_clause)
             arcpy.management.AddField("dup_layer", "Casing", 'SHORT', '#', '#', '#', '#', 'NULLABLE', 'NON_REQUIRED', '#')
             dup_recs = arcpy.management.CopyFeatures("dup_layer", "Duplicate_records")
@@ -277,8 +266,7 @@ def rebuild_centerline(split_layer, center_layer, update_field, polygons, width_
                 u_cur.updateRow(u_row)
 
         if len(dup_rec_ids) >= 1:
-            where_clause = "OBJECTID = "
-            where_clause += "OR OBJECTID =".join(dup_rec_ids)
+            where_clause = oid_where(un_layer, dup_rec_ids)
             arcpy.management.MakeFeatureLayer(un_layer, "un_layer1", where_clause)
             
 
@@ -303,7 +291,7 @@ def rebuild_centerline(split_layer, center_layer, update_field, polygons, width_
             arcpy.management.Append(dup_recs, center_layer, "NO_TEST")
             arcpy.management.DeleteField(center_layer, "ORIG_OID")
 
-        length_field = (arcpy.da.Describe(center_layer))['lengthFieldName']
+        length_field = (describe(center_layer))['lengthFieldName']
         length_query = f'{length_field} < {width_np/3} AND {update_field} = 1'
         arcpy.management.SelectLayerByAttribute(center_layer, "NEW_SELECTION", length_query)
         arcpy.management.SelectLayerByLocation(center_layer, "BOUNDARY_TOUCHES", polygons, "", "SUBSET_SELECTION")
@@ -380,7 +368,7 @@ def merge(poly_layer, distance, field, scratch):
         with arcpy.da.SearchCursor(mem, ["SHAPE@"]) as mem_cur:
             for mem_row in mem_cur:
                 geom = mem_row[0]
-                arcpy.SelectLayerByLocation_management(poly_layer, "WITHIN", geom)
+                arcpy.management.SelectLayerByLocation(poly_layer, "WITHIN", geom)
                 # Use update cursor to update geometry of hydro poly
                 # Use SQL Clause to sort by name so that the first record returned can be used
                 # to update the geometry.  If this record doesn't have a name, then none of the
@@ -409,7 +397,7 @@ def merge(poly_layer, distance, field, scratch):
 def hydro_prep(line_fc, sel_fc_list):
     try:
         temp_list = []
-        desc = arcpy.da.Describe(line_fc)
+        desc = describe(line_fc)
         fc_name = desc['name']
         features_lyr = arcpy.management.MakeFeatureLayer(line_fc, f"features_lyr_{fc_name}")
         
@@ -436,7 +424,7 @@ def remove_short_lines_connecting_polys(hydro_line, hydro_poly, name_fld, line_l
 
         # Make feature layer of hydro lines less than specified length
         arcpy.AddMessage( "Creating feature layer of hydro line segments less than " + str(line_len) + " Meters...")
-        shape_length = arcpy.da.Describe(hydro_line)['lengthFieldName']
+        shape_length = describe(hydro_line)['lengthFieldName']
         where = f"{shape_length} < {line_len}"
         arcpy.management.MakeFeatureLayer(hydro_line, "hydro_line", where)
 
@@ -513,9 +501,9 @@ def narrow_polygons_new(fc_list, polygon_input_list, centerline_input_list, widt
     # Set the workspace
     arcpy.env.overwriteOutput = True
     polygon_input_list = list(filter(str.strip, polygon_input_list))
-    polygon_input_list = [fc for a_lyr in polygon_input_list for fc in fc_list if str(a_lyr) in fc]
+    polygon_input_list = fc_list.find_all(polygon_input_list)
     centerline_input_list = list(filter(str.strip, centerline_input_list))
-    centerline_input_list = [fc for a_lyr in centerline_input_list for fc in fc_list if str(a_lyr) in fc]
+    centerline_input_list = fc_list.find_all(centerline_input_list)
 
     try:
         width_np = width_units
@@ -526,7 +514,7 @@ def narrow_polygons_new(fc_list, polygon_input_list, centerline_input_list, widt
 
         for polygon_input_np, center_line_input in zip(polygon_input_list, centerline_input_list):
             update_field = 'Casing'
-            desc = arcpy.da.Describe(polygon_input_np)
+            desc = describe(polygon_input_np)
             delimit_oid = desc['OIDFieldName']
             name = desc['name']
             # Create layers for inputs
@@ -550,7 +538,7 @@ def narrow_polygons_new(fc_list, polygon_input_list, centerline_input_list, widt
                 # Split the Hydro Polygons and centerlines
                 split_polygons, split_center, poly_is_split = SplitByBox.split(poly_input_layer, center_layer, width_np, working_gdb)
                 poly_layer = arcpy.management.MakeFeatureLayer(split_polygons, 'poly_lyr')
-                split_field = (arcpy.da.Describe(center_line_input))['name']
+                split_field = (describe(center_line_input))['name']
                 q1 = f'FID_{split_field} <> -1'
                 layer1 = arcpy.management.MakeFeatureLayer(split_center, 'split_lyr', q1)
                 # Identity polygon
@@ -665,7 +653,7 @@ def narrow_polygons_new(fc_list, polygon_input_list, centerline_input_list, widt
                         for s_row in s_cur:
                             if s_row[2] != None:
                                 if s_row[2] >= 1:
-                                    query = f'{(arcpy.da.Describe(poly_layer2))["OIDFieldName"]} = {s_row[2]}'
+                                    query = f'{(describe(poly_layer2))["OIDFieldName"]} = {s_row[2]}'
                                     with arcpy.da.UpdateCursor(poly_layer2, ['OID@', 'SHAPE@'], query) as p_up_cur:
                                         for p_up_row in p_up_cur:
                                             arcpy.AddMessage(f"Widening polygon {p_up_row[0]} from line {s_row[0]}")
@@ -739,7 +727,7 @@ def extend_lines_remove_poly(line_FC, polygon_fc, minLakeAreaSize, expression, c
         arcpy.env.overwriteOutput = True
         arcpy.AddMessage("Scratch : " + str(working_gdb))
 
-        desc = arcpy.da.Describe(polygon_fc)
+        desc = describe(polygon_fc)
         fc_name = desc['name']
         area_field = desc['areaFieldName']
         oid_field = desc['OIDFieldName']
@@ -757,7 +745,7 @@ def extend_lines_remove_poly(line_FC, polygon_fc, minLakeAreaSize, expression, c
             with arcpy.da.SearchCursor(extractedLakes, ["SHAPE@", 'OID@']) as srows:
                 for row in srows:
                     centerpt = row[0].centroid
-                    geom2Merge = arcpy.PointGeometry(centerpt, arcpy.da.Describe(extractedLakes)['spatialReference'])
+                    geom2Merge = arcpy.PointGeometry(centerpt, describe(extractedLakes)['spatialReference'])
                     arcpy.management.SelectLayerByLocation(river_layer, "INTERSECT", row[0], "", "NEW_SELECTION")
                     if int(arcpy.management.GetCount(river_layer)[0]) > 1:
                         arcpy.AddMessage("Updating lines that intersect polygon with OID " + str(row[1]))
@@ -784,7 +772,7 @@ def extend_lines_remove_poly(line_FC, polygon_fc, minLakeAreaSize, expression, c
                     for fc in compare_fcs:
                         # Get just the secondary fc name without path
                         indx = fc.strip("\'")
-                        desc = arcpy.da.Describe(indx)
+                        desc = describe(indx)
                         fcName = desc['name']
                         secondaryFCNames.append(fcName)
 
@@ -852,7 +840,7 @@ def delete_small_fc_near_large_fc(polygon_fc, sql, name_field, deleteSize, minSi
 
         # --- determine query for selecting features ---
         # Find area field
-        desc = arcpy.da.Describe(polygon_fc)
+        desc = describe(polygon_fc)
         area_field = desc['areaFieldName']
         oid_field = desc['OIDFieldName']
         # Query for features smaller than minimum size
@@ -981,7 +969,7 @@ def aggregare_polygons(input_polygons, sql, name_field, min_size, distance, work
         delete_total = 0
         # Determine query for selecting features
         # Find and delimit system fields
-        desc = arcpy.da.Describe(input_polygons)
+        desc = describe(input_polygons)
         fc_name = desc['name']
         # Query for features smaller than minimum size
         small_query = ""
@@ -1056,7 +1044,7 @@ def convert_type(in_FC, SQL, minimumLength, out_FC, out_Subtype, connect, workin
         inFCLyr = "inFCLyr"
         arcpy.management.MakeFeatureLayer(in_FC, inFCLyr)
 
-        desc = arcpy.da.Describe(in_FC)
+        desc = describe(in_FC)
         shapelength = desc['lengthFieldName']
 
         # Get features that meet selection criteria
@@ -1110,7 +1098,7 @@ def increase_line_length(damFC, sql, minimum_length, working_gdb):
         arcpy.management.MakeFeatureLayer(damFC, damFCLyr)
 
         # Get features that meet selection criteria
-        desc = arcpy.da.Describe(damFC)
+        desc = describe(damFC)
         shapelength = desc['lengthFieldName']
         where_clause = f"{shapelength} < {minimumLength}"
         if SQL:
@@ -1203,48 +1191,18 @@ def remove_close_lines(input_lines, sql, distance, per, dangles, delete, visible
             arcpy.management.SelectLayerByAttribute(line_lyr, "CLEAR_SELECTION")
             arcpy.AddMessage(str(len(values)) + "Features have dangles")
             if len(values) >= 1:
-                # Convert list of Target FID values to a SQL statement
-                value_str = ", ".join(str(v) for v in values)
-                where = f"OBJECTID IN ({value_str})"
-                arcpy.management.SelectLayerByAttribute(line_lyr, "New_Selection", where)
+                # Select the lines by the Target FID values
+                select_by_oids(line_lyr, values)
 
         proc_cnt = int(arcpy.management.GetCount(line_lyr)[0])
         arcpy.AddMessage(str(proc_cnt) + " features selected.")
 
         if proc_cnt > 0:
             arcpy.AddMessage(comp_lines)
-            near_dangles = arcpy.analysis.GenerateNearTable(line_lyr, comp_lines, "near_dangles", distance, "NO_LOCATION", "NO_ANGLE", "ALL")
-            touching_ids = []
-            near_dict = {}
-            connect_dict = {}
-            connect_ids = []
-            # Get a list of the lines close to other lines...
-            with arcpy.da.SearchCursor(near_dangles, ["IN_FID", "NEAR_FID", "NEAR_DIST"]) as cursor:
-                for row in cursor:
-                    if row[2] > 1:
-                        # If this is the first record for that in_fid value
-                        if row[0] not in touching_ids:
-                            # Add to the touching_ids list and near dictionary
-                            touching_ids.append(row[0])
-                            near_dict[row[0]] = [row[1]]
-                        # If this is not the first record
-                        else:
-                            # Updated the dictionary to add the new near id
-                            cur_list = near_dict[row[0]]
-                            cur_list.append(row[1])
-                            near_dict[row[0]] = cur_list
-                    elif row[2] <= 1:
-                        # If this is the first record for that in_fid value
-                        if row[0] not in connect_ids:
-                            # Add to the touching_ids list and near dictionary
-                            connect_ids.append(row[0])
-                            connect_dict[row[0]] = [row[1]]
-                        # If this is not the first record
-                        else:
-                            # Updated the dictionary to add the new near id
-                            cur_list = connect_dict[row[0]]
-                            cur_list.append(row[1])
-                            connect_dict[row[0]] = cur_list
+            in_fids, near_fids, near_dist = near_pairs(line_lyr, comp_lines, distance, working_gdb, "near_dangles")
+            # Get a list of the lines close to other lines, lines within 1 meter are connected
+            near_dict, connect_dict = spatial_index.close_and_connected(in_fids, near_fids, near_dist, 1)
+            touching_ids = near_dict.keys()
 
             arcpy.AddMessage("Near Cnt " + str(len(touching_ids)))
             arcpy.AddMessage("Getting comparison geometries")
@@ -1253,7 +1211,7 @@ def remove_close_lines(input_lines, sql, distance, per, dangles, delete, visible
                 for row in cursor:
                     geo_dict[row[0]] = [row[1], row[2]]
             line_ignore = []
-            length_field = arcpy.da.Describe(input_lines)['lengthFieldName']
+            length_field = describe(input_lines)['lengthFieldName']
             order = "ORDER BY " + length_field
             if delete == 'false':
                 fields = [length_field, "OID@", "SHAPE@", "BEARING", visible_field]
@@ -1385,16 +1343,12 @@ def remove_dangles_lines(working_gdb, hydro_lines, sql, seg_length, compare_fcs,
     arcpy.env.overwriteOutput = 1
     arcpy.env.workspace = working_gdb
 
-    clean_list = []
-
     try:
-        # Denote dangles using points using the
-        # Feature Vertices to Points GP tool at dangles
-        arcpy.AddMessage("Creating points at dangles...")
-        dangles = arcpy.management.FeatureVerticesToPoints(hydro_lines, "dangles", "DANGLE").getOutput(0)
-        clean_list.append(dangles)
+        # Find the lines with a free end
+        arcpy.AddMessage("Finding dangles...")
+        dangles = dangle_line_ids(hydro_lines)
         # Use Describe function to get SHAPE Length field
-        shp_len_fld = arcpy.da.Describe(hydro_lines)['lengthFieldName']
+        shp_len_fld = describe(hydro_lines)['lengthFieldName']
         # Create feature layer of hydro lines where
         # length of segment < seg_length and Name field
         # is an empty string or NULL
@@ -1413,6 +1367,8 @@ def remove_dangles_lines(working_gdb, hydro_lines, sql, seg_length, compare_fcs,
                     arcpy.AddMessage("Deleting dangles loop " + str(count))
                     feature_count = delete_dangles("hydro", dangles, seg_length, compare_fcs, working_gdb)
                     arcpy.management.SelectLayerByAttribute("hydro", "NEW_SELECTION", where)
+                    # Deleting dangles can leave new ones
+                    dangles = dangle_line_ids(hydro_lines)
                     count += 1
         else:
             delete_dangles("hydro", dangles, seg_length, compare_fcs, working_gdb)
@@ -1436,10 +1392,8 @@ def update_veg_lyr_with_hydro_lyr(hydro_fc_list, veg_lyr_list, working_gdb):
                 selected_fcs = arcpy.management.SelectLayerByLocation(veg_lyr, "INTERSECT", hydro_fc, None, "NEW_SELECTION")
                 if count_features(selected_fcs) >= 1:
                     temp_erase_layer = arcpy.analysis.Erase(veg_lyr, hydro_fc, temp_erase_layer)
-                    # Delete existing features
-                    arcpy.management.DeleteFeatures(veg_lyr)
-                    # Append simplified features with main fc
-                    arcpy.management.Append(temp_erase_layer, veg_lyr, 'NO_TEST')
+                    # Replace the selected features with the erased features
+                    replace_features(veg_lyr, temp_erase_layer)
         # Delete temp files
         arcpy.management.Delete([temp_erase_layer])
 
@@ -1462,33 +1416,33 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
     try:
         # Hydro preparation
         hydro_prep_fc_list = list(filter(str.strip, hydro_prep_fc_list))
-        hydro_prep_fc_list = [fc for a_lyr in hydro_prep_fc_list for fc in fc_list if str(a_lyr) in fc]
-        river = [fc for fc in fc_list if 'HH0040_River_L' in fc][0]
-        river_bank = [fc for fc in fc_list if 'HH0041_River_Bank_L' in fc][0]
-        irrigation = [fc for fc in fc_list if 'HH0190_Irrigation_Canal_L' in fc][0]
-        irrigation_edge = [fc for fc in fc_list if 'HH0191_Irrigation_Canal_Edge_L' in fc][0]
-        sea_coverage = [fc for fc in fc_list if 'HK0040_Sea_Coverage_A' in fc][0]
-        irrigation_canal_cover_list = [fc for fc in fc_list if 'HH0192_Irrigation_Canal_Coverage_A' in fc]
+        hydro_prep_fc_list = fc_list.find_all(hydro_prep_fc_list)
+        river = fc_list.find('HH0040_River_L')
+        river_bank = fc_list.find('HH0041_River_Bank_L')
+        irrigation = fc_list.find('HH0190_Irrigation_Canal_L')
+        irrigation_edge = fc_list.find('HH0191_Irrigation_Canal_Edge_L')
+        sea_coverage = fc_list.find('HK0040_Sea_Coverage_A')
+        irrigation_canal_cover_list = fc_list.matches('HH0192_Irrigation_Canal_Coverage_A')
         topo_fcs_list = list(filter(str.strip, topo_fcs_list))
-        topo_fcs = [fc for a_lyr in topo_fcs_list for fc in fc_list if str(a_lyr) in fc]
+        topo_fcs = fc_list.find_all(topo_fcs_list)
 
         hydro_prep(river, hydro_prep_fc_list)
         hydro_prep(irrigation, irrigation_canal_cover_list)
    
         # Hydro Remove Short Lines Connecting Polygons
-        pond = [fc for fc in fc_list if 'HH0210_Pond_A' in fc][0]
-        lake = [fc for fc in fc_list if 'HH0020_Lake_A' in fc][0]
-        river_coverage = [fc for fc in fc_list if 'HH0042_River_Coverage_A' in fc][0]
+        pond = fc_list.find('HH0210_Pond_A')
+        lake = fc_list.find('HH0020_Lake_A')
+        river_coverage = fc_list.find('HH0042_River_Coverage_A')
         remove_short_lines_connecting_polys(river, pond, name_fld, line_len, working_gdb)
         remove_short_lines_connecting_polys(river, lake, name_fld, line_len, working_gdb)
 
         # Hydro narrow polygons
         narrow_polygons_new(fc_list, polygon_input_list, centerline_input_list, width_units, buffer_percent, vis_field, topo_fcs, working_gdb, logger)
         # Hydro generalize shared
-        polygon_input_list = [fc for topo in ['HH0042_River_Coverage_A', 'HH0192_Irrigation_Canal_Coverage_A'] for fc in fc_list if str(topo) in fc]
-        centerline_input_list = [fc for topo in ['HH0040_River_L', 'HH0190_Irrigation_Canal_L'] for fc in fc_list if str(topo) in fc]
+        polygon_input_list = fc_list.find_all(['HH0042_River_Coverage_A', 'HH0192_Irrigation_Canal_Coverage_A'])
+        centerline_input_list = fc_list.find_all(['HH0040_River_L', 'HH0190_Irrigation_Canal_L'])
         for line_fc, poly_fc in zip(centerline_input_list, polygon_input_list):
-            desc = arcpy.da.Describe(line_fc)
+            desc = describe(line_fc)
             fc_name = desc['name']
             features_lyr = arcpy.management.MakeFeatureLayer(line_fc, f"features_lyr_{fc_name}")
             arcpy.management.SelectLayerByLocation(features_lyr, 'INTERSECT', poly_fc, "2 Meters", 'NEW_SELECTION')
@@ -1497,9 +1451,9 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
             arcpy.edit.Snap(features_lyr, [snap_env])
 
         update_veg_lyr_with_hydro_lyr(polygon_input_list, topo_fcs, working_gdb)
-        river_coverage = [fc for fc in fc_list if 'HH0042_River_Coverage_A' in fc][0]
-        irrigation_canal_cover = [fc for fc in fc_list if 'HH0192_Irrigation_Canal_Coverage_A' in fc][0]
-        topology_fcs = [fc for a_lyr in topo_fcs_list for fc in fc_list if str(a_lyr) in fc]
+        river_coverage = fc_list.find('HH0042_River_Coverage_A')
+        irrigation_canal_cover = fc_list.find('HH0192_Irrigation_Canal_Coverage_A')
+        topology_fcs = fc_list.find_all(topo_fcs_list)
         # Generalize shared features
         topology_fcs.insert(0, lake)
         gen_shared_features(lake, generalize_operations, simple_tolerance, smooth_tolerance, working_gdb, topology_fcs)
@@ -1515,9 +1469,9 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
         topology_fcs.remove(irrigation_canal_cover)
         
         # Determination and Reconnecting
-        part_01_lk = (arcpy.da.Describe(lake)['name']).split("_")[1]
-        part_01_pnd = (arcpy.da.Describe(pond)['name']).split("_")[1]
-        part_02_r = (arcpy.da.Describe(river)['name']).split("_")[1]
+        part_01_lk = (describe(lake)['name']).split("_")[1]
+        part_01_pnd = (describe(pond)['name']).split("_")[1]
+        part_02_r = (describe(river)['name']).split("_")[1]
 
         out_name_1 = f"{part_01_lk}_{part_02_r}_rlc"
         out_name_2 = f"{part_02_r}_{part_01_pnd}_rlc"
@@ -1537,9 +1491,9 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
             # Create the table for storing information about touching features
             arcpy.management.CreateTable(working_gdb, out_name_2)
 
-        line_field_river = "FID_" + arcpy.da.Describe(river)['name']
-        poly_field_lake = "FID_" + arcpy.da.Describe(lake)['name']
-        poly_field_pond = "FID_" + arcpy.da.Describe(pond)['name']
+        line_field_river = "FID_" + describe(river)['name']
+        poly_field_lake = "FID_" + describe(lake)['name']
+        poly_field_pond = "FID_" + describe(pond)['name']
 
         # Run the determine function
         # For River-Pond
@@ -1565,9 +1519,9 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
         arcpy.management.DeleteFeatures(selected_irrigation_edge)
         arcpy.management.DeleteFeatures(selected_river_bank)
         # Ditermine touching hydro
-        part_01_lk = (arcpy.da.Describe(lake)['name']).split("_")[1]
-        part_01_pnd = (arcpy.da.Describe(pond)['name']).split("_")[1]
-        part_02_r = (arcpy.da.Describe(river)['name']).split("_")[1]
+        part_01_lk = (describe(lake)['name']).split("_")[1]
+        part_01_pnd = (describe(pond)['name']).split("_")[1]
+        part_02_r = (describe(river)['name']).split("_")[1]
  
         out_name_1 = f"{part_01_lk}_{part_02_r}_touch"
         out_name_2 = f"{part_01_pnd}_{part_02_r}_touch"
@@ -1587,9 +1541,9 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
             # Create the table for storing information about touching features
             arcpy.management.CreateTable(working_gdb, out_name_2)
 
-        line_field_river = "FID_" + arcpy.da.Describe(river)['name']
-        poly_field_lake = "FID_" + arcpy.da.Describe(lake)['name']
-        poly_field_pond = "FID_" + arcpy.da.Describe(pond)['name']
+        line_field_river = "FID_" + describe(river)['name']
+        poly_field_lake = "FID_" + describe(lake)['name']
+        poly_field_pond = "FID_" + describe(pond)['name']
 
         ##---Run the determine function---##
         # For River-Pond
@@ -1604,9 +1558,9 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
         river_fc2 = extend_lines_remove_poly(river_fc1, "pond_lyr", hydro_remove_small_poly_mim_area, False, topo_fcs, working_gdb)
 
         # Hydro enlarge polygons touching lines
-        global_position_station = [fc for fc in fc_list if 'ZA0010_Global_Navigation_Satellite_System_Station_P' in fc][0]
-        base_pont = [fc for fc in fc_list if 'ZA0070_Base_Point_P' in fc][0]
-        trigonometric_station = [fc for fc in fc_list if 'ZA0040_Trigonometry_Station_P' in fc][0]
+        global_position_station = fc_list.find('ZA0010_Global_Navigation_Satellite_System_Station_P')
+        base_pont = fc_list.find('ZA0070_Base_Point_P')
+        trigonometric_station = fc_list.find('ZA0040_Trigonometry_Station_P')
 
         # CHANGES IN 100K COMMENT OUT THE REPAIR GEOMETRY SECTION FOR GEN_HYDRO
         # # Repair geometry
@@ -1634,7 +1588,7 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
 
         # Hydro remove near polygons
         hydro_remove_near_poly_list = list(filter(str.strip, hydro_remove_near_poly_list))
-        hydro_remove_near_poly_list = [fc for a_lyr in hydro_remove_near_poly_list for fc in fc_list if str(a_lyr) in fc]
+        hydro_remove_near_poly_list = fc_list.find_all(hydro_remove_near_poly_list)
 
         for polygon_fc in hydro_remove_near_poly_list:
             if any(island in polygon_fc for island in ['HL0010_Inland_Island_A', 'HL0020_Coastal_Island_A', 'HL0030_Offshore_Island_A']):
@@ -1659,7 +1613,7 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
 
         # Hydro enlarge polygons untouching
         hydro_enlarge_untch_poly_list = list(filter(str.strip, hydro_enlarge_poly_list))
-        hydro_enlarge_untch_poly_list = [fc for a_lyr in hydro_enlarge_untch_poly_list for fc in fc_list if str(a_lyr) in fc]
+        hydro_enlarge_untch_poly_list = fc_list.find_all(hydro_enlarge_untch_poly_list)
         for polygon_fc in hydro_enlarge_untch_poly_list:
             if any(island in polygon_fc for island in ['HL0010_Inland_Island_A', 'HL0020_Coastal_Island_A', 'HL0030_Offshore_Island_A']):
                 enlarge_barrier_fcs01.append(polygon_fc)
@@ -1689,14 +1643,18 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
             merge_touching_features_new(poly_fc, None, name_fld, working_gdb)
         # # Hydro trim between polygons
         island = [fc for fc in fc_list if any(islandelm in fc for islandelm in ['HL0010_Inland_Island_A', 'HL0020_Coastal_Island_A', 'HL0030_Offshore_Island_A'])][0]
+        # Trim partition by partition in parallel when the sheet has cartographic partitions
+        carto_partition = fc_list.matches('CartoPartitionA')
+        arcpy.env.cartographicPartitions = carto_partition[0] if carto_partition else None
         trim_polygon_within_distance(island, name_fld, None, hydro_trim_between_polygon_distance, hydro_trim_between_polygon_min_area, delete, working_gdb)
         trim_polygon_within_distance(lake, name_fld, None, hydro_trim_between_polygon_distance, hydro_trim_between_polygon_min_area, delete, working_gdb)
         trim_polygon_within_distance(pond, name_fld, None, hydro_trim_between_polygon_distance, hydro_trim_between_polygon_min_area, delete, working_gdb)
+        arcpy.env.cartographicPartitions = None
 
         # Reconnect Touching Hydro
-        pond = [fc for fc in fc_list if 'HH0210_Pond_A' in fc][0]
-        lake = [fc for fc in fc_list if 'HH0020_Lake_A' in fc][0]
-        river = [fc for fc in fc_list if 'HH0040_River_L' in fc][0]
+        pond = fc_list.find('HH0210_Pond_A')
+        lake = fc_list.find('HH0020_Lake_A')
+        river = fc_list.find('HH0040_River_L')
         out_table1 = f"{working_gdb}\\Pond_River_Touch"
         out_table2 = f"{working_gdb}\\Lake_River_Touch"  
         reconnect_touching(pond, river, out_table1, delete)
@@ -1704,7 +1662,7 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
 
         # Hydro remove small polygon by converting
         hydro_remove_small_poly_list = list(filter(str.strip, hydro_remove_small_poly_list))
-        hydro_remove_small_poly_list = [fc for a_lyr in hydro_remove_small_poly_list for fc in fc_list if str(a_lyr) in fc]
+        hydro_remove_small_poly_list = fc_list.find_all(hydro_remove_small_poly_list)
 
         input_secondary01 = [lake, sea_coverage, river_coverage, pond]
         input_secondary02 = [lake, river_coverage] + topo_fcs
@@ -1724,8 +1682,8 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
 
         # Hydro erase polygons
         hydro_erase_poly_list = list(filter(str.strip, hydro_erase_poly_list))
-        hydro_erase_poly_list = [fc for a_lyr in hydro_erase_poly_list for fc in fc_list if str(a_lyr) in fc]
-        track = [fc for fc in fc_list if 'TA0110_Track_L' in fc][0]
+        hydro_erase_poly_list = fc_list.find_all(hydro_erase_poly_list)
+        track = fc_list.find('TA0110_Track_L')
         temp_list = [river, track] + topo_fcs
         temp_list01 = [river] + topo_fcs
         temp_list02 = [lake, river_coverage]
@@ -1740,11 +1698,11 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
                 erase_polygons_by_replace(enlarge_fc, topo_fcs, None, working_gdb)
 
         # Fill gaps
-        lake = [fc for fc in fc_list if 'HH0020_Lake_A' in fc][0]
+        lake = fc_list.find('HH0020_Lake_A')
         arcpy.topographic.FillGaps(lake, hydro_erase_poly_max_gap_area, "FILL_BY_LENGTH")
 
         # Remove shoreline not on hydro area feature boundary
-        shore_line = [fc for fc in fc_list if 'HA0010_Shoreline_L' in fc][0]
+        shore_line = fc_list.find('HA0010_Shoreline_L')
         shore_line_lyr = arcpy.management.MakeFeatureLayer(shore_line, "shore_line")
         selected_shore_line_island = arcpy.management.SelectLayerByLocation(shore_line_lyr, 'CROSSED_BY_THE_OUTLINE_OF', island, None, 'ADD_TO_SELECTION', 'INVERT')
         selected_shore_line_pond = arcpy.management.SelectLayerByLocation(shore_line_lyr, 'CROSSED_BY_THE_OUTLINE_OF', pond, None, 'ADD_TO_SELECTION', 'INVERT')
@@ -1755,13 +1713,13 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
         arcpy.management.CalculateField(in_table=selected_shore_line_lake, field=vis_field, expression=1, expression_type='PYTHON3')
 
         # Convert underground river
-        under_ground_river = [fc for fc in fc_list if 'HH0050_Under_Ground_River_L' in fc][0]
-        river = [fc for fc in fc_list if 'HH0040_River_L' in fc][0]
+        under_ground_river = fc_list.find('HH0050_Under_Ground_River_L')
+        river = fc_list.find('HH0040_River_L')
         connect = True
         convert_type(under_ground_river, None, hydro_convert_ungr_river_min_length, river, None, connect, working_gdb)
         # Increase hydro line length
-        dam = [fc for fc in fc_list if 'HH0010_Dam_L' in fc][0]
-        under_ground_river = [fc for fc in fc_list if 'HH0050_Under_Ground_River_L' in fc][0]
+        dam = fc_list.find('HH0010_Dam_L')
+        under_ground_river = fc_list.find('HH0050_Under_Ground_River_L')
         under_ground_river_lyr = arcpy.management.MakeFeatureLayer(under_ground_river, "under_ground_river_lyr", hydro_enlarge_poly_sql)
         increase_line_length(under_ground_river_lyr, None, increase_hydro_line_min_length, working_gdb)
         increase_line_length(dam, None, increase_hydro_line_min_length, working_gdb)
@@ -1776,21 +1734,21 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
         comp_lines = []
         
         # For river fc
-        river = [fc for fc in fc_list if 'HH0040_River_L' in fc][0]
+        river = fc_list.find('HH0040_River_L')
         arcpy.management.Integrate([river], remove_close_tolerance)
         h_river_l_intg_repare_geom = arcpy.management.RepairGeometry(in_features=river, delete_null=True, validation_method="ESRI")
         remove_close_lines(h_river_l_intg_repare_geom, hydro_remove_small_sql, remove_close_dist, remove_close_parallel_per_min, dangles1, delete, vis_field, check_connect1, connect_angle1, 
                            comp_lines, working_gdb)
         # For irrigation canal fc
-        irrigation = [fc for fc in fc_list if 'HH0190_Irrigation_Canal_L' in fc][0]
+        irrigation = fc_list.find('HH0190_Irrigation_Canal_L')
         arcpy.management.Integrate([irrigation], remove_close_tolerance)
         h_river_l_intg_repare_geom = arcpy.management.RepairGeometry(in_features=irrigation, delete_null=True, validation_method="ESRI")
         remove_close_lines(h_river_l_intg_repare_geom, hydro_remove_small_sql, remove_close_dist, remove_close_parallel_per_max, dangles2, delete, vis_field, check_connect2, connect_angle2, 
                            comp_lines, working_gdb)
         
         # Hydro line dangles
-        compare_fcs = [fc for a_lyr in ['HH0192_Irrigation_Canal_Coverage_A', 'HH0020_Lake_A', 'HH0210_Pond_A', 'HH0042_River_Coverage_A'] for fc in fc_list if str(a_lyr) in fc]
-        hydro_lines_list = [fc for a_lyr in ['HH0190_Irrigation_Canal_L', 'HH0040_River_L'] for fc in fc_list if str(a_lyr) in fc]
+        compare_fcs = fc_list.find_all(['HH0192_Irrigation_Canal_Coverage_A', 'HH0020_Lake_A', 'HH0210_Pond_A', 'HH0042_River_Coverage_A'])
+        hydro_lines_list = fc_list.find_all(['HH0190_Irrigation_Canal_L', 'HH0040_River_L'])
         aoi = f"{in_feature_loc}\\AOI_L"
         compare_fcs.append(aoi)
         recursive = "true"
@@ -1798,9 +1756,9 @@ def gen_hydrography(fc_list, hydro_prep_fc_list, name_fld, line_len, working_gdb
             remove_dangles_lines(working_gdb, hydro_lines, hydro_remove_small_sql, hydro_line_dangle_min_length, compare_fcs, recursive)
         # Hydro small feature to point
         hydro_small_line_fc_list = list(filter(str.strip, hydro_small_line_fc_list))
-        hydro_small_line_fc_list = [fc for a_lyr in hydro_small_line_fc_list for fc in fc_list if str(a_lyr) in fc]
+        hydro_small_line_fc_list = fc_list.find_all(hydro_small_line_fc_list)
         hydro_small_point_fc_list = list(filter(str.strip, hydro_small_point_fc_list))
-        hydro_small_point_fc_list = [fc for a_lyr in hydro_small_point_fc_list for fc in fc_list if str(a_lyr) in fc]
+        hydro_small_point_fc_list = fc_list.find_all(hydro_small_point_fc_list)
 
         sql = None
         for line_fc, point_fc in zip(hydro_small_line_fc_list, hydro_small_point_fc_list):
@@ -3,16 +3,12 @@ import traceback
 import sys
 from common_utils import *
 
-def has_features(fc):
-    with arcpy.da.SearchCursor(fc, ['OID@']) as cursor:
-        return next(cursor, None) is not None
-
 def convert_small_bldg_2_point(fc_list, small_bldg_2_point_a, small_bldg_2_point_p, min_size_bldg, delete_input, one_point, unique_field, working_gdb):
     try:
         small_bldg_2_point_a = list(filter(str.strip, small_bldg_2_point_a))
-        small_bldg_2_point_a = [fc for a_lyr in small_bldg_2_point_a for fc in fc_list if str(a_lyr) in fc]
+        small_bldg_2_point_a = fc_list.find_all(small_bldg_2_point_a)
         small_bldg_2_point_p = list(filter(str.strip, small_bldg_2_point_p))
-        small_bldg_2_point_p = [fc for p_lyr in small_bldg_2_point_p for fc in fc_list if str(p_lyr) in fc]
+        small_bldg_2_point_p = fc_list.find_all(small_bldg_2_point_p)
 
         # Small building to point
         for inFc, point_fc in zip(small_bldg_2_point_a, small_bldg_2_point_p):
@@ -29,7 +25,7 @@ def delete_features_in_poly(features_in_cemetery, poly_fc, poly_size):
     # Set the workspace
     arcpy.env.overwriteOutput = True
     try:
-        desc = arcpy.da.Describe(poly_fc)
+        desc = describe(poly_fc)
         shape_delim = desc['areaFieldName']
         sizeQuery = shape_delim + " <= " + str(poly_size)
         arcpy.AddMessage(f'sizeQuery is: {sizeQuery}')
@@ -55,7 +51,7 @@ def delete_features_in_poly(features_in_cemetery, poly_fc, poly_size):
                 point_count = int(arcpy.management.GetCount("point_lyr").getOutput(0))
                 arcpy.AddMessage(str(point_count))
                 # Determine if pt_fc is a point or polygon feature class
-                desc = arcpy.da.Describe(pt_fc)
+                desc = describe(pt_fc)
                 if desc['shapeType'] == 'Polygon':
                     # Optional code to fil holes in cemetery if topology exists between the two
                     point_count = int(arcpy.management.GetCount("point_lyr").getOutput(0))
@@ -84,12 +80,12 @@ def delete_features_in_poly(features_in_cemetery, poly_fc, poly_size):
 def delete_small_building(fc_list, delete_small_bldgs, del_min_area):
     try:
         delete_small_bldgs = list(filter(str.strip, delete_small_bldgs))
-        delete_small_bldgs = [fc for a_lyr in delete_small_bldgs for fc in fc_list if str(a_lyr) in fc]
+        delete_small_bldgs = fc_list.find_all(delete_small_bldgs)
 
         for polygon_fc in delete_small_bldgs:
             if has_features(polygon_fc):
                 # Create query
-                desc = arcpy.da.Describe(polygon_fc)
+                desc = describe(polygon_fc)
                 fc_name = desc['name']
                 shape_area = desc['areaFieldName']
                 query = f"{shape_area} <= {del_min_area}"
@@ -109,7 +105,7 @@ def simplify_buildings(polygon_fc, distance, working_gdb):
     try:
         field = "BLD_STATUS"
 
-        desc = arcpy.da.Describe(polygon_fc)
+        desc = describe(polygon_fc)
         fc_name = desc['name']
         oid_field = desc['OIDFieldName']
         simple_fc = working_gdb + "\\"+ fc_name + "_Simple"
@@ -162,11 +158,11 @@ def delineate_built_up_area(fc_list, in_buildings_list, edge_features_list, grou
     arcpy.env.referenceScale = delineate_ref_scale
     try:
         in_buildings_list = list(filter(str.strip, in_buildings_list))
-        in_buildings = [fc for a_lyr in in_buildings_list for fc in fc_list if str(a_lyr) in fc]
+        in_buildings = fc_list.find_all(in_buildings_list)
         edge_features_list = list(filter(str.strip, edge_features_list))
-        edge_features = [fc for a_lyr in edge_features_list for fc in fc_list if str(a_lyr) in fc]
+        edge_features = fc_list.find_all(edge_features_list)
         # Town Built Up Fc Layer
-        town_buil_up = [fc for fc in fc_list if 'BJ0073_Town_Built_up_A' in fc][0]
+        town_buil_up = fc_list.find('BJ0073_Town_Built_up_A')
 
         out_feature_class = f"{in_feature_loc}\\town_built_up"
         arcpy.cartography.DelineateBuiltUpAreas(in_buildings, None, edge_features, grouping_distance, minimum_detail_size, out_feature_class, minimum_building_count)
@@ -181,9 +177,9 @@ def generalised_buildings(fc_list):
     try:
         # Set the workspace
         arcpy.env.overwriteOutput = True
-        local_authoruty_cover = [fc for fc in fc_list if 'DA0220_Local_Authority_Area_A' in fc][0]
-        town_buil_up = [fc for fc in fc_list if 'BJ0073_Town_Built_up_A' in fc][0]
-        generalised_building = [fc for fc in fc_list if 'BJ0500_Generalised_Buildings_A' in fc][0]
+        local_authoruty_cover = fc_list.find('DA0220_Local_Authority_Area_A')
+        town_buil_up = fc_list.find('BJ0073_Town_Built_up_A')
+        generalised_building = fc_list.find('BJ0500_Generalised_Buildings_A')
         # Make feature layers
         local_authoruty_cover = arcpy.management.MakeFeatureLayer(local_authoruty_cover, "local_authoruty_cover")
         town_buil_up = arcpy.management.MakeFeatureLayer(town_buil_up, "town_buil_up")
@@ -213,18 +209,18 @@ def gen_buildup(fc_list, small_bldg_2_point_a, small_bldg_2_point_p, min_size_bl
         convert_small_bldg_2_point(fc_list, small_bldg_2_point_a, small_bldg_2_point_p, min_size_bldg, delete_input, one_point, unique_field, working_gdb)
         # Delete buildings in Cemetery
         features_in_cemetery = list(filter(str.strip, features_in_cemetery))
-        features_in_cemetery = [fc for a_lyr in features_in_cemetery for fc in fc_list if str(a_lyr) in fc]
-        cemetery = [fc for fc in fc_list if 'BH0010_Cemetery_A' in fc][0]
+        features_in_cemetery = fc_list.find_all(features_in_cemetery)
+        cemetery = fc_list.find('BH0010_Cemetery_A')
         delete_features_in_poly(features_in_cemetery, cemetery, min_size_bldg2)
         # Enlarge builtup Features (Cemetery)
         enlarge_barrier_fcs = list(filter(str.strip, enlarge_barrier_fcs))
-        enlarge_barrier_fcs = [fc for a_lyr in enlarge_barrier_fcs for fc in fc_list if str(a_lyr) in fc]
+        enlarge_barrier_fcs = fc_list.find_all(enlarge_barrier_fcs)
         enlarge_polygon_barrier(cemetery, None, None, enlarge_min_size, enlarge_val, enlarge_barrier_fcs, working_gdb)
         # Delete small buildings
         delete_small_building(fc_list, delete_small_bldgs, del_min_area)
         # Enlarge small buildings
         enlarge_building_features = list(filter(str.strip, enlarge_building_features))
-        enlarge_building_features = [fc for a_lyr in enlarge_building_features for fc in fc_list if str(a_lyr) in fc]
+        enlarge_building_features = fc_list.find_all(enlarge_building_features)
         #extend_polygon_sides(enlarge_building_features, working_gdb, enlarge_bldg_min_width, enlarge_bldg_min_length, enlarge_bldg_additional_criteria, simplification_tolerance)
         # Simplify buildings
         for polygon_fc in enlarge_building_features:
@@ -235,9 +231,9 @@ def gen_buildup(fc_list, small_bldg_2_point_a, small_bldg_2_point_p, min_size_bl
         # Generalised Buildings
         generalised_buildings(fc_list)
         # Delete small features (Swimming)
-        recreation = [fc for fc in fc_list if 'BG0040_Swimming_Pool_A' in fc][0] ## edited
+        recreation = fc_list.find('BG0040_Swimming_Pool_A') ## edited
         delete_small_features = list(filter(str.strip, delete_small_features))
-        delete_small_features = [fc for a_lyr in delete_small_features for fc in fc_list if str(a_lyr) in fc]
+        delete_small_features = fc_list.find_all(delete_small_features)
         remove_by_converting(recreation, delete_small_features, del_small_recreation_fc_min_size, None, working_gdb)
         # Erase vagetaton
         erase_polygons_by_replace(cemetery, delete_small_features, erase_sql, working_gdb)
@@ -2,6 +2,7 @@ import arcpy
 import traceback
 import sys
 from common_utils import *
+from feature_store import FeatureStore
 
 def lookupSubTypeValue(table, value):
     """
@@ -97,24 +98,17 @@ def multipart_to_singlepart(working_gdb, FC, sql):
     arcpy.env.workspace = "memory"
     try:
         fcName = os.path.basename(FC)
-        outFC = f"{working_gdb}" + "\\" + fcName + "_Explode"
-        arcpy.management.MakeFeatureLayer(FC, "layer", sql)
-
         arcpy.AddMessage("Processing " + fcName)
 
         if has_features(FC):
-            # Run feature to Line on feature class
+            # Explode the features in memory instead of writing them to the working gdb
             arcpy.AddMessage ("   ...Running Multipart to Singlepart")
-            arcpy.management.MultipartToSinglepart(FC, outFC)
-            # Delete features from the input feature class
-            arcpy.AddMessage ("   ...Running Delete Features")
-            arcpy.management.DeleteFeatures(FC)
-            # Add the output of Feature To Line back into the original feature class
-            arcpy.AddMessage ("   ...Running Append")
-            arcpy.management.Append(outFC, FC, "NO_TEST")
-            # Delete temporary output feature class
-            if arcpy.Exists(outFC):
-                arcpy.management.Delete(outFC)
+            store = FeatureStore.from_arcpy(FC)
+            exploded = store.explode()
+            if exploded >= 1:
+                # Write the single part features back to the input feature class
+                arcpy.AddMessage (f"   ...Writing {exploded} exploded features")
+                store.flush(FC)
         else:
             arcpy.AddMessage("Feature class has no features.")
     except Exception as e:
@@ -127,7 +121,7 @@ def multipart_to_singlepart_(working_gdb, FC, sql):
     arcpy.env.overwriteOutput = 1
     arcpy.env.workspace = working_gdb
     try: 
-        desc = arcpy.da.Describe(FC)
+        desc = describe(FC)
         fcName = desc['name']
         outFC = f"{working_gdb}" + "\\" + fcName + "_Explode"
         arcpy.management.MakeFeatureLayer(FC, "layer", sql)
@@ -162,7 +156,7 @@ def feature_to_point(working_db, inFc, sql, min_size, outputFc, deleteInput, one
     arcpy.env.overwriteOutput = True
     try:
         # Use Describe object and get Shape Area field
-        desc = arcpy.da.Describe(inFc)
+        desc = describe(inFc)
         if desc['shapeType'] == 'Polygon':
             size_field  = desc['areaFieldName']
         if desc['shapeType'] == 'Polyline':
@@ -264,7 +258,7 @@ def detect_small_util(working_gdb, primaryFC, secondaryFCs, minimumArea, additio
         arcpy.AddMessage("Scratch : " + str(working_gdb))
 
         # Use Describe object and get Shape Area field
-        desc = arcpy.da.Describe(primaryFC)
+        desc = describe(primaryFC)
         area_field  = desc["areaFieldName"]
         
         selectionCriteria = area_field + " < " + str(minimumArea)
@@ -322,7 +316,7 @@ def detect_small_util(working_gdb, primaryFC, secondaryFCs, minimumArea, additio
 
 def merge_parallel_powerlines(fc_list, Distance, Distance_shorter, merge_fields, update, working_gdb):
     try:
-        powerlineFC = [fc for fc in fc_list if 'UA0010_Powerline_L' in fc][0]
+        powerlineFC = fc_list.find('UA0010_Powerline_L')
        
         # Add and calculate field
         arcpy.management.AddField(powerlineFC, merge_fields, "SHORT", "", "", 10, "", "NULLABLE", "NON_REQUIRED", "")
@@ -352,9 +346,9 @@ def vegetation_under_powerlines(fc_list, utility_compare_features, utility_beffe
     #arcpy.AddMessage("Vegetation under powerlines tool started")
 
     compare_features = list(filter(str.strip, utility_compare_features))
-    compare_features = sorted([fc for a_lyr in compare_features for fc in fc_list if str(a_lyr) in fc])
-    powerlineFC = [fc for fc in fc_list if 'UA0010_Powerline_L' in fc][0]
-    Grass_A = [fc for fc in fc_list if 'VC1110_Grass_A' in fc][0]
+    compare_features = sorted(fc_list.find_all(compare_features))
+    powerlineFC = fc_list.find('UA0010_Powerline_L')
+    Grass_A = fc_list.find('VC1110_Grass_A')
     miscFC = [fc for fc in compare_features if os.path.basename(fc).startswith(("VC"))]
     agricultureFC = [fc for fc in compare_features if os.path.basename(fc).startswith(("VA"))]
     forestFC = [fc for fc in compare_features if os.path.basename(fc).startswith(("VB"))]
@@ -407,9 +401,9 @@ def vegetation_under_powerlines_(fc_list, utility_compare_features, utility_beff
     #arcpy.AddMessage("Vegetation under powerlines tool started")
 
     compare_features = list(filter(str.strip, utility_compare_features))
-    compare_features = sorted([fc for a_lyr in compare_features for fc in fc_list if str(a_lyr) in fc])
-    powerlineFC = [fc for fc in fc_list if 'UA0010_Powerline_L' in fc][0]
-    Grass_A = [fc for fc in fc_list if 'VC1110_Grass_A' in fc][0]
+    compare_features = sorted(fc_list.find_all(compare_features))
+    powerlineFC = fc_list.find('UA0010_Powerline_L')
+    Grass_A = fc_list.find('VC1110_Grass_A')
     miscFC = [fc for fc in compare_features if os.path.basename(fc).startswith(("VC"))]
     agricultureFC = [fc for fc in compare_features if os.path.basename(fc).startswith(("VA"))]
     forestFC = [fc for fc in compare_features if os.path.basename(fc).startswith(("VB"))]
@@ -467,11 +461,11 @@ def building_to_point(fc_list, utility_area_features, utility_point_features, wo
         # Create fc list
         arcpy.env.workspace = working_gdb
         area_features = list(filter(str.strip, utility_area_features))
-        area_features = [fc for a_lyr in area_features for fc in fc_list if str(a_lyr) in fc]
+        area_features = fc_list.find_all(area_features)
         point_features = list(filter(str.strip, utility_point_features))
-        point_features = [fc for a_lyr in point_features for fc in fc_list if str(a_lyr) in fc]
+        point_features = fc_list.find_all(point_features)
         compare_features = list(filter(str.strip, utility_compare_features))
-        compare_features = [fc for a_lyr in compare_features for fc in fc_list if str(a_lyr) in fc]
+        compare_features = fc_list.find_all(compare_features)
 
         for in_fc, output_fc in zip(area_features, point_features):
             if "UA0030_Power_Station_A" in in_fc:
@@ -481,7 +475,7 @@ def building_to_point(fc_list, utility_area_features, utility_point_features, wo
 
         # Loop through utility features and delete small ones
         for feature_name in area_features:
-            desc = arcpy.da.Describe(feature_name)
+            desc = describe(feature_name)
             fc_name = desc["name"]
             area_field = desc['areaFieldName']
             detect_small_util(working_gdb, feature_name, compare_features, utility_min_size, utility_addi_criteria)
@@ -501,8 +495,8 @@ def delete_small_util_sewerage(fc_list, working_gdb, utility_compare_features, u
     try:
         # Get feature classes
         compare_features = list(filter(str.strip, utility_compare_features))
-        secondaryFCs = [fc for a_lyr in compare_features for fc in fc_list if str(a_lyr) in fc]
-        primaryFC = [fc for fc in fc_list if 'UF0010_Sewage_Treatment_Plant_A' in fc][0]
+        secondaryFCs = fc_list.find_all(compare_features)
+        primaryFC = fc_list.find('UF0010_Sewage_Treatment_Plant_A')
         #arcpy.AddMessage(secondaryFCs)
         # Delete small utility
         detect_small_util(working_gdb, primaryFC, secondaryFCs, utility_min_size_sewerage, utility_addi_criteria_sewerage)
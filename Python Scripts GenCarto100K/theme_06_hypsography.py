@@ -24,55 +24,26 @@ def remove_closed_lines(working_db, input_lines, sql, distance, per, dangles, de
         if dangles == 'true':
             mem = f"{scratch}\\dangle"
             arcpy.management.FeatureVerticesToPoints(line_lyr, mem, "DANGLE")
-            values = [str(row[0]) for row in arcpy.da.SearchCursor(mem, ("ORIG_FID"))]
+            values = [row[0] for row in arcpy.da.SearchCursor(mem, ("ORIG_FID"))]
             if arcpy.Exists(mem):
                 arcpy.management.Delete(mem)
             arcpy.management.SelectLayerByAttribute(line_lyr, "CLEAR_SELECTION")
             arcpy.AddMessage(str(len(values)) + "Features have dangles")
             if len(values) >= 1:
-                # Convert list of Target FID values to a SQL statement
-                where = "OBJECTID = "
-                where += " OR OBJECTID = ".join(values)
-                arcpy.management.SelectLayerByAttribute(line_lyr, "New_Selection", where)
+                # Select the lines by the Target FID values
+                select_by_oids(line_lyr, values)
 
         proc_cnt = int(arcpy.management.GetCount(line_lyr)[0])
         arcpy.AddMessage(str(proc_cnt) + " features selected.")
 
         if proc_cnt > 0:
             arcpy.AddMessage(comp_lines)
-            near_dangles = arcpy.analysis.GenerateNearTable(line_lyr, comp_lines, "near_dangles", distance, "NO_LOCATION", "NO_ANGLE", "ALL")
-
-            touching_ids = []
-            near_dict = {}
-            connect_dict = {}
-            connect_ids = []
-            # Get a list of the lines close to other lines...
-            with arcpy.da.SearchCursor(near_dangles, ["IN_FID", "NEAR_FID", "NEAR_DIST"]) as cursor:
-                for row in cursor:
-                    if row[2] > 1:
-                        # If this is the first record for that in_fid value
-                        if row[0] not in touching_ids:
-                            # Add to the touching_ids list and near dictionary
-                            touching_ids.append(row[0])
-                            near_dict[row[0]] = [row[1]]
-                        # If this is not the first record
-                        else:
-                            # Updated the dictionary to add the new near id
-                            cur_list = near_dict[row[0]]
-                            cur_list.append(row[1])
-                            near_dict[row[0]] = cur_list
-                    elif row[2] <= 1:
-                        # If this is the first record for that in_fid value
-                        if row[0] not in connect_ids:
-                            # Add to the touching_ids list and near dictionary
-                            connect_ids.append(row[0])
-                            connect_dict[row[0]] = [row[1]]
-                        # If this is not the first record
-                        else:
-                            # Updated the dictionary to add the new near id
-                            cur_list = connect_dict[row[0]]
-                            cur_list.append(row[1])
-                            connect_dict[row[0]] = cur_list
+            in_fids, near_fids, near_dist = near_pairs(line_lyr, comp_lines, distance, working_db, "near_dangles")
+            # Get a list of the lines close to other lines, lines within 1 meter are connected
+            close = near_dist > 1
+            near_dict = {key: val.tolist() for key, val in spatial_index.group_pairs(in_fids[close], near_fids[close]).items()}
+            connect_dict = {key: val.tolist() for key, val in spatial_index.group_pairs(in_fids[~close], near_fids[~close]).items()}
+            touching_ids = near_dict.keys()
 
             arcpy.AddMessage("Near Cnt " + str(len(touching_ids)))
             arcpy.AddMessage("Getting comparison geometries")
@@ -81,7 +52,7 @@ def remove_closed_lines(working_db, input_lines, sql, distance, per, dangles, de
                 for row in cursor:
                     geo_dict[row[0]] = [row[1], row[2]]
             line_ignore = []
-            length_field = arcpy.da.Describe(input_lines)['lengthFieldName']
+            length_field = describe(input_lines)['lengthFieldName']
             order = "ORDER BY " + length_field
             if delete == 'false':
                 fields = [length_field, "OID@", "shape@", "BEARING", visible_field]
@@ -214,14 +185,14 @@ def thin_cuttings_and_embankments(working_gdb, fc_list, distance, minimum_length
     arcpy.AddMessage(f"{working_gdb}")
     try:
         # Get the feature classes from the workspace
-        embankment_fc = [fc for fc in fc_list if 'RA0080_Embankment_L' in fc][0]
-        cutting_fc = [fc for fc in fc_list if 'RA0070_Cutting_L' in fc][0]
+        embankment_fc = fc_list.find('RA0080_Embankment_L')
+        cutting_fc = fc_list.find('RA0070_Cutting_L')
         # start here of additional lines for 100k from below 100k_TCE
-        cliff_precipitous = [fc for fc in fc_list if 'RA0060_Cliff_Precipitous_L' in fc][0]
+        cliff_precipitous = fc_list.find('RA0060_Cliff_Precipitous_L')
         # end here of additional lines for 100k_TCE
         # add unit to distance
         distance_str =  f"{distance} Meters"
-        fc_name_em = arcpy.da.Describe(embankment_fc)["name"]
+        fc_name_em = describe(embankment_fc)["name"]
         # Simplify the geometry of the feature class and remove closed lines
         embankment_simplified = f"{working_gdb}\\{fc_name_em}_simplified"
         arcpy.cartography.SimplifyLine(embankment_fc, embankment_simplified, "BEND_SIMPLIFY", distance_str, "FLAG_ERRORS", "KEEP_COLLAPSED_POINTS", "NO_CHECK", None, "NO_CHECK")
@@ -229,7 +200,7 @@ def thin_cuttings_and_embankments(working_gdb, fc_list, distance, minimum_length
         # Remove closed lines from the simplified feature class
         remove_closed_lines(working_gdb, embankment_simplified, None, distance, percent_parallel, "false", "true", "", "true", 10, None)
         # Fc name
-        fc_name_cut = arcpy.da.Describe(cutting_fc)["name"]
+        fc_name_cut = describe(cutting_fc)["name"]
         cutting_simplified = f"{working_gdb}\\{fc_name_cut}_simplified"
         arcpy.cartography.SimplifyLine(cutting_fc, cutting_simplified, "BEND_SIMPLIFY", distance_str, "FLAG_ERRORS", "KEEP_COLLAPSED_POINTS", "NO_CHECK", None, "NO_CHECK")
         arcpy.AddMessage(f"Simplified {cutting_fc} to {cutting_simplified}")
@@ -237,7 +208,7 @@ def thin_cuttings_and_embankments(working_gdb, fc_list, distance, minimum_length
         
         # start here of additional lines for 100k from below 100k_TCE
         # cliff_precipitous Fc name
-        fc_name_cut_cliff_precipitous = arcpy.da.Describe(cliff_precipitous)["name"]
+        fc_name_cut_cliff_precipitous = describe(cliff_precipitous)["name"]
         cliff_precipitous_simplified = f"{working_gdb}\\{fc_name_cut_cliff_precipitous}_simplified"
         arcpy.cartography.SimplifyLine(cliff_precipitous, cliff_precipitous_simplified, "BEND_SIMPLIFY", distance_str,
                                        "FLAG_ERRORS", "KEEP_COLLAPSED_POINTS", "NO_CHECK", None, "NO_CHECK")
@@ -251,26 +222,23 @@ def thin_cuttings_and_embankments(working_gdb, fc_list, distance, minimum_length
         arcpy.AddMessage(f"Removed closed lines from {cutting_simplified} comparing to {embankment_simplified}")
 
         # Feature layer creation, feature deleted from main fc and feature append
-        area_field = arcpy.da.Describe(embankment_fc)["lengthFieldName"]
+        area_field = describe(embankment_fc)["lengthFieldName"]
         expression = f"{area_field} > {minimum_length} AND ( INVISIBILITY = 0 OR INVISIBILITY IS NULL )"
         arcpy.AddMessage(f"{area_field}")
         arcpy.AddMessage(f"{minimum_length}")
         arcpy.AddMessage(f"{expression}")
 
 
-        arcpy.AddMessage(f"Deleting features")
+        arcpy.AddMessage(f"Replacing features")
         embankment_lyr = arcpy.management.MakeFeatureLayer(embankment_simplified, 'embankment_lyr', expression)
-        arcpy.management.DeleteFeatures(embankment_fc)
-        arcpy.management.Append(embankment_lyr, embankment_fc, "NO_TEST")
+        replace_features(embankment_fc, embankment_lyr)
 
         cutting_lyr = arcpy.management.MakeFeatureLayer(cutting_simplified, 'cutting_lyr', expression)
-        arcpy.management.DeleteFeatures(cutting_fc)
-        arcpy.management.Append(cutting_lyr, cutting_fc, "NO_TEST")
+        replace_features(cutting_fc, cutting_lyr)
 
         cliff_precipitous_lyr = arcpy.management.MakeFeatureLayer(cliff_precipitous_simplified, 'cliff_precipitous_lyr',
                                                                   expression)
-        arcpy.management.DeleteFeatures(cliff_precipitous)
-        arcpy.management.Append(cliff_precipitous_lyr, cliff_precipitous, "NO_TEST")
+        replace_features(cliff_precipitous, cliff_precipitous_lyr)
         # end here of additional lines for 100k_TCE
 
     except Exception as e:
@@ -284,7 +252,7 @@ def smooth_contours(fc_list, working_gdb, smoothing_tolerance):
     arcpy.env.overwriteOutput = True
 
     try:
-        contour_fc = [fc for fc in fc_list if 'RA0010_Contour_Line_L' in fc][0]
+        contour_fc = fc_list.find('RA0010_Contour_Line_L')
         # Make a feature layer
         layer_name = "contour_line_lyr"
         arcpy.management.MakeFeatureLayer(contour_fc, layer_name)
@@ -293,12 +261,9 @@ def smooth_contours(fc_list, working_gdb, smoothing_tolerance):
         # Smooth line
         arcpy.AddMessage("Smoothing contour lines...")
         arcpy.cartography.SmoothLine(layer_name, smooth_output, "PAEK", smoothing_tolerance, "FIXED_CLOSED_ENDPOINT")
-        # Delete original features
-        arcpy.AddMessage("Deleting original contour features...")
-        arcpy.management.DeleteFeatures(contour_fc)
-        # Append smoothed features back
-        arcpy.AddMessage("Appending smoothed contours back...")
-        arcpy.management.Append(smooth_output, contour_fc, "NO_TEST")
+        # Replace original features with the smoothed features
+        arcpy.AddMessage("Replacing contours with smoothed contours...")
+        replace_features(contour_fc, smooth_output)
         arcpy.AddMessage("Contour smoothing complete.")
 
     except Exception as e:
@@ -310,8 +275,8 @@ def enlarge_hypso_polygons(working_gdb, fc_list, minimum_size_m, minimum_size_m2
     try:
         arcpy.env.overwriteOutput = True
         # Get feature classes
-        mines_fc = [fc for fc in fc_list if 'GD2000_Mine_A' in fc][0]
-        rock_fc = [fc for fc in fc_list if 'GF4100_Rock_Outcrop_A' in fc][0]
+        mines_fc = fc_list.find('GD2000_Mine_A')
+        rock_fc = fc_list.find('GF4100_Rock_Outcrop_A')
         geoscience_fc_list = [fc for fc in fc_list for fcs in ['GD3100_Quarry Pit_A', 'GG2100_Geohazard_Site_A', 'GG2110_Landslide_Site_A', 'GF3100_Mud_Volcano_A']  if fcs in fc]
 
         barrier_fcs = []
@@ -335,8 +300,8 @@ def dissolve_touching_polygons(fc_list, working_gdb, dissolve_field):
     arcpy.env.workspace = working_gdb
     arcpy.env.overwriteOutput = True
     # Get required feature Class
-    mines_fc = [fc for fc in fc_list if 'GD2000_Mine_A' in fc][0]
-    rock_fc = [fc for fc in fc_list if 'GF4100_Rock_Outcrop_A' in fc][0]
+    mines_fc = fc_list.find('GD2000_Mine_A')
+    rock_fc = fc_list.find('GF4100_Rock_Outcrop_A')
     geoscience_fc_list = [fc for fc in fc_list for fcs in ['GD3100_Quarry Pit_A', 'GG2100_Geohazard_Site_A', 'GG2110_Landslide_Site_A', 'GF3100_Mud_Volcano_A']  if fcs in fc]
 
     try:
@@ -360,12 +325,12 @@ def erase_veg_hypso(fc_list, working_gdb, hypso_compare_features, logger):
     arcpy.env.workspace = working_gdb
     arcpy.env.overwriteOutput = True
 
-    mines_fc = [fc for fc in fc_list if 'GD2000_Mine_A' in fc][0]
-    rock_fc = [fc for fc in fc_list if 'GF4100_Rock_Outcrop_A' in fc][0]
+    mines_fc = fc_list.find('GD2000_Mine_A')
+    rock_fc = fc_list.find('GF4100_Rock_Outcrop_A')
     geoscience_fc_list = [fc for fc in fc_list for fcs in ['GD3100_Quarry Pit_A', 'GG2100_Geohazard_Site_A', 'GG2110_Landslide_Site_A', 'GF3100_Mud_Volcano_A']  if fcs in fc]
 
     hypso_compare_features = list(filter(str.strip, hypso_compare_features))
-    hypso_compare_features = [fc for a_lyr in hypso_compare_features for fc in fc_list if str(a_lyr) in fc]
+    hypso_compare_features = fc_list.find_all(hypso_compare_features)
 
     try:
         sql = None
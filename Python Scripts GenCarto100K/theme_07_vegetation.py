@@ -7,19 +7,19 @@ def gen_vegetation(fc_list, vegetation_min_area, vegetation_eliminate_area, veg_
     arcpy.AddMessage('Starting vegetation features generalization.....')
     arcpy.env.overwriteOutput = True
     try:
-        input_fcs=[fc for a_lyr in veg_lyrs_list for fc in fc_list if str(a_lyr) in fc]
+        input_fcs=fc_list.find_all(veg_lyrs_list)
         
         field_cal_expr = [
-            ([fc for fc in input_fcs if 'VA1030_Coconut_A' in fc][0], "VA1030"),
-            ([fc for fc in input_fcs if 'VA1060_Oil_Palm_A' in fc][0], "VA1060"),
-            ([fc for fc in input_fcs if 'VA9010_Sundry_Tree_A' in fc][0], "VA9010"),
-            ([fc for fc in input_fcs if 'VA9020_Sundry_Non_Tree_A' in fc][0], "VA9020"),
-            ([fc for fc in input_fcs if 'VA2060_Paddy_A' in fc][0], "VA2060"),
-            ([fc for fc in input_fcs if 'VA1040_Rubber_Trees_A' in fc][0], "VA1040"),
-            ([fc for fc in input_fcs if 'VB0000_Forest_A' in fc][0], "VB0000"),
-            ([fc for fc in input_fcs if 'VC1110_Grass_A' in fc][0], "VC1110"),
-            ([fc for fc in input_fcs if 'VC1100_Riung_A' in fc][0], "VC1100"),
-            ([fc for fc in input_fcs if 'VC1090_Scrub_Shrub_A' in fc][0], "VC1090")]
+            (fc_list.find('VA1030_Coconut_A'), "VA1030"),
+            (fc_list.find('VA1060_Oil_Palm_A'), "VA1060"),
+            (fc_list.find('VA9010_Sundry_Tree_A'), "VA9010"),
+            (fc_list.find('VA9020_Sundry_Non_Tree_A'), "VA9020"),
+            (fc_list.find('VA2060_Paddy_A'), "VA2060"),
+            (fc_list.find('VA1040_Rubber_Trees_A'), "VA1040"),
+            (fc_list.find('VB0000_Forest_A'), "VB0000"),
+            (fc_list.find('VC1110_Grass_A'), "VC1110"),
+            (fc_list.find('VC1100_Riung_A'), "VC1100"),
+            (fc_list.find('VC1090_Scrub_Shrub_A'), "VC1090")]
 
         # Loop through the list and apply selection + calculation
         for fc, field_val in field_cal_expr:
@@ -100,13 +100,13 @@ def gen_vegetation(fc_list, vegetation_min_area, vegetation_eliminate_area, veg_
                 arcpy.management.CalculateField(in_table=fc, field='Feature_Code', expression=f"'{field_val}'",expression_type="PYTHON3")
 
         # Erase vegetation overlap
-        enlarge_fcs_1 = [fc for a_lyr in ['VC1110_Grass_A', 'VC1100_Riung_A', 'VC1090_Scrub_Shrub_A'] for fc in fc_list if str(a_lyr) in fc]
-        erase_fcs_1 = [fc for a_lyr in ['VA1030_Coconut_A', 'VA1060_Oil_Palm_A', 'VA9010_Sundry_Tree_A',
+        enlarge_fcs_1 = fc_list.find_all(['VC1110_Grass_A', 'VC1100_Riung_A', 'VC1090_Scrub_Shrub_A'])
+        erase_fcs_1 = fc_list.find_all(['VA1030_Coconut_A', 'VA1060_Oil_Palm_A', 'VA9010_Sundry_Tree_A',
                                         'VA9020_Sundry_Non_Tree_A', 'VA2060_Paddy_A', 'VA1040_Rubber_Trees_A', 
-                                        'VB0000_Forest_A'] for fc in fc_list if str(a_lyr) in fc]
-        enlarge_fcs_2 = [fc for a_lyr in ['VA1030_Coconut_A', 'VA1060_Oil_Palm_A', 'VA9010_Sundry_Tree_A',
-                                          'VA9020_Sundry_Non_Tree_A', 'VA2060_Paddy_A'] for fc in fc_list if str(a_lyr) in fc]
-        erase_fcs_2 = [fc for a_lyr in ['VA1040_Rubber_Trees_A', 'VB0000_Forest_A'] for fc in fc_list if str(a_lyr) in fc]
+                                        'VB0000_Forest_A'])
+        enlarge_fcs_2 = fc_list.find_all(['VA1030_Coconut_A', 'VA1060_Oil_Palm_A', 'VA9010_Sundry_Tree_A',
+                                          'VA9020_Sundry_Non_Tree_A', 'VA2060_Paddy_A'])
+        erase_fcs_2 = fc_list.find_all(['VA1040_Rubber_Trees_A', 'VB0000_Forest_A'])
 
         for fc in enlarge_fcs_1:
             erase_polygons_by_replace(fc, erase_fcs_1, None, working_gdb)
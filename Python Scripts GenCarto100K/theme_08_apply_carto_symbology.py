@@ -7,42 +7,21 @@ def timestamp():
     """Return current timestamp as string."""
     return datetime.now()
 
-def has_features(fc):
-    with arcpy.da.SearchCursor(fc, ["OID@"]) as cursor:
-        return next(cursor, None) is not None  # True if at least one feature
-
 def split_at_intersection(input_line, split_lines, working_gdb):
     arcpy.env.overwriteOutput = True
     try:
-        spat_ref = arcpy.da.Describe(input_line)['spatialReference']
+        spat_ref = describe(input_line)['spatialReference']
 
         split_points = []
         for split_line in split_lines:
             # Determine intersections
             arcpy.AddMessage("Determining intersections with " + str(split_line))
-            near = arcpy.analysis.GenerateNearTable(input_line, split_line, f"{working_gdb}\\near", "0 Meters", closest="ALL")
-
-            arcpy.AddMessage(str(int(arcpy.management.GetCount(near)[0])))
-            near_dict = {} 
-            split_oids = []
-            in_oids = []
-            if has_features(near):
-                with arcpy.da.SearchCursor(near, ["IN_FID", "NEAR_FID"]) as cursor:
-                    for row in cursor:
-                        # If this is the first record for that in_fid value
-                        if row[0] not in in_oids:
-                            #add to the touching_ids list and near dictionary
-                            in_oids.append(row[0])
-                            near_dict[row[0]] = [row[1]]
-                            split_oids.append(row[1])
-                        else:
-                            # Updated the dictionary to add the new near id
-                            cur_list = near_dict[row[0]]
-                            cur_list.append(row[1])
-                            near_dict[row[0]] = cur_list
-                            split_oids.append(row[1])
-
-            split_oids = set(split_oids)
+            in_fids, near_fids, _ = near_pairs(input_line, split_line, "0 Meters", working_gdb, "near")
+
+            arcpy.AddMessage(str(len(in_fids)))
+            near_dict = spatial_index.group_pairs(in_fids, near_fids)
+            in_oids = near_dict.keys()
+            split_oids = set(near_fids.tolist())
             if len(in_oids) >= 1:
                 arcpy.AddMessage("Getting intersection points")
                 split_geos = {}
@@ -57,7 +36,7 @@ def split_at_intersection(input_line, split_lines, working_gdb):
                         for row in cursor:
                             if row[0] in in_oids:
                                 near_oid = near_dict[row[0]]
-                                for oid in near_oid:
+                                for oid in near_oid.tolist():
                                     near_geo = split_geos[oid]
                                     pts = row[1].intersect(near_geo, 1)
                                     for pt in pts:
@@ -73,9 +52,6 @@ def split_at_intersection(input_line, split_lines, working_gdb):
             split_lines.append(input_line)
             arcpy.management.Integrate(split_lines)
 
-        if arcpy.Exists(f"{working_gdb}\\near"):
-            arcpy.management.Delete(f"{working_gdb}\\near")
-
     except Exception as e:
         tb = traceback.format_exc()
         error_message = f"Split at intersection error: {e}\nTraceback details:\n{tb}"
@@ -91,20 +67,9 @@ def hide_near_lines_by_count(hide_line, vis_field, distance, test_value, comp_li
         hide_cnt = 0
         near_dict = {}
 
-        close_lines = f"{working_gdb}\\close_lines"
-
-        near = arcpy.analysis.GenerateNearTable(hide_line, comp_lines, close_lines, distance, closest="ALL")
-
-        with arcpy.da.SearchCursor(near, ("IN_FID", "NEAR_RANK")) as cursor:
-            for row in cursor:
-                id_val = row[0]
-                rank = row[1]
-                if id_val not in near_dict:
-                    near_dict[id_val] = rank
-                else:
-                    cur_rank = near_dict[id_val]
-                    if rank > cur_rank:
-                        near_dict[id_val] = rank
+        # The highest NEAR_RANK of a line is the number of lines near it
+        in_fids, _, _ = near_pairs(hide_line, comp_lines, distance, working_gdb, "close_lines")
+        near_dict = spatial_index.pair_counts(in_fids)
 
         for key, value in near_dict.items():
             if value > max_val:
@@ -124,15 +89,13 @@ def hide_near_lines_by_count(hide_line, vis_field, distance, test_value, comp_li
         arcpy.AddMessage("Features to hide count is " + str(hide_cnt))
         arcpy.AddMessage(str(rank_dict))
 
+        higher_list = set(higher_list)
         with arcpy.da.UpdateCursor(hide_line, ('OID@', vis_field)) as cursor:
             for row in cursor:
                 if row[0] in higher_list:
                     row[1] = 1
                     cursor.updateRow(row)
 
-        if arcpy.Exists(close_lines):
-            arcpy.management.Delete(close_lines)
-
     except Exception as e:
         tb = traceback.format_exc()
         error_message = f"Hide near lines by count error: {e}\nTraceback details:\n{tb}"
@@ -140,7 +103,7 @@ def hide_near_lines_by_count(hide_line, vis_field, distance, test_value, comp_li
 
 def add_layers(fc_list, map_name):
     try:
-        aprx = arcpy.mp.ArcGISProject('CURRENT')
+        aprx = get_project()
         maps = aprx.listMaps(map_name)[0]
         for fc in fc_list:
             if has_features(fc):
@@ -156,12 +119,12 @@ def apply_attribution(fc_list, attribution_fc_list, express_list, query_list, fi
     try:
         # Get feature list
         attribution_fc_list = list(filter(str.strip, attribution_fc_list))
-        attribution_fc_list = [fc for attr_lyr in attribution_fc_list for fc in fc_list if str(attr_lyr) in fc]
+        attribution_fc_list = fc_list.find_all(attribution_fc_list)
         # Remove unneccesary character
         query_list = list(filter(str.strip, query_list))
         field_list = list(filter(str.strip, field_list))
         for attr_fc, express, query, field in zip(attribution_fc_list, express_list, query_list, field_list):
-            fc_name = arcpy.da.Describe(attr_fc)['name']
+            fc_name = describe(attr_fc)['name']
             if(query):
                 fcfields = [f.name for f in arcpy.ListFields(attr_fc)]
                 if ' ' in field.strip():
@@ -169,14 +132,14 @@ def apply_attribution(fc_list, attribution_fc_list, express_list, query_list, fi
                     if len(multiple_fields) > 1:
                         for fld in multiple_fields:
                             if fld not in fcfields:
-                                arcpy.AddField_management(
+                                arcpy.management.AddField(
                                     in_table=attr_fc,
                                     field_name=fld,
                                     field_type='SHORT'
                                 )
                 else:
                     if field not in fcfields:
-                        arcpy.AddField_management(
+                        arcpy.management.AddField(
                             in_table=attr_fc,
                             field_name=field,
                             field_type='SHORT'
@@ -197,9 +160,9 @@ def apply_attribution(fc_list, attribution_fc_list, express_list, query_list, fi
 def embankment_cutting(fc_list, intersecting_fc_list, working_gdb):
     try:
         intersecting_fc_list = list(filter(str.strip, intersecting_fc_list))
-        intersecting_fc_list = [fc for intersect_fc in intersecting_fc_list for fc in fc_list if str(intersect_fc) in fc]
-        cutting = [fc for fc in fc_list if 'RA0070_Cutting_L' in fc][0]
-        embankment = [fc for fc in fc_list if 'RA0080_Embankment_L' in fc][0]
+        intersecting_fc_list = fc_list.find_all(intersecting_fc_list)
+        cutting = fc_list.find('RA0070_Cutting_L')
+        embankment = fc_list.find('RA0080_Embankment_L')
         split_at_intersection(cutting, intersecting_fc_list, working_gdb)
         split_at_intersection(embankment, intersecting_fc_list, working_gdb)
 
@@ -208,16 +171,30 @@ def embankment_cutting(fc_list, intersecting_fc_list, working_gdb):
         error_message = f"Embankment Cutting error: {e}\nTraceback details:\n{tb}"
         arcpy.AddMessage(error_message)
 
+def thin_points_by_spacing(fc_list, thin_point_fcs, thin_point_queries, thin_point_fields, thin_point_orders, thin_point_spacings, ref_scale, visible_field):
+    try:
+        arcpy.AddMessage('Thinning dense point layers.....')
+        for thin_fc, query, field, order, spacing in zip(thin_point_fcs, thin_point_queries, thin_point_fields, thin_point_orders, thin_point_spacings):
+            thin_fc = str(thin_fc).strip()
+            if not thin_fc or not fc_list.matches(thin_fc) or spacing in ('', None):
+                continue
+            thin_point_layer(fc_list.find(thin_fc), spacing, ref_scale, str(field).strip(), str(order).strip(), str(query).strip(), visible_field)
+
+    except Exception as e:
+        tb = traceback.format_exc()
+        error_message = f"Thin points by spacing error: {e}\nTraceback details:\n{tb}"
+        arcpy.AddMessage(error_message)
+
 def prep_4_line_resolve(fc_list, query, visible_field, distance, mx_no_close_fcs_l, mx_no_close_fcs_m, mx_no_close_fcs_u, prep_line_resolve_fcs_list, working_gdb):
     try:
         prep_line_resolve_fcs_list = list(filter(str.strip, prep_line_resolve_fcs_list))
-        prep_line_resolve_fcs_list = [fc for prep_line in prep_line_resolve_fcs_list for fc in fc_list if str(prep_line) in fc]
+        prep_line_resolve_fcs_list = fc_list.find_all(prep_line_resolve_fcs_list)
         # Required feature class
-        generalised_bldg = [fc for fc in fc_list if 'BJ0500_Generalised_Buildings_A' in fc][0]
-        town_built_up = [fc for fc in fc_list if 'BJ0073_Town_Built_up_A' in fc][0]
-        cutting = [fc for fc in fc_list if 'RA0070_Cutting_L' in fc][0]
+        generalised_bldg = fc_list.find('BJ0500_Generalised_Buildings_A')
+        town_built_up = fc_list.find('BJ0073_Town_Built_up_A')
+        cutting = fc_list.find('RA0070_Cutting_L')
         feature_layer_cutting = arcpy.management.MakeFeatureLayer(cutting, "cutting_layer")
-        embankment = [fc for fc in fc_list if 'RA0080_Embankment_L' in fc][0]
+        embankment = fc_list.find('RA0080_Embankment_L')
 
         feature_layer_embankment = arcpy.management.MakeFeatureLayer(embankment, "embankment_layer")
         sel_generalised_bldg_em = arcpy.management.SelectLayerByLocation(feature_layer_embankment, "WITHIN", generalised_bldg, "", "NEW_SELECTION")
@@ -233,9 +210,9 @@ def prep_4_line_resolve(fc_list, query, visible_field, distance, mx_no_close_fcs
         compare_layers = []
         for in_features in prep_line_resolve_fcs_list:
             if has_features(in_features):
-                fc_name = arcpy.da.Describe(in_features)['name']
+                fc_name = describe(in_features)['name']
                 if "TA0060_Road_L" in in_features:
-                    desc = arcpy.da.Describe(in_features)
+                    desc = describe(in_features)
                     oid_fld_name = desc["OIDFieldName"]
                     feature_layer = arcpy.management.MakeFeatureLayer(in_features, f"feature_layer_{fc_name}", query)
                     compare_layers.append(feature_layer)
@@ -250,14 +227,14 @@ def prep_4_line_resolve(fc_list, query, visible_field, distance, mx_no_close_fcs
                     arcpy.management.RepairGeometry(append_layer)
 
                 elif "TA0110_Track_L" in in_features:
-                    desc = arcpy.da.Describe(in_features)
+                    desc = describe(in_features)
                     oid_fld_name = desc["OIDFieldName"]
                     feature_layer = arcpy.management.MakeFeatureLayer(in_features, f"feature_layer_{fc_name}", query)
                     compare_layers.append(feature_layer)
                     # Unsplit line
                     track_unsplit = arcpy.management.UnsplitLine(in_features, f"memory\\track_unsplit", ['NAM'], [['OBJECTID', 'FIRST']])
                     # Join field
-                    fields_list_selected_fcs = [field.name for field in (arcpy.da.Describe(in_features))['fields'] if field.name not in ['not_required_flds']]
+                    fields_list_selected_fcs = [field.name for field in (describe(in_features))['fields'] if field.name not in ['not_required_flds']]
                     joined_layer = arcpy.management.JoinField(track_unsplit, 'FIRST_OBJECTID', in_features, oid_fld_name, fields_list_selected_fcs)
                     # Delete features
                     arcpy.management.DeleteFeatures(feature_layer)
@@ -265,14 +242,14 @@ def prep_4_line_resolve(fc_list, query, visible_field, distance, mx_no_close_fcs
                     arcpy.management.RepairGeometry(append_layer)
 
                 elif "HH0190_Irrigation_Canal_L" in in_features:
-                    desc = arcpy.da.Describe(in_features)
+                    desc = describe(in_features)
                     oid_fld_name = desc["OIDFieldName"]
                     feature_layer = arcpy.management.MakeFeatureLayer(in_features, f"feature_layer_{fc_name}", query)
                     compare_layers.append(feature_layer)
                     # Unsplit line
                     irrigation_unsplit = arcpy.management.UnsplitLine(in_features, f"memory\\irrigation_unsplit", ['NAM'], [['OBJECTID', 'FIRST']])
                     # Join field
-                    fields_list_selected_fcs = [field.name for field in (arcpy.da.Describe(in_features))['fields'] if field.name not in ['not_required_flds']]
+                    fields_list_selected_fcs = [field.name for field in (describe(in_features))['fields'] if field.name not in ['not_required_flds']]
                     joined_layer = arcpy.management.JoinField(irrigation_unsplit, 'FIRST_OBJECTID', in_features, oid_fld_name, fields_list_selected_fcs)
                     # Delete features
                     arcpy.management.DeleteFeatures(feature_layer)
@@ -319,7 +296,7 @@ def split_explode_lines_100k(fc_list,apply_symbology_layers_list,working_gdb):
     try:
         
         apply_symbology_fc_name = list(filter(str.strip, apply_symbology_layers_list))
-        apply_symbology_fc_list = [fc for sym_app_lyr in apply_symbology_fc_name for fc in fc_list if str(sym_app_lyr) in fc]
+        apply_symbology_fc_list = fc_list.find_all(apply_symbology_fc_name)
         # Set environment variables
         arcpy.env.overwriteOutput = True
         scratch = working_gdb
@@ -428,10 +405,10 @@ def calc_vst_on_workspace(fc_list, symbology_file_path, apply_symbology_layers_l
         # add_layers(fc_list, map_name)
         # Get feature list
         apply_symbology_fc_name = list(filter(str.strip, apply_symbology_layers_list))
-        apply_symbology_fc_list = [fc for sym_app_lyr in apply_symbology_fc_name for fc in fc_list if str(sym_app_lyr) in fc]
+        apply_symbology_fc_list = fc_list.find_all(apply_symbology_fc_name)
         apply_symbology_fc_list.append(f"{feature_loc}\\AOI")
         # Calculate VST
-        aprx = arcpy.mp.ArcGISProject('CURRENT')
+        aprx = get_project()
         maps = aprx.listMaps(map_name)[0]
         lyrx = [os.path.basename(k)[:-5] for k in glob.glob(os.path.join(symbology_file_path + "\*.lyrx"))]
 
@@ -452,7 +429,8 @@ def calc_vst_on_workspace(fc_list, symbology_file_path, apply_symbology_layers_l
 
 def apply_carto_symbology(fc_list, attribution_fc_list, express_list, query_list, field_list, intersecting_fc_list, working_gdb, query, visible_field, distance, mx_no_close_fcs_l, 
                           mx_no_close_fcs_m, mx_no_close_fcs_u, feature_loc, feature_count, vst_workspace, specification, hierarchy_file, hierarchy_fld_name, prep_line_resolve_fcs_list, 
-                          carto_partition, symbology_file_path, map_name, apply_symbology_layers_list, logger):
+                          carto_partition, symbology_file_path, map_name, apply_symbology_layers_list, thin_point_fcs, thin_point_queries, thin_point_fields, thin_point_orders, 
+                          thin_point_spacings, ref_scale, logger):
     arcpy.AddMessage('Starting carto symbolisation application .....')
     # Set the workspace
     arcpy.env.overwriteOutput = True
@@ -463,6 +441,8 @@ def apply_carto_symbology(fc_list, attribution_fc_list, express_list, query_list
         embankment_cutting(fc_list, intersecting_fc_list, working_gdb)
         # Prep for line resolve
         prep_4_line_resolve(fc_list, query, visible_field, distance, mx_no_close_fcs_l, mx_no_close_fcs_m, mx_no_close_fcs_u, prep_line_resolve_fcs_list, working_gdb)
+        # Thin dense point layers
+        thin_points_by_spacing(fc_list, thin_point_fcs, thin_point_queries, thin_point_fields, thin_point_orders, thin_point_spacings, ref_scale, visible_field)
         # Start Additional 100k
         # Split and Explode lines
         split_explode_lines_100k(fc_list, apply_symbology_layers_list, working_gdb)
@@ -2,6 +2,7 @@ import arcpy
 import traceback
 import sys
 from common_utils import *
+import offset_points
 
 def merge_explode(poly_layer, field, working_gdb):
     try:
@@ -122,6 +123,52 @@ def offset_xy(pnt_data, line_data, orient_fld, offset_dist, perpendicular, worki
         error_message = f"offset_xy error: {e}\nTraceback details:\n{tb}"
         arcpy.AddMessage(error_message)
 
+def offset_xy_batch(pnt_data, line_data, road_query, offset_dists, orient_fld, perpendicular):
+    """ offset_xy for all the points at once. The roads are split into segments once,
+    the segment under each point is found through the spatial index and the offsets
+    are written in a single update cursor pass. Each road query has its own offset
+    distance, a road matching more than one query takes the distance of the last one """
+    # Environment variables
+    arcpy.env.overwriteOutput = 1
+    # Offset fields
+    x_offset_fld = "OFFSETX"
+    y_offset_fld = "OFFSETY"
+
+    try:
+        # Offset distance of every road
+        road_dists = {}
+        for query, dist in zip(road_query, offset_dists):
+            for row in arcpy.da.SearchCursor(line_data, ['OID@'], query):
+                road_dists[row[0]] = float(dist)
+
+        # Split roads into segments at vertices
+        road_store = FeatureStore.from_arcpy(line_data, [])
+        rows = np.fromiter((road_store.row(oid) for oid in road_dists), dtype=np.int64)
+        seg_start, seg_end, seg_rows = offset_points.line_segments(road_store, rows)
+        seg_dists = np.array([road_dists[oid] for oid in road_store.oids[seg_rows].tolist()])
+
+        pnt_arr = arcpy.da.FeatureClassToNumPyArray(pnt_data, ['OID@', 'SHAPE@X', 'SHAPE@Y'])
+        points = np.column_stack([pnt_arr['SHAPE@X'], pnt_arr['SHAPE@Y']])
+        nearest, x_offset, y_offset, angle = offset_points.point_offsets(points, seg_start, seg_end, seg_dists,
+                                                                         perpendicular == 'TRUE', xy_tolerance(line_data))
+        offsets = {oid: (x, y, a) for oid, seg, x, y, a in zip(pnt_arr['OID@'].tolist(), nearest.tolist(),
+                                                                x_offset.tolist(), y_offset.tolist(), angle.tolist()) if seg >= 0}
+
+        arcpy.AddMessage(f"Offsetting {len(offsets)} of {len(pnt_arr)} points")
+        # Update fields with calculated x and y offset values
+        with arcpy.da.UpdateCursor(pnt_data, ["OID@", x_offset_fld, y_offset_fld, orient_fld]) as cur:
+            for row in cur:
+                if row[0] in offsets:
+                    row[1], row[2], row[3] = offsets[row[0]]
+                    cur.updateRow(row)
+                else:
+                    arcpy.AddWarning("No intersection at Point: " + str(row[0]))
+
+    except Exception as e:
+        tb = traceback.format_exc()
+        error_message = f"offset_xy error: {e}\nTraceback details:\n{tb}"
+        arcpy.AddMessage(error_message)
+
 def explode_remove_dissolve(polygon_fc, min_area, working_gdb):
     try:
         # Define environment variables
@@ -133,7 +180,7 @@ def explode_remove_dissolve(polygon_fc, min_area, working_gdb):
 
         # --- determine query for selecting features ---
         # Find area field
-        desc = arcpy.da.Describe(polygon_fc)
+        desc = describe(polygon_fc)
         area_field = desc['areaFieldName']
         # Query for features smaller than minimum size
         small_query = f"{area_field} < {min_area}"
@@ -208,7 +255,7 @@ def trim_line_within_distance(input_line, visible_field, distance, min_length, r
         where = (visible_field + " = 0 OR " + visible_field + " IS NULL")
         line_layer = arcpy.management.MakeFeatureLayer(input_line, "line_lyr", where)
         clean_list.append("line_lyr")
-        desc = arcpy.da.Describe(input_line)
+        desc = describe(input_line)
         spat_ref = desc['spatialReference']
         fc_name = desc['name']
         arcpy.management.RepairGeometry(input_line)
@@ -219,7 +266,7 @@ def trim_line_within_distance(input_line, visible_field, distance, min_length, r
 
         conflict_areas = []
         for compare in compare_features:
-            desc = arcpy.da.Describe(str(compare))
+            desc = describe(str(compare))
             comp_name = desc['name']
             arcpy.AddMessage("Finding conflicts with " + comp_name)
             comp_lyr = arcpy.management.MakeFeatureLayer(compare, "comp_lyr", where)
@@ -315,9 +362,9 @@ def offset_kilometer_post(fc_list, road_query, orient_fld, offset_dist_l, offset
         # Set Environment
         arcpy.env.overwriteOutput = 1
         # Get feature classes
-        road = [fc for fc in fc_list if 'TA0060_Road_L' in fc][0]
+        road = fc_list.find('TA0060_Road_L')
         feature_layer_rd = arcpy.management.MakeFeatureLayer(road, "feature_layer_rd")
-        kilometer_post = [fc for fc in fc_list if 'TA0180_Kilometer_Post_P' in fc][0]
+        kilometer_post = fc_list.find('TA0180_Kilometer_Post_P')
         feature_layer_kilo = arcpy.management.MakeFeatureLayer(kilometer_post, "feature_layer_kilo")
         single_carriage_hwy = arcpy.management.SelectLayerByAttribute(feature_layer_rd, "NEW_SELECTION", road_query[0])
         single_carriage_road = arcpy.management.SelectLayerByAttribute(feature_layer_rd, "NEW_SELECTION", road_query[1])
@@ -326,6 +373,12 @@ def offset_kilometer_post(fc_list, road_query, orient_fld, offset_dist_l, offset
         # Snapping kilometer post feature
         snap_env = [feature_layer_rd, "EDGE", 35]
         arcpy.edit.Snap(feature_layer_rd, [snap_env])
+        if spatial_index.has_spatial_index():
+            # Calculation orient degree
+            arcpy.management.SelectLayerByAttribute(feature_layer_rd, "CLEAR_SELECTION")
+            offset_xy_batch(feature_layer_kilo, feature_layer_rd, road_query[:4], [offset_dist_l, offset_dist_l, offset_dist_l, offset_dist_u],
+                            orient_fld, perpendicular)
+            return
         # Select by location
         sel_single_carriage_hwy = arcpy.management.SelectLayerByLocation(feature_layer_kilo, "INTERSECT", single_carriage_hwy, "", "NEW_SELECTION")
         sel_single_carriage_road = arcpy.management.SelectLayerByLocation(feature_layer_kilo, "INTERSECT", single_carriage_road, "", "NEW_SELECTION")
@@ -347,9 +400,9 @@ def offset_benckmark(fc_list, road_query, bench_query, orient_fld, offset_dist_l
         # Set Environment
         arcpy.env.overwriteOutput = 1
         # Get feature classes
-        road = [fc for fc in fc_list if 'TA0060_Road_L' in fc][0]
+        road = fc_list.find('TA0060_Road_L')
         feature_layer_rd = arcpy.management.MakeFeatureLayer(road, "feature_layer_rd")
-        height_point = [fc for fc in fc_list if 'ZA0050_Height_Point_P' in fc][0]
+        height_point = fc_list.find('ZA0050_Height_Point_P')
         feature_layer_hp = arcpy.management.MakeFeatureLayer(height_point, "feature_layer_kilo", bench_query)
         single_carriage_hwy = arcpy.management.SelectLayerByAttribute(feature_layer_rd, "NEW_SELECTION", road_query[0])
         single_carriage_road = arcpy.management.SelectLayerByAttribute(feature_layer_rd, "NEW_SELECTION", road_query[1])
@@ -358,6 +411,12 @@ def offset_benckmark(fc_list, road_query, bench_query, orient_fld, offset_dist_l
         # Snapping kilometer post feature
         snap_env = [feature_layer_rd, "EDGE", 50]
         arcpy.edit.Snap(feature_layer_rd, [snap_env])
+        if spatial_index.has_spatial_index():
+            # Calculation orient degree
+            arcpy.management.SelectLayerByAttribute(feature_layer_rd, "CLEAR_SELECTION")
+            offset_xy_batch(feature_layer_hp, feature_layer_rd, road_query[:4], [offset_dist_l, offset_dist_l, offset_dist_u, offset_dist_u],
+                            orient_fld, perpendicular)
+            return
         # Select by location
         sel_single_carriage_hwy = arcpy.management.SelectLayerByLocation(feature_layer_hp, "INTERSECT", single_carriage_hwy, "", "NEW_SELECTION")
         sel_single_carriage_road = arcpy.management.SelectLayerByLocation(feature_layer_hp, "INTERSECT", single_carriage_road, "", "NEW_SELECTION")
@@ -385,27 +444,27 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
         arcpy.env.overwriteOutput = 1
         # Get feature classes
         input_line_layers = list(filter(str.strip, input_line_layers))
-        input_line_layers = [fc for line_lyr in input_line_layers for fc in fc_list if str(line_lyr) in fc]
+        input_line_layers = fc_list.find_all(input_line_layers)
 
         # Line features
-        river = [fc for fc in fc_list if 'HH0040_River_L' in fc][0]
-        irrigation_canal = [fc for fc in fc_list if 'HH0190_Irrigation_Canal_L' in fc][0]
+        river = fc_list.find('HH0040_River_L')
+        irrigation_canal = fc_list.find('HH0190_Irrigation_Canal_L')
         # Polygon features
-        lake = [fc for fc in fc_list if 'HH0020_Lake_A' in fc][0]
-        pond = [fc for fc in fc_list if 'HH0210_Pond_A' in fc][0]
-        irrigation_cov = [fc for fc in fc_list if 'HH0192_Irrigation_Canal_Coverage_A' in fc][0]
+        lake = fc_list.find('HH0020_Lake_A')
+        pond = fc_list.find('HH0210_Pond_A')
+        irrigation_cov = fc_list.find('HH0192_Irrigation_Canal_Coverage_A')
         # Set the symbology for the line layers
         layerx_path = symbology_file_path
         # Set object variable
         for l_lyr in input_line_layers:
             if "HH0040_River_L" in l_lyr:
-                fc_name = arcpy.da.Describe(l_lyr)["name"]
+                fc_name = describe(l_lyr)["name"]
                 feature_layer = arcpy.management.MakeFeatureLayer(l_lyr, f"{fc_name}", river_ex)
                 basename = os.path.basename(l_lyr)
                 apply_symbology(l_lyr, hierarchy_field, layerx_path, map_name, basename)
 
             elif "TA0060_Road_L" in l_lyr:
-                fc_name = arcpy.da.Describe(l_lyr)["name"]
+                fc_name = describe(l_lyr)["name"]
                 feature_layer = arcpy.management.MakeFeatureLayer(l_lyr, f"{fc_name}", ln_lyr_ex)
                 selected_road_fc = arcpy.management.SelectLayerByAttribute(feature_layer, "NEW_SELECTION", road_query_rlc)
                 flag_loops(selected_road_fc, working_gdb, hierarchy_field)
@@ -414,14 +473,14 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
                 apply_symbology(l_lyr, hierarchy_field, layerx_path, map_name, basename)
         
             elif "TA0110_Track_L" in l_lyr:
-                fc_name = arcpy.da.Describe(l_lyr)["name"]
+                fc_name = describe(l_lyr)["name"]
                 flag_loops(l_lyr, working_gdb, hierarchy_field)
                 feature_layer = arcpy.management.MakeFeatureLayer(l_lyr, f"{fc_name}", ln_lyr_ex)
                 basename = os.path.basename(l_lyr)
                 apply_symbology(l_lyr, hierarchy_field, layerx_path, map_name, basename)
 
             else:
-                fc_name = arcpy.da.Describe(l_lyr)["name"]
+                fc_name = describe(l_lyr)["name"]
                 feature_layer = arcpy.management.MakeFeatureLayer(l_lyr, f"{fc_name}", ln_lyr_ex)
                 basename = os.path.basename(l_lyr)
                 apply_symbology(l_lyr, hierarchy_field, layerx_path, map_name, basename)
@@ -431,7 +490,7 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
         arcpy.env.referenceScale = ref_scale
         arcpy.env.cartographicPartitions = cartopartion
         # Get the map layers
-        aprx = arcpy.mp.ArcGISProject('CURRENT')
+        aprx = get_project()
         maps = aprx.listMaps(map_name)[0]
         # Get the feature layer
         fc_layers = maps.listLayers()
@@ -443,11 +502,11 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
 
         # Determine and reconnect for line features
         arcpy.AddMessage("Determining and reconnecting line features")
-        part_01_lk = (arcpy.da.Describe(lake)['name']).split("_")[1]
-        part_01_pnd = (arcpy.da.Describe(pond)['name']).split("_")[1]
-        part_01_ic = (arcpy.da.Describe(irrigation_cov)['name']).split("_")[1]
-        part_02_r = (arcpy.da.Describe(river)['name']).split("_")[1]
-        part_02_icnl = (arcpy.da.Describe(irrigation_canal)['name']).split("_")[1]
+        part_01_lk = (describe(lake)['name']).split("_")[1]
+        part_01_pnd = (describe(pond)['name']).split("_")[1]
+        part_01_ic = (describe(irrigation_cov)['name']).split("_")[1]
+        part_02_r = (describe(river)['name']).split("_")[1]
+        part_02_icnl = (describe(irrigation_canal)['name']).split("_")[1]
 
         out_name_1 = f"{part_01_lk}_{part_02_r}_rlc"
         out_name_2 = f"{part_02_icnl}_{part_01_lk}_rlc"
@@ -495,11 +554,11 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
             # Create the table for storing information about touching features
             arcpy.management.CreateTable(working_gdb, out_name_6)
 
-        line_field_river = "FID_" + arcpy.da.Describe(river)['name']
-        line_field_canal = "FID_" + arcpy.da.Describe(irrigation_canal)['name']
-        poly_field_lake = "FID_" + arcpy.da.Describe(lake)['name']
-        poly_field_pond = "FID_" + arcpy.da.Describe(pond)['name']
-        poly_field_irri_cov = "FID_" + arcpy.da.Describe(irrigation_cov)['name']
+        line_field_river = "FID_" + describe(river)['name']
+        line_field_canal = "FID_" + describe(irrigation_canal)['name']
+        poly_field_lake = "FID_" + describe(lake)['name']
+        poly_field_pond = "FID_" + describe(pond)['name']
+        poly_field_irri_cov = "FID_" + describe(irrigation_cov)['name']
  
         # Run the determine function
         determine(river, lake, out_table1, line_field_river, poly_field_lake, working_gdb)
@@ -517,41 +576,41 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
 
         ## Recreate boundary
         edge_features = list(filter(str.strip, edge_features))
-        edge_features = [fc for edge_lyr in edge_features for fc in fc_list if str(edge_lyr) in fc]
-        irrigation_canal_edge = [fc for fc in fc_list if 'HH0191_Irrigation_Canal_Edge_L' in fc][0]
-        river_bank = [fc for fc in fc_list if 'HH0041_River_Bank_L' in fc][0]
-        river_cov = [fc for fc in fc_list if 'HH0042_River_Coverage_A' in fc][0]
+        edge_features = fc_list.find_all(edge_features)
+        irrigation_canal_edge = fc_list.find('HH0191_Irrigation_Canal_Edge_L')
+        river_bank = fc_list.find('HH0041_River_Bank_L')
+        river_cov = fc_list.find('HH0042_River_Coverage_A')
         # Recreate boundary lines
         recreate_boundary_lines(irrigation_canal_edge, irrigation_cov, edge_features)
         recreate_boundary_lines(river_bank, river_cov, edge_features)
         # Propagate displacement
         footprint_fcs = list(filter(str.strip, footprint_fcs))
-        footprint_fcs = [fc for ft_lyr in footprint_fcs for fc in fc_list if str(ft_lyr) in fc]
+        footprint_fcs = fc_list.find_all(footprint_fcs)
         arcpy.env.referenceScale = ref_scale
         for footprint in footprint_fcs:
             arcpy.cartography.PropagateDisplacement(footprint, f"{feature_loc_path}\\displace", "AUTO")
         #--- Resolve conflict for lakes and ponds ---#
         # Get feature classes
         compare_fcs = list(filter(str.strip, resolve_line_compare))
-        compare_fcs = [fc for com_lyr in compare_fcs for fc in fc_list if str(com_lyr) in fc]
+        compare_fcs = fc_list.find_all(compare_fcs)
 
         # Polygon features
-        lake = [fc for fc in fc_list if 'HH0020_Lake_A' in fc][0]
-        pond = [fc for fc in fc_list if 'HH0210_Pond_A' in fc][0]
+        lake = fc_list.find('HH0020_Lake_A')
+        pond = fc_list.find('HH0210_Pond_A')
 
-        road = [fc for fc in fc_list if 'TA0060_Road_L' in fc][0]
+        road = fc_list.find('TA0060_Road_L')
         feature_layer_rd = arcpy.management.MakeFeatureLayer(road, "feature_layer_rd", ln_lyr_ex)
-        track = [fc for fc in fc_list if 'TA0110_Track_L' in fc][0]
+        track = fc_list.find('TA0110_Track_L')
         feature_layer_tr = arcpy.management.MakeFeatureLayer(track, "feature_layer_tr", ln_lyr_ex)
-        railway = [fc for fc in fc_list if 'TA0010_Rail_Line_L' in fc][0]
+        railway = fc_list.find('TA0010_Rail_Line_L')
         feature_layer_rail = arcpy.management.MakeFeatureLayer(railway, "feature_layer_rail", ln_lyr_ex)
 
         # Determine and reconnect for lakes and ponds
         arcpy.AddMessage("Determining and reconnecting lakes and ponds")
-        part_01_lk = (arcpy.da.Describe(lake)['name']).split("_")[1]
-        part_01_pnd = (arcpy.da.Describe(pond)['name']).split("_")[1]
-        part_02_r = (arcpy.da.Describe(river)['name']).split("_")[1]
-        part_02_icnl = (arcpy.da.Describe(irrigation_canal)['name']).split("_")[1]
+        part_01_lk = (describe(lake)['name']).split("_")[1]
+        part_01_pnd = (describe(pond)['name']).split("_")[1]
+        part_02_r = (describe(river)['name']).split("_")[1]
+        part_02_icnl = (describe(irrigation_canal)['name']).split("_")[1]
 
         out_name_1 = f"{part_01_pnd}_{part_02_r}_rlc"
         out_name_2 = f"{part_01_pnd}_{part_02_icnl}_rlc"
@@ -585,10 +644,10 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
             # Create the table for storing information about touching features
             arcpy.management.CreateTable(working_gdb, out_name_4)
         # Required fields creation
-        line_field_river = "FID_" + arcpy.da.Describe(river)['name']
-        line_field_canal = "FID_" + arcpy.da.Describe(irrigation_canal)['name']
-        poly_field_lake = "FID_" + arcpy.da.Describe(lake)['name']
-        poly_field_pond = "FID_" + arcpy.da.Describe(pond)['name']
+        line_field_river = "FID_" + describe(river)['name']
+        line_field_canal = "FID_" + describe(irrigation_canal)['name']
+        poly_field_lake = "FID_" + describe(lake)['name']
+        poly_field_pond = "FID_" + describe(pond)['name']
         # Delete boolean
         delete = False
         # Run the determine function
@@ -620,9 +679,9 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
         remove_by_converting(pond_track, compare_fcs, minimumArea, additionalCriteria, working_gdb)
         # Reduce embankment conflict
         embank_list = list(filter(str.strip, embank_list))
-        embank_list = [fc for embn_lyr in embank_list for fc in fc_list if str(embn_lyr) in fc]
+        embank_list = fc_list.find_all(embank_list)
         compare_fcs_embank = list(filter(str.strip, compare_fcs_embank))
-        compare_fcs_embank = [fc for emb_lyr in compare_fcs_embank for fc in fc_list if str(emb_lyr) in fc]
+        compare_fcs_embank = fc_list.find_all(compare_fcs_embank)
         for embn_fc in embank_list:
             trim_line_within_distance(embn_fc, visible_field, distance, min_length, ref_scale, erase_y, compare_fcs_embank, working_gdb)
         # Offset kilometer post
@@ -630,15 +689,15 @@ def resolve_conflict_lines(fc_list, feature_loc_path, input_line_layers, ln_lyr_
         # Offset benchmark
         offset_benckmark(fc_list, road_query, bench_query, orient_fld, offset_dist_benc_l, offset_dist_benc_u, perpendicular_b, working_gdb)
         # Snap bridge
-        road = [fc for fc in fc_list if 'TA0060_Road_L' in fc][0]
+        road = fc_list.find('TA0060_Road_L')
         feature_layer_rd = arcpy.management.MakeFeatureLayer(road, "feature_layer_rd")
-        track = [fc for fc in fc_list if 'TA0110_Track_L' in fc][0]
+        track = fc_list.find('TA0110_Track_L')
         feature_layer_tr = arcpy.management.MakeFeatureLayer(track, "feature_layer_tr")
         arcpy.management.RepairGeometry(feature_layer_tr)
-        railway = [fc for fc in fc_list if 'TA0010_Rail_Line_L' in fc][0]
+        railway = fc_list.find('TA0010_Rail_Line_L')
         feature_layer_rail = arcpy.management.MakeFeatureLayer(railway, "feature_layer_rail")
         arcpy.management.RepairGeometry(feature_layer_rail)
-        bridge = [fc for fc in fc_list if 'TA0240_Bridge_P' in fc][0]
+        bridge = fc_list.find('TA0240_Bridge_P')
         feature_layer_rail_br = arcpy.management.MakeFeatureLayer(bridge, "feature_layer_rail_br", bridge_query[0])
         feature_layer_road_br = arcpy.management.MakeFeatureLayer(bridge, "feature_layer_road_br", bridge_query[1])
         # Snapping between railway bridge and railway lyr
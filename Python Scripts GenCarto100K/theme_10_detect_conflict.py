@@ -35,7 +35,7 @@ def detect_write_conflicts(in_feature_loc, inputFCs, query, compareFCs,
 
         # Set spatial reference from first input FC
         fc = inputFCs[0]
-        desc = arcpy.da.Describe(fc)
+        desc = describe(fc)
         sr = desc['spatialReference']
         arcpy.env.cartographicCoordinateSystem = sr
 
@@ -55,13 +55,13 @@ def detect_write_conflicts(in_feature_loc, inputFCs, query, compareFCs,
 
             for inlyr in inLayers:
                 compareTo = []
-                in_name = arcpy.da.Describe(inlyr)['name']
+                in_name = describe(inlyr)['name']
 
                 for conflict_lyr_ID in compareLayers:
                     compared = False
 
                     # Skip if already compared in opposite order (match original logic)
-                    compare_name = arcpy.da.Describe(conflict_lyr_ID)['name']
+                    compare_name = describe(conflict_lyr_ID)['name']
                     if compare_name in comparison:
                         vals = comparison[compare_name]
                         if in_name in vals:
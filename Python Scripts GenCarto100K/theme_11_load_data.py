@@ -9,14 +9,14 @@ def load_data_into_edb(in_workspace, aoi_sheet, out_workspace, version, working_
     arcpy.env.workspace = working_gdb
     arcpy.env.overwriteOutput = True
     try:
-        desc = arcpy.da.Describe(aoi_sheet)
+        desc = describe(aoi_sheet)
         aoi_name = desc['name']
         ident_field = "FID_" + aoi_name
 
         # Grab the AOI directly from the workspace
         aoi_lyr = arcpy.management.MakeFeatureLayer(aoi_sheet, "AOI_layer")
         
-        desc = arcpy.da.Describe(out_workspace)
+        desc = describe(out_workspace)
         wksp_type = desc['workspaceType']
         # Get required features and data
         fc_name_list, in_fcs_dict = get_fcs_load_data(in_workspace, wksp_type)
@@ -52,7 +52,7 @@ def load_data_into_edb(in_workspace, aoi_sheet, out_workspace, version, working_
             arcpy.management.SelectLayerByLocation(outlyr, "INTERSECT", aoi_lyr)
             count_out_lyr = int(arcpy.management.GetCount(outlyr)[0])
             # Get geo type
-            desc = arcpy.da.Describe(outfc)
+            desc = describe(outfc)
             geo_type = desc['shapeType']
 
             if count_out_lyr >= 1:
@@ -0,0 +1,396 @@
+# import required python modules
+import functools
+import importlib
+import inspect
+import logging
+import os
+import sys
+
+import common_utils
+from feature_catalog import FeatureCatalog
+
+# Themes in run order, filled by the register decorator below
+THEMES = []
+
+
+class ThemeError(Exception):
+    """ a theme logged an error. The theme functions catch their own exceptions
+    and log them, so this is how the failure reaches main and the pipeline """
+
+
+class ErrorCount(logging.Handler):
+    """ counts the error records logged while a theme runs """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+
+class Theme:
+    """ one theme of the tool: the function that runs it, the modules it needs,
+    which are only imported when the theme runs, and the snapshot stored after it.
+    The configuration keys the theme needs are the parameters of its function
+    after the run context """
+
+    def __init__(self, key, name, checkpoint, title, modules, func):
+        self.key = key
+        self.name = name
+        self.checkpoint = checkpoint
+        self.title = title
+        self.modules = tuple(modules)
+        self.func = func
+        self.params = tuple(list(inspect.signature(func).parameters)[1:])
+
+    def __repr__(self):
+        return f"Theme({self.name!r})"
+
+    def load(self, reload=False):
+        """ imports the modules of the theme and returns them. With reload=True the
+        modules are reloaded, common_utils first, so that edits made while ArcGIS
+        Pro is open are picked up """
+        if reload:
+            importlib.reload(common_utils)
+        modules = []
+        for name in self.modules:
+            if reload and name in sys.modules:
+                modules.append(importlib.reload(sys.modules[name]))
+            else:
+                modules.append(importlib.import_module(name))
+        return modules
+
+    def run(self, context, params):
+        """ runs the theme with the values of its configuration keys, then stores
+        its checkpoint snapshot. Raises ThemeError, and stores no snapshot, when
+        the theme logged an error """
+        logger = context.logger
+        logger.info(f'Starting {self.title} Theme.....')
+        # Describes and counts are cached only while the theme runs, the
+        # workspace may be restored or edited by hand between themes
+        common_utils.feature_catalog.start()
+        errors = ErrorCount()
+        logger.addHandler(errors)
+        try:
+            self.func(context, **{key: params[key] for key in self.params})
+        finally:
+            logger.removeHandler(errors)
+            common_utils.feature_catalog.stop()
+        if errors.count:
+            raise ThemeError(f'{self.title} Theme logged {errors.count} error(s), see the log file')
+        logger.info(f'{self.title} Theme ran successfully. Starting Backup.....')
+        # Backup features data
+        backup_path_edit = os.path.join(context.log_dir, "Backup", self.checkpoint, "Edit")
+        os.makedirs(backup_path_edit, exist_ok=True)
+        common_utils.snapshot_data(context.in_feature_loc, os.path.join(context.log_dir, "Backup"), self.checkpoint,
+                                   logger, background=True)
+
+
+class ThemeContext:
+    """ tool inputs and workspaces shared by every theme of a run """
+
+    def __init__(self, in_feature_loc, working_gdb, log_dir, dataset_name, logger, hierarchy_file=None,
+                 out_workspace=None, rev_workspace=None, excel_file=None, symbology_file_path=None, vst_workspace=None):
+        self.in_feature_loc = in_feature_loc
+        self.working_gdb = working_gdb
+        self.log_dir = log_dir
+        self.dataset_name = dataset_name
+        self.logger = logger
+        self.hierarchy_file = hierarchy_file
+        self.out_workspace = out_workspace
+        self.rev_workspace = rev_workspace
+        self.excel_file = excel_file
+        self.symbology_file_path = symbology_file_path
+        self.vst_workspace = vst_workspace
+
+    @functools.cached_property
+    def fc_list(self):
+        """ catalog of the feature classes of the input workspace, listed on first use """
+        return FeatureCatalog(sorted(common_utils.get_fcs(self.in_feature_loc, self.dataset_name, self.logger)))
+
+    @property
+    def aoi(self):
+        return f'{self.in_feature_loc}\\AOI'
+
+    @property
+    def carto_partition(self):
+        return f'{self.in_feature_loc}\\CartoPartitionA'
+
+
+def register(key, name, checkpoint, title, modules):
+    """ decorator that adds a theme function to the registry """
+    def decorator(func):
+        THEMES.append(Theme(key, name, checkpoint, title, modules, func))
+        return func
+    return decorator
+
+
+def get_theme(theme_type):
+    """ theme by tool value (e.g. '2-Transportation Generalization') or key (e.g. '2') """
+    theme_type = str(theme_type).strip()
+    for theme in THEMES:
+        if theme_type in (theme.name, theme.key):
+            return theme
+    raise ValueError(f"Unknown theme {theme_type}")
+
+
+def _open_map(map_name):
+    """ creates the map of a theme if needed and clears its contents """
+    import LayerGrouping as LG
+    map_name1 = common_utils.create_map_add_layers(map_name)
+    LG.clear_map_contents(map_name1)
+    return map_name1
+
+
+def _group_layers(context, map_name1, sheet_name):
+    """ layer grouping and reordering of a map from a sheet of the configuration file """
+    import LayerGrouping as LG
+    LG.layer_grouping(map_name1, context.excel_file, sheet_name, context.logger)
+    LG.reorder_group_layers(map_name1, context.excel_file, sheet_name, context.logger)
+
+
+# ----------------------------------------------------------------------
+# Themes
+# ----------------------------------------------------------------------
+@register("1", "1-Data Preparation", "01_AFTDP", "Data Preparation", ["theme_01_data_prep"])
+def data_preparation(context, buffer_distance, vertex_limit, buffer_distance_point, feature_count, not_include_fields,
+                     fcs_trim_extent_hyd, fcs_trim_extent_trans, extend_val, trim_val, buffer_points_25K, feature_to_split,
+                     bau_field_fc):
+    import theme_01_data_prep
+    fcs_trim_extend = fcs_trim_extent_hyd + fcs_trim_extent_trans
+    # Data cleaning
+    theme_01_data_prep.data_cleaning_all_funcs(context.aoi, context.fc_list, context.in_feature_loc, context.working_gdb,
+                                               buffer_distance, vertex_limit, buffer_distance_point, feature_count,
+                                               not_include_fields, fcs_trim_extend, extend_val, trim_val, buffer_points_25K,
+                                               feature_to_split, bau_field_fc, context.logger)
+    # Backup folders of the extent edits
+    for folder in ("Auto", "Edit"):
+        os.makedirs(os.path.join(context.log_dir, "Backup", "00_AFTExt", folder), exist_ok=True)
+
+
+@register("2", "2-Transportation Generalization", "02_AFTTrans", "Transportation", ["theme_02_transportation"])
+def transportation(context, hierarchy_field, collapse_sql, collapse_size, seg_length, group_sql_rd1, group_sql_rd2,
+                   minimum_length_min, minimum_length_max, visible_field, ref_scale, trans_generalized_operation,
+                   simple_tolerance, smooth_tolerance, trans_common_express, min_size, trans_delete_input,
+                   trans_create_one_point, trans_unique_field, group_sql_track, minimum_length, minimum_width,
+                   additional_criteria_trans, railway_sql, Merge_Field, merge_distance, trans_update_val,
+                   trans_changed_road_type, trans_build_up_buildings, topology_features):
+    import theme_02_transportation
+    # Get Generalize operation
+    generalize_operations = trans_generalized_operation.split(" ")
+    # Get changed road type
+    change_road_type = trans_changed_road_type.split(",")
+    theme_02_transportation.gen_transportation(context.fc_list, context.working_gdb, context.hierarchy_file, context.in_feature_loc,
+                                               hierarchy_field, collapse_sql, collapse_size, context.carto_partition, seg_length,
+                                               group_sql_rd1, group_sql_rd2, minimum_length_min, minimum_length_max, visible_field,
+                                               ref_scale, generalize_operations, simple_tolerance, smooth_tolerance,
+                                               trans_common_express, min_size, trans_delete_input, trans_create_one_point,
+                                               trans_unique_field, group_sql_track, minimum_length, minimum_width,
+                                               additional_criteria_trans, railway_sql, Merge_Field, merge_distance,
+                                               trans_update_val, change_road_type, trans_build_up_buildings, topology_features,
+                                               context.logger)
+
+
+@register("3", "3-Hydrography Generalization", "03_AFTHydro", "Hydrography",
+          ["DetermineTouching", "SplitByBox", "RemoveByConverting", "theme_03_hydrography"])
+def hydrography(context, hydro_prep_fc_list, name_fld, remove_short_line_line_length, hydro_input_polygon_fc,
+                hydro_center_line_fc, hydro_np_polygon_width, hydro_np_polygon_percentage, visible_field, hydro_replace_fc,
+                hydro_generalized_operation, hydro_simple_tolerance, hydro_smooth_tolerance, hydro_trim_update_val,
+                hydro_remove_small_poly_exp, hydro_remove_small_poly_mim_area, hydro_enlarge_poly_mim_size,
+                hydro_enlarge_poly_buffer_dist, hydro_remove_near_poly_list, hydro_remove_near_poly_delete_size,
+                hydro_remove_near_poly_min_size, hydro_remove_near_poly_dist, hydro_remove_near_poly_sql, hydro_enlarge_poly_sql,
+                hydro_enlarge_untouch_poly_buffer_dist, hydro_enlarge_poly_list, hydro_trim_between_polygon_min_area,
+                hydro_trim_between_polygon_distance, hydro_remove_small_poly_list, hydro_remove_small_sql,
+                hydro_remove_small_min_size, hydro_erase_poly_list, hydro_erase_poly_max_gap_area,
+                hydro_convert_ungr_river_min_length, increase_hydro_line_min_length, remove_close_parallel_per_min,
+                remove_close_parallel_per_max, remove_close_dist, remove_close_tolerance, hydro_line_dangle_min_length,
+                hydro_small_line_fc_list, hydro_small_point_fc_list, hydro_small_fc_min_length, hydro_delete_input,
+                hydro_create_one_point, hydro_unique_field):
+    import theme_03_hydrography
+    # Get Generalize operation
+    generalize_operations = hydro_generalized_operation.split(" ")
+    theme_03_hydrography.gen_hydrography(context.fc_list, hydro_prep_fc_list, name_fld, remove_short_line_line_length, context.working_gdb,
+                                         hydro_input_polygon_fc, hydro_center_line_fc, hydro_np_polygon_width,
+                                         hydro_np_polygon_percentage, visible_field, hydro_replace_fc, generalize_operations,
+                                         hydro_simple_tolerance, hydro_smooth_tolerance, hydro_trim_update_val, context.in_feature_loc,
+                                         hydro_remove_small_poly_exp, hydro_remove_small_poly_mim_area, hydro_enlarge_poly_mim_size,
+                                         hydro_enlarge_poly_buffer_dist, hydro_remove_near_poly_list, hydro_remove_near_poly_delete_size,
+                                         hydro_remove_near_poly_min_size, hydro_remove_near_poly_dist, hydro_remove_near_poly_sql,
+                                         hydro_enlarge_poly_sql, hydro_enlarge_untouch_poly_buffer_dist, hydro_enlarge_poly_list,
+                                         hydro_trim_between_polygon_min_area, hydro_trim_between_polygon_distance,
+                                         hydro_remove_small_poly_list, hydro_remove_small_sql, hydro_remove_small_min_size,
+                                         hydro_erase_poly_list, hydro_erase_poly_max_gap_area, hydro_convert_ungr_river_min_length,
+                                         increase_hydro_line_min_length, remove_close_parallel_per_min, remove_close_parallel_per_max,
+                                         remove_close_dist, remove_close_tolerance, hydro_line_dangle_min_length,
+                                         hydro_small_line_fc_list, hydro_small_point_fc_list, hydro_small_fc_min_length,
+                                         hydro_delete_input, hydro_create_one_point, hydro_unique_field, context.logger)
+
+
+@register("4", "4-Built-up Generalization", "04_AFTBuiltUp", "Built-up", ["theme_04_buildup"])
+def built_up(context, small_bldg_2_point_a, small_bldg_2_point_p, min_size_bldg1, sql_bldg, build_delete_input,
+             build_create_one_point, build_unique_field, min_size_bldg2, features_in_cemetery, enlarge_min_size, enlarge_val,
+             enlarge_barrier_features, delete_small_bldgs, del_min_area, enlarge_building_features, enlarge_bldg_min_width,
+             enlarge_bldg_min_length, additional_criteria, simpl_bldg_distance, delineate_building_layers,
+             delineate_edge_features, delineate_grp_dist, delineate_min_detail_size, delineate_min_bldg_count,
+             delineate_ref_scale, del_small_recreation_fc_min_size, delete_small_features, erase_sql,
+             simplification_tolerance):
+    import theme_04_buildup
+    theme_04_buildup.gen_buildup(context.fc_list, small_bldg_2_point_a, small_bldg_2_point_p, min_size_bldg1, sql_bldg,
+                                 build_delete_input, build_create_one_point, build_unique_field, context.working_gdb, min_size_bldg2,
+                                 features_in_cemetery, enlarge_min_size, enlarge_val, enlarge_barrier_features, delete_small_bldgs,
+                                 del_min_area, enlarge_building_features, enlarge_bldg_min_width, enlarge_bldg_min_length,
+                                 additional_criteria, simpl_bldg_distance, delineate_building_layers, delineate_edge_features,
+                                 delineate_grp_dist, delineate_min_detail_size, delineate_min_bldg_count, context.in_feature_loc,
+                                 delineate_ref_scale, del_small_recreation_fc_min_size, delete_small_features, erase_sql,
+                                 simplification_tolerance, context.logger)
+
+
+@register("5", "5-Utilities Generalization", "05_AFTUtil", "Utilities", ["theme_05_utility"])
+def utilities(context, utility_area_features, utility_point_features, utility_compare_features, utility_min_size_sewerage,
+              utility_min_size_building, utility_min_size, utility_beffer_dist, utility_dist, utility_dist_shorter,
+              utility_addi_criteria_sewerage, utility_addi_criteria, utility_merge_field, utility_unique_field,
+              utility_update_val, utility_delete_input, utility_create_one_point):
+    import theme_05_utility
+    theme_05_utility.gen_utility(context.fc_list, utility_area_features, utility_point_features, utility_compare_features,
+                                 utility_min_size_sewerage, utility_min_size_building, utility_min_size, utility_beffer_dist,
+                                 utility_dist, utility_dist_shorter, utility_addi_criteria_sewerage, utility_addi_criteria,
+                                 utility_merge_field, context.working_gdb, utility_unique_field, utility_update_val,
+                                 utility_delete_input, utility_create_one_point, context.logger)
+
+
+@register("6", "6-Hypsography Generalization", "06_AFTHypso", "Hypsography", ["theme_06_hypsography"])
+def hypsography(context, hypso_compare_features, hypso_dissolved_field, hypso_dist, hypso_parallel_per, hypso_min_length,
+                hypso_smoothing_tolerance, hypso_increase_factor, hypso_size_max, hypso_size_min):
+    import theme_06_hypsography
+    theme_06_hypsography.gen_hypsography(context.fc_list, hypso_compare_features, hypso_dissolved_field, hypso_dist,
+                                         hypso_parallel_per, hypso_min_length, hypso_smoothing_tolerance, hypso_increase_factor,
+                                         hypso_size_max, hypso_size_min, context.working_gdb, context.logger)
+
+
+@register("7", "7-Vegetation Generalization", "07_AFTVeg", "Vegetation", ["theme_07_vegetation"])
+def vegetation(context, vegetation_min_area, vegetation_eliminate_area, veg_lyrs_list, veg_field_values):
+    import theme_07_vegetation
+    theme_07_vegetation.gen_vegetation(context.fc_list, vegetation_min_area, vegetation_eliminate_area, veg_lyrs_list,
+                                       veg_field_values, context.working_gdb, context.logger)
+
+
+@register("8", "8-Apply Carto Symbology", "08_AFTAS", "Apply Carto Symbology",
+          ["LayerGrouping", "theme_08_apply_carto_symbology"])
+def apply_carto_symbology(context, map_name_apply_carto, attribution_fc_list, express_list, query_list, field_list,
+                          intersecting_fc_list, query_acs, visible_field, distance_acs, mx_no_close_fcs_l, mx_no_close_fcs_m,
+                          mx_no_close_fcs_u, feature_count_acs, specification, hierarchy_field, prep_line_resolve_fcs_list,
+                          apply_symbology_layers_list, thin_point_fcs, thin_point_queries, thin_point_fields,
+                          thin_point_orders, thin_point_spacings, ref_scale):
+    import theme_08_apply_carto_symbology
+    map_name1 = _open_map(map_name_apply_carto)
+    theme_08_apply_carto_symbology.apply_carto_symbology(context.fc_list, attribution_fc_list, express_list, query_list, field_list,
+                                                         intersecting_fc_list, context.working_gdb, query_acs, visible_field,
+                                                         distance_acs, mx_no_close_fcs_l, mx_no_close_fcs_m, mx_no_close_fcs_u,
+                                                         context.in_feature_loc, feature_count_acs, context.vst_workspace,
+                                                         specification, context.hierarchy_file, hierarchy_field,
+                                                         prep_line_resolve_fcs_list, context.carto_partition,
+                                                         context.symbology_file_path, map_name1, apply_symbology_layers_list,
+                                                         thin_point_fcs, thin_point_queries, thin_point_fields,
+                                                         thin_point_orders, thin_point_spacings, ref_scale, context.logger)
+    _group_layers(context, map_name1, "group_layer_mapping")
+
+
+@register("9a", "9a-Resolve Conflict for Lines", "09a_AFTRCL", "Resolve Conflict for Lines",
+          ["LayerGrouping", "offset_points", "theme_08_apply_carto_symbology", "theme_09a_resolve_conflict_lines"])
+def resolve_conflict_lines(context, map_name_resolve_lines, input_line_layers, ln_lyr_ex, ref_scale, hierarchy_field,
+                           res_con_line_delete, edge_features, river_ex, road_query_rlc, name_fld, distance_b, distance_s,
+                           min_area, additional_criteria, visible_field, distance_rcl, min_length,
+                           res_con_line_erase_input_fcs, embank_list, compare_fcs_embank, orient_fld, offset_dist_l,
+                           offset_dist_u, offset_dist_benc_l, offset_dist_benc_u, perpendicular_k, perpendicular_b,
+                           bench_query, bridge_query, footprint_fcs, resolve_line_compare, road_query,
+                           apply_symbology_layers_list):
+    import theme_08_apply_carto_symbology
+    import theme_09a_resolve_conflict_lines
+    map_name1 = _open_map(map_name_resolve_lines)
+    theme_09a_resolve_conflict_lines.resolve_conflict_lines(context.fc_list, context.in_feature_loc, input_line_layers, ln_lyr_ex,
+                                                            context.symbology_file_path, ref_scale, hierarchy_field,
+                                                            context.working_gdb, res_con_line_delete, context.carto_partition,
+                                                            edge_features, river_ex, road_query_rlc, name_fld, distance_b,
+                                                            distance_s, min_area, additional_criteria, visible_field,
+                                                            distance_rcl, min_length, res_con_line_erase_input_fcs, embank_list,
+                                                            compare_fcs_embank, orient_fld, offset_dist_l, offset_dist_u,
+                                                            offset_dist_benc_l, offset_dist_benc_u, perpendicular_k,
+                                                            perpendicular_b, bench_query, bridge_query, footprint_fcs,
+                                                            resolve_line_compare, road_query, context.log_dir, map_name1,
+                                                            context.logger)
+    # Apply symbology for all layers in the map
+    theme_08_apply_carto_symbology.calc_vst_on_workspace(context.fc_list, context.symbology_file_path,
+                                                         apply_symbology_layers_list, map_name1, context.in_feature_loc)
+    _group_layers(context, map_name1, "group_layer_mapping_9")
+
+
+@register("9b", "9b-Resolve Conflict for Buildings", "09b_AFTRCB", "Resolve Conflict for Buildings",
+          ["LayerGrouping", "theme_08_apply_carto_symbology", "theme_09b_resolve_conflict_buildings"])
+def resolve_conflict_buildings(context, map_name_resolve_polygons, build_up_area_fcs, express_val_mx, express_val_mn,
+                               hierarchy_field, search_distance, query, input_building_layers, input_barrier_layers,
+                               bb_lyr_ex, bb_lyr_ex_his, visible_field, ref_scale, minimum_size, bld_gap, ap_src_dis_mn,
+                               ap_src_dis_mx, orient_dir, g1_align_features, g4_align_features, g5_input_points,
+                               g5_align_features, g6_align_features, g7_input_points, g7_align_features, input_primary,
+                               input_secondary, in_prim_sql, max_gap_area, fill_option, apply_symbology_layers_list):
+    import theme_08_apply_carto_symbology
+    import theme_09b_resolve_conflict_buildings
+    map_name1 = _open_map(map_name_resolve_polygons)
+    theme_09b_resolve_conflict_buildings.resolve_conflict_buildings(context.fc_list, build_up_area_fcs, express_val_mx, express_val_mn,
+                                                                    hierarchy_field, search_distance, query, input_building_layers,
+                                                                    input_barrier_layers, bb_lyr_ex, bb_lyr_ex_his, hierarchy_field,
+                                                                    visible_field, context.symbology_file_path, ref_scale,
+                                                                    minimum_size, bld_gap, ap_src_dis_mn, ap_src_dis_mx, orient_dir,
+                                                                    g1_align_features, g4_align_features, g5_input_points,
+                                                                    g5_align_features, g6_align_features, g7_input_points,
+                                                                    g7_align_features, input_primary, input_secondary, in_prim_sql,
+                                                                    max_gap_area, fill_option, context.working_gdb, map_name1,
+                                                                    context.log_dir, context.logger)
+    # Apply symbology for all layers in the map
+    theme_08_apply_carto_symbology.calc_vst_on_workspace(context.fc_list, context.symbology_file_path,
+                                                         apply_symbology_layers_list, map_name1, context.in_feature_loc)
+    _group_layers(context, map_name1, "group_layer_mapping_9")
+
+
+@register("10", "10-Detect Conflict", "10_AFTDC", "Detect Conflict",
+          ["LayerGrouping", "theme_08_apply_carto_symbology", "theme_10_detect_conflict"])
+def detect_conflict(context, map_name_detect, Structure2Structure, Structure2Lines, Lines2Lines, G1_Poly2Poly, G2_Poly2Poly,
+                    G3_Poly2Poly, dc_express, dc_distance, dc_reviewer_session, dc_severity, dc_ref_scale,
+                    apply_symbology_layers_list):
+    import theme_08_apply_carto_symbology
+    import theme_10_detect_conflict
+    fc_list = context.fc_list
+    map_name1 = _open_map(map_name_detect)
+
+    def matching(names):
+        names = list(filter(str.strip, names))
+        return fc_list.find_all(names)
+
+    def detect(input_fcs, near_fcs):
+        theme_10_detect_conflict.detect_write_conflicts(context.in_feature_loc, input_fcs, dc_express, near_fcs, dc_distance,
+                                                        context.rev_workspace, dc_reviewer_session, dc_severity, dc_ref_scale,
+                                                        context.carto_partition, map_name1, context.symbology_file_path,
+                                                        context.logger)
+
+    Structure2Structure = matching(Structure2Structure)
+    # Structure to Structure
+    detect(Structure2Structure, Structure2Structure)
+    # Structure to Lines
+    detect(Structure2Structure, matching(Structure2Lines))
+    # Lines to Lines, then polygon to polygon G1, G2 and G3
+    for group in (Lines2Lines, G1_Poly2Poly, G2_Poly2Poly, G3_Poly2Poly):
+        group = matching(group)
+        detect(group, group)
+
+    # Apply symbology for all layers in the map
+    theme_08_apply_carto_symbology.calc_vst_on_workspace(fc_list, context.symbology_file_path, apply_symbology_layers_list,
+                                                         map_name1, context.in_feature_loc)
+    _group_layers(context, map_name1, "group_layer_mapping_10")
+
+
+@register("11", "11-Load Data into CARTO100K", "11_Final", "Load Data into CARTO100K", ["theme_11_load_data"])
+def load_data(context, versions):
+    import theme_11_load_data
+    # Load data into gdb or ent db
+    theme_11_load_data.load_data_into_edb(context.in_feature_loc, context.aoi, context.out_workspace, versions,
+                                          context.working_gdb, context.logger)
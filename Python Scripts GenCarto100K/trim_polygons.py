@@ -0,0 +1,86 @@
+# import required python modules
+import numpy as np
+
+import geometry_backend
+from spatial_index import SpatialIndex, linear_distance
+
+
+def unique_pairs(in_ids, near_ids):
+    """ drops self pairs and the reverse of a pair that is already listed.
+    The pair with the lower IN_FID is kept, as when looping over the near table """
+    in_ids = np.asarray(in_ids, dtype=np.int64)
+    near_ids = np.asarray(near_ids, dtype=np.int64)
+    keep = in_ids != near_ids
+    in_ids, near_ids = in_ids[keep], near_ids[keep]
+    if not len(in_ids):
+        return in_ids, near_ids
+    size = int(max(in_ids.max(), near_ids.max())) + 1
+    reverse = np.isin(near_ids * size + in_ids, in_ids * size + near_ids)
+    keep = ~(reverse & (in_ids > near_ids))
+    return in_ids[keep], near_ids[keep]
+
+
+def trim_erase_areas(in_geoms, near_geoms, in_ids, near_ids, distance, near_is_polygon=True, same_dataset=True,
+                     backend=None):
+    """ For every near pair the intersection of the two buffers is erased from the
+    larger of the two polygons, so that it is no longer within distance of the other.
+
+    in_geoms and near_geoms are {oid: geometry}. Every feature is buffered once.
+    Returns {oid: erase geometry} for the features of in_geoms that need trimming,
+    with the erase areas of all the pairs of a feature unioned together """
+    backend = backend or geometry_backend.get_backend()
+    distance = linear_distance(distance)
+    if same_dataset:
+        in_ids, near_ids = unique_pairs(in_ids, near_ids)
+
+    in_buffers = {}
+    near_buffers = in_buffers if same_dataset else {}
+    erase_parts = {}
+    for in_id, near_id in zip(np.asarray(in_ids).tolist(), np.asarray(near_ids).tolist()):
+        in_geo = in_geoms[in_id]
+        near_geo = near_geoms[near_id]
+        in_area = backend.area(in_geo)
+        near_area = backend.area(near_geo) if near_is_polygon else 0
+
+        # Larger polygon loses, most of the time it is the one that was enlarged
+        # to meet the minimum size and would fall under it if it was trimmed
+        if in_area > near_area:
+            update_id = in_id
+        elif same_dataset and near_id in in_geoms:
+            update_id = near_id
+        else:
+            # Compare features are not edited
+            continue
+
+        if in_id not in in_buffers:
+            in_buffers[in_id] = backend.buffer(in_geo, distance)
+        if near_id not in near_buffers:
+            near_buffers[near_id] = backend.buffer(near_geo, distance)
+        intrsct = backend.intersection(in_buffers[in_id], near_buffers[near_id])
+        if intrsct is not None and backend.area(intrsct) > 0:
+            erase_parts.setdefault(update_id, []).append(intrsct)
+
+    return {oid: parts[0] if len(parts) == 1 else backend.union_all(parts) for oid, parts in erase_parts.items()}
+
+
+def apply_trim(geo, erase_geo, min_area, backend=None):
+    """ erases erase_geo from geo. Returns the trimmed geometry, or None if
+    nothing is left, and whether it still meets the minimum area """
+    backend = backend or geometry_backend.get_backend()
+    new_geo = backend.difference(geo, erase_geo)
+    if new_geo is None or backend.area(new_geo) <= 0:
+        return None, False
+    return new_geo, backend.area(new_geo) >= min_area
+
+
+def trim_task(ids, geometries, near_ids, near_geometries, distance, near_is_polygon=True, same_dataset=True):
+    """ partition task for partition_executor.run_partitioned: the erase areas of
+    one partition as {oid: WKB}, computed with the shapely backend """
+    backend = geometry_backend.get_backend("shapely")
+    index = SpatialIndex(near_geometries, near_ids)
+    in_idx, near_idx, _ = index.within_distance(geometries, distance)
+    in_geoms = dict(zip(np.asarray(ids).tolist(), geometries))
+    near_geoms = dict(zip(np.asarray(near_ids).tolist(), near_geometries))
+    erase_geoms = trim_erase_areas(in_geoms, near_geoms, np.asarray(ids)[in_idx], index.to_ids(near_idx), distance,
+                                   near_is_polygon, same_dataset, backend)
+    return {oid: backend.to_wkb(geo) for oid, geo in erase_geoms.items()}
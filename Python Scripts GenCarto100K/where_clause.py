@@ -0,0 +1,375 @@
+# import required python modules
+import functools
+import re
+
+import numpy as np
+
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+# Tokens of the where clauses used in the rule files and the workbook
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<number>-?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_.]*|"[^"]+")
+      | (?P<op><>|!=|<=|>=|=|<|>)
+      | (?P<punct>[(),])
+    )""", re.VERBOSE)
+KEYWORDS = ("AND", "OR", "NOT", "IS", "NULL", "IN", "LIKE", "BETWEEN")
+# Fields a clause can read that are not attribute columns: the oid and the shape measures
+OID_FIELDS = ("OBJECTID", "OID", "FID")
+AREA_FIELDS = ("SHAPE_AREA", "SHAPE.AREA", "SHAPE__AREA")
+LENGTH_FIELDS = ("SHAPE_LENGTH", "SHAPE.LEN", "SHAPE__LENGTH")
+# Compiled clauses kept by compile_where
+CACHE_SIZE = 1024
+# Values per IN list of an oid clause; Oracle refuses longer IN lists
+OID_IN_SIZE = 1000
+# Consecutive oids from this many on are written as one BETWEEN range
+OID_RUN_LENGTH = 3
+# Oids per clause when a selection is split over several clauses
+OID_CLAUSE_SIZE = 20000
+COMPARISONS = {
+    "=": np.equal,
+    "<>": np.not_equal,
+    "!=": np.not_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+}
+
+
+def tokenize(text):
+    """ (kind, value) tokens of a where clause; keywords are upper case """
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN_PATTERN.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Cannot parse where clause {text!r} at {text[pos:]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = value[1:-1].replace("''", "'")
+        elif kind == "number":
+            value = float(value) if any(char in value for char in ".eE") else int(value)
+        elif kind == "name":
+            if value.startswith('"'):
+                value = value[1:-1]
+            elif value.upper() in KEYWORDS:
+                kind, value = "keyword", value.upper()
+        tokens.append((kind, value))
+    return tokens
+
+
+def column_nulls(column):
+    """ rows of a column that are NULL: None in object columns, NaN in float columns """
+    if column.dtype == object:
+        return np.equal(column, None)
+    if column.dtype.kind == "f":
+        return np.isnan(column)
+    return np.zeros(len(column), dtype=bool)
+
+
+def like_pattern(pattern):
+    """ regular expression of a LIKE pattern (% any characters, _ one character) """
+    return re.compile("".join(".*" if char == "%" else "." if char == "_" else re.escape(char) for char in pattern),
+                      re.DOTALL)
+
+
+class WhereClause:
+    """ a where clause compiled to a tree of NumPy operations over attribute
+    columns, so that a predicate is evaluated for every row of a table at once
+    instead of by a selection on the feature class.
+
+    Supported: comparisons (=, <>, !=, <, <=, >, >=), IS [NOT] NULL,
+    [NOT] IN (...), [NOT] LIKE, [NOT] BETWEEN ... AND ..., AND, OR, NOT and
+    parentheses. NULLs follow SQL three valued logic: a comparison with a NULL
+    is unknown, and unknown rows are not selected, also not under NOT. An empty
+    clause selects every row. Field names are not case sensitive """
+
+    def __init__(self, text):
+        self.text = (text or "").strip()
+        self.fields = set()
+        self.tokens = tokenize(self.text)
+        self.pos = 0
+        self.tree = self._or() if self.tokens else None
+        if self.pos < len(self.tokens):
+            raise ValueError(f"Unexpected {self.tokens[self.pos][1]!r} in where clause {self.text!r}")
+        del self.tokens
+
+    def __repr__(self):
+        return f"WhereClause({self.text!r})"
+
+    # ------------------------------------------------------------------
+    # Parser
+    # ------------------------------------------------------------------
+    def _peek(self, kind=None, value=None):
+        if self.pos >= len(self.tokens):
+            return False
+        token_kind, token_value = self.tokens[self.pos]
+        return (kind is None or token_kind == kind) and (value is None or token_value == value)
+
+    def _take(self, kind=None, value=None):
+        if not self._peek(kind, value):
+            found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end of clause"
+            raise ValueError(f"Expected {value or kind} but found {found!r} in where clause {self.text!r}")
+        self.pos += 1
+        return self.tokens[self.pos - 1][1]
+
+    def _or(self):
+        node = self._and()
+        while self._peek("keyword", "OR"):
+            self._take()
+            node = ("or", node, self._and())
+        return node
+
+    def _and(self):
+        node = self._not()
+        while self._peek("keyword", "AND"):
+            self._take()
+            node = ("and", node, self._not())
+        return node
+
+    def _not(self):
+        if self._peek("keyword", "NOT"):
+            self._take()
+            return ("not", self._not())
+        return self._predicate()
+
+    def _predicate(self):
+        if self._peek("punct", "("):
+            self._take()
+            node = self._or()
+            self._take("punct", ")")
+            return node
+        left = self._operand()
+        if self._peek("keyword", "IS"):
+            self._take()
+            negate = self._peek("keyword", "NOT")
+            if negate:
+                self._take()
+            self._take("keyword", "NULL")
+            node = ("null", left)
+            return ("not", node) if negate else node
+        negate = self._peek("keyword", "NOT")
+        if negate:
+            self._take()
+        if self._peek("keyword", "IN"):
+            self._take()
+            self._take("punct", "(")
+            values = [self._literal()]
+            while self._peek("punct", ","):
+                self._take()
+                values.append(self._literal())
+            self._take("punct", ")")
+            node = ("in", left, values)
+        elif self._peek("keyword", "LIKE"):
+            self._take()
+            node = ("like", left, like_pattern(str(self._literal())))
+        elif self._peek("keyword", "BETWEEN"):
+            self._take()
+            low = self._operand()
+            self._take("keyword", "AND")
+            node = ("and", ("cmp", ">=", left, low), ("cmp", "<=", left, self._operand()))
+        elif negate:
+            raise ValueError(f"NOT must be followed by IN, LIKE or BETWEEN in where clause {self.text!r}")
+        else:
+            node = ("cmp", self._take("op"), left, self._operand())
+        return ("not", node) if negate else node
+
+    def _operand(self):
+        if self._peek("name"):
+            name = self._take()
+            self.fields.add(name)
+            return ("field", name)
+        return ("value", self._literal())
+
+    def _literal(self):
+        if self._peek("string") or self._peek("number"):
+            return self._take()
+        found = self.tokens[self.pos][1] if self.pos < len(self.tokens) else "end of clause"
+        raise ValueError(f"Expected a value but found {found!r} in where clause {self.text!r}")
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+    def mask(self, columns, count=None):
+        """ boolean mask of the rows selected by the clause. columns is a dict of
+        field name -> values (NumPy array or list) covering the fields of the clause """
+        if count is None:
+            count = len(next(iter(columns.values()))) if columns else 0
+        if self.tree is None:
+            return np.ones(count, dtype=bool)
+        lookup = {field.upper(): field for field in columns}
+        missing = [field for field in self.fields if field.upper() not in lookup]
+        if missing:
+            raise KeyError(f"Where clause {self.text!r} needs the fields {', '.join(sorted(missing))}")
+        arrays = {}
+        for field in self.fields:
+            column = columns[lookup[field.upper()]]
+            if not isinstance(column, np.ndarray):
+                values = list(column)
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            arrays[field] = column
+        selected, _ = self._eval(self.tree, arrays, count)
+        return selected
+
+    def _eval(self, node, arrays, count):
+        """ (true, false) masks of a node; rows in neither are unknown """
+        kind = node[0]
+        if kind == "and":
+            left_true, left_false = self._eval(node[1], arrays, count)
+            right_true, right_false = self._eval(node[2], arrays, count)
+            return left_true & right_true, left_false | right_false
+        if kind == "or":
+            left_true, left_false = self._eval(node[1], arrays, count)
+            right_true, right_false = self._eval(node[2], arrays, count)
+            return left_true | right_true, left_false & right_false
+        if kind == "not":
+            true, false = self._eval(node[1], arrays, count)
+            return false, true
+        if kind == "null":
+            values, nulls = self._operand_values(node[1], arrays, count)
+            return nulls, ~nulls
+
+        values, nulls = self._operand_values(node[2] if kind == "cmp" else node[1], arrays, count)
+        known = ~nulls
+        result = np.zeros(count, dtype=bool)
+        if kind == "cmp":
+            other, other_nulls = self._operand_values(node[3], arrays, count)
+            known &= ~other_nulls
+            rows = np.flatnonzero(known)
+            if len(rows):
+                left, right = _comparable(values[rows], other[rows])
+                result[rows] = COMPARISONS[node[1]](left, right)
+        elif kind == "in":
+            rows = np.flatnonzero(known)
+            choices = set(node[2])
+            result[rows] = [value in choices for value in values[rows].tolist()]
+        elif kind == "like":
+            rows = np.flatnonzero(known)
+            result[rows] = [node[2].fullmatch(str(value)) is not None for value in values[rows].tolist()]
+        return result, known & ~result
+
+    @staticmethod
+    def _operand_values(operand, arrays, count):
+        if operand[0] == "field":
+            column = arrays[operand[1]]
+            return column, column_nulls(column)
+        values = np.empty(count, dtype=object)
+        values[:] = [operand[1]] * count
+        return values, np.zeros(count, dtype=bool)
+
+
+def _comparable(left, right):
+    """ non-null values of two operands in types NumPy can compare; when one
+    side is numeric both are compared as numbers """
+    if _is_numeric(left) or _is_numeric(right):
+        try:
+            return left.astype(np.float64), right.astype(np.float64)
+        except (TypeError, ValueError):
+            pass
+    return left, right
+
+
+def _is_numeric(values):
+    if values.dtype.kind in "biuf":
+        return True
+    return isinstance(values[0], (int, float, np.number)) and not isinstance(values[0], bool)
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _compile(text):
+    return WhereClause(text)
+
+
+def compile_where(text):
+    """ compiled where clause, cached by its text so that a clause used for every
+    feature class or every partition is only parsed once. Accepts a compiled clause """
+    if isinstance(text, WhereClause):
+        return text
+    return _compile((text or "").strip())
+
+
+def clear_cache():
+    _compile.cache_clear()
+
+
+def needs_geometry(clause):
+    """ whether a clause reads a shape measure, which is computed from the geometries """
+    return any(field.upper() in AREA_FIELDS + LENGTH_FIELDS for field in compile_where(clause).fields)
+
+
+def feature_columns(clause, oids, attributes, geometries=None):
+    """ columns of the fields a clause reads: the attribute columns, plus the oid
+    and the shape area and length computed from the geometries when the clause
+    reads them and the attributes do not hold them """
+    clause = compile_where(clause)
+    lookup = {field.upper(): field for field in attributes}
+    columns = {}
+    for field in clause.fields:
+        name = field.upper()
+        if name in lookup:
+            columns[field] = attributes[lookup[name]]
+        elif name in OID_FIELDS:
+            columns[field] = np.asarray(oids, dtype=np.int64)
+        elif name in AREA_FIELDS + LENGTH_FIELDS:
+            if geometries is None:
+                raise KeyError(f"Where clause {clause.text!r} needs the geometries for {field}")
+            columns[field] = _measure(geometries, "area" if name in AREA_FIELDS else "length")
+    return columns
+
+
+def select(clause, oids, attributes, geometries=None):
+    """ mask of the features selected by a where clause (text or compiled). attributes
+    is a dict of field -> values in the order of oids """
+    clause = compile_where(clause)
+    return clause.mask(feature_columns(clause, oids, attributes, geometries), len(oids))
+
+
+def _measure(geometries, measure):
+    """ area or length of every geometry; NaN for missing geometries """
+    if shapely is not None:
+        try:
+            return getattr(shapely, measure)(np.asarray(geometries, dtype=object))
+        except TypeError:
+            pass
+    return np.array([np.nan if geo is None else getattr(geo, measure) for geo in geometries], dtype=np.float64)
+
+
+def oid_clause(field, oids):
+    """ where clause selecting the features whose field (the oid field, or another
+    field of integer ids such as ORIG_FID) is one of oids. Far shorter to parse than
+    'OBJECTID = a OR OBJECTID = b ...': runs of consecutive ids become BETWEEN
+    ranges and the other ids IN lists of at most OID_IN_SIZE values. No oids gives
+    1 = 0, which selects nothing whatever field is used """
+    oids = np.unique(np.fromiter((int(oid) for oid in oids), dtype=np.int64))
+    if not len(oids):
+        return "1 = 0"
+    breaks = np.flatnonzero(np.diff(oids) != 1) + 1
+    terms = []
+    singles = []
+    for start, end in zip([0] + breaks.tolist(), breaks.tolist() + [len(oids)]):
+        if end - start >= OID_RUN_LENGTH:
+            terms.append(f"{field} BETWEEN {oids[start]} AND {oids[end - 1]}")
+        else:
+            singles.extend(oids[start:end].tolist())
+    for cnt in range(0, len(singles), OID_IN_SIZE):
+        chunk = singles[cnt:cnt + OID_IN_SIZE]
+        terms.append(f"{field} = {chunk[0]}" if len(chunk) == 1 else f"{field} IN ({', '.join(map(str, chunk))})")
+    return " OR ".join(terms)
+
+
+def oid_clauses(field, oids, size=OID_CLAUSE_SIZE):
+    """ oid_clause of every chunk of size oids, for selections that should not be
+    one clause for a whole sheet. Always yields at least one clause """
+    oids = np.unique(np.fromiter((int(oid) for oid in oids), dtype=np.int64))
+    for cnt in range(0, max(len(oids), 1), size):
+        yield oid_clause(field, oids[cnt:cnt + size])